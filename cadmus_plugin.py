@@ -9,6 +9,8 @@ from .core.config.ToolRegistry import ToolRegistry
 from .core.config.MenuManager import MenuManager
 from .core.config.PyQtSignalManager import PyQtSignalManager
 from .core.services.MrkDropHandler import MrkDropHandler
+from .core.engine_tasks.ProcessPoolBackend import ProcessPoolBackend
+from .utils.mrk.CustomPhotosFieldsIncremental import CustomPhotosFieldsIncremental
 
 
 class CadmusPlugin:
@@ -113,4 +115,14 @@ class CadmusPlugin:
         except Exception as e:
             self.logger.error(f"Erro ao descarregar MenuManager: {str(e)}")
 
+        try:
+            ProcessPoolBackend.shutdown_shared()
+        except Exception as e:
+            self.logger.error(f"Erro ao encerrar pool de processos: {str(e)}")
+
+        try:
+            CustomPhotosFieldsIncremental.release_all()
+        except Exception as e:
+            self.logger.error(f"Erro ao liberar estados de campos custom: {str(e)}")
+
         self.logger.info("Plugin Cadmus descarregado")
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
-from typing import List
-
-from qgis.core import QgsApplication
+from typing import Dict, List, Optional, Set
 
 from .ExecutionContext import ExecutionContext
 from .BaseStep import BaseStep
+from .CompletionEvent import CompletionEvent
+from .CheckpointStore import CheckpointStore
+from .PipelineProfiler import PipelineProfiler
+from .StreamChannel import StreamChannel
+from .TaskExecutor import TaskExecutor
 from ..config.LogUtils import LogUtils
 from qgis.core import QgsTask
 
@@ -12,8 +15,26 @@ from qgis.core import QgsTask
 class AsyncPipelineEngine:
     """
     Orquestrador genérico de Steps e QgsTasks.
+
+    Modos de execução:
+    - MODE_SEQUENTIAL (padrão): um step por vez, na ordem da lista.
+    - MODE_GRAPH: usa `BaseStep.reads()`/`writes()` para montar o grafo de
+      dependências e agenda ao mesmo tempo todos os steps cujas entradas já
+      estão prontas. Steps sem declaração (None) funcionam como barreira.
+
+    As tasks vão para o `executor` (padrão: gerenciador de tarefas do QGIS;
+    `ThreadPoolTaskExecutor` para rodar sem GUI).
+
+    Após cada step o engine registra o tamanho do `ExecutionContext` e, com
+    `spill_intermediates`, grava em disco (num worker, `spill_async`) os
+    slots `spillable` que nenhum step restante lê (`reads()`) nem os
+    callbacks leem (`result_keys`). Com callbacks e `result_keys=None` o
+    engine não sabe o que eles leem e não grava nada.
     """
 
+    MODE_SEQUENTIAL = "sequential"
+    MODE_GRAPH = "graph"
+
     logger = LogUtils(
         tool="AsyncPipelineEngine",
         class_name="AsyncPipelineEngine",
@@ -28,7 +49,17 @@ class AsyncPipelineEngine:
         on_finished=None,
         on_error=None,
         on_cancelled=None,
+        mode: str = MODE_SEQUENTIAL,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        profiler: Optional[PipelineProfiler] = None,
+        stream_capacity: int = StreamChannel.DEFAULT_CAPACITY,
+        executor: Optional[TaskExecutor] = None,
+        spill_intermediates: bool = True,
+        result_keys: Optional[List[str]] = None,
     ):
+        if mode not in (self.MODE_SEQUENTIAL, self.MODE_GRAPH):
+            raise ValueError(f"Invalid pipeline mode: {mode}")
+
         self._pipeline_task = None
         self._steps = steps
         self._context = context
@@ -42,6 +73,29 @@ class AsyncPipelineEngine:
         self._is_running = False
         self._is_cancelled = False
 
+        self._mode = mode
+        self._dependencies: List[Set[int]] = []
+        self._pending: Set[int] = set()
+        self._running: Dict[int, QgsTask] = {}
+        self._done: Set[int] = set()
+        self._step_progress: Dict[int, float] = {}
+
+        self._checkpoint_store = checkpoint_store
+        self._fingerprints: Dict[int, str] = {}
+        self._resume_checkpoints = False
+
+        self._profiler = profiler or PipelineProfiler(
+            context.get("tool_key") or "AsyncPipelineEngine"
+        )
+
+        self._stream_capacity = stream_capacity
+        self._streams: Dict[str, StreamChannel] = {}
+        self._stream_dependencies: List[Set[int]] = []
+
+        self._executor = executor or TaskExecutor.default()
+        self._spill_intermediates = spill_intermediates
+        self._result_keys = self._keys(result_keys)
+
     # -------------------------------------------------
     # Public API
     # -------------------------------------------------
@@ -50,13 +104,25 @@ class AsyncPipelineEngine:
         if self._is_running:
             raise RuntimeError("Pipeline already running.")
 
+        self._open_streams()
         self._is_running = True
         self._is_cancelled = False
         self._current_index = 0
-
+        self._done = set()
+        self._fingerprints = {}
+        # Checkpoints só valem para retomar execução que falhou/foi cancelada
+        self._resume_checkpoints = (
+            self._checkpoint_store.begin_run() if self._checkpoint_store else False
+        )
+
+        self._profiler.start()
         self._pipeline_task = PipelineTask("Processando trilha")
-        QgsApplication.taskManager().addTask(self._pipeline_task)
-        self._run_next_step()
+        self._executor.submit(self._pipeline_task)
+
+        if self._mode == self.MODE_GRAPH:
+            self._start_graph()
+        else:
+            self._run_next_step()
 
     def _set_global_progress(self, step_progress: float):
         total_steps = len(self._steps)
@@ -73,9 +139,9 @@ class AsyncPipelineEngine:
         self._is_cancelled = True
         self._context.cancel()
 
-        if self._current_task:
+        for task in self._active_tasks():
             try:
-                self._current_task.cancel()
+                task.cancel()
             except RuntimeError as e:
                 self.logger.error(f"Failed to cancel current task: {e}")
 
@@ -87,6 +153,20 @@ class AsyncPipelineEngine:
     def is_running(self) -> bool:
         return self._is_running
 
+    @property
+    def profiler(self) -> PipelineProfiler:
+        return self._profiler
+
+    @property
+    def executor(self) -> TaskExecutor:
+        return self._executor
+
+    def _active_tasks(self) -> List[QgsTask]:
+        tasks = list(self._running.values())
+        if self._current_task and self._current_task not in tasks:
+            tasks.append(self._current_task)
+        return tasks
+
     def _run_next_step(self) -> None:
 
         if self._is_cancelled or self._context.is_cancelled():
@@ -99,7 +179,9 @@ class AsyncPipelineEngine:
 
         step = self._steps[self._current_index]
 
-        if not step.should_run(self._context):
+        if self._skip_step(self._current_index, step):
+            self._close_streams(self._current_index)
+            self._after_step(self._current_index)
             self._current_index += 1
             self._run_next_step()
             return
@@ -115,11 +197,36 @@ class AsyncPipelineEngine:
         task.on_error = self._handle_task_error
         task.progressChanged.connect(self._set_global_progress)
 
-        QgsApplication.taskManager().addTask(task)
+        self._enqueue(task, step)
+
+    def _skip_step(self, index: int, step: BaseStep) -> bool:
+        """True se o step não precisa de task (should_run falso ou checkpoint)."""
+        if not step.should_run(self._context):
+            self._profiler.step_skipped(step.name(), "skipped")
+            # Sem consumidor o produtor não pode ficar preso no backpressure
+            for name in step.stream_inputs():
+                if name in self._streams:
+                    self._streams[name].make_unbounded()
+            return True
+        if self._restore_checkpoint(index, step):
+            self._profiler.step_skipped(step.name(), "checkpoint")
+            return True
+        return False
+
+    def _enqueue(self, task: QgsTask, step: BaseStep) -> None:
+        self._profiler.task_queued(task, step.name())
+        if hasattr(task, "profiler"):
+            # Tasks compostas (ParallelStep) perfilam suas subtasks
+            task.profiler = self._profiler
+        if hasattr(task, "executor"):
+            # ... e agendam as subtasks no mesmo executor
+            task.executor = self._executor
+        self._executor.submit(task)
 
     def _handle_task_success(self, result):
 
         step = self._steps[self._current_index]
+        self._profiler.task_finished(self._current_task, "success")
 
         try:
             step.on_success(self._context, result)
@@ -127,10 +234,17 @@ class AsyncPipelineEngine:
             self._handle_task_error(exc)
             return
 
+        self._save_checkpoint(self._current_index, step, result)
+        self._close_streams(self._current_index)
+        self._after_step(self._current_index)
         self._current_index += 1
         self._run_next_step()
 
     def _handle_task_error(self, exception: Exception):
+        if self._current_task is not None:
+            self._profiler.task_finished(self._current_task, "error")
+        if self._current_index < len(self._steps):
+            self._close_streams(self._current_index, exception)
         try:
             step = self._steps[self._current_index]
 
@@ -141,13 +255,370 @@ class AsyncPipelineEngine:
         self._context.add_error(exception)
         self._finish_error()
 
+    # -------------------------------------------------
+    # Streams
+    # -------------------------------------------------
+
+    def _open_streams(self) -> None:
+        """Cria no contexto os `StreamChannel` declarados pelos steps."""
+        self._streams = {}
+        self._stream_dependencies = []
+        producers: Dict[str, int] = {}
+
+        # Em modo sequencial o consumidor só roda depois do produtor:
+        # buffer limitado travaria o produtor, então o canal fica ilimitado.
+        capacity = self._stream_capacity if self._mode == self.MODE_GRAPH else 0
+
+        for index, step in enumerate(self._steps):
+            deps: Set[int] = set()
+            for name in step.stream_inputs():
+                if name not in producers:
+                    raise ValueError(
+                        f"Step '{step.name()}' consome stream '{name}' sem produtor anterior"
+                    )
+                deps.add(producers[name])
+            self._stream_dependencies.append(deps)
+
+            for name in step.stream_outputs():
+                channel = StreamChannel(name, capacity)
+                self._streams[name] = channel
+                producers[name] = index
+                self._context.set(name, channel)
+
+        if self._streams and self._mode != self.MODE_GRAPH:
+            self.logger.warning(
+                "Streams em modo sequencial: sem sobreposição nem backpressure",
+                code="PIPELINE_STREAM_SEQUENTIAL",
+                streams=list(self._streams),
+            )
+
+    def _close_streams(self, index: int, exception: Exception = None) -> None:
+        """Fecha (ou marca falha) dos canais produzidos pelo step `index`."""
+        for name in self._steps[index].stream_outputs():
+            channel = self._streams.get(name)
+            if channel is None:
+                continue
+            if exception is not None:
+                channel.fail(exception)
+            else:
+                channel.close()
+            self.logger.debug(
+                "Stream encerrado",
+                code="PIPELINE_STREAM_CLOSED",
+                **channel.stats(),
+            )
+
+    def _shutdown_streams(self, cancel: bool) -> None:
+        for channel in self._streams.values():
+            if cancel:
+                channel.cancel()
+            else:
+                channel.close()
+
+    # -------------------------------------------------
+    # Checkpoints
+    # -------------------------------------------------
+
+    def _restore_checkpoint(self, index: int, step: BaseStep) -> bool:
+        """Retorna True se o step foi restaurado de checkpoint (pula a task)."""
+        if self._checkpoint_store is None:
+            return False
+
+        try:
+            key = step.checkpoint_key(self._context)
+        except Exception as e:
+            self.logger.warning(f"checkpoint_key failed for {step.name()}: {e}")
+            return False
+        if key is None:
+            return False
+
+        fingerprint = CheckpointStore.fingerprint(step.name(), key)
+        self._fingerprints[index] = fingerprint
+        if not self._resume_checkpoints:
+            return False
+
+        hit, payload = self._checkpoint_store.load(step.name(), fingerprint)
+        if not hit:
+            return False
+
+        if not step.checkpoint_valid(self._context, payload):
+            self.logger.debug(
+                f"Checkpoint de {step.name()} obsoleto, executando step",
+                code="PIPELINE_CHECKPOINT_MISS",
+                fingerprint=fingerprint,
+            )
+            return False
+
+        try:
+            step.restore_checkpoint(self._context, payload)
+        except Exception as e:
+            self.logger.warning(
+                f"Checkpoint de {step.name()} inválido, executando step: {e}"
+            )
+            return False
+
+        self.logger.info(
+            f"Step {step.name()} restaurado de checkpoint",
+            code="PIPELINE_CHECKPOINT_HIT",
+            fingerprint=fingerprint,
+        )
+        return True
+
+    def _save_checkpoint(self, index: int, step: BaseStep, result) -> None:
+        fingerprint = self._fingerprints.pop(index, None)
+        if self._checkpoint_store is None or not fingerprint:
+            return
+
+        try:
+            payload = step.serialize_checkpoint(self._context, result)
+        except Exception as e:
+            self.logger.warning(f"serialize_checkpoint failed for {step.name()}: {e}")
+            return
+
+        # Pickle e escrita rodam no worker do CheckpointStore, fora da GUI
+        future = self._checkpoint_store.save_async(step.name(), fingerprint, payload)
+        future.add_done_callback(
+            lambda f, name=step.name(): self._log_checkpoint_saved(name, f)
+        )
+
+    def _log_checkpoint_saved(self, step_name: str, future) -> None:
+        path = None if future.cancelled() else future.result()
+        if path:
+            self.logger.debug(
+                f"Checkpoint de {step_name} gravado",
+                code="PIPELINE_CHECKPOINT_SAVED",
+                path=path,
+            )
+
+    def _end_checkpoint_run(self, status: str) -> None:
+        if self._checkpoint_store is None:
+            return
+        try:
+            self._checkpoint_store.end_run(status)
+        except Exception as e:
+            self.logger.error(f"Failed to finalize checkpoints: {e}")
+
+    # -------------------------------------------------
+    # Graph mode
+    # -------------------------------------------------
+
+    @staticmethod
+    def _keys(values: Optional[List[str]]) -> Optional[Set[str]]:
+        return None if values is None else set(values)
+
+    def _build_dependencies(self) -> List[Set[int]]:
+        """
+        Para cada step, índices dos steps anteriores dos quais depende.
+
+        Há aresta j -> i (j < i) quando i lê o que j escreve, quando ambos
+        escrevem a mesma chave, quando i escreve o que j lê, ou quando um
+        dos dois não declarou dependências (barreira).
+        """
+        declared = [
+            (self._keys(step.reads()), self._keys(step.writes()))
+            for step in self._steps
+        ]
+
+        dependencies: List[Set[int]] = []
+        for i, (reads_i, writes_i) in enumerate(declared):
+            deps: Set[int] = set()
+            for j in range(i):
+                reads_j, writes_j = declared[j]
+                if None in (reads_i, writes_i, reads_j, writes_j):
+                    deps.add(j)
+                elif writes_j & (reads_i | writes_i) or reads_j & writes_i:
+                    deps.add(j)
+            dependencies.append(deps)
+        return dependencies
+
+    def _start_graph(self) -> None:
+        self._dependencies = self._build_dependencies()
+        self._pending = set(range(len(self._steps)))
+        self._running = {}
+        self._done = set()
+        self._step_progress = {}
+
+        self.logger.debug(
+            "Pipeline em modo grafo",
+            code="PIPELINE_GRAPH",
+            steps=[s.name() for s in self._steps],
+            dependencies=[sorted(d) for d in self._dependencies],
+            stream_dependencies=[sorted(d) for d in self._stream_dependencies],
+        )
+        self._schedule_ready()
+
+    def _schedule_ready(self) -> None:
+        if self._is_cancelled or self._context.is_cancelled():
+            self._finish_cancelled()
+            return
+
+        scheduled = True
+        while scheduled:
+            scheduled = False
+            for index in sorted(self._pending):
+                if not self._dependencies[index] <= self._done:
+                    continue
+                # Consumidores de stream iniciam quando o produtor já começou
+                started = self._done | set(self._running)
+                if not self._stream_dependencies[index] <= started:
+                    continue
+
+                self._pending.discard(index)
+                step = self._steps[index]
+
+                if self._skip_step(index, step):
+                    self._mark_step_done(index)
+                    # Um step pulado pode liberar outros: reavalia a fila
+                    scheduled = True
+                    break
+
+                self._launch_graph_step(index, step)
+
+        if not self._pending and not self._running:
+            self._finish_success()
+
+    def _launch_graph_step(self, index: int, step: BaseStep) -> None:
+        task = step.create_task(self._context)
+
+        if task is None:
+            raise RuntimeError(f"Step '{step.name()}' returned no task.")
+
+        self._running[index] = task
+        self._step_progress[index] = 0.0
+
+        task.on_success = lambda result, i=index: self._handle_graph_success(
+            i, result
+        )
+        task.on_error = lambda exc, i=index: self._handle_graph_error(i, exc)
+        task.progressChanged.connect(
+            lambda value, i=index: self._set_graph_progress(i, value)
+        )
+
+        self._enqueue(task, step)
+
+    def _mark_step_done(self, index: int) -> None:
+        self._close_streams(index)
+        self._after_step(index)
+        self._step_progress[index] = 100.0
+        self._update_graph_progress()
+
+    def _set_graph_progress(self, index: int, step_progress: float) -> None:
+        if index not in self._running:
+            return
+        self._step_progress[index] = max(0.0, min(100.0, float(step_progress)))
+        self._update_graph_progress()
+
+    def _update_graph_progress(self) -> None:
+        total_steps = len(self._steps)
+        if not total_steps or not self._pipeline_task:
+            return
+        global_progress = sum(self._step_progress.values()) / total_steps
+        self._pipeline_task.setProgress(global_progress)
+
+    def _handle_graph_success(self, index: int, result) -> None:
+        # Callbacks tardios (após erro/cancelamento) são ignorados
+        if not self._is_running or index not in self._running:
+            return
+
+        self._profiler.task_finished(self._running.pop(index, None), "success")
+        step = self._steps[index]
+
+        try:
+            step.on_success(self._context, result)
+        except Exception as exc:
+            self._handle_graph_error(index, exc)
+            return
+
+        self._save_checkpoint(index, step, result)
+        self._mark_step_done(index)
+        self._schedule_ready()
+
+    def _handle_graph_error(self, index: int, exception: Exception) -> None:
+        if not self._is_running:
+            return
+
+        task = self._running.pop(index, None)
+        if task is not None:
+            self._profiler.task_finished(task, "error")
+        self._close_streams(index, exception)
+
+        try:
+            self._steps[index].on_error(self._context, exception)
+        except Exception as e:
+            self.logger.error(f"_handle_graph_error handler failed: {e}")
+
+        self._context.add_error(exception)
+
+        for task in list(self._running.values()):
+            try:
+                task.cancel()
+            except RuntimeError as e:
+                self.logger.error(f"Failed to cancel running task: {e}")
+
+        self._finish_error()
+
+    # -------------------------------------------------
+    # Context memory
+    # -------------------------------------------------
+
+    def _after_step(self, index: int) -> None:
+        self._done.add(index)
+        name = self._steps[index].name()
+        context_bytes = self._context.mark_step(name)
+        self._profiler.context_sampled(name, context_bytes)
+        if self._spill_intermediates:
+            self._spill_unread()
+
+    def _spill_unread(self) -> None:
+        """Grava em disco os slots `spillable` que ninguém mais lê."""
+        remaining = [i for i in range(len(self._steps)) if i not in self._done]
+        if not remaining:
+            # Fim da pipeline: o resultado vai direto para on_finished
+            return
+
+        has_callbacks = any((self._on_finished, self._on_error, self._on_cancelled))
+        if has_callbacks and self._result_keys is None:
+            # Callback sem declaração pode ler qualquer chave
+            return
+        needed: Set[str] = set(self._result_keys or ())
+        for index in remaining:
+            reads = self._keys(self._steps[index].reads())
+            if reads is None:
+                # Step sem declaração pode ler qualquer chave
+                return
+            needed |= reads
+
+        for key in self._context.spillable_keys():
+            if key in needed:
+                continue
+            size = self._context.size_of(key)
+            future = self._context.spill_async(key)
+            if future is not None:
+                future.add_done_callback(
+                    lambda f, key=key, size=size: self._log_spilled(key, size, f)
+                )
+
+    def _log_spilled(self, key: str, size: int, future) -> None:
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        self.logger.debug(
+            "Intermediário gravado em disco",
+            code="PIPELINE_CONTEXT_SPILL",
+            key=key,
+            size_kb=round(size / 1024.0, 1),
+        )
+
     # -------------------------------------------------
     # Finalization
     # -------------------------------------------------
 
     def _finish_success(self):
         self._is_running = False
+        self._profiler.stop("success", context_memory=self._context.memory_report())
+        self._end_checkpoint_run(CheckpointStore.RUN_SUCCESS)
+        self._shutdown_streams(cancel=False)
         self._current_task = None
+        self._running = {}
 
         if self._pipeline_task:
             self._pipeline_task.setProgress(100)
@@ -161,7 +632,11 @@ class AsyncPipelineEngine:
 
     def _finish_error(self):
         self._is_running = False
+        self._profiler.stop("error", context_memory=self._context.memory_report())
+        self._end_checkpoint_run(CheckpointStore.RUN_FAILED)
+        self._shutdown_streams(cancel=True)
         self._current_task = None
+        self._running = {}
 
         if self._pipeline_task:
             self._pipeline_task.mark_done()
@@ -174,7 +649,11 @@ class AsyncPipelineEngine:
 
     def _finish_cancelled(self):
         self._is_running = False
+        self._profiler.stop("cancelled", context_memory=self._context.memory_report())
+        self._end_checkpoint_run(CheckpointStore.RUN_CANCELLED)
+        self._shutdown_streams(cancel=True)
         self._current_task = None
+        self._running = {}
 
         if self._pipeline_task:
             self._pipeline_task.mark_done()
@@ -187,18 +666,40 @@ class AsyncPipelineEngine:
 
 
 class PipelineTask(QgsTask):
+    """
+    Task "guarda-chuva" exibida no gerenciador de tarefas do QGIS enquanto o
+    pipeline roda. Fica bloqueada em um `CompletionEvent` (sem busy-wait)
+    até o engine chamar `mark_done()` ou a task ser cancelada.
+    """
+
+    waits_for_subtasks = True
+
+    logger = LogUtils(
+        tool="AsyncPipelineEngine",
+        class_name="PipelineTask",
+        level=LogUtils.DEBUG,
+    )
 
     def __init__(self, description="Pipeline"):
         super().__init__(description, QgsTask.CanCancel)
-        self._done = False
+        self._done = CompletionEvent()
 
     def run(self):
         # mantém task viva até engine marcar done
-        while not self._done:
-            if self.isCanceled():
-                return False
-            QgsApplication.processEvents()
-        return True
+        self._done.wait(self.isCanceled)
+        self.logger.debug(
+            "PipelineTask aguardou conclusão",
+            code="PIPELINE_WAIT",
+            **self._done.stats(),
+        )
+        return not self.isCanceled()
+
+    def cancel(self):
+        super().cancel()
+        self._done.set()
 
     def mark_done(self):
-        self._done = True
+        self._done.set()
+
+    def wait_stats(self):
+        return self._done.stats()
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, List, Optional
 
 from .ExecutionContext import ExecutionContext
 
@@ -27,6 +27,85 @@ class BaseStep(ABC):
         """Permite pular etapa dinamicamente."""
         return True
 
+    def work_size(self, context: ExecutionContext) -> float:
+        """
+        Peso relativo do trabalho do step (ex.: nº de arquivos ou feições).
+
+        Usado pelo `ParallelStep` para ponderar o progresso do grupo.
+        """
+        return 1.0
+
+    # -----------------------------
+    # Dependências (modo grafo)
+    # -----------------------------
+
+    def reads(self) -> Optional[List[str]]:
+        """
+        Chaves do ExecutionContext lidas pelo step.
+
+        None (padrão) indica dependências desconhecidas: no modo grafo do
+        `AsyncPipelineEngine` o step vira barreira e roda isolado, na ordem.
+        """
+        return None
+
+    def writes(self) -> Optional[List[str]]:
+        """Chaves do ExecutionContext escritas pelo step (None = desconhecido)."""
+        return None
+
+    def stream_outputs(self) -> List[str]:
+        """
+        Nomes dos `StreamChannel` que o step produz enquanto roda.
+
+        O engine cria cada canal no contexto (mesmo nome) antes do início;
+        a task publica lotes com `channel.put(batch)`. O engine fecha o canal
+        quando o step termina.
+        """
+        return []
+
+    def stream_inputs(self) -> List[str]:
+        """
+        Nomes dos `StreamChannel` consumidos pelo step.
+
+        No modo grafo o consumidor inicia assim que o produtor começa a rodar
+        (não espera o fim), consumindo os lotes com backpressure.
+        """
+        return []
+
+    # -----------------------------
+    # Checkpoint (retomada)
+    # -----------------------------
+
+    def checkpoint_key(self, context: ExecutionContext) -> Optional[Any]:
+        """
+        Entradas e parâmetros que identificam a execução do step.
+
+        Deve ser serializável em JSON; o `CheckpointStore` gera o fingerprint
+        a partir dele. None (padrão) desativa checkpoint para o step.
+        """
+        return None
+
+    def serialize_checkpoint(self, context: ExecutionContext, result: Any) -> Any:
+        """
+        Dados gravados no checkpoint após `on_success`.
+
+        Padrão: valores das chaves de `writes()` no contexto. Steps cujas
+        saídas não são serializáveis (ex.: camadas QGIS) devem sobrescrever.
+        """
+        keys = self.writes() or []
+        return {key: context.get(key) for key in keys if context.has(key)}
+
+    def checkpoint_valid(self, context: ExecutionContext, payload: Any) -> bool:
+        """
+        False quando o checkpoint depende de algo que não existe mais (ex.:
+        arquivo apagado); o engine trata como ausência de checkpoint.
+        """
+        return True
+
+    def restore_checkpoint(self, context: ExecutionContext, payload: Any) -> None:
+        """Reaplica no contexto os dados de `serialize_checkpoint`."""
+        for key, value in (payload or {}).items():
+            context.set(key, value)
+
     # -----------------------------
     # Task creation
     # -----------------------------
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import threading
+from typing import Callable, Optional
+
+
+class OperationCancelled(Exception):
+    """Levantada por utilitários quando o `CancellationToken` foi cancelado."""
+
+
+class CancellationToken:
+    """
+    Token leve de cancelamento + progresso para laços longos dos utilitários.
+
+    Os utilitários (MrkParser, PhotoMetadata, juízes, geometria) não conhecem
+    a QgsTask que os chama; recebem um token opcional e chamam `tick()` a
+    cada item. A verificação real (`is_cancelled`, que pode consultar
+    `task.isCanceled()`) só acontece a cada `check_every` itens, então o
+    custo por item é um incremento de inteiro.
+
+    Uso numa task:
+
+        token = CancellationToken.from_task(self)
+        MrkParser.parse_file(path, cancel_token=token)
+
+    `BaseTask.run` trata `OperationCancelled` como cancelamento (retorna
+    False sem registrar erro).
+    """
+
+    DEFAULT_CHECK_EVERY = 256
+
+    def __init__(
+        self,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_progress: Optional[Callable[[float], None]] = None,
+        *,
+        check_every: int = DEFAULT_CHECK_EVERY,
+        progress_range=(0.0, 100.0),
+        parent: "CancellationToken" = None,
+    ):
+        self._is_cancelled = is_cancelled
+        self._on_progress = on_progress
+        self._event = threading.Event()
+        self._parent = parent
+        self.check_every = max(1, int(check_every))
+        self._start, self._end = progress_range
+        self._ticks = 0
+
+    @staticmethod
+    def from_task(task, check_every: int = DEFAULT_CHECK_EVERY) -> "CancellationToken":
+        """Token ligado ao `isCanceled()`/`setProgress()` de uma QgsTask."""
+        return CancellationToken(task.isCanceled, task.setProgress, check_every=check_every)
+
+    @staticmethod
+    def ensure(token: Optional["CancellationToken"]) -> "CancellationToken":
+        """Permite aos utilitários aceitar `cancel_token=None`."""
+        return token if token is not None else CancellationToken()
+
+    # -----------------------------
+    # Cancelamento
+    # -----------------------------
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._parent is not None and self._parent.is_cancelled():
+            return True
+        if self._is_cancelled is not None and self._is_cancelled():
+            # memoriza: próximas consultas não chamam o callback
+            self._event.set()
+            return True
+        return False
+
+    def raise_if_cancelled(self) -> None:
+        if self.is_cancelled():
+            raise OperationCancelled("Operação cancelada")
+
+    def tick(self, count: int = 1) -> None:
+        """Conta itens processados; verifica o cancelamento a cada lote."""
+        before = self._ticks
+        self._ticks += count
+        if before // self.check_every != self._ticks // self.check_every:
+            self.raise_if_cancelled()
+
+    # -----------------------------
+    # Progresso
+    # -----------------------------
+
+    def set_progress(self, percent: float) -> None:
+        """Progresso local (0-100), mapeado para a faixa do token."""
+        percent = max(0.0, min(100.0, float(percent)))
+        self._emit(self._start + (self._end - self._start) * percent / 100.0)
+
+    def report(self, done: int, total: int) -> None:
+        """Atalho: progresso `done/total` e verificação de cancelamento."""
+        if total:
+            self.set_progress(100.0 * done / total)
+        self.raise_if_cancelled()
+
+    def _emit(self, value: float) -> None:
+        if self._parent is not None:
+            self._parent._emit(value)
+        elif self._on_progress is not None:
+            self._on_progress(value)
+
+    def child(self, start: float, end: float) -> "CancellationToken":
+        """
+        Sub-token para uma fase: compartilha o cancelamento e mapeia 0-100
+        da fase para [start, end] deste token.
+        """
+        span = self._end - self._start
+        return CancellationToken(
+            check_every=self.check_every,
+            progress_range=(
+                self._start + span * start / 100.0,
+                self._start + span * end / 100.0,
+            ),
+            parent=self,
+        )
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple
+
+from ..config.LogUtils import LogUtils
+from ...utils.ExplorerUtils import ExplorerUtils
+
+
+class CheckpointStore:
+    """
+    Checkpoints em disco dos steps concluídos do `AsyncPipelineEngine`.
+
+    Cada checkpoint é um pickle identificado pelo nome do step e por um
+    fingerprint (sha256) das entradas/parâmetros informados pelo próprio step
+    em `BaseStep.checkpoint_key()`. Se as entradas mudarem (ex.: MRK editado),
+    o fingerprint muda e o checkpoint antigo é simplesmente ignorado.
+
+    Checkpoints servem para retomar uma execução interrompida, não como
+    cache de resultados: `begin_run()` só libera a restauração quando a
+    execução anterior da ferramenta falhou, foi cancelada ou não terminou, e
+    `end_run("success")` apaga os checkpoints da ferramenta.
+
+    A gravação (pickle) roda num worker próprio, fora da thread da GUI, em
+    ordem: um `clear()` enfileirado depois de um `save_async()` apaga o
+    arquivo que ele gravou.
+
+    Os arquivos ficam em `%TEMP%/cadmus/checkpoints/<tool_key>`.
+    """
+
+    CHECKPOINTS_FOLDER = "checkpoints"
+    FORMAT_VERSION = 1
+    RUN_STATE_FILE = "run_state.json"
+    RUN_RUNNING = "running"
+    RUN_SUCCESS = "success"
+    RUN_FAILED = "failed"
+    RUN_CANCELLED = "cancelled"
+
+    _writer: Optional[ThreadPoolExecutor] = None
+    _writer_lock = threading.Lock()
+    _pending: List[Future] = []
+
+    def __init__(self, tool_key: str, folder: Optional[str] = None):
+        self.tool_key = tool_key
+        self.folder = folder or ExplorerUtils.get_temp_folder(
+            tool_key, self.CHECKPOINTS_FOLDER, str(tool_key)
+        )
+        self.logger = LogUtils(tool=tool_key, class_name="CheckpointStore")
+
+    # -----------------------------
+    # Fingerprint
+    # -----------------------------
+
+    @staticmethod
+    def fingerprint(step_name: str, key: Any) -> str:
+        raw = json.dumps(
+            {"v": CheckpointStore.FORMAT_VERSION, "step": step_name, "key": key},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_identities(
+        paths: Iterable[str],
+        extensions: Optional[Iterable[str]] = None,
+        recursive: bool = False,
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Identidade (caminho, tamanho, mtime_ns) dos arquivos em `paths`.
+
+        Pastas são expandidas (filtrando por `extensions`, se informado).
+        """
+        exts = tuple(e.lower() for e in extensions) if extensions else None
+        identities = []
+
+        def _add(file_path):
+            if exts and not file_path.lower().endswith(exts):
+                return
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return
+            identities.append((os.path.abspath(file_path), st.st_size, st.st_mtime_ns))
+
+        for path in paths or []:
+            if not path:
+                continue
+            if os.path.isfile(path):
+                _add(path)
+                continue
+            if not os.path.isdir(path):
+                continue
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file_name in sorted(files):
+                    _add(os.path.join(root, file_name))
+                if not recursive:
+                    break
+
+        return identities
+
+    # -----------------------------
+    # Estado da execução
+    # -----------------------------
+
+    def _run_state_path(self) -> str:
+        return os.path.join(self.folder, self.RUN_STATE_FILE)
+
+    def last_run_status(self) -> Optional[str]:
+        """Status gravado pela execução anterior (None se não houver)."""
+        try:
+            with open(self._run_state_path(), "r", encoding="utf-8") as fh:
+                return json.load(fh).get("status")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def begin_run(self) -> bool:
+        """
+        Marca o início de uma execução.
+
+        Retorna True se os checkpoints existentes podem ser restaurados, isto
+        é, se a execução anterior falhou, foi cancelada ou ficou "running"
+        (QGIS fechado no meio).
+        """
+        self.flush()
+        resumable = self.last_run_status() in (
+            self.RUN_RUNNING,
+            self.RUN_FAILED,
+            self.RUN_CANCELLED,
+        )
+        self._write_run_state(self.RUN_RUNNING)
+        return resumable
+
+    def end_run(self, status: str) -> None:
+        """Registra o fim da execução; em sucesso apaga os checkpoints."""
+        if status == self.RUN_SUCCESS:
+            self._submit(self._clear_all)
+        else:
+            self._submit(self._write_run_state, status)
+
+    def _clear_all(self) -> None:
+        self.clear()
+        self._remove(self._run_state_path())
+
+    def _write_run_state(self, status: str) -> None:
+        path = self._run_state_path()
+        try:
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump({"status": status, "updated_at": time.time()}, fh)
+        except OSError as e:
+            self.logger.warning(f"Falha ao gravar estado da execução ({path}): {e}")
+
+    # -----------------------------
+    # Gravação em segundo plano
+    # -----------------------------
+
+    @classmethod
+    def _submit(cls, fn, *args) -> Future:
+        with cls._writer_lock:
+            if cls._writer is None:
+                cls._writer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="cadmus-checkpoint"
+                )
+            cls._pending = [f for f in cls._pending if not f.done()]
+            future = cls._writer.submit(fn, *args)
+            cls._pending.append(future)
+            return future
+
+    @classmethod
+    def flush(cls, timeout: Optional[float] = None) -> bool:
+        """Aguarda as gravações pendentes. Retorna False se estourar o timeout."""
+        with cls._writer_lock:
+            pending = list(cls._pending)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(remaining)
+            except Exception:
+                if not future.done():
+                    return False
+        return True
+
+    def save_async(self, step_name: str, fingerprint: str, payload: Any) -> Future:
+        """Como `save`, mas serializa e grava no worker de checkpoints."""
+        return self._submit(self.save, step_name, fingerprint, payload)
+
+    # -----------------------------
+    # Persistência
+    # -----------------------------
+
+    def _path_for(self, step_name: str, fingerprint: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", step_name)
+        return os.path.join(self.folder, f"{safe_name}_{fingerprint[:24]}.pkl")
+
+    def load(self, step_name: str, fingerprint: str) -> Tuple[bool, Any]:
+        """Retorna (True, payload) se houver checkpoint válido."""
+        path = self._path_for(step_name, fingerprint)
+        if not os.path.isfile(path):
+            return False, None
+        try:
+            with open(path, "rb") as fh:
+                record = pickle.load(fh)
+        except Exception as e:
+            self.logger.warning(f"Checkpoint ilegível descartado ({path}): {e}")
+            self._remove(path)
+            return False, None
+
+        if (
+            not isinstance(record, dict)
+            or record.get("fingerprint") != fingerprint
+            or record.get("version") != self.FORMAT_VERSION
+        ):
+            return False, None
+        return True, record.get("payload")
+
+    def save(self, step_name: str, fingerprint: str, payload: Any) -> Optional[str]:
+        path = self._path_for(step_name, fingerprint)
+        tmp_path = f"{path}.tmp"
+        record = {
+            "version": self.FORMAT_VERSION,
+            "step": step_name,
+            "fingerprint": fingerprint,
+            "created_at": time.time(),
+            "payload": payload,
+        }
+        try:
+            with open(tmp_path, "wb") as fh:
+                pickle.dump(record, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            self.logger.error(f"Falha ao gravar checkpoint de {step_name}: {e}")
+            self._remove(tmp_path)
+            return None
+
+    def clear(self, step_name: Optional[str] = None) -> int:
+        """Remove checkpoints (todos ou apenas de um step). Retorna quantidade."""
+        prefix = re.sub(r"[^A-Za-z0-9_.-]+", "_", step_name) + "_" if step_name else ""
+        removed = 0
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith(".pkl") and name.startswith(prefix):
+                if self._remove(os.path.join(self.folder, name)):
+                    removed += 1
+        return removed
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class CompletionEvent:
+    """
+    Sinal de conclusão para tasks "pai" (PipelineTask, _ParallelGroupTask).
+
+    Substitui o laço `processEvents()` + `sleep` por um `threading.Event`:
+    a thread da task pai fica bloqueada (sem consumir CPU) até alguém chamar
+    `set()` — conclusão das subtasks ou `cancel()` da própria task.
+
+    O `poll_interval` é só uma rede de segurança para cancelamentos que não
+    passem pelo `cancel()` sobrescrito; não é o caminho normal de acordar.
+    """
+
+    DEFAULT_POLL_INTERVAL = 0.5
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self._event = threading.Event()
+        self._poll_interval = poll_interval
+        self._wait_wall = 0.0
+        self._wait_cpu = 0.0
+        self._wakeups = 0
+
+    def set(self) -> None:
+        self._event.set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def clear(self) -> None:
+        self._event.clear()
+
+    def wait(self, is_cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Bloqueia até `set()` ou até `is_cancelled()` retornar True.
+
+        Retorna True se o evento foi sinalizado.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            while not self._event.wait(self._poll_interval):
+                self._wakeups += 1
+                if is_cancelled is not None and is_cancelled():
+                    break
+        finally:
+            self._wait_wall += time.perf_counter() - wall_start
+            self._wait_cpu += time.thread_time() - cpu_start
+        return self._event.is_set()
+
+    def stats(self) -> Dict[str, float]:
+        """Tempo de parede e de CPU gastos esperando (segundos)."""
+        return {
+            "wait_wall_s": round(self._wait_wall, 4),
+            "wait_cpu_s": round(self._wait_cpu, 4),
+            "wakeups": self._wakeups,
+        }
@@ -1,48 +1,393 @@
 # -*- coding: utf-8 -*-
-from typing import Any, Dict, List, Optional
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..model.ContextSlot import ContextSlot
 
 
 class ExecutionContext:
     """
     Armazena o estado compartilhado da execução da pipeline.
+
+    - Acesso protegido por lock (steps concorrentes no modo grafo e
+      subtasks do `ParallelStep`).
+    - Slots tipados: chaves declaradas em `SLOTS`, no argumento `slots` ou
+      com `declare()` têm o tipo validado em `set()` (TypeError).
+    - Contabilidade de memória: cada valor tem o tamanho estimado em `set()`;
+      `release()` descarta e `spill()` grava em disco (pickle) um
+      intermediário grande; `spill_async()` faz o pickle num worker, fora da
+      thread que chama e sem segurar o lock. Valores em disco voltam de
+      forma transparente no próximo `get()`.
+    - `mark_step()` registra o total após cada step; `memory_report()`
+      devolve o pico e o consumo por step/chave.
     """
 
-    def __init__(self, initial_data: Optional[Dict[str, Any]] = None):
-        self._data: Dict[str, Any] = initial_data.copy() if initial_data else {}
+    SPILL_TEMP_FOLDER = "context_spill"
+    SPILL_MIN_BYTES = 1024 * 1024
+    _SIZE_SAMPLE = 32
+    _SIZE_DEPTH = 3
+
+    _spill_writer: Optional[ThreadPoolExecutor] = None
+    _spill_writer_lock = threading.Lock()
+
+    # Chaves compartilhadas entre pipelines. Chaves de um step específico
+    # são registradas por quem monta a pipeline (`slots`/`declare()`).
+    SLOTS: Dict[str, ContextSlot] = {
+        slot.name: slot
+        for slot in (
+            ContextSlot("tool_key", (str,)),
+            ContextSlot("paths", (list, tuple)),
+            ContextSlot("recursive", (bool,)),
+            ContextSlot("base_folder", (str,)),
+            ContextSlot("photo_metadata_json_path", (str,)),
+            ContextSlot("reuse_existing_outputs", (bool,)),
+            ContextSlot("parallel_result", (dict,), spillable=True),
+            ContextSlot("parallel_errors", (list,)),
+        )
+    }
+
+    def __init__(
+        self,
+        initial_data: Optional[Dict[str, Any]] = None,
+        slots: Optional[List[ContextSlot]] = None,
+    ):
+        self._lock = threading.RLock()
+        self._slots: Dict[str, ContextSlot] = dict(self.SLOTS)
+        for slot in slots or []:
+            self._slots[slot.name] = slot
+
+        self._data: Dict[str, Any] = {}
+        self._sizes: Dict[str, int] = {}
+        self._spilled: Dict[str, Tuple[str, int]] = {}
+        # spill em andamento: chave -> valor sendo gravado
+        self._spilling: Dict[str, Any] = {}
+        self._spill_futures: List[Future] = []
         self._errors: List[Exception] = []
         self._is_cancelled: bool = False
 
+        self._step_memory: List[Dict[str, Any]] = []
+        self._peak_bytes = 0
+        self._peak_step: Optional[str] = None
+        # pico atingido dentro de um step ainda não marcado (`mark_step`)
+        self._peak_pending = False
+
+        for key, value in (initial_data or {}).items():
+            self.set(key, value)
+        if self._peak_pending:
+            self._peak_step = "<initial>"
+            self._peak_pending = False
+
     # -----------------------------
     # Basic access
     # -----------------------------
 
     def set(self, key: str, value: Any) -> "ExecutionContext":
-        self._data[key] = value
+        self._check_type(key, value)
+        size = self.estimate_size(value)
+        with self._lock:
+            self._drop_spill_file(key)
+            self._spilling.pop(key, None)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._track_peak(None)
         return self
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self._data.get(key, default)
+        with self._lock:
+            if key in self._spilled:
+                return self._load_spilled(key)
+            # Lido durante um spill assíncrono: o valor continua em memória
+            self._spilling.pop(key, None)
+            return self._data.get(key, default)
 
     def has(self, key: str) -> bool:
-        return key in self._data
+        with self._lock:
+            return key in self._data or key in self._spilled
 
     def require(self, keys: List[str]) -> None:
-        missing = [k for k in keys if k not in self._data]
+        missing = [k for k in keys if not self.has(k)]
         if missing:
             raise KeyError(f"ExecutionContext missing required keys: {missing}")
 
+    # -----------------------------
+    # Slots
+    # -----------------------------
+
+    def declare(
+        self,
+        name: str,
+        types: Tuple[type, ...] = (object,),
+        *,
+        spillable: bool = False,
+        description: Optional[str] = None,
+    ) -> "ExecutionContext":
+        slot = ContextSlot(name, tuple(types), spillable, description)
+        with self._lock:
+            self._slots[name] = slot
+            if name in self._data:
+                self._check_type(name, self._data[name])
+        return self
+
+    def slot(self, name: str) -> Optional[ContextSlot]:
+        return self._slots.get(name)
+
+    def _check_type(self, key: str, value: Any) -> None:
+        slot = self._slots.get(key)
+        if slot is None or value is None or isinstance(value, slot.types):
+            return
+        expected = ", ".join(t.__name__ for t in slot.types)
+        raise TypeError(
+            f"ExecutionContext slot '{key}' expects {expected}, got {type(value).__name__}"
+        )
+
+    # -----------------------------
+    # Memória
+    # -----------------------------
+
+    @classmethod
+    def estimate_size(cls, value: Any, _depth: int = 0) -> int:
+        """
+        Tamanho aproximado (bytes) de `value`, por amostragem.
+
+        Containers grandes são estimados pela média de até `_SIZE_SAMPLE`
+        elementos. Strings compartilhadas são contadas em cada referência,
+        então o número tende a ser um limite superior.
+        """
+        size = sys.getsizeof(value)
+        if _depth >= cls._SIZE_DEPTH or isinstance(value, (str, bytes, int, float, bool)):
+            return size
+
+        if isinstance(value, dict):
+            n = len(value)
+            if not n:
+                return size
+            sample = list(value.items())[: cls._SIZE_SAMPLE]
+            per_item = sum(
+                cls.estimate_size(k, _depth + 1) + cls.estimate_size(v, _depth + 1)
+                for k, v in sample
+            ) / len(sample)
+            return size + int(per_item * n)
+
+        if isinstance(value, (list, tuple, set, frozenset)):
+            n = len(value)
+            if not n:
+                return size
+            if isinstance(value, (list, tuple)):
+                sample = value[: cls._SIZE_SAMPLE]
+            else:
+                sample = [v for _, v in zip(range(cls._SIZE_SAMPLE), value)]
+            per_item = sum(cls.estimate_size(v, _depth + 1) for v in sample) / len(sample)
+            return size + int(per_item * n)
+
+        # Objetos (camadas QGIS, etc.): só o wrapper Python é visível
+        return size
+
+    def size_of(self, key: str) -> int:
+        with self._lock:
+            return 0 if key in self._spilled else self._sizes.get(key, 0)
+
+    def total_size(self) -> int:
+        with self._lock:
+            return sum(
+                size for key, size in self._sizes.items() if key not in self._spilled
+            )
+
+    def release(self, key: str) -> int:
+        """Remove `key` do contexto (memória e disco). Retorna bytes liberados."""
+        with self._lock:
+            freed = self.size_of(key)
+            self._drop_spill_file(key)
+            self._spilling.pop(key, None)
+            self._data.pop(key, None)
+            self._sizes.pop(key, None)
+            return freed
+
+    def spill(self, key: str) -> bool:
+        """
+        Grava o valor de `key` em arquivo temporário e o tira da memória.
+
+        Retorna False se a chave não existir, for pequena demais
+        (`SPILL_MIN_BYTES`) ou não for serializável (ex.: camadas QGIS).
+        """
+        job = self._begin_spill(key)
+        return job is not None and self._write_spill(*job)
+
+    def spill_async(self, key: str) -> Optional[Future]:
+        """
+        Como `spill`, mas o pickle e a escrita rodam no worker de spill.
+
+        Retorna None se a chave não puder ser gravada; senão um Future com o
+        resultado de `spill`. Se a chave for lida, trocada ou liberada antes
+        do fim da gravação, o arquivo é descartado e o valor fica em memória.
+        """
+        job = self._begin_spill(key)
+        if job is None:
+            return None
+        cls = type(self)
+        with cls._spill_writer_lock:
+            if cls._spill_writer is None:
+                cls._spill_writer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="cadmus-spill"
+                )
+            future = cls._spill_writer.submit(self._write_spill, *job)
+        with self._lock:
+            self._spill_futures = [f for f in self._spill_futures if not f.done()]
+            self._spill_futures.append(future)
+        return future
+
+    def flush_spills(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda os `spill_async` pendentes. False se estourar o timeout."""
+        with self._lock:
+            pending = list(self._spill_futures)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(remaining)
+            except Exception:
+                if not future.done():
+                    return False
+        return True
+
+    def _begin_spill(self, key: str) -> Optional[Tuple[str, Any, str]]:
+        with self._lock:
+            if key in self._spilled or key in self._spilling or key not in self._data:
+                return None
+            if self._sizes.get(key, 0) < self.SPILL_MIN_BYTES:
+                return None
+            value = self._data[key]
+            self._spilling[key] = value
+            return key, value, self._spill_path(key)
+
+    def _write_spill(self, key: str, value: Any, path: str) -> bool:
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove_file(tmp_path)
+            with self._lock:
+                if self._spilling.get(key) is value:
+                    del self._spilling[key]
+            return False
+
+        with self._lock:
+            current = key in self._spilling and self._spilling.pop(key) is value
+            if not current or self._data.get(key) is not value:
+                self._remove_file(path)
+                return False
+            self._spilled[key] = (path, self._sizes.get(key, 0))
+            del self._data[key]
+            return True
+
+    def spillable_keys(self) -> List[str]:
+        """Chaves em memória cujo slot permite `spill()`."""
+        with self._lock:
+            return [
+                key
+                for key in self._data
+                if key in self._slots and self._slots[key].spillable
+            ]
+
+    def is_spilled(self, key: str) -> bool:
+        with self._lock:
+            return key in self._spilled
+
+    def mark_step(self, step_name: str) -> int:
+        """Registra o total em memória após `step_name`. Retorna o total."""
+        with self._lock:
+            total = self.total_size()
+            self._step_memory.append(
+                {
+                    "step": step_name,
+                    "context_bytes": total,
+                    "spilled_keys": sorted(self._spilled),
+                }
+            )
+            self._track_peak(step_name, total)
+            if self._peak_pending:
+                self._peak_step = step_name
+                self._peak_pending = False
+            return total
+
+    def memory_report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "current_bytes": self.total_size(),
+                "peak_bytes": self._peak_bytes,
+                "peak_step": self._peak_step,
+                "by_key": {
+                    key: size
+                    for key, size in sorted(
+                        self._sizes.items(), key=lambda item: item[1], reverse=True
+                    )
+                },
+                "spilled": {key: size for key, (_, size) in self._spilled.items()},
+                "by_step": [dict(entry) for entry in self._step_memory],
+            }
+
+    def _track_peak(self, step_name: Optional[str], total: Optional[int] = None) -> None:
+        total = self.total_size() if total is None else total
+        if total > self._peak_bytes:
+            self._peak_bytes = total
+            self._peak_step = step_name
+            # Sem nome: o pico é atribuído ao próximo step marcado
+            self._peak_pending = step_name is None
+
+    def _spill_path(self, key: str) -> str:
+        # Import tardio: ExplorerUtils depende de LogUtils/QGIS
+        from ...utils.ExplorerUtils import ExplorerUtils
+
+        tool_key = self._data.get("tool_key") or "untraceable"
+        folder = ExplorerUtils.get_temp_folder(tool_key, self.SPILL_TEMP_FOLDER)
+        safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
+        return os.path.join(
+            folder, f"{safe_key}_{id(self):x}_{time.time_ns():x}.pkl"
+        )
+
+    def _load_spilled(self, key: str) -> Any:
+        path, size = self._spilled.pop(key)
+        with open(path, "rb") as fh:
+            value = pickle.load(fh)
+        self._remove_file(path)
+        self._data[key] = value
+        self._sizes[key] = size
+        self._track_peak(None)
+        return value
+
+    def _drop_spill_file(self, key: str) -> None:
+        entry = self._spilled.pop(key, None)
+        if entry is not None:
+            self._remove_file(entry[0])
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
     # -----------------------------
     # Errors
     # -----------------------------
 
     def add_error(self, exc: Exception) -> None:
-        self._errors.append(exc)
+        with self._lock:
+            self._errors.append(exc)
 
     def get_errors(self) -> List[Exception]:
-        return self._errors.copy()
+        with self._lock:
+            return self._errors.copy()
 
     def has_errors(self) -> bool:
-        return len(self._errors) > 0
+        with self._lock:
+            return len(self._errors) > 0
 
     # -----------------------------
     # Cancel
@@ -59,6 +404,15 @@ class ExecutionContext:
     # -----------------------------
 
     def clear(self) -> None:
-        self._data.clear()
-        self._errors.clear()
-        self._is_cancelled = False
+        with self._lock:
+            for key in list(self._spilled):
+                self._drop_spill_file(key)
+            self._spilling.clear()
+            self._data.clear()
+            self._sizes.clear()
+            self._errors.clear()
+            self._step_memory.clear()
+            self._peak_bytes = 0
+            self._peak_step = None
+            self._peak_pending = False
+            self._is_cancelled = False
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
+import os
+
 from .BaseStep import BaseStep
+from .CheckpointStore import CheckpointStore
 from .ExecutionContext import ExecutionContext
+from ..model.ContextSlot import ContextSlot
+from ..model.MrkPointColumns import MrkPointColumns
 from ..task.MrkParseTask import MrkParseTask
 from ..config.LogUtils import LogUtils
 from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
@@ -10,11 +15,77 @@ from qgis.PyQt.QtCore import QVariant
 
 
 class MrkParseStep(BaseStep):
-    """Step responsável por ler MRKs e criar camada de pontos inicial."""
+    """
+    Step responsável por ler MRKs e criar camada de pontos inicial.
+
+    Com `stream_batch_size` o step vira produtor de stream: publica os pontos
+    em lotes no canal `POINTS_STREAM` e não monta a lista nem a camada; quem
+    grava `layer` e `points` é o `MrkPointsLayerStep`, consumindo os lotes.
+    Usado pelo DroneCoordinates (plugin e runner).
+
+    `CONTEXT_SLOTS` declara as chaves que o step grava; quem monta a
+    pipeline as registra no contexto (`ExecutionContext(slots=...)`).
+    """
+
+    POINTS_STREAM = "mrk_points_stream"
+
+    CONTEXT_SLOTS = [
+        ContextSlot("points", (list, MrkPointColumns), spillable=True,
+                    description="Pontos lidos dos MRKs (um dict por foto)"),
+        ContextSlot("mrk_points_total", (int,)),
+    ]
+
+    def __init__(self, stream_batch_size: int = None):
+        self.stream_batch_size = stream_batch_size
+
+    @staticmethod
+    def point_field_specs():
+        return [
+            ("foto", QVariant.Int, MetadataFields.resolve_output_name("foto")),
+            ("alt", QVariant.Double, MetadataFields.resolve_output_name("alt")),
+            ("date_name", QVariant.String, MetadataFields.resolve_output_name("date_name")),
+            ("flight_number", QVariant.String, MetadataFields.resolve_output_name("flight_number")),
+            ("flight_name", QVariant.String, MetadataFields.resolve_output_name("flight_name")),
+            ("folder_level1", QVariant.String, MetadataFields.resolve_output_name("folder_level1")),
+            ("folder_level2", QVariant.String, MetadataFields.resolve_output_name("folder_level2")),
+            ("mrk_folder", QVariant.String, MetadataFields.resolve_output_name("mrk_folder")),
+        ]
 
     def name(self) -> str:
         return "MrkParseStep"
 
+    def reads(self):
+        return ["paths", "recursive", "extra_fields", "points_layer_name", "tool_key"]
+
+    def writes(self):
+        if self.stream_batch_size:
+            return ["base_folder", "mrk_points_total"]
+        return ["layer", "points", "base_folder"]
+
+    def stream_outputs(self):
+        return [self.POINTS_STREAM] if self.stream_batch_size else []
+
+    def checkpoint_key(self, context: ExecutionContext):
+        if self.stream_batch_size:
+            # Lotes já foram consumidos; não há o que restaurar
+            return None
+        paths = [os.path.abspath(p) for p in context.get("paths") or []]
+        recursive = context.get("recursive", True)
+        return {
+            "paths": paths,
+            "recursive": recursive,
+            "extra_fields": context.get("extra_fields"),
+            "points_layer_name": context.get("points_layer_name"),
+            "files": CheckpointStore.file_identities(paths, [".mrk"], recursive),
+        }
+
+    def serialize_checkpoint(self, context: ExecutionContext, result):
+        # A camada é recriada na restauração; persiste apenas o resultado da task
+        return result
+
+    def restore_checkpoint(self, context: ExecutionContext, payload):
+        self.on_success(context, payload)
+
     def create_task(self, context: ExecutionContext):
         context.require(["paths", "recursive", "tool_key"])
 
@@ -23,9 +94,17 @@ class MrkParseStep(BaseStep):
             recursive=context.get("recursive", True),
             extra_fields=context.get("extra_fields"),
             tool_key=context.get("tool_key"),
+            stream=context.get(self.POINTS_STREAM) if self.stream_batch_size else None,
+            batch_size=self.stream_batch_size,
         )
 
     def on_success(self, context: ExecutionContext, result):
+        if self.stream_batch_size:
+            result = result if isinstance(result, dict) else {}
+            context.set("base_folder", result.get("base_folder"))
+            context.set("mrk_points_total", result.get("points_total", 0))
+            return
+
         points = result.get("points", []) if isinstance(result, dict) else []
         if not points:
             LogUtils(
@@ -35,20 +114,10 @@ class MrkParseStep(BaseStep):
             return
 
         layer_name = context.get("points_layer_name", "MRK_Pontos")
-        field_specs = [
-            ("foto", QVariant.Int, MetadataFields.resolve_output_name("foto")),
-            ("alt", QVariant.Double, MetadataFields.resolve_output_name("alt")),
-            ("date_name", QVariant.String, MetadataFields.resolve_output_name("date_name")),
-            ("flight_number", QVariant.String, MetadataFields.resolve_output_name("flight_number")),
-            ("flight_name", QVariant.String, MetadataFields.resolve_output_name("flight_name")),
-            ("folder_level1", QVariant.String, MetadataFields.resolve_output_name("folder_level1")),
-            ("folder_level2", QVariant.String, MetadataFields.resolve_output_name("folder_level2")),
-            ("mrk_folder", QVariant.String, MetadataFields.resolve_output_name("mrk_folder")),
-        ]
         layer = VectorLayerGeometry.create_point_layer_from_dicts(
             points=points,
             name=layer_name,
-            field_specs=field_specs,
+            field_specs=self.point_field_specs(),
             geometry_keys=("lon", "lat"),
             extra_fields=context.get("extra_fields"),
         )
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from .BaseStep import BaseStep
+from .ExecutionContext import ExecutionContext
+from .MrkParseStep import MrkParseStep
+from ..task.MrkPointsLayerTask import MrkPointsLayerTask
+from ..config.LogUtils import LogUtils
+from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
+from qgis.core import QgsProject
+
+
+class MrkPointsLayerStep(BaseStep):
+    """
+    Consumidor do stream de pontos do `MrkParseStep(stream_batch_size=...)`.
+
+    Grava `layer` e `points` como o `MrkParseStep` em modo lista, então os
+    steps seguintes (`TrackLayerStep`, `PhotoMetadataStep`) não mudam.
+
+    Uso (modo grafo):
+        [MrkParseStep(stream_batch_size=500), MrkPointsLayerStep(), PhotoMetadataStep()]
+    """
+
+    def name(self) -> str:
+        return "MrkPointsLayerStep"
+
+    def reads(self):
+        return ["points_layer_name", "extra_fields", "tool_key"]
+
+    def writes(self):
+        return ["layer", "points"]
+
+    def stream_inputs(self):
+        return [MrkParseStep.POINTS_STREAM]
+
+    def create_task(self, context: ExecutionContext):
+        context.require([MrkParseStep.POINTS_STREAM, "tool_key"])
+
+        return MrkPointsLayerTask(
+            stream=context.get(MrkParseStep.POINTS_STREAM),
+            field_specs=MrkParseStep.point_field_specs(),
+            extra_fields=context.get("extra_fields"),
+            tool_key=context.get("tool_key"),
+        )
+
+    def on_success(self, context: ExecutionContext, result):
+        result = result if isinstance(result, dict) else {}
+        points = result.get("points") or []
+        logger = LogUtils(
+            tool=context.get("tool_key"),
+            class_name=self.__class__.__name__,
+        )
+        if not points:
+            logger.warning("Nenhum ponto recebido do stream de MRKs")
+            return
+
+        layer = VectorLayerGeometry.create_point_layer_from_rows(
+            result.get("rows") or [],
+            name=context.get("points_layer_name", "MRK_Pontos"),
+            field_specs=MrkParseStep.point_field_specs(),
+            extra_fields=context.get("extra_fields"),
+        )
+        if result.get("skipped"):
+            logger.warning(
+                f"Pulados {result['skipped']} pontos sem coordenada válida"
+            )
+
+        if layer and layer.isValid():
+            QgsProject.instance().addMapLayer(layer)
+            context.set("layer", layer)
+            context.set("points", points)
+        else:
+            logger.error("Falha ao criar camada de pontos a partir do stream de MRKs")
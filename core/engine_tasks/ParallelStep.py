@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
+from collections import deque
 from typing import List, Any, Dict, Optional
 import threading
-import time
 
-from qgis.core import QgsTask, QgsApplication
+from qgis.core import QgsTask
 
 from .BaseStep import BaseStep
+from .CompletionEvent import CompletionEvent
 from .ExecutionContext import ExecutionContext
+from .TaskExecutor import TaskExecutor
 from ..config.LogUtils import LogUtils
 
 
@@ -16,18 +18,47 @@ class ParallelStep(BaseStep):
 
     - Recebe uma lista de steps independentes
     - Cria as tasks desses sub-steps
-    - Agenda todas as tasks com `QgsApplication.taskManager().addTask()`
+    - Agenda as tasks no `TaskExecutor` do engine (padrão: gerenciador de
+      tarefas do QGIS), no máximo `max_concurrency` por vez (None = todas)
     - Aguarda todas finalizarem, agrupa resultados e retorna um dict
 
+    Política de erro (`error_policy`):
+    - ERROR_FAIL_FAST (padrão): primeiro erro cancela as demais e falha o grupo
+    - ERROR_COLLECT: segue com as demais; erros vão para `parallel_errors`
+      no contexto e o grupo termina com sucesso
+    - ERROR_RETRY: recria a task do sub-step até `max_retries` vezes; esgotadas
+      as tentativas, comporta-se como fail-fast
+
+    O progresso do grupo é ponderado por `BaseStep.work_size()` de cada sub-step.
+
     Nota: Todo o paralelismo fica encapsulado aqui; o `AsyncPipelineEngine`
     continua tratando `ParallelStep` como um `BaseStep` normal.
     """
 
-    def __init__(self, steps: List[BaseStep], description: Optional[str] = None):
+    ERROR_FAIL_FAST = "fail_fast"
+    ERROR_COLLECT = "collect"
+    ERROR_RETRY = "retry"
+
+    def __init__(
+        self,
+        steps: List[BaseStep],
+        description: Optional[str] = None,
+        *,
+        max_concurrency: Optional[int] = None,
+        error_policy: str = ERROR_FAIL_FAST,
+        max_retries: int = 2,
+    ):
         if not isinstance(steps, list):
             raise TypeError("ParallelStep expects a list of BaseStep instances")
+        if error_policy not in (self.ERROR_FAIL_FAST, self.ERROR_COLLECT, self.ERROR_RETRY):
+            raise ValueError(f"Invalid error policy: {error_policy}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
         self._steps = steps
         self._description = description
+        self.max_concurrency = max_concurrency
+        self.error_policy = error_policy
+        self.max_retries = max(0, int(max_retries))
         self.logger = LogUtils(tool="ParallelStep", class_name="ParallelStep")
 
     def name(self) -> str:
@@ -40,8 +71,35 @@ class ParallelStep(BaseStep):
         # Executa se pelo menos um sub-step desejar rodar
         return any(s.should_run(context) for s in self._steps)
 
+    def work_size(self, context: ExecutionContext) -> float:
+        return sum(s.work_size(context) for s in self._steps)
+
+    def reads(self) -> Optional[List[str]]:
+        return self._union_keys([s.reads() for s in self._steps])
+
+    def writes(self) -> Optional[List[str]]:
+        keys = self._union_keys([s.writes() for s in self._steps])
+        return None if keys is None else keys + ["parallel_result", "parallel_errors"]
+
+    @staticmethod
+    def _union_keys(groups: List[Optional[List[str]]]) -> Optional[List[str]]:
+        # Se algum sub-step não declarou, o grupo inteiro é tratado como barreira
+        if any(g is None for g in groups):
+            return None
+        keys: List[str] = []
+        for group in groups:
+            keys.extend(k for k in group if k not in keys)
+        return keys
+
     def create_task(self, context: ExecutionContext):
-        return _ParallelGroupTask(self._steps, context, self.name())
+        return _ParallelGroupTask(
+            self._steps,
+            context,
+            self.name(),
+            max_concurrency=self.max_concurrency,
+            error_policy=self.error_policy,
+            max_retries=self.max_retries,
+        )
 
     def on_success(self, context: ExecutionContext, result: Any) -> None:
         # Por design, os on_success dos sub-steps já foram executados
@@ -64,30 +122,51 @@ class _ParallelGroupTask(QgsTask):
     Task composta que agenda e monitora um grupo de tasks.
 
     Comportamento:
-    - Cria as tasks dos sub-steps
+    - Mantém uma fila de sub-steps e cria/agenda as tasks conforme há vaga
+      (`max_concurrency`)
     - Anexa callbacks locais para coletar resultados/erros
-    - Agenda as tasks em paralelo
     - Monitora até todas terminarem ou até cancelamento
-    - Em caso de erro, cancela tasks restantes e chama `self.on_error`
+    - Em caso de erro aplica a política do `ParallelStep` (fail-fast,
+      coleta ou nova tentativa)
     - Em caso de sucesso, chama `self.on_success` com dict {step_name: result}
     """
 
+    waits_for_subtasks = True
+
     def __init__(
         self,
         steps: List[BaseStep],
         context: ExecutionContext,
         description: str = "ParallelGroup",
+        *,
+        max_concurrency: Optional[int] = None,
+        error_policy: str = ParallelStep.ERROR_FAIL_FAST,
+        max_retries: int = 0,
     ):
         super().__init__(description, QgsTask.CanCancel)
         self._steps = steps
         self._context = context
-
-        self._lock = threading.Lock()
-        self._pending = 0
+        self._max_concurrency = max_concurrency or max(1, len(steps))
+        self._error_policy = error_policy
+        self._max_retries = max_retries if error_policy == ParallelStep.ERROR_RETRY else 0
+
+        self._lock = threading.RLock()
+        self._queue: "deque[int]" = deque()
+        self._running: Dict[int, QgsTask] = {}
+        self._attempts: Dict[int, int] = {}
         self._results: Dict[str, Any] = {}
+        self._errors: List[Dict[str, Any]] = []
         self._error: Optional[Exception] = None
-        self._done_event = threading.Event()
+        self._done_event = CompletionEvent()
         self._subtasks: List[QgsTask] = []
+        self._step_progress: Dict[int, float] = {}
+        self._weights: Dict[int, float] = {}
+        self._subtask_names: Dict[int, str] = {}
+
+        # PipelineProfiler injetado pelo engine (opcional)
+        self.profiler = None
+        # TaskExecutor injetado pelo engine (None = gerenciador do QGIS)
+        self.executor = None
         self.logger = LogUtils(
             tool="ParallelGroupTask", class_name="_ParallelGroupTask"
         )
@@ -97,145 +176,244 @@ class _ParallelGroupTask(QgsTask):
         self.on_error = None
 
     def run(self) -> bool:
-        # Cria e agenda subtasks
         with self._lock:
-            for step in self._steps:
+            for index, step in enumerate(self._steps):
                 try:
-                    task = step.create_task(self._context)
+                    weight = float(step.work_size(self._context))
                 except Exception as e:
-                    # falha ao criar task -> aborta
-                    self._error = e
-                    self._done_event.set()
-                    break
-
-                if task is None:
-                    # step optou por não criar task
-                    continue
-
-                # Guarda referência
-                self._subtasks.append(task)
-
-                # Envolva callbacks para coletar resultados
-                def make_success_handler(s, t):
-                    def _on_success(result):
-                        try:
-                            # permite que o próprio sub-step aplique sua lógica
-                            try:
-                                s.on_success(self._context, result)
-                            except Exception as e:
-                                self.logger.error(f"substep on_success error: {e}")
-
-                            with self._lock:
-                                self._results[s.name()] = result
-                                self._pending -= 1
-                                if self._pending <= 0:
-                                    self._done_event.set()
-                        except Exception as e:
-                            # registro local
-                            self.logger.error(f"subtask success handler error: {e}")
-
-                    return _on_success
-
-                def make_error_handler(s, t):
-                    def _on_error(exc):
-                        try:
-                            try:
-                                s.on_error(self._context, exc)
-                            except Exception as e:
-                                self.logger.error(f"substep on_error error: {e}")
-
-                            with self._lock:
-                                # registra primeira exceção
-                                if self._error is None:
-                                    self._error = exc
-                                # força cancelamento das demais
-                                for st in self._subtasks:
-                                    try:
-                                        st.cancel()
-                                    except Exception as e:
-                                        self.logger.error(
-                                            f"Error cancelling subtask: {e}"
-                                        )
-
-                                self._done_event.set()
-                        except Exception as e:
-                            self.logger.error(f"subtask error handler error: {e}")
-
-                    return _on_error
-
-                # Attach handlers
-                task.on_success = make_success_handler(step, task)
-                task.on_error = make_error_handler(step, task)
-
-                # Forward subtask progress to group progress
+                    self.logger.error(f"work_size error in {step.name()}: {e}")
+                    weight = 1.0
+                self._weights[index] = max(0.0, weight)
+                self._step_progress[index] = 0.0
+                self._attempts[index] = 0
+                self._queue.append(index)
+
+            self._launch_available()
+
+        # Aguarda conclusão ou cancelamento (bloqueante, sem busy-wait):
+        # os handlers das subtasks e o cancel() do grupo acordam o evento.
+        self._done_event.wait(self.isCanceled)
+
+        if self.isCanceled():
+            with self._lock:
+                self._queue.clear()
+            # Propaga cancelamento para subtasks
+            self._cancel_running("Error cancelling subtask during shutdown")
+
+        self.logger.debug(
+            "ParallelGroup aguardou subtasks",
+            code="PARALLEL_WAIT",
+            subtasks=len(self._subtasks),
+            max_concurrency=self._max_concurrency,
+            error_policy=self._error_policy,
+            collected_errors=len(self._errors),
+            **self._done_event.stats(),
+        )
+
+        # Retorna sucesso se não houve erro
+        return self._error is None
+
+    # -----------------------------
+    # Fila de sub-steps
+    # -----------------------------
+
+    def _launch_available(self) -> None:
+        """Agenda sub-steps da fila enquanto houver vaga. Chamar com o lock."""
+        while (
+            self._queue
+            and self._error is None
+            and not self.isCanceled()
+            and len(self._running) < self._max_concurrency
+        ):
+            index = self._queue.popleft()
+            self._launch(index)
+        self._check_done()
+
+    def _launch(self, index: int) -> None:
+        step = self._steps[index]
+        self._attempts[index] += 1
+        try:
+            task = step.create_task(self._context)
+        except Exception as e:
+            # falha ao criar task -> trata como erro do sub-step
+            self._handle_failure(index, step, None, e)
+            return
+
+        if task is None:
+            # step optou por não criar task
+            self._step_progress[index] = 100.0
+            return
+
+        self._subtasks.append(task)
+        self._subtask_names[id(task)] = step.name()
+        self._step_progress[index] = 0.0
+
+        # Envolva callbacks para coletar resultados
+        task.on_success = self._make_success_handler(index, step, task)
+        task.on_error = self._make_error_handler(index, step, task)
+
+        # Forward subtask progress to group progress
+        try:
+            task.progressChanged.connect(
+                lambda value, i=index: self._on_subtask_progress(i, value)
+            )
+        except Exception as e:
+            self.logger.error(f"Failed connecting progressChanged: {e}")
+
+        self._running[index] = task
+        try:
+            if self.profiler is not None:
+                self.profiler.task_queued(
+                    task,
+                    step.name(),
+                    kind="subtask",
+                    parent=self.description(),
+                )
+            (self.executor or TaskExecutor.default()).submit(task)
+        except Exception as e:
+            # falha ao agendar
+            self._running.pop(index, None)
+            self._handle_failure(index, step, task, e, retry=False)
+
+    def _check_done(self) -> None:
+        if self._error is not None or (not self._queue and not self._running):
+            self._done_event.set()
+
+    def _make_success_handler(self, index: int, step: BaseStep, task: QgsTask):
+        def _on_success(result):
+            self._profile_finished(task, "success")
+            try:
+                # permite que o próprio sub-step aplique sua lógica
                 try:
-                    task.progressChanged.connect(self._on_subtask_progress)
+                    step.on_success(self._context, result)
                 except Exception as e:
-                    self.logger.error(f"Failed connecting progressChanged: {e}")
-                self._pending += 1
+                    self.logger.error(f"substep on_success error: {e}")
 
-        # Se erro na criação das tasks
-        if self._error:
-            return False
+                with self._lock:
+                    self._running.pop(index, None)
+                    self._results[step.name()] = result
+                    self._step_progress[index] = 100.0
+                    self._launch_available()
+                self._publish_progress()
+            except Exception as e:
+                # registro local
+                self.logger.error(f"subtask success handler error: {e}")
 
-        # Agenda subtasks
-        for st in list(self._subtasks):
+        return _on_success
 
+    def _make_error_handler(self, index: int, step: BaseStep, task: QgsTask):
+        def _on_error(exc):
+            self._profile_finished(task, "error")
             try:
-                QgsApplication.taskManager().addTask(st)
-            except Exception as e:
-                # falha ao agendar
                 with self._lock:
-                    if self._error is None:
-                        self._error = e
-                    # cancela os já agendados
-                    for s in self._subtasks:
-                        try:
-                            s.cancel()
-                        except Exception as e:
-                            self.logger.error(
-                                f"Error cancelling scheduled subtask: {e}"
-                            )
-
-                    self._done_event.set()
-                break
-
-        # Aguarda conclusão ou cancelamento
-        while not self._done_event.is_set():
-            if self.isCanceled():
-                # Propaga cancelamento para subtasks
-                for st in list(self._subtasks):
-                    try:
-                        st.cancel()
-                    except Exception as e:
-                        self.logger.error(
-                            f"Error cancelling subtask during shutdown: {e}"
-                        )
-                self._done_event.set()
-                break
-            QgsApplication.processEvents()
-            time.sleep(0.01)
+                    self._running.pop(index, None)
+                    self._handle_failure(index, step, task, exc)
+            except Exception as e:
+                self.logger.error(f"subtask error handler error: {e}")
 
-        # Retorna sucesso se não houve erro
-        return self._error is None
+        return _on_error
+
+    def _handle_failure(
+        self,
+        index: int,
+        step: BaseStep,
+        task: Optional[QgsTask],
+        exc: Exception,
+        retry: bool = True,
+    ) -> None:
+        """Aplica a política de erro. Chamar com o lock."""
+        if retry and self._attempts.get(index, 0) <= self._max_retries and not self.isCanceled():
+            self.logger.warning(
+                f"Sub-step {step.name()} falhou; nova tentativa",
+                code="PARALLEL_SUBTASK_RETRY",
+                attempt=self._attempts.get(index, 0),
+                max_retries=self._max_retries,
+                error=str(exc),
+            )
+            self._step_progress[index] = 0.0
+            self._queue.appendleft(index)
+            self._launch_available()
+            return
 
-    def _on_subtask_progress(self, value: float) -> None:
-        # Calcula média simples de progresso entre subtasks
         try:
-            # tenta ler progress individuais (não disponível), então apenas
-            # estima com base no último valor recebido e número de tasks
-            # para manter o feed de progresso ao engine.
-            # Aqui adotamos: group_progress = value / max(1, len(self._subtasks))
-            total = max(1, len(self._subtasks))
-            group_progress = min(100.0, float(value) / total)
+            step.on_error(self._context, exc)
+        except Exception as e:
+            self.logger.error(f"substep on_error error: {e}")
+
+        if self._error_policy == ParallelStep.ERROR_COLLECT:
+            self._errors.append(
+                {"step": step.name(), "error": exc, "attempts": self._attempts.get(index, 0)}
+            )
+            self._step_progress[index] = 100.0
+            self._launch_available()
+            self._publish_progress()
+            return
+
+        # fail-fast: registra primeira exceção e cancela as demais
+        if self._error is None:
+            self._error = exc
+        self._queue.clear()
+        self._cancel_running("Error cancelling subtask")
+        self._done_event.set()
+
+    def _cancel_running(self, message: str) -> None:
+        with self._lock:
+            running = list(self._running.values())
+        for task in running:
             try:
-                self.setProgress(int(group_progress))
+                task.cancel()
             except Exception as e:
-                self.logger.error(f"_on_subtask_progress setProgress error: {e}")
+                self.logger.error(f"{message}: {e}")
+
+    def cancel(self) -> None:
+        super().cancel()
+        self._done_event.set()
+
+    def _profile_finished(self, task: QgsTask, status: str) -> None:
+        if self.profiler is None:
+            return
+        try:
+            self.profiler.task_finished(task, status)
+        except Exception as e:
+            self.logger.error(f"Failed profiling subtask: {e}")
+
+    # -----------------------------
+    # Progresso
+    # -----------------------------
+
+    def _on_subtask_progress(self, index: int, value: float) -> None:
+        try:
+            self._step_progress[index] = max(0.0, min(100.0, float(value)))
+            self._publish_progress()
         except Exception as e:
             self.logger.error(f"_on_subtask_progress error: {e}")
 
+    def _publish_progress(self) -> None:
+        # Média do progresso de cada sub-step ponderada por work_size()
+        total_weight = sum(self._weights.values())
+        if total_weight > 0:
+            group_progress = (
+                sum(self._step_progress[i] * w for i, w in self._weights.items()) / total_weight
+            )
+        else:
+            group_progress = sum(self._step_progress.values()) / max(1, len(self._step_progress))
+        try:
+            self.setProgress(group_progress)
+        except Exception as e:
+            self.logger.error(f"_on_subtask_progress setProgress error: {e}")
+
     def finished(self, success: bool):
+        if self._errors:
+            self.logger.warning(
+                "Sub-steps com erro coletados",
+                code="PARALLEL_ERRORS_COLLECTED",
+                errors=[{"step": e["step"], "error": str(e["error"])} for e in self._errors],
+            )
+        try:
+            self._context.set("parallel_errors", list(self._errors))
+        except Exception as e:
+            self.logger.error(f"Failed storing parallel_errors: {e}")
+
         # Se sucesso, chama on_success com dicionário de resultados
         if success and self._error is None:
             if callable(self.on_success):
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
+import os
 import re
 
 from .BaseStep import BaseStep
+from .CheckpointStore import CheckpointStore
 from .ExecutionContext import ExecutionContext
 from ..task.PhotoMetadataTask import PhotoMetadataTask
 from ..config.LogUtils import LogUtils
@@ -11,7 +13,17 @@ from qgis.PyQt.QtCore import QVariant
 
 
 class PhotoMetadataStep(BaseStep):
-    """Step para aplicar metadados de fotos diretamente na camada."""
+    """
+    Step para aplicar metadados de fotos diretamente na camada.
+
+    `workers`: threads que leem as fotos ao mesmo tempo (None usa
+    `PhotoMetadata.DEFAULT_WORKERS`, 1 lê em sequência). Progresso e
+    cancelamento seguem pela task do step, como no modo sequencial.
+
+    `project_fields`: lê das fotos só os campos selecionados. None (padrão)
+    decide pelo contexto: projeta quando `generate_report` está definido e
+    falso, já que o relatório usa o JSON completo.
+    """
 
     _NUMERIC_RE = re.compile(r"^[+-]?\d+(?:\.\d+)?$")
     _FORCE_STRING_FIELD_KEYS = {
@@ -46,9 +58,30 @@ class PhotoMetadataStep(BaseStep):
         MetadataFields.resolve_output_name(key) for key in _FORCE_STRING_FIELD_KEYS
     }
 
+    def __init__(self, workers: int = None, project_fields: bool = None):
+        self.workers = workers
+        self.project_fields = project_fields
+
     def name(self) -> str:
         return "PhotoMetadataStep"
 
+    def reads(self):
+        return [
+            "layer",
+            "base_folder",
+            "recursive",
+            "points",
+            "selected_required_fields",
+            "selected_custom_fields",
+            "selected_mrk_fields",
+            "generate_report",
+            "tool_key",
+        ]
+
+    def writes(self):
+        # "layer" é alterada in-place (novos campos/valores)
+        return ["layer", "photo_metadata_json_path"]
+
     @classmethod
     def _is_numeric_candidate(cls, field_name, value):
         if field_name in cls._FORCE_STRING_FIELDS:
@@ -109,6 +142,53 @@ class PhotoMetadataStep(BaseStep):
         except Exception:
             return None
 
+    def _project_fields(self, context: ExecutionContext) -> bool:
+        if self.project_fields is not None:
+            return self.project_fields
+        return context.has("generate_report") and not context.get("generate_report")
+
+    @staticmethod
+    def _mrk_paths(points):
+        """Caminhos únicos dos MRKs de origem dos pontos."""
+        if hasattr(points, "column") and "mrk_path" in points.fields():
+            values = points.column("mrk_path")
+        else:
+            values = (p.get("mrk_path") for p in points if isinstance(p, dict))
+        return sorted({str(v) for v in values if v})
+
+    def checkpoint_key(self, context: ExecutionContext):
+        # Roda na thread da GUI: só `stat` dos MRKs e das fotos, sem ler
+        # conteúdo nem serializar os pontos. O payload restaurado é aplicado
+        # sem reler nenhuma foto, então fotos novas, apagadas ou
+        # regravadas precisam mudar o fingerprint.
+        points = context.get("points", []) or []
+        base_folder = context.get("base_folder")
+        recursive = context.get("recursive", True)
+        return {
+            "base_folder": base_folder,
+            "recursive": recursive,
+            "selected_required_fields": context.get("selected_required_fields", []),
+            "selected_custom_fields": context.get("selected_custom_fields", []),
+            "selected_mrk_fields": context.get("selected_mrk_fields", []),
+            "project_fields": self._project_fields(context),
+            "points_total": len(points),
+            "mrk_files": CheckpointStore.file_identities(self._mrk_paths(points)),
+            "photos": CheckpointStore.file_identities(
+                [base_folder] if base_folder else [], [".jpg"], recursive
+            ),
+        }
+
+    def serialize_checkpoint(self, context: ExecutionContext, result):
+        # Alterações na camada não são serializáveis; guarda o resultado da task
+        return result
+
+    def checkpoint_valid(self, context: ExecutionContext, payload) -> bool:
+        json_dump_path = (payload or {}).get("json_dump_path")
+        return not json_dump_path or os.path.isfile(json_dump_path)
+
+    def restore_checkpoint(self, context: ExecutionContext, payload):
+        self.on_success(context, payload)
+
     def create_task(self, context: ExecutionContext):
         context.require(["layer", "base_folder", "recursive", "tool_key"])
 
@@ -122,6 +202,8 @@ class PhotoMetadataStep(BaseStep):
             selected_custom_fields=context.get("selected_custom_fields", []),
             selected_mrk_fields=context.get("selected_mrk_fields", []),
             tool_key=context.get("tool_key"),
+            workers=self.workers,
+            project_fields=self._project_fields(context),
         )
 
     def on_success(self, context: ExecutionContext, result):
@@ -14,6 +14,12 @@ class PhotoVectorizationStep(BaseStep):
     def name(self) -> str:
         return "PhotoVectorizationStep"
 
+    def reads(self):
+        return ["base_folder", "recursive", "layer_name", "iface", "tool_key"]
+
+    def writes(self):
+        return ["json_path", "layer", "report_payload", "total_points", "quality"]
+
     def create_task(self, context: ExecutionContext):
         context.require(["base_folder", "recursive", "layer_name", "tool_key"])
 
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from ..config.LogUtils import LogUtils
+from ...utils.ExplorerUtils import ExplorerUtils
+
+
+class PipelineProfiler:
+    """
+    Instrumentação por step/subtask do `AsyncPipelineEngine`.
+
+    Para cada task registra espera na fila, tempo de parede e de CPU, pico de
+    memória Python (tracemalloc, se ativo) e itens processados. Os números de
+    execução vêm de `BaseTask.metrics` (medidos na thread worker); tasks que
+    não herdam de `BaseTask` têm apenas fila + tempo total visto pelo engine.
+
+    O engine também amostra o tamanho estimado do `ExecutionContext` após
+    cada step (`context_sampled`), exportado como contador no trace.
+
+    Cada registro vira um evento `PIPELINE_STEP_PROFILE` no `LogUtils` e pode
+    ser exportado para o formato Chrome trace-event (chrome://tracing,
+    Perfetto) com `export_chrome_trace()`.
+    """
+
+    PROFILES_TEMP_FOLDER = "profiles"
+
+    def __init__(
+        self,
+        tool_key: str = "AsyncPipelineEngine",
+        *,
+        trace_memory: bool = False,
+        export_trace: bool = False,
+    ):
+        self.tool_key = tool_key
+        self.trace_memory = trace_memory
+        self.export_trace = export_trace
+        self.logger = LogUtils(tool=tool_key, class_name="PipelineProfiler")
+
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._queued: Dict[int, Dict[str, Any]] = {}
+        self._records: List[Dict[str, Any]] = []
+        self._context_samples: List[Dict[str, Any]] = []
+        self._started_tracemalloc = False
+        self._active = False
+
+    # -----------------------------
+    # Ciclo do pipeline
+    # -----------------------------
+
+    def start(self) -> None:
+        with self._lock:
+            self._origin = time.perf_counter()
+            self._queued = {}
+            self._records = []
+            self._context_samples = []
+        self._active = True
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self, status: str, context_memory: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Encerra o perfil, loga o resumo e exporta o trace (se configurado).
+
+        `context_memory` é o `ExecutionContext.memory_report()` do pipeline.
+        """
+        if not self._active:
+            return None
+        self._active = False
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        records = self.records()
+        self.logger.info(
+            "Perfil do pipeline",
+            code="PIPELINE_PROFILE_SUMMARY",
+            status=status,
+            total_wall_s=round(time.perf_counter() - self._origin, 4),
+            tasks=len(records),
+            slowest=sorted(records, key=lambda r: r.get("wall_s") or 0, reverse=True)[:3],
+        )
+        if context_memory:
+            self.logger.info(
+                "Memória do ExecutionContext",
+                code="PIPELINE_CONTEXT_MEMORY",
+                status=status,
+                peak_kb=round(context_memory.get("peak_bytes", 0) / 1024.0, 1),
+                peak_step=context_memory.get("peak_step"),
+                current_kb=round(context_memory.get("current_bytes", 0) / 1024.0, 1),
+                largest_keys={
+                    key: round(size / 1024.0, 1)
+                    for key, size in list(context_memory.get("by_key", {}).items())[:5]
+                },
+                spilled=list(context_memory.get("spilled", {})),
+                by_step=[
+                    (entry["step"], round(entry["context_bytes"] / 1024.0, 1))
+                    for entry in context_memory.get("by_step", [])
+                ],
+            )
+        if self.export_trace:
+            return self.export_chrome_trace()
+        return None
+
+    # -----------------------------
+    # Tasks
+    # -----------------------------
+
+    def task_queued(self, task, name: str, *, kind: str = "step", parent: str = None) -> None:
+        with self._lock:
+            self._queued[id(task)] = {
+                "name": name,
+                "kind": kind,
+                "parent": parent,
+                "queued_at": time.perf_counter(),
+            }
+
+    def task_finished(self, task, status: str) -> Optional[Dict[str, Any]]:
+        now = time.perf_counter()
+        with self._lock:
+            queued = self._queued.pop(id(task), None)
+        if queued is None:
+            return None
+
+        metrics = getattr(task, "metrics", None) or {}
+        started_at = metrics.get("started_at")
+        finished_at = metrics.get("finished_at") or now
+        queued_at = queued["queued_at"]
+
+        if started_at is not None:
+            queue_wait = max(0.0, started_at - queued_at)
+            wall = max(0.0, finished_at - started_at)
+        else:
+            # QgsTask sem instrumentação: só o total visto pelo engine
+            started_at = queued_at
+            queue_wait = None
+            wall = max(0.0, now - queued_at)
+
+        peak = metrics.get("peak_mem_bytes")
+        record = {
+            "name": queued["name"],
+            "kind": queued["kind"],
+            "parent": queued["parent"],
+            "status": status,
+            "start_s": round(started_at - self._origin, 6),
+            "queue_wait_s": None if queue_wait is None else round(queue_wait, 6),
+            "wall_s": round(wall, 6),
+            "cpu_s": metrics.get("cpu_s"),
+            "peak_mem_kb": None if peak is None else round(peak / 1024.0, 1),
+            "items": getattr(task, "items_processed", None),
+            "thread_id": metrics.get("thread_id"),
+        }
+        with self._lock:
+            self._records.append(record)
+
+        self.logger.info(
+            f"Perfil de {record['kind']} {record['name']}",
+            code="PIPELINE_STEP_PROFILE",
+            **record,
+        )
+        return record
+
+    def step_skipped(self, name: str, reason: str) -> None:
+        with self._lock:
+            self._records.append(
+                {
+                    "name": name,
+                    "kind": "step",
+                    "parent": None,
+                    "status": reason,
+                    "start_s": round(time.perf_counter() - self._origin, 6),
+                    "queue_wait_s": 0.0,
+                    "wall_s": 0.0,
+                    "cpu_s": None,
+                    "peak_mem_kb": None,
+                    "items": None,
+                    "thread_id": None,
+                }
+            )
+
+    def context_sampled(self, step_name: str, context_bytes: int) -> None:
+        with self._lock:
+            self._context_samples.append(
+                {
+                    "step": step_name,
+                    "bytes": context_bytes,
+                    "at_s": round(time.perf_counter() - self._origin, 6),
+                }
+            )
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(r) for r in self._records]
+
+    # -----------------------------
+    # Exportação
+    # -----------------------------
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Eventos no formato Chrome trace-event (ph "X", tempos em µs)."""
+        pid = os.getpid()
+        events = []
+        for record in self.records():
+            start_us = record["start_s"] * 1e6
+            tid = record.get("thread_id") or 0
+            args = {
+                k: record[k]
+                for k in ("status", "parent", "cpu_s", "peak_mem_kb", "items", "queue_wait_s")
+                if record.get(k) is not None
+            }
+            if record.get("queue_wait_s"):
+                wait_us = record["queue_wait_s"] * 1e6
+                events.append(
+                    {
+                        "name": f"{record['name']} (fila)",
+                        "cat": "queue",
+                        "ph": "X",
+                        "ts": start_us - wait_us,
+                        "dur": wait_us,
+                        "pid": pid,
+                        "tid": "fila",
+                    }
+                )
+            events.append(
+                {
+                    "name": record["name"],
+                    "cat": record["kind"],
+                    "ph": "X" if record["wall_s"] else "i",
+                    "ts": start_us,
+                    "dur": record["wall_s"] * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        with self._lock:
+            samples = list(self._context_samples)
+        for sample in samples:
+            events.append(
+                {
+                    "name": "ExecutionContext (KB)",
+                    "ph": "C",
+                    "ts": sample["at_s"] * 1e6,
+                    "pid": pid,
+                    "args": {"kb": round(sample["bytes"] / 1024.0, 1)},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: Optional[str] = None) -> Optional[str]:
+        output_path = path or ExplorerUtils.build_temp_file_path(
+            self.PROFILES_TEMP_FOLDER,
+            tool_key=self.tool_key,
+            prefix="pipeline_trace",
+            extension=".json",
+        )
+        try:
+            with open(output_path, "w", encoding="utf-8") as fh:
+                json.dump(self.to_chrome_trace(), fh, ensure_ascii=False)
+        except Exception as e:
+            self.logger.error(f"Falha ao exportar trace do pipeline: {e}")
+            return None
+        self.logger.info(
+            "Trace do pipeline exportado",
+            code="PIPELINE_TRACE_EXPORTED",
+            path=output_path,
+        )
+        return output_path
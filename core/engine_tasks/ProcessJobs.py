@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Funções executadas nos processos do `ProcessPoolBackend`.
+
+Este módulo é importado DENTRO dos processos worker, que não têm QGIS
+carregado. Por isso:
+- só bibliotecas padrão e módulos também livres de QGIS (ex.:
+  `processing/model/attribute_statistics_model.py`,
+  `core/model/MrkFileReader.py`);
+- nada de `LogUtils`, `utils.*` ou `qgis.*` (o `utils/__init__` importa
+  `qgis.core`);
+- entradas e saídas precisam ser picklable (listas, dicts, números, str).
+
+Cada job recebe UM lote (lista de itens) e devolve uma lista de resultados
+na mesma ordem.
+"""
+
+from array import array
+from typing import Any, Dict, List, Tuple
+
+from ..model.MrkFileReader import MrkFileReader
+from ...processing.model.attribute_statistics_model import StatsCalculator
+
+
+class ProcessJobs:
+
+    @staticmethod
+    def field_stats(
+        batch: List[Tuple[str, List[float], Dict[str, bool]]],
+    ) -> List[Tuple[str, Dict[str, float]]]:
+        """Lote de (campo, valores, stats_enabled) -> (campo, estatísticas)."""
+        return [
+            (field_name, StatsCalculator.compute_field_stats(values, stats_enabled))
+            for field_name, values, stats_enabled in batch
+        ]
+
+    @staticmethod
+    def mrk_arrays(batch: List[str]) -> List[Dict[str, array]]:
+        """Lote de arquivos MRK -> colunas numéricas de cada um (`MrkFileReader.read_arrays`)."""
+        return [MrkFileReader.read_arrays(file_path) for file_path in batch]
+
+    @staticmethod
+    def echo(batch: List[Any]) -> List[Any]:
+        """Devolve o lote sem alterações (diagnóstico do pool)."""
+        return list(batch)
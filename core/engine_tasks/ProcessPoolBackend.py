@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional
+
+from ..config.LogUtils import LogUtils
+from .StreamChannel import StreamChannel
+
+
+class ProcessPoolBackend:
+    """
+    Pool de processos compartilhado para trabalho CPU-bound das tasks.
+
+    As QgsTasks rodam em threads e disputam o GIL; cálculos puramente Python
+    (estatísticas, campos derivados, juízes de sequência) não escalam com os
+    núcleos. Este backend envia lotes para um `ProcessPoolExecutor` e devolve
+    progresso/cancelamento à task dona, que continua sendo quem fala com o
+    QGIS.
+
+    Regras para `func`:
+    - função de módulo livre de QGIS (ver `ProcessJobs`), referenciável por
+      nome (pickle): nada de lambdas/closures;
+    - recebe um lote (lista) e devolve uma lista do mesmo tamanho.
+
+    O cancelamento é por lote: lotes pendentes são descartados na hora, os
+    que já estão num worker terminam e o resultado é ignorado.
+
+    Se o pool não puder ser criado (ex.: interpretador Python do QGIS não
+    encontrado) ou quebrar, os lotes rodam na própria thread da task.
+    """
+
+    DEFAULT_MIN_BATCHES = 2
+    _WAIT_SLICE = 0.1
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_workers: Optional[int] = None, tool_key: str = "ProcessPoolBackend"):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.logger = LogUtils(tool=tool_key, class_name="ProcessPoolBackend")
+        self._executor = None
+        self._disabled_reason = None
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Instância compartilhada
+    # -----------------------------
+
+    @classmethod
+    def shared(cls) -> "ProcessPoolBackend":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def shutdown_shared(cls) -> None:
+        """Encerra o pool compartilhado (chamado no unload do plugin)."""
+        with cls._shared_lock:
+            backend, cls._shared = cls._shared, None
+        if backend is not None:
+            backend.shutdown()
+
+    # -----------------------------
+    # Pool
+    # -----------------------------
+
+    @staticmethod
+    def resolve_python_executable() -> Optional[str]:
+        """
+        Interpretador usado para iniciar os workers.
+
+        Dentro do QGIS `sys.executable` costuma ser o próprio binário do QGIS
+        (ex.: qgis-bin.exe); nesse caso procuramos o python da mesma
+        instalação.
+        """
+        current = sys.executable or ""
+        if os.path.basename(current).lower().startswith("python"):
+            return current
+
+        candidates = [
+            os.path.join(sys.exec_prefix, "pythonw.exe"),
+            os.path.join(sys.exec_prefix, "python.exe"),
+            os.path.join(sys.exec_prefix, "python3.exe"),
+            os.path.join(sys.exec_prefix, "bin", "python3"),
+            os.path.join(sys.exec_prefix, "bin", "python"),
+        ]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+        return shutil.which("python3") or shutil.which("python")
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if self._executor is not None or self._disabled_reason:
+                return self._executor
+
+            executable = self.resolve_python_executable()
+            if not executable:
+                self._disable("interpretador Python não encontrado")
+                return None
+            try:
+                # "spawn" em todas as plataformas: fork com threads do Qt
+                # vivas não é seguro.
+                ctx = multiprocessing.get_context("spawn")
+                ctx.set_executable(executable)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=ctx
+                )
+            except Exception as e:
+                self._disable(f"falha ao criar pool: {e}")
+                return None
+
+            self.logger.info(
+                "Pool de processos criado",
+                code="PROCESS_POOL_STARTED",
+                workers=self.max_workers,
+                executable=executable,
+            )
+            return self._executor
+
+    def _disable(self, reason: str) -> None:
+        self._disabled_reason = reason
+        self.logger.warning(
+            f"Pool de processos indisponível ({reason}); usando execução local",
+            code="PROCESS_POOL_UNAVAILABLE",
+        )
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def available(self) -> bool:
+        return self._get_executor() is not None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    # -----------------------------
+    # Execução
+    # -----------------------------
+
+    def map(
+        self,
+        func: Callable[[List[Any]], List[Any]],
+        items: List[Any],
+        *,
+        batch_size: Optional[int] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_progress: Optional[Callable[[float], None]] = None,
+        min_batches: int = DEFAULT_MIN_BATCHES,
+    ) -> Optional[List[Any]]:
+        """
+        Aplica `func` aos itens em lotes e devolve os resultados na ordem.
+
+        Retorna None se `is_cancelled()` ficar verdadeiro. Com menos de
+        `min_batches` lotes roda localmente (o custo de iniciar/serializar
+        não compensa).
+        """
+        items = list(items)
+        if not items:
+            return []
+        size = batch_size or max(1, -(-len(items) // (self.max_workers * 4)))
+        batches = list(StreamChannel.chunked(items, size))
+
+        executor = self._get_executor() if len(batches) >= min_batches else None
+        if executor is not None:
+            try:
+                return self._map_in_pool(executor, func, batches, is_cancelled, on_progress)
+            except BrokenProcessPool as e:
+                self.logger.warning(
+                    f"Pool de processos quebrou ({e}); reprocessando localmente",
+                    code="PROCESS_POOL_BROKEN",
+                )
+                self._discard_executor(executor)
+
+        return self._map_local(func, batches, is_cancelled, on_progress)
+
+    def _map_in_pool(self, executor, func, batches, is_cancelled, on_progress):
+        futures = {executor.submit(func, batch): index for index, batch in enumerate(batches)}
+        results: List[Optional[List[Any]]] = [None] * len(batches)
+        pending = set(futures)
+
+        while pending:
+            if is_cancelled is not None and is_cancelled():
+                for future in pending:
+                    future.cancel()
+                return None
+            done, pending = wait(pending, timeout=self._WAIT_SLICE, return_when=FIRST_COMPLETED)
+            for future in done:
+                # Exceção do job é repassada à task dona
+                results[futures[future]] = future.result()
+            if done and on_progress is not None:
+                on_progress(100.0 * (len(batches) - len(pending)) / len(batches))
+
+        return [item for batch_result in results for item in batch_result]
+
+    def _map_local(self, func, batches, is_cancelled, on_progress):
+        results = []
+        for index, batch in enumerate(batches, start=1):
+            if is_cancelled is not None and is_cancelled():
+                return None
+            results.extend(func(batch))
+            if on_progress is not None:
+                on_progress(100.0 * index / len(batches))
+        return results
@@ -14,6 +14,19 @@ class ReportGenerationStep(BaseStep):
     def name(self) -> str:
         return "ReportGenerationStep"
 
+    def reads(self):
+        return [
+            "json_path",
+            "photo_metadata_json_path",
+            "report_json_path",
+            "html_output_path",
+            "iface",
+            "tool_key",
+        ]
+
+    def writes(self):
+        return ["json_path", "report_payload"]
+
     def _resolve_json_path(self, context: ExecutionContext):
         return (
             context.get("json_path")
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+
+class StreamClosedError(RuntimeError):
+    """Canal cancelado/falhou enquanto produtor ou consumidor o usava."""
+
+
+class StreamChannel:
+    """
+    Canal limitado de lotes entre steps de streaming.
+
+    - O produtor chama `put(batch)`; com o buffer cheio, `put` bloqueia
+      (backpressure) até o consumidor retirar um lote.
+    - O consumidor itera `batches()` até o canal ser fechado (`close()`).
+    - `fail(exc)` propaga o erro do produtor ao consumidor depois dos lotes
+      já publicados; `cancel()` acorda e interrompe os dois lados.
+
+    `capacity=0` deixa o buffer ilimitado (usado quando produtor e consumidor
+    não rodam ao mesmo tempo, ex.: engine em modo sequencial).
+    """
+
+    DEFAULT_CAPACITY = 8
+    DEFAULT_BATCH_SIZE = 500
+    _WAIT_SLICE = 0.1
+
+    def __init__(self, name: str, capacity: int = DEFAULT_CAPACITY):
+        self.name = name
+        self.capacity = capacity
+        self._queue: "queue.Queue[List[Any]]" = queue.Queue(maxsize=capacity)
+        self._closed = threading.Event()
+        self._cancelled = False
+        self._error: Optional[BaseException] = None
+
+        self.batches_put = 0
+        self.items_put = 0
+        self.max_depth = 0
+        self.producer_blocked_s = 0.0
+
+    # -----------------------------
+    # Produtor
+    # -----------------------------
+
+    def put(
+        self,
+        batch: List[Any],
+        is_cancelled: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        if self._closed.is_set():
+            raise StreamClosedError(f"Stream '{self.name}' já foi fechado")
+
+        started = time.perf_counter()
+        while True:
+            if self._cancelled or (is_cancelled is not None and is_cancelled()):
+                raise StreamClosedError(f"Stream '{self.name}' cancelado")
+            try:
+                self._queue.put(batch, timeout=self._WAIT_SLICE)
+                break
+            except queue.Full:
+                continue
+
+        # Tempo em put() ~ tempo bloqueado pelo backpressure
+        self.producer_blocked_s += time.perf_counter() - started
+        self.batches_put += 1
+        self.items_put += len(batch)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def fail(self, exc: BaseException) -> None:
+        if self._error is None:
+            self._error = exc
+        self._closed.set()
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self._closed.set()
+        # Esvazia o buffer para liberar um produtor bloqueado em put()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    # -----------------------------
+    # Consumidor
+    # -----------------------------
+
+    def get(self, is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[List[Any]]:
+        """
+        Próximo lote; None quando o canal foi fechado e esvaziado.
+
+        Lotes publicados antes de `fail()` ainda são entregues; o erro do
+        produtor só sobe quando o buffer esvazia.
+        """
+        while True:
+            if self._cancelled or (is_cancelled is not None and is_cancelled()):
+                raise StreamClosedError(f"Stream '{self.name}' cancelado")
+            # Lido antes do buffer: o produtor só fecha depois do último put
+            closed = self._closed.is_set()
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if self._error is not None:
+                raise StreamClosedError(
+                    f"Produtor do stream '{self.name}' falhou: {self._error}"
+                )
+            if closed:
+                return None
+            try:
+                return self._queue.get(timeout=self._WAIT_SLICE)
+            except queue.Empty:
+                continue
+
+    def batches(
+        self, is_cancelled: Optional[Callable[[], bool]] = None
+    ) -> Iterator[List[Any]]:
+        while True:
+            batch = self.get(is_cancelled)
+            if batch is None:
+                return
+            yield batch
+
+    # -----------------------------
+    # Estado
+    # -----------------------------
+
+    def make_unbounded(self) -> None:
+        """Remove o limite do buffer (ex.: consumidor foi pulado)."""
+        with self._queue.mutex:
+            self._queue.maxsize = 0
+            self._queue.not_full.notify_all()
+        self.capacity = 0
+
+    def is_closed(self) -> bool:
+        return self._closed.is_set()
+
+    def stats(self) -> dict:
+        return {
+            "stream": self.name,
+            "capacity": self.capacity,
+            "batches": self.batches_put,
+            "items": self.items_put,
+            "max_depth": self.max_depth,
+            "producer_blocked_s": round(self.producer_blocked_s, 4),
+        }
+
+    @staticmethod
+    def chunked(items: List[Any], size: int) -> Iterator[List[Any]]:
+        size = max(1, int(size or StreamChannel.DEFAULT_BATCH_SIZE))
+        for start in range(0, len(items), size):
+            yield items[start : start + size]
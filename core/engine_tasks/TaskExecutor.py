@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from qgis.core import QgsApplication, QgsTask
+
+from ..config.LogUtils import LogUtils
+
+
+class TaskExecutor:
+    """
+    Onde o `AsyncPipelineEngine` e o `ParallelStep` executam suas QgsTasks.
+
+    A implementação padrão entrega as tasks ao `QgsApplication.taskManager()`
+    (comportamento de sempre dentro do QGIS). Executores alternativos, como o
+    `ThreadPoolTaskExecutor`, permitem rodar os mesmos steps sem GUI.
+
+    Tasks "pai", que só esperam outras tasks (`PipelineTask`,
+    `_ParallelGroupTask`), declaram `waits_for_subtasks = True`.
+    """
+
+    def submit(self, task: QgsTask) -> None:
+        QgsApplication.taskManager().addTask(task)
+
+    _default = None
+
+    @classmethod
+    def default(cls) -> "TaskExecutor":
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+
+class ThreadPoolTaskExecutor(TaskExecutor):
+    """
+    Executor headless: roda as QgsTasks num `ThreadPoolExecutor`.
+
+    Reproduz o contrato do gerenciador de tarefas do QGIS:
+    - `task.run()` roda numa thread do pool;
+    - `task.finished(ok)` roda na thread que chama `process_events()` /
+      `run_until_complete()` (papel da thread principal do QGIS);
+    - tasks "pai" ganham thread própria, para não ocuparem vagas do pool
+      enquanto esperam as subtasks (evita deadlock com pool pequeno).
+
+    Exemplo (script sem GUI, QgsApplication já inicializado):
+
+        executor = ThreadPoolTaskExecutor(max_workers=4)
+        engine = AsyncPipelineEngine(steps, context, executor=executor)
+        executor.run_until_complete(engine)
+        executor.shutdown()
+
+    Trabalho CPU-bound dentro das tasks continua podendo usar o pool de
+    processos (`BaseTask.map_in_processes`); as QgsTasks em si não são
+    picklable e por isso ficam em threads.
+    """
+
+    _WAIT_SLICE = 0.05
+
+    def __init__(self, max_workers: Optional[int] = None, tool_key: str = "TaskExecutor"):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="cadmus-task"
+        )
+        self._finished: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.logger = LogUtils(tool=tool_key, class_name="ThreadPoolTaskExecutor")
+
+    # -----------------------------
+    # Submissão
+    # -----------------------------
+
+    def submit(self, task: QgsTask) -> None:
+        with self._lock:
+            self._in_flight += 1
+        if getattr(task, "waits_for_subtasks", False):
+            threading.Thread(
+                target=self._run_task, args=(task,), name="cadmus-task-parent", daemon=True
+            ).start()
+        else:
+            self._pool.submit(self._run_task, task)
+
+    def _run_task(self, task: QgsTask) -> None:
+        ok = False
+        try:
+            ok = False if task.isCanceled() else bool(task.run())
+        except Exception as e:
+            # BaseTask já captura as próprias exceções; aqui só tasks cruas
+            self.logger.error(f"Task '{task.description()}' levantou exceção: {e}")
+            ok = False
+        finally:
+            self._finished.put((task, ok))
+
+    # -----------------------------
+    # "Thread principal"
+    # -----------------------------
+
+    def process_events(self, timeout: float = 0.0) -> int:
+        """
+        Entrega `finished()` das tasks concluídas. Retorna quantas entregou.
+
+        Também processa eventos Qt pendentes (sinais `progressChanged`
+        emitidos pelas threads do pool), se houver um QgsApplication.
+        """
+        delivered = 0
+        try:
+            task, ok = self._finished.get(timeout=timeout) if timeout else self._finished.get_nowait()
+        except queue.Empty:
+            task = None
+
+        while task is not None:
+            try:
+                task.finished(ok)
+            except Exception as e:
+                self.logger.error(f"Erro em finished() de '{task.description()}': {e}")
+            with self._lock:
+                self._in_flight -= 1
+            delivered += 1
+            try:
+                task, ok = self._finished.get_nowait()
+            except queue.Empty:
+                task = None
+
+        app = QgsApplication.instance()
+        if app is not None:
+            app.processEvents()
+        return delivered
+
+    def run_until(self, predicate: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """Bombeia `process_events()` até `predicate()`; False se estourar o timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.process_events(self._WAIT_SLICE)
+        return True
+
+    def run_until_complete(self, engine, timeout: Optional[float] = None) -> bool:
+        """
+        Inicia `engine` (se ainda não rodando) e bloqueia até ele terminar.
+
+        Retorna False se o timeout estourar (o engine é cancelado). Ao final
+        entrega também os `finished()` restantes (ex.: PipelineTask).
+        """
+        if not engine.is_running():
+            engine.start()
+        completed = self.run_until(lambda: not engine.is_running(), timeout)
+        if not completed:
+            engine.cancel()
+        self.run_until(lambda: self.in_flight() == 0, timeout=5.0)
+        return completed
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
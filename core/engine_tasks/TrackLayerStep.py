@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from .BaseStep import BaseStep
+from .ExecutionContext import ExecutionContext
+from ..task.TrackLayerTask import TrackLayerTask
+from ..config.LogUtils import LogUtils
+from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
+from ...utils.vector.VectorLayerSource import VectorLayerSource
+
+
+class TrackLayerStep(BaseStep):
+    """
+    Step que gera a trilha (linha) a partir dos pontos lidos dos MRKs.
+
+    Só depende de `points`, portanto no modo grafo roda em paralelo com o
+    `PhotoMetadataStep`. A task calcula as linhas; camada e GPKG são
+    criados em `on_success`, na thread principal.
+    """
+
+    def name(self) -> str:
+        return "TrackLayerStep"
+
+    def reads(self):
+        return [
+            "points",
+            "track_layer_name",
+            "auto_track_output_path",
+            "reuse_existing_outputs",
+            "tool_key",
+        ]
+
+    def writes(self):
+        return ["track_layer"]
+
+    def should_run(self, context: ExecutionContext) -> bool:
+        return bool(context.get("points"))
+
+    def create_task(self, context: ExecutionContext):
+        context.require(["points", "tool_key"])
+
+        return TrackLayerTask(
+            points=context.get("points"),
+            layer_name=context.get("track_layer_name", "Trilha"),
+            output_path=context.get("auto_track_output_path"),
+            tool_key=context.get("tool_key"),
+            # Só reaproveita o GPKG quando quem montou o contexto validou que ele
+            # é do MRK atual (`MrkParseCache.output_is_fresh`)
+            reuse_existing=context.get("reuse_existing_outputs", False),
+        )
+
+    def on_success(self, context: ExecutionContext, result):
+        result = result if isinstance(result, dict) else {}
+        tool_key = context.get("tool_key")
+        output_path = result.get("output_path")
+
+        track_layer = None
+        if result.get("reuse_existing"):
+            track_layer = VectorLayerSource.load_existing_vector_layer(
+                output_path, tool_key=tool_key
+            )
+
+        if not track_layer:
+            line_layer = None
+            if result.get("lines"):
+                line_layer = VectorLayerGeometry.create_line_layer_from_records(
+                    result.get("field_names"),
+                    result["lines"],
+                    name=result.get("layer_name", "Trilha"),
+                )
+            if line_layer and line_layer.isValid() and output_path:
+                track_layer = VectorLayerSource.save_and_load_layer(
+                    line_layer,
+                    output_path,
+                    tool_key=tool_key,
+                    decision="overwrite",
+                )
+            if not track_layer or not track_layer.isValid():
+                # Fallback: mantém a camada em memória
+                track_layer = line_layer
+
+        if not track_layer or not track_layer.isValid():
+            LogUtils(
+                tool=tool_key,
+                class_name=self.__class__.__name__,
+            ).warning("Trilha não gerada a partir dos pontos")
+            return
+
+        context.set("track_layer", track_layer)
@@ -126,4 +126,13 @@ class MetadataFieldKey(Enum):
     DATE_NAME = "DateName"
     MRK_FILE = "MrkFile"
     MRK_PATH = "MrkPath"
-    MRK_FOLDER = "MrkFolder"
\ No newline at end of file
+    MRK_FOLDER = "MrkFolder"
+    GPS_SOW = "GpsSow"
+    GPS_WEEK = "GpsWeek"
+    OFFSET_N = "OffsetN"
+    OFFSET_E = "OffsetE"
+    OFFSET_V = "OffsetV"
+    STD_N = "StdN"
+    STD_E = "StdE"
+    STD_V = "StdV"
+    FIX_FLAG = "FixFlag"
\ No newline at end of file
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ContextSlot:
+    """
+    Declaração de uma chave do `ExecutionContext`.
+
+    - `types`: tipos aceitos em `set()` (None é sempre aceito);
+    - `spillable`: o valor pode ser gravado em disco quando nenhum step
+      pendente o lê mais (ver `AsyncPipelineEngine`).
+    """
+
+    name: str
+    types: Tuple[type, ...] = (object,)
+    spillable: bool = False
+    description: Optional[str] = None
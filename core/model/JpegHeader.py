@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class JpegHeader:
+    """
+    Segmentos de um JPEG lidos até o início do scan (SOS), por
+    `JpegHeaderReader.read`.
+
+    - `exif`: payload APP1 "Exif\\0\\0" + TIFF (como `info["exif"]` do PIL);
+      `exif_offset` é a posição do TIFF no arquivo;
+    - `directories`: IFDs já separados (`ifd0`, `exif`, `gps`, `interop`),
+      cada um {tag: (tipo, quantidade, bytes do valor, offset no TIFF)};
+    - `makernote`: (offset no arquivo, tamanho) do MakerNote, sem decodificar;
+    - `xmp`: pacote XMP do APP1 "http://ns.adobe.com/xap/1.0/";
+    - `mpf_images`: número de imagens do índice MPF (APP2), se houver.
+    """
+
+    stat: Optional[os.stat_result] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bits: Optional[int] = None
+    components: Optional[int] = None
+    progressive: bool = False
+    jfif_unit: Optional[int] = None
+    jfif_density: Optional[Tuple[int, int]] = None
+    exif: Optional[bytes] = None
+    exif_offset: Optional[int] = None
+    byte_order: str = "<"
+    directories: Dict[str, Dict[int, tuple]] = field(default_factory=dict)
+    makernote: Optional[Tuple[int, int]] = None
+    xmp: Optional[bytes] = None
+    mpf_images: Optional[int] = None
+    ultra_hdr: bool = False
+    bytes_read: int = 0
+
+    @property
+    def is_mpo(self) -> bool:
+        """Mesma regra do PIL: MPF com 2+ imagens (exceto Ultra HDR)."""
+        return bool(self.mpf_images and self.mpf_images > 1 and not self.ultra_hdr)
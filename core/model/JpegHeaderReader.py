@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura do cabeçalho de JPEGs (fotos de drone) sem decodificar a imagem.
+
+Percorre os marcadores do SOI até o SOS: lê só os segmentos usados (SOF,
+APP0 JFIF, APP1 EXIF/XMP, APP2 MPF) e pula os demais com `seek`. Para uma
+foto de 20 MB isso são poucos KB de leitura.
+
+Livre de QGIS e de PIL: pode rodar em workers. A conversão para os tipos
+do PIL (nomes de tags, `IFDRational`) fica no `ExifUtil`.
+"""
+import os
+import struct
+from typing import Callable, Dict, Optional
+
+from .JpegHeader import JpegHeader
+
+
+class JpegHeaderReader:
+
+    SOI = b"\xff\xd8"
+    EXIF_ID = b"Exif\x00\x00"
+    XMP_ID = b"http://ns.adobe.com/xap/1.0/\x00"
+    MPF_ID = b"MPF\x00"
+    ULTRA_HDR_ID = b' hdrgm:Version="'
+
+    # SOF0..SOF15, exceto DHT (C4), JPG (C8) e DAC (CC)
+    SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+    PROGRESSIVE_MARKERS = frozenset((0xC2, 0xC6, 0xCA, 0xCE))
+    # Marcadores sem tamanho (TEM, RST0..7)
+    STANDALONE_MARKERS = frozenset((0x01, *range(0xD0, 0xD8)))
+
+    # Ponteiros para sub-IFDs
+    EXIF_IFD_TAG = 0x8769
+    GPS_IFD_TAG = 0x8825
+    INTEROP_IFD_TAG = 0xA005
+    MAKERNOTE_TAG = 0x927C
+    MPF_IMAGE_COUNT_TAG = 0xB001
+    MPF_ENTRIES_TAG = 0xB002
+
+    # tipo TIFF -> (tamanho do item, formato struct)
+    TIFF_TYPES = {
+        1: (1, "B"),
+        2: (1, "s"),
+        3: (2, "H"),
+        4: (4, "L"),
+        5: (8, "L"),
+        6: (1, "b"),
+        7: (1, "s"),
+        8: (2, "h"),
+        9: (4, "l"),
+        10: (8, "l"),
+        11: (4, "f"),
+        12: (8, "d"),
+        13: (4, "L"),
+        16: (8, "Q"),
+        17: (8, "q"),
+        18: (8, "Q"),
+    }
+    ASCII = 2
+    BYTE = 1
+    UNDEFINED = 7
+    RATIONAL = 5
+    SIGNED_RATIONAL = 10
+
+    # -----------------------------
+    # Segmentos
+    # -----------------------------
+
+    @staticmethod
+    def read(image_path: str) -> Optional[JpegHeader]:
+        """
+        Cabeçalho do JPEG ou None se o arquivo não começar com SOI ou
+        terminar antes do SOS (o PIL também não abre esses arquivos).
+
+        Levanta OSError (arquivo) e ValueError (segmento com tamanho
+        inválido); quem chama decide se volta para a leitura completa.
+        """
+        with open(image_path, "rb") as fh:
+            if fh.read(2) != JpegHeaderReader.SOI:
+                return None
+            header = JpegHeader(stat=os.fstat(fh.fileno()))
+            header.bytes_read = 2
+            if not JpegHeaderReader._read_segments(fh, header):
+                return None
+        return header
+
+    @staticmethod
+    def _read_segments(fh, header: JpegHeader) -> bool:
+        """Lê até o SOS. Retorna False se o arquivo acabar antes."""
+        while True:
+            byte = fh.read(1)
+            header.bytes_read += 1
+            if not byte:
+                return False
+            if byte != b"\xff":
+                # lixo entre segmentos: o PIL também ignora
+                continue
+            marker = fh.read(1)
+            header.bytes_read += 1
+            while marker == b"\xff":
+                # bytes de preenchimento
+                marker = fh.read(1)
+                header.bytes_read += 1
+            if not marker:
+                return False
+            code = marker[0]
+            if code == 0x00 or code == 0xD8 or code in JpegHeaderReader.STANDALONE_MARKERS:
+                continue
+            if code == 0xD9:
+                return False
+
+            raw_length = fh.read(2)
+            header.bytes_read += 2
+            if len(raw_length) != 2:
+                return False
+            length = struct.unpack(">H", raw_length)[0] - 2
+            if length < 0:
+                raise ValueError(f"Invalid JPEG segment length at marker 0x{code:02X}")
+
+            if code == 0xDA:
+                return True
+            if not JpegHeaderReader._wants_segment(code):
+                fh.seek(length, os.SEEK_CUR)
+                continue
+
+            offset = fh.tell()
+            payload = fh.read(length)
+            header.bytes_read += len(payload)
+            JpegHeaderReader._handle_segment(header, code, payload, offset)
+
+    @staticmethod
+    def _wants_segment(code: int) -> bool:
+        return code in (0xE0, 0xE1, 0xE2) or code in JpegHeaderReader.SOF_MARKERS
+
+    @staticmethod
+    def _handle_segment(header: JpegHeader, code: int, payload: bytes, offset: int) -> None:
+        if code in JpegHeaderReader.SOF_MARKERS:
+            if len(payload) >= 6:
+                header.bits = payload[0]
+                header.height, header.width = struct.unpack(">HH", payload[1:5])
+                header.components = payload[5]
+                header.progressive = code in JpegHeaderReader.PROGRESSIVE_MARKERS
+        elif code == 0xE0:
+            if payload.startswith(b"JFIF") and len(payload) >= 12:
+                header.jfif_unit = payload[7]
+                header.jfif_density = struct.unpack(">HH", payload[8:12])
+        elif code == 0xE1:
+            if JpegHeaderReader.ULTRA_HDR_ID in payload:
+                header.ultra_hdr = True
+            if payload.startswith(JpegHeaderReader.EXIF_ID):
+                if header.exif is None:
+                    header.exif = payload
+                    header.exif_offset = offset + len(JpegHeaderReader.EXIF_ID)
+                else:
+                    header.exif += payload[len(JpegHeaderReader.EXIF_ID):]
+            elif payload.startswith(JpegHeaderReader.XMP_ID):
+                header.xmp = payload[len(JpegHeaderReader.XMP_ID):]
+        elif code == 0xE2 and payload.startswith(JpegHeaderReader.MPF_ID):
+            header.mpf_images = JpegHeaderReader._mpf_image_count(
+                payload[len(JpegHeaderReader.MPF_ID):]
+            )
+
+    # -----------------------------
+    # TIFF (EXIF / MPF)
+    # -----------------------------
+
+    @staticmethod
+    def parse_exif(header: JpegHeader) -> None:
+        """
+        Separa os IFDs do EXIF em `header.directories` e localiza o
+        MakerNote. Sem EXIF (ou TIFF inválido) os diretórios ficam vazios.
+        """
+        if not header.exif:
+            return
+        tiff = header.exif[len(JpegHeaderReader.EXIF_ID):]
+        byte_order = JpegHeaderReader._byte_order(tiff)
+        if byte_order is None:
+            return
+        header.byte_order = byte_order
+
+        first = struct.unpack(byte_order + "L", tiff[4:8])[0]
+        ifd0 = JpegHeaderReader.read_ifd(tiff, first, byte_order)
+        directories = {"ifd0": ifd0}
+
+        for name, tag, parent in (
+            ("exif", JpegHeaderReader.EXIF_IFD_TAG, "ifd0"),
+            ("gps", JpegHeaderReader.GPS_IFD_TAG, "ifd0"),
+            ("interop", JpegHeaderReader.INTEROP_IFD_TAG, "exif"),
+        ):
+            pointer = JpegHeaderReader._pointer(directories.get(parent), tag, byte_order)
+            if pointer is not None:
+                directories[name] = JpegHeaderReader.read_ifd(tiff, pointer, byte_order)
+
+        header.directories = directories
+        makernote = directories.get("exif", {}).get(JpegHeaderReader.MAKERNOTE_TAG)
+        if makernote is not None and header.exif_offset is not None:
+            _, _, data, data_offset = makernote
+            header.makernote = (header.exif_offset + data_offset, len(data))
+
+    @staticmethod
+    def read_ifd(tiff: bytes, offset: int, byte_order: str) -> Dict[int, tuple]:
+        """
+        Entradas de um IFD: {tag: (tipo, quantidade, bytes do valor, offset)}.
+
+        Como no PIL, entradas de tipo desconhecido, vazias ou que apontam
+        para fora do buffer são ignoradas.
+        """
+        entries = {}
+        if offset < 0 or offset + 2 > len(tiff):
+            return entries
+        count = struct.unpack(byte_order + "H", tiff[offset : offset + 2])[0]
+        position = offset + 2
+        for _ in range(count):
+            entry = tiff[position : position + 12]
+            position += 12
+            if len(entry) < 12:
+                break
+            tag, typ, quantity = struct.unpack(byte_order + "HHL", entry[:8])
+            type_info = JpegHeaderReader.TIFF_TYPES.get(typ)
+            if type_info is None:
+                continue
+            size = type_info[0] * quantity
+            if size > 4:
+                data_offset = struct.unpack(byte_order + "L", entry[8:12])[0]
+                data = tiff[data_offset : data_offset + size]
+            else:
+                data_offset = position - 4
+                data = entry[8 : 8 + size]
+            if not data or len(data) != size:
+                continue
+            entries[tag] = (typ, quantity, data, data_offset)
+        return entries
+
+    @staticmethod
+    def decode_value(
+        typ: int,
+        quantity: int,
+        data: bytes,
+        byte_order: str,
+        rational: Optional[Callable[[int, int], object]] = None,
+    ):
+        """
+        Valor de uma entrada de IFD, no formato do PIL (`getexif()`):
+        BYTE/UNDEFINED -> bytes, ASCII -> str (sem o NUL final), demais ->
+        tupla, ou o próprio item quando há um só.
+
+        `rational(numerador, denominador)` monta RATIONAL/SRATIONAL (padrão:
+        float, NaN com denominador zero).
+        """
+        if typ in (JpegHeaderReader.BYTE, JpegHeaderReader.UNDEFINED):
+            return data
+        if typ == JpegHeaderReader.ASCII:
+            if data.endswith(b"\x00"):
+                data = data[:-1]
+            return data.decode("latin-1", "replace")
+
+        item_size, fmt = JpegHeaderReader.TIFF_TYPES[typ]
+        if typ in (JpegHeaderReader.RATIONAL, JpegHeaderReader.SIGNED_RATIONAL):
+            raw = struct.unpack(f"{byte_order}{2 * quantity}{fmt}", data)
+            make = rational or JpegHeaderReader._float_rational
+            values = tuple(make(num, den) for num, den in zip(raw[::2], raw[1::2]))
+        else:
+            values = struct.unpack(f"{byte_order}{quantity}{fmt}", data)
+        return values[0] if len(values) == 1 else values
+
+    @staticmethod
+    def _float_rational(numerator: int, denominator: int) -> float:
+        return numerator / denominator if denominator else float("nan")
+
+    @staticmethod
+    def _byte_order(tiff: bytes) -> Optional[str]:
+        if tiff[:4] == b"II*\x00":
+            return "<"
+        if tiff[:4] == b"MM\x00*":
+            return ">"
+        return None
+
+    @staticmethod
+    def _pointer(directory: Optional[dict], tag: int, byte_order: str) -> Optional[int]:
+        entry = (directory or {}).get(tag)
+        if entry is None:
+            return None
+        value = JpegHeaderReader.decode_value(entry[0], entry[1], entry[2], byte_order)
+        if not isinstance(value, int) or value < 0:
+            # Ponteiro corrompido: o PIL também descarta o sub-IFD
+            return None
+        return value
+
+    @staticmethod
+    def _mpf_image_count(mpf: bytes) -> Optional[int]:
+        """
+        NumberOfImages do índice MPF, ou None se o índice for inválido
+        (o PIL trata esses arquivos como JPEG simples).
+        """
+        byte_order = JpegHeaderReader._byte_order(mpf)
+        if byte_order is None:
+            return None
+        first = struct.unpack(byte_order + "L", mpf[4:8])[0]
+        ifd = JpegHeaderReader.read_ifd(mpf, first, byte_order)
+        count_entry = ifd.get(JpegHeaderReader.MPF_IMAGE_COUNT_TAG)
+        entries = ifd.get(JpegHeaderReader.MPF_ENTRIES_TAG)
+        if count_entry is None or entries is None:
+            return None
+        count = JpegHeaderReader.decode_value(*count_entry[:3], byte_order)
+        if not isinstance(count, int):
+            return None
+        raw = entries[2]
+        for index in range(count):
+            try:
+                attribute = struct.unpack_from(byte_order + "L", raw, index * 16)[0]
+            except struct.error:
+                return None
+            if (attribute >> 24) & 7:
+                # formato diferente de JPEG
+                return None
+        return count
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura "pura" de arquivos MRK (DJI).
+
+Livre de QGIS e de `LogUtils`: é usada tanto pelo `MrkParser` (thread da
+task) quanto pelos processos do `ProcessPoolBackend` (`ProcessJobs`).
+"""
+import os
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from .MrkPointColumns import MrkPointColumns
+from .MrkTokenizer import MrkTokenizer
+
+
+class MrkFileReader:
+
+    # Regex antiga (foto/lat/lon/alt); hoje só para linhas fora do layout
+    LINE_RE = MrkTokenizer.FALLBACK_RE
+
+    DATE_RE = re.compile(r"DJI_(\d{8})", re.IGNORECASE)
+
+    FILE_META_RE = re.compile(
+        r"DJI_\d+_(?P<flight_number>\d+?)_(?P<flight_name>[^_]+?)_Timestamp",
+        re.IGNORECASE,
+    )
+
+    @staticmethod
+    def list_files(folder: str, recursive: bool = True) -> List[str]:
+        """MRKs da pasta na ordem do `os.walk` (a ordem de saída dos pontos)."""
+        files = []
+        for root, _, names in os.walk(os.path.abspath(folder)):
+            for name in names:
+                if name.lower().endswith(".mrk"):
+                    files.append(os.path.join(root, name))
+            if not recursive:
+                break
+        return files
+
+    @staticmethod
+    def file_metadata(file_name: str) -> Dict[str, Optional[str]]:
+        match = MrkFileReader.FILE_META_RE.search(file_name)
+
+        if not match:
+            return {"flight_number": None, "flight_name": None}
+
+        return {
+            "flight_number": match.group("flight_number"),
+            "flight_name": match.group("flight_name"),
+        }
+
+    @staticmethod
+    def folder_fields(file_dir: str, base_folder: str) -> Dict[str, str]:
+        """folder_level1..N: da pasta do arquivo subindo até `base_folder`."""
+        file_dir = os.path.abspath(file_dir)
+        base_folder = os.path.abspath(base_folder)
+
+        folders = []
+        current = file_dir
+
+        while True:
+
+            name = os.path.basename(current)
+            if name:
+                folders.append(name)
+
+            if current.lower() == base_folder.lower():
+                break
+
+            parent = os.path.dirname(current)
+
+            if parent == current:
+                break
+
+            current = parent
+
+        return {f"folder_level{i}": name for i, name in enumerate(folders, 1)}
+
+    @staticmethod
+    def read_arrays(file_path: str, cancel_token=None) -> Dict[str, array]:
+        """
+        Colunas numéricas das linhas válidas (`MrkTokenizer.COLUMNS`: foto,
+        lat/lon/alt, tempo GPS, deslocamentos e desvios RTK, flag do fix).
+
+        É a parte cara da leitura e a única que depende do conteúdo do
+        arquivo (o resto vem do nome/pasta, ver `file_constants`).
+        `cancel_token` (opcional) recebe `tick()` por linha.
+        """
+        tick = cancel_token.tick if cancel_token is not None else None
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as fh:
+            return MrkTokenizer.tokenize(fh, tick)
+
+    @staticmethod
+    def point_columns(arrays: Dict[str, array]) -> Dict[str, object]:
+        """Colunas de `read_arrays` com None no lugar dos valores ausentes."""
+        return {
+            name: MrkTokenizer.with_missing(values.typecode, values)
+            for name, values in arrays.items()
+        }
+
+    @staticmethod
+    def points_from_arrays(arrays: Dict[str, array], constants: dict) -> List[dict]:
+        return list(MrkFileReader.iter_points_from_arrays(arrays, constants))
+
+    @staticmethod
+    def iter_points_from_arrays(
+        arrays: Dict[str, array], constants: dict
+    ) -> Iterator[dict]:
+        columns = MrkFileReader.point_columns(arrays)
+        names = list(columns)
+        for row in zip(*columns.values()):
+            point = dict(zip(names, row))
+            point.update(constants)
+            yield point
+
+    @staticmethod
+    def iter_points(file_path: str, constants: dict, cancel_token=None) -> Iterator[dict]:
+        """
+        Pontos do MRK um a um, à medida que as linhas são lidas (memória
+        constante). Mesmos dicts de `points_from_arrays(read_arrays(...))`.
+        """
+        names = [name for name, _ in MrkTokenizer.COLUMNS]
+        with_missing = MrkTokenizer.row_with_missing
+        tick = cancel_token.tick if cancel_token is not None else None
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as fh:
+            for values in MrkTokenizer.iter_rows(fh, tick):
+                point = dict(zip(names, with_missing(values)))
+                point.update(constants)
+                yield point
+
+    @staticmethod
+    def columns_from_arrays(arrays: Dict[str, array], constants: dict) -> MrkPointColumns:
+        columns = MrkPointColumns()
+        columns.extend_file(
+            len(arrays["foto"]), MrkFileReader.point_columns(arrays), constants
+        )
+        return columns
+
+    @staticmethod
+    def read_points(
+        file_path: str,
+        base_folder: Optional[str] = None,
+        gerarpastas: bool = True,
+        cancel_token=None,
+    ) -> List[dict]:
+        """Pontos (um dict por linha válida) de um MRK existente."""
+        file_path = os.path.abspath(file_path)
+        return MrkFileReader.points_from_arrays(
+            MrkFileReader.read_arrays(file_path, cancel_token),
+            MrkFileReader.file_constants(file_path, base_folder, gerarpastas),
+        )
+
+    @staticmethod
+    def read_columns(
+        file_path: str,
+        base_folder: Optional[str] = None,
+        gerarpastas: bool = True,
+        cancel_token=None,
+    ) -> MrkPointColumns:
+        """Mesmos pontos de `read_points`, em `MrkPointColumns`."""
+        file_path = os.path.abspath(file_path)
+        return MrkFileReader.columns_from_arrays(
+            MrkFileReader.read_arrays(file_path, cancel_token),
+            MrkFileReader.file_constants(file_path, base_folder, gerarpastas),
+        )
+
+    @staticmethod
+    def file_constants(
+        file_path: str,
+        base_folder: Optional[str],
+        gerarpastas: bool,
+        folder_memo: Optional[dict] = None,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Campos iguais para todos os pontos do arquivo, na ordem de saída.
+
+        `folder_memo` (dict, opcional) guarda os `folder_level*` por pasta:
+        vários MRKs na mesma pasta calculam uma vez só.
+        """
+        root = os.path.dirname(file_path)
+        file_name = os.path.basename(file_path)
+        base_folder = os.path.abspath(base_folder or root)
+
+        file_meta = MrkFileReader.file_metadata(file_name)
+        date_match = MrkFileReader.DATE_RE.search(file_name)
+
+        constants = {
+            "date_name": date_match.group(1) if date_match else None,
+            "folder": os.path.basename(root),
+            "folder_path": root,
+            "mrk_file": file_name,
+            "mrk_path": file_path,
+            "flight_number": file_meta["flight_number"],
+            "flight_name": file_meta["flight_name"],
+        }
+        if gerarpastas:
+            if folder_memo is None:
+                constants.update(MrkFileReader.folder_fields(root, base_folder))
+            else:
+                key = (root, base_folder)
+                if key not in folder_memo:
+                    folder_memo[key] = MrkFileReader.folder_fields(root, base_folder)
+                constants.update(folder_memo[key])
+        return constants
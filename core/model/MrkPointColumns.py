@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class MrkPointColumns(Sequence):
+    """
+    Pontos MRK em colunas: alternativa compacta à lista de dicts.
+
+    - colunas numéricas do MRK (`TYPED_COLUMNS`: foto, lat/lon/alt, dados
+      RTK) ficam em `array` tipado;
+    - colunas de texto guardam códigos (`array('I')`) de uma tabela de
+      strings compartilhada: pasta, arquivo MRK, voo etc. existem uma vez só,
+      não uma vez por ponto;
+    - demais valores (ex.: metadados de fotos do `PhotoMetadata.enrich`) vão
+      para colunas genéricas (lista).
+
+    Continua sendo uma sequência de pontos: `points[i]` e a iteração
+    devolvem dicts novos (cópias), com as mesmas chaves e na mesma ordem da
+    saída em dicts do `MrkParser`; colunas ausentes numa parte valem None
+    (equivale ao `_normalize_folder_fields`). Alterações vão por
+    `update_row()`/`set_column()`.
+
+    Livre de QGIS e picklable: é o que os workers do `ProcessPoolBackend`
+    devolvem no modo colunar.
+    """
+
+    TYPED_COLUMNS = {
+        "foto": "q",
+        "lat": "d",
+        "lon": "d",
+        "alt": "d",
+        "gps_sow": "d",
+        "gps_week": "q",
+        "offset_n": "d",
+        "offset_e": "d",
+        "offset_v": "d",
+        "std_n": "d",
+        "std_e": "d",
+        "std_v": "d",
+        "fix_flag": "q",
+    }
+
+    _TYPED = "typed"
+    _STR = "str"
+    _OBJ = "obj"
+
+    def __init__(self):
+        self._length = 0
+        self._columns: Dict[str, Any] = {}
+        self._kinds: Dict[str, str] = {}
+        # código 0 é sempre None
+        self._strings: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+    @classmethod
+    def from_points(cls, points: Iterable[dict]) -> "MrkPointColumns":
+        columns = cls()
+        for point in points:
+            columns.append(point)
+        return columns
+
+    @classmethod
+    def concat(cls, parts: Iterable["MrkPointColumns"]) -> "MrkPointColumns":
+        """Junta partes (ex.: um arquivo MRK cada) preservando a ordem."""
+        merged = cls()
+        for part in parts:
+            merged.extend_columns(part)
+        return merged
+
+    # -----------------------------
+    # Sequência
+    # -----------------------------
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("MrkPointColumns index out of range")
+        return {name: self._value(name, index) for name in self._columns}
+
+    def __iter__(self) -> Iterator[dict]:
+        names = self.fields
+        for values in self.iter_tuples(names):
+            yield dict(zip(names, values))
+
+    def __getstate__(self):
+        # O índice de códigos é reconstruído ao carregar
+        state = dict(self.__dict__)
+        state.pop("_codes", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._codes = {value: code for code, value in enumerate(self._strings)}
+
+    def __sizeof__(self) -> int:
+        return self.nbytes()
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def to_points(self) -> List[dict]:
+        return list(self)
+
+    # -----------------------------
+    # Leitura por coluna
+    # -----------------------------
+
+    def column(self, name: str) -> List[Any]:
+        """Valores da coluna (None para coluna inexistente)."""
+        if name not in self._columns:
+            return [None] * self._length
+        kind = self._kinds[name]
+        if kind == self._STR:
+            strings = self._strings
+            return [strings[code] for code in self._columns[name]]
+        return list(self._columns[name])
+
+    def iter_tuples(self, names: List[str]) -> Iterator[Tuple[Any, ...]]:
+        """Tuplas com os valores de `names` por ponto (caminho rápido)."""
+        return zip(*(self._column_iter(name) for name in names)) if names else iter(
+            [()] * self._length
+        )
+
+    def _column_iter(self, name: str) -> Iterable[Any]:
+        if name not in self._columns:
+            return [None] * self._length
+        if self._kinds[name] == self._STR:
+            strings = self._strings
+            return (strings[code] for code in self._columns[name])
+        return self._columns[name]
+
+    def _value(self, name: str, index: int) -> Any:
+        value = self._columns[name][index]
+        if self._kinds[name] == self._STR:
+            return self._strings[value]
+        return value
+
+    # -----------------------------
+    # Escrita
+    # -----------------------------
+
+    def append(self, point: dict) -> None:
+        index = self._length
+        self._length += 1
+        for name in self._columns:
+            if name not in point:
+                self._pad(name, 1)
+        for name, value in point.items():
+            if name not in self._columns:
+                self._new_column(name, value, index)
+            self._append_value(name, value)
+
+    def extend_file(
+        self,
+        count: int,
+        typed: Dict[str, Any],
+        constants: Dict[str, Any],
+    ) -> None:
+        """
+        Acrescenta `count` pontos de um arquivo: colunas prontas (mesmo
+        tamanho; `array` do tipo de `TYPED_COLUMNS` ou lista, que pode ter
+        None) e valores constantes no arquivo (pasta, voo...).
+        """
+        start = self._length
+        self._length += count
+        given = set(typed) | set(constants)
+        for name in list(self._columns):
+            if name not in given:
+                self._pad(name, count)
+
+        for name, values in typed.items():
+            if name not in self._columns:
+                self._new_column(name, values[0] if count else None, start)
+            column = self._columns[name]
+            if self._kinds[name] == self._TYPED and getattr(
+                values, "typecode", None
+            ) == column.typecode:
+                column.extend(values)
+            else:
+                for value in values:
+                    self._append_value(name, value)
+
+        for name, value in constants.items():
+            if name not in self._columns:
+                self._new_column(name, value, start)
+            kind = self._kinds[name]
+            if kind == self._STR and (value is None or isinstance(value, str)):
+                self._columns[name].extend(array("I", [self._intern(value)]) * count)
+            else:
+                for _ in range(count):
+                    self._append_value(name, value)
+
+    def extend_columns(self, other: "MrkPointColumns") -> None:
+        start = self._length
+        count = len(other)
+        self._length += count
+        for name in list(self._columns):
+            if name not in other._columns:
+                self._pad(name, count)
+
+        remap = None
+        for name in other._columns:
+            kind = other._kinds[name]
+            if name not in self._columns:
+                first = other._value(name, 0) if count else None
+                self._new_column(name, first, start, kind_hint=kind)
+            mine = self._kinds[name]
+            if kind == mine == self._TYPED:
+                self._columns[name].extend(other._columns[name])
+            elif kind == mine == self._STR:
+                if remap is None:
+                    remap = [self._intern(value) for value in other._strings]
+                self._columns[name].extend(
+                    array("I", (remap[code] for code in other._columns[name]))
+                )
+            else:
+                for value in other._column_iter(name):
+                    self._append_value(name, value)
+
+    def update_row(self, index: int, values: Dict[str, Any]) -> None:
+        """Equivalente a `points[index].update(values)`."""
+        if not 0 <= index < self._length:
+            raise IndexError("MrkPointColumns index out of range")
+        for name, value in values.items():
+            if name not in self._columns:
+                self._new_column(name, value, self._length)
+            self._set_value(name, index, value)
+
+    def set_column(self, name: str, values: Iterable[Any]) -> None:
+        """Substitui (ou cria) a coluna `name` com um valor por ponto."""
+        values = list(values)
+        if len(values) != self._length:
+            raise ValueError(
+                f"Column '{name}' has {len(values)} values, expected {self._length}"
+            )
+        self._columns.pop(name, None)
+        self._kinds.pop(name, None)
+        first = next((v for v in values if v is not None), None)
+        self._new_column(name, first, 0)
+        for value in values:
+            self._append_value(name, value)
+
+    def nbytes(self) -> int:
+        """Tamanho aproximado em memória (arrays, listas e tabela de strings)."""
+        total = 0
+        for name, values in self._columns.items():
+            if isinstance(values, array):
+                total += values.itemsize * len(values)
+            else:
+                total += 8 * len(values)
+        total += sum(len(s) + 49 for s in self._strings if s is not None)
+        return total
+
+    # -----------------------------
+    # Internos
+    # -----------------------------
+
+    def _intern(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def _new_column(self, name: str, sample: Any, filled: int, kind_hint: str = None) -> None:
+        """Cria a coluna já com `filled` valores None (linhas anteriores)."""
+        typecode = self.TYPED_COLUMNS.get(name)
+        if typecode and not filled and kind_hint in (None, self._TYPED):
+            kind = self._TYPED
+        elif kind_hint == self._STR or (
+            kind_hint is None and (sample is None or isinstance(sample, str))
+        ):
+            kind = self._STR
+        else:
+            kind = self._OBJ
+
+        if kind == self._TYPED:
+            self._columns[name] = array(typecode)
+        elif kind == self._STR:
+            self._columns[name] = array("I", bytes(4 * filled)) if filled else array("I")
+        else:
+            self._columns[name] = [None] * filled
+        self._kinds[name] = kind
+
+    def _pad(self, name: str, count: int) -> None:
+        if self._kinds[name] == self._TYPED:
+            self._to_object(name)
+        if self._kinds[name] == self._STR:
+            self._columns[name].extend(array("I", [0]) * count)
+        else:
+            self._columns[name].extend([None] * count)
+
+    def _append_value(self, name: str, value: Any) -> None:
+        kind = self._kinds[name]
+        if kind == self._TYPED:
+            if self._fits_typed(name, value):
+                self._columns[name].append(value)
+                return
+            self._to_object(name)
+        elif kind == self._STR:
+            if value is None or isinstance(value, str):
+                self._columns[name].append(self._intern(value))
+                return
+            self._to_object(name)
+        self._columns[name].append(value)
+
+    def _set_value(self, name: str, index: int, value: Any) -> None:
+        kind = self._kinds[name]
+        if kind == self._TYPED:
+            if self._fits_typed(name, value):
+                self._columns[name][index] = value
+                return
+            self._to_object(name)
+        elif kind == self._STR:
+            if value is None or isinstance(value, str):
+                self._columns[name][index] = self._intern(value)
+                return
+            self._to_object(name)
+        self._columns[name][index] = value
+
+    def _fits_typed(self, name: str, value: Any) -> bool:
+        if self.TYPED_COLUMNS[name] == "q":
+            return type(value) is int
+        return type(value) is float
+
+    def _to_object(self, name: str) -> None:
+        self._columns[name] = list(self._column_iter(name))
+        self._kinds[name] = self._OBJ
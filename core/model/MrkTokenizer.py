@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Tokenizador de linhas MRK (DJI), sem regex no caminho principal.
+
+Layout de uma linha (campos separados por TAB):
+
+    1  416519.123456  [2241]  -23,N  14,E  161,V  -22.1,Lat  -47.1,Lon  812.3,Ellh  0.01, 0.01, 0.02  50,Q
+
+    foto | segundos da semana GPS | semana GPS | deslocamento RTK N/E/V (mm)
+    | latitude | longitude | altura elipsoidal | desvio padrão N/E/V (m)
+    | flag do fix (50 fixo, 34 flutuante, 16 simples, 0 sem posição)
+
+Livre de QGIS e de `LogUtils` (roda nos workers do `ProcessPoolBackend`).
+"""
+import math
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+class MrkTokenizer:
+
+    # Ordem das colunas devolvidas por `parse_line`/`tokenize`
+    COLUMNS: Tuple[Tuple[str, str], ...] = (
+        ("foto", "q"),
+        ("lat", "d"),
+        ("lon", "d"),
+        ("alt", "d"),
+        ("gps_sow", "d"),
+        ("gps_week", "q"),
+        ("offset_n", "d"),
+        ("offset_e", "d"),
+        ("offset_v", "d"),
+        ("std_n", "d"),
+        ("std_e", "d"),
+        ("std_v", "d"),
+        ("fix_flag", "q"),
+    )
+
+    # Valor ausente nas colunas tipadas (convertido para None na saída).
+    # Inteiro fora da faixa lida do MRK (mínimo do int64): -1 é valor válido.
+    MISSING_INT = -(2 ** 63)
+    MISSING_FLOAT = math.nan
+
+    # Caminho antigo: só foto/lat/lon/alt. Usado para linhas fora do layout
+    FALLBACK_RE = re.compile(
+        r"(?P<foto>\d+).*?"
+        r"(?P<lat>-?\d+\.\d+),Lat.*?"
+        r"(?P<lon>-?\d+\.\d+),Lon.*?"
+        r"(?P<alt>-?\d+(?:\.\d+)?),Ellh",
+        re.IGNORECASE,
+    )
+
+    _LABELS = {
+        "n": "offset_n",
+        "e": "offset_e",
+        "v": "offset_v",
+        "lat": "lat",
+        "lon": "lon",
+        "ellh": "alt",
+        "q": "fix_flag",
+    }
+
+    # -----------------------------
+    # Linha
+    # -----------------------------
+
+    @staticmethod
+    def parse_line(line: str) -> Optional[tuple]:
+        """
+        Valores da linha na ordem de `COLUMNS` ou None se não for um ponto.
+
+        Tenta o layout fixo; se algum campo não bater, lê os campos pelo
+        rótulo (`,Lat`, `,Ellh`...) em qualquer posição e, por último,
+        usa `FALLBACK_RE` (só foto/lat/lon/alt, como antes).
+        """
+        fields = line.rstrip("\r\n").split("\t")
+        if len(fields) == 11:
+            values = MrkTokenizer._parse_fixed(fields)
+            if values is not None:
+                return values
+        values = MrkTokenizer._parse_labelled(fields)
+        if values is not None:
+            return values
+        return MrkTokenizer._parse_fallback(line)
+
+    @staticmethod
+    def _parse_fixed(f: list) -> Optional[tuple]:
+        n, e, v, lat, lon, alt, q = f[3], f[4], f[5], f[6], f[7], f[8], f[10]
+        if not (
+            lat.endswith(",Lat")
+            and lon.endswith(",Lon")
+            and alt.endswith(",Ellh")
+            and n.endswith(",N")
+            and e.endswith(",E")
+            and v.endswith(",V")
+            and q.endswith(",Q")
+        ):
+            return None
+        week = f[2].strip()
+        std = f[9].split(",")
+        if len(std) != 3 or week[:1] != "[" or week[-1:] != "]":
+            return None
+        try:
+            values = (
+                int(f[0]),
+                float(lat[:-4]),
+                float(lon[:-4]),
+                float(alt[:-5]),
+                float(f[1]),
+                int(week[1:-1]),
+                float(n[:-2]),
+                float(e[:-2]),
+                float(v[:-2]),
+                float(std[0]),
+                float(std[1]),
+                float(std[2]),
+                int(q[:-2]),
+            )
+        except ValueError:
+            return None
+        # float() aceita "nan"/"inf": não são coordenadas válidas
+        if not math.isfinite(values[1] + values[2] + values[3]):
+            return None
+        return values
+
+    @staticmethod
+    def _parse_labelled(fields: list) -> Optional[tuple]:
+        found = {}
+        try:
+            found["foto"] = int(fields[0])
+        except ValueError:
+            return None
+
+        labels = MrkTokenizer._LABELS
+        for token in fields[1:]:
+            token = token.strip()
+            value, sep, label = token.rpartition(",")
+            name = labels.get(label.strip().lower()) if sep else None
+            try:
+                if name is not None:
+                    found[name] = (
+                        int(value) if name == "fix_flag" else float(value)
+                    )
+                elif token[:1] == "[" and token[-1:] == "]":
+                    found["gps_week"] = int(token[1:-1])
+                elif token.count(",") == 2:
+                    found["std_n"], found["std_e"], found["std_v"] = (
+                        float(part) for part in token.split(",")
+                    )
+                elif token and "gps_sow" not in found:
+                    found["gps_sow"] = float(token)
+            except ValueError:
+                continue
+
+        if not all(
+            math.isfinite(found.get(name, math.nan)) for name in ("lat", "lon", "alt")
+        ):
+            return None
+        return MrkTokenizer._ordered(found)
+
+    @staticmethod
+    def _parse_fallback(line: str) -> Optional[tuple]:
+        m = MrkTokenizer.FALLBACK_RE.search(line)
+        if not m:
+            return None
+        return MrkTokenizer._ordered(
+            {
+                "foto": int(m.group("foto")),
+                "lat": float(m.group("lat")),
+                "lon": float(m.group("lon")),
+                "alt": float(m.group("alt")),
+            }
+        )
+
+    @staticmethod
+    def _ordered(found: dict) -> tuple:
+        return tuple(
+            found.get(
+                name,
+                MrkTokenizer.MISSING_INT if typecode == "q" else MrkTokenizer.MISSING_FLOAT,
+            )
+            for name, typecode in MrkTokenizer.COLUMNS
+        )
+
+    # -----------------------------
+    # Arquivo
+    # -----------------------------
+
+    @staticmethod
+    def iter_rows(lines: Iterable[str], tick=None) -> Iterator[tuple]:
+        """
+        Tuplas (ordem de `COLUMNS`) das linhas que são pontos, à medida que
+        as linhas são lidas. `tick` (opcional) é chamado a cada linha.
+        """
+        parse_fixed = MrkTokenizer._parse_fixed
+        parse_line = MrkTokenizer.parse_line
+
+        for line in lines:
+            if tick is not None:
+                tick()
+            fields = line.rstrip("\r\n").split("\t")
+            values = parse_fixed(fields) if len(fields) == 11 else None
+            if values is None:
+                values = parse_line(line)
+                if values is None:
+                    continue
+            yield values
+
+    @staticmethod
+    def tokenize(lines: Iterable[str], tick=None) -> Dict[str, array]:
+        """Colunas tipadas (uma `array` por nome de `COLUMNS`) de `iter_rows`."""
+        columns = [array(typecode) for _, typecode in MrkTokenizer.COLUMNS]
+        appends = [column.append for column in columns]
+        for values in MrkTokenizer.iter_rows(lines, tick):
+            for append, value in zip(appends, values):
+                append(value)
+
+        return {name: column for (name, _), column in zip(MrkTokenizer.COLUMNS, columns)}
+
+    @staticmethod
+    def row_with_missing(values: tuple) -> tuple:
+        """Tupla de `iter_rows` com None no lugar dos valores ausentes."""
+        total = sum(values)
+        if total == total and MrkTokenizer.MISSING_INT not in values:
+            return values
+        # Algum NaN/MISSING_INT: confere por coluna
+        missing = MrkTokenizer.MISSING_INT
+        return tuple(
+            None
+            if value != value or (typecode == "q" and value == missing)
+            else value
+            for value, (_, typecode) in zip(values, MrkTokenizer.COLUMNS)
+        )
+
+    @staticmethod
+    def with_missing(typecode: str, values: array):
+        """
+        `values` como está se não houver valor ausente; senão uma lista com
+        None no lugar de `MISSING_INT`/NaN.
+        """
+        if typecode == "q":
+            missing = MrkTokenizer.MISSING_INT
+            if missing not in values:
+                return values
+            return [None if value == missing else value for value in values]
+        if all(value == value for value in values):
+            return values
+        return [None if value != value else value for value in values]
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Dump dos metadados de fotos em JSON Lines (um objeto JSON por linha),
+opcionalmente em gzip (`.jsonl.gz`).
+
+Linhas, na ordem em que são gravadas:
+- `{"type": "header", "format": ..., "version": 1, ...}`: cabeçalho;
+- `{"type": "group", "folder": ..., ...}`: início de um grupo (pasta);
+- `{"type": "record", "group": ..., "file": ..., "record": {...}}`: uma foto;
+- `{"type": "end", "groups": N, "records": N}`: dump completo.
+
+Os registros são gravados um a um à medida que cada grupo é indexado e lidos
+um a um, então nem o gravador nem o leitor têm o dump inteiro em memória. Sem a
+linha `end` o dump está incompleto (gravação em andamento ou interrompida):
+o leitor pode acompanhar o arquivo (`follow=True`, só sem gzip) até ela
+aparecer.
+
+Livre de QGIS: o log fica com quem usa (`PhotoMetadata`, `JSONUtil`).
+"""
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+
+class PhotoMetadataDump:
+    """Gravador do dump (context manager); leitura pelos métodos estáticos."""
+
+    FORMAT = "cadmus-photo-metadata"
+    VERSION = 1
+    GZIP_MAGIC = b"\x1f\x8b"
+    COMPRESS_LEVEL = 6
+    # Intervalo de espera do leitor em `follow` quando o arquivo não cresceu
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, path: str, compress: Optional[bool] = None, **header: Any):
+        """
+        `compress`: gzip; None decide pela extensão (`.gz`). `header`: campos
+        extras do cabeçalho (ex.: `base_folder`, `points_total`).
+        """
+        self.path = path
+        self.compress = path.lower().endswith(".gz") if compress is None else compress
+        self.header = header
+        self.groups = 0
+        self.records = 0
+        self._fh = None
+
+    def __enter__(self) -> "PhotoMetadataDump":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def open(self) -> "PhotoMetadataDump":
+        if self.compress:
+            self._fh = gzip.open(
+                self.path, "wt", encoding="utf-8", newline="\n", compresslevel=self.COMPRESS_LEVEL
+            )
+        else:
+            self._fh = open(self.path, "w", encoding="utf-8", newline="\n")
+        self._write({"type": "header", "format": self.FORMAT, "version": self.VERSION, **self.header})
+        self._fh.flush()
+        return self
+
+    def write_group(
+        self,
+        folder: str,
+        records: Union[Dict[str, Dict], Iterable[Tuple[str, Dict]]],
+        **info: Any,
+    ) -> None:
+        """
+        Grava o grupo `folder` e seus registros: {arquivo: registro} ou pares
+        (arquivo, registro), por exemplo de um gerador, gravados à medida que
+        são produzidos.
+        """
+        self._write({"type": "group", "folder": folder, **info})
+        if isinstance(records, dict):
+            records = records.items()
+        for file_key, record in records:
+            self._write({"type": "record", "group": folder, "file": file_key, "record": record})
+            self.records += 1
+        self.groups += 1
+        # Leitor em `follow` vê o grupo inteiro assim que ele termina
+        self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            self._write({"type": "end", "groups": self.groups, "records": self.records})
+        finally:
+            self._fh.close()
+            self._fh = None
+
+    def abort(self) -> None:
+        """Fecha sem a linha `end` e remove o arquivo (gravação interrompida)."""
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except OSError:
+                pass
+            self._fh = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":")))
+        self._fh.write("\n")
+
+    # -----------------------------
+    # Leitura
+    # -----------------------------
+
+    @staticmethod
+    def is_dump(path: str) -> bool:
+        """True se `path` é um dump JSON Lines (com ou sem gzip)."""
+        try:
+            with open(path, "rb") as fh:
+                compressed = fh.read(2) == PhotoMetadataDump.GZIP_MAGIC
+            opener = gzip.open if compressed else open
+            with opener(path, "rt", encoding="utf-8", newline="\n") as fh:
+                first = fh.readline()
+            header = json.loads(first)
+        except (OSError, EOFError, ValueError):
+            return False
+        return (
+            isinstance(header, dict)
+            and header.get("type") == "header"
+            and header.get("format") == PhotoMetadataDump.FORMAT
+        )
+
+    @staticmethod
+    def entries(
+        path: str, follow: bool = False, timeout: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Linhas do dump, uma a uma, do cabeçalho até `end` (inclusive).
+
+        Sem `follow`, dump sem `end` levanta ValueError depois das linhas
+        lidas. Com `follow` espera o gravador (arquivo ainda inexistente ou
+        crescendo) até `end`; `timeout`: segundos sem novas linhas antes de
+        TimeoutError (None = sem limite). `follow` não vale para gzip.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while follow and not os.path.exists(path):
+            PhotoMetadataDump._wait(deadline, path)
+
+        with open(path, "rb") as fh:
+            compressed = fh.read(2) == PhotoMetadataDump.GZIP_MAGIC
+        if compressed and follow:
+            raise ValueError("follow nao suportado em dump gzip")
+        opener = gzip.open if compressed else open
+
+        with opener(path, "rt", encoding="utf-8", newline="\n") as fh:
+            pending = ""
+            first = True
+            while True:
+                line = fh.readline()
+                if line.endswith("\n"):
+                    line, pending = pending + line, ""
+                elif follow:
+                    # Linha parcial ou fim do arquivo: espera o gravador
+                    pending += line
+                    PhotoMetadataDump._wait(deadline, path)
+                    continue
+                elif line or pending:
+                    raise ValueError(f"Dump incompleto (linha truncada): {path}")
+                else:
+                    raise ValueError(f"Dump incompleto (sem linha end): {path}")
+
+                if timeout is not None:
+                    deadline = time.monotonic() + timeout
+                entry = json.loads(line)
+                if first:
+                    first = False
+                    if (
+                        not isinstance(entry, dict)
+                        or entry.get("type") != "header"
+                        or entry.get("format") != PhotoMetadataDump.FORMAT
+                    ):
+                        raise ValueError(f"Arquivo nao e um dump de metadados: {path}")
+                    if entry.get("version") != PhotoMetadataDump.VERSION:
+                        raise ValueError(
+                            f"Versao de dump nao suportada ({entry.get('version')}): {path}"
+                        )
+                yield entry
+                if entry.get("type") == "end":
+                    return
+
+    @staticmethod
+    def records(
+        path: str, follow: bool = False, timeout: Optional[float] = None
+    ) -> Iterator[Tuple[Dict[str, Any], str, str]]:
+        """(registro, pasta do grupo, arquivo) de cada foto, na ordem gravada."""
+        for entry in PhotoMetadataDump.entries(path, follow=follow, timeout=timeout):
+            if entry.get("type") == "record":
+                yield entry.get("record"), entry.get("group") or "", entry.get("file") or ""
+
+    @staticmethod
+    def _wait(deadline: Optional[float], path: str) -> None:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Dump sem novas linhas no prazo: {path}")
+        time.sleep(PhotoMetadataDump.POLL_INTERVAL)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura dos campos de um pacote XMP sem montar a árvore XML.
+
+Os campos de drone (`drone-dji:*`, `tiff:*`, `xmp:*`...) são atributos
+planos do `rdf:Description` ou, às vezes, elementos só com texto. O `scan`
+lê o pacote em fluxo (expat sem processamento de namespaces, só eventos de
+início/fim de tag e texto), resolve os prefixos uma vez por tag e junta
+atributos e elementos simples de todos os `rdf:Description`.
+
+O que o scanner não trata (prefixo redefinido ou não declarado,
+`rdf:Description` aninhado, XML mal formado) devolve None, e `parse` cai no
+`parse_tree` (ElementTree), que aplica as mesmas regras: o resultado é o
+mesmo pelos dois caminhos.
+
+Livre de QGIS: pode rodar em workers.
+"""
+from functools import lru_cache
+from typing import Dict, Optional
+from xml.etree import ElementTree as ET
+from xml.parsers import expat
+
+
+class XmpAttributeScanner:
+
+    RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+    XML_NS = "http://www.w3.org/XML/1998/namespace"
+    DESCRIPTION = "Description"
+
+    # -----------------------------
+    # API
+    # -----------------------------
+
+    @staticmethod
+    def parse(xmp_text: str, namespace_prefixes: Dict[str, str]) -> Optional[dict]:
+        """
+        {prefixo:nome: valor} dos `rdf:Description` de `xmp_text`; None se
+        não houver nenhum. XML inválido levanta `ET.ParseError`.
+        """
+        data = XmpAttributeScanner.scan(xmp_text, namespace_prefixes)
+        if data is not None:
+            return data
+        return XmpAttributeScanner.parse_tree(xmp_text, namespace_prefixes)
+
+    @staticmethod
+    def parse_tree(xmp_text: str, namespace_prefixes: Dict[str, str]) -> Optional[dict]:
+        """Mesmo resultado de `scan`, pelo ElementTree (aceita qualquer XML)."""
+        root = ET.fromstring(xmp_text)
+        descriptions = list(root.iter(f"{{{XmpAttributeScanner.RDF_NS}}}Description"))
+        if not descriptions:
+            return None
+
+        data = {}
+        for description in descriptions:
+            for name, value in description.attrib.items():
+                data.setdefault(
+                    XmpAttributeScanner._tree_name(name, namespace_prefixes), value
+                )
+            for child in description:
+                if len(child) or child.attrib or not isinstance(child.tag, str):
+                    continue
+                data.setdefault(
+                    XmpAttributeScanner._tree_name(child.tag, namespace_prefixes),
+                    child.text or "",
+                )
+        return data
+
+    @staticmethod
+    def scan(xmp_text: str, namespace_prefixes: Dict[str, str]) -> Optional[dict]:
+        """
+        Atributos e elementos simples (só texto) de todos os
+        `rdf:Description`, sem árvore. O primeiro valor de cada nome vale.
+        None quando o pacote tem algo que o scanner não trata ou nenhum
+        `rdf:Description`.
+        """
+        scanner = _Scanner(namespace_prefixes)
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = scanner.start
+        parser.EndElementHandler = scanner.end
+        parser.CharacterDataHandler = scanner.text
+        try:
+            parser.Parse(xmp_text, True)
+        except (expat.ExpatError, _Unsupported):
+            return None
+        return scanner.data if scanner.found else None
+
+    # -----------------------------
+    # Namespaces
+    # -----------------------------
+    # Escopo: (namespaces {prefixo: uri}, rótulos {prefixo: "rotulo:"},
+    # chave hashable). As fotos de um mesmo equipamento repetem os mesmos
+    # nomes e declarações, então a resolução fica em cache por tag.
+
+    @staticmethod
+    def _attributes(attributes: dict, scope: tuple, namespace_prefixes: tuple) -> tuple:
+        """
+        ({nome: valor}, escopo) de uma tag: as declarações `xmlns` abrem o
+        novo escopo e saem dos atributos; os nomes recebem o rótulo do
+        namespace (`_output_names`).
+        """
+        names = "\x00".join(attributes)
+        declared = XmpAttributeScanner._declared_names(names)
+        if declared:
+            declarations = tuple((name, attributes.pop(name)) for name in declared)
+            scope = XmpAttributeScanner._scope(scope[2], declarations, namespace_prefixes)
+        output_names = XmpAttributeScanner._output_names(names, scope[2])
+        if output_names is not None:
+            attributes = dict(zip(output_names, attributes.values()))
+        return attributes, scope
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _declared_names(names: str) -> tuple:
+        return tuple(
+            name
+            for name in names.split("\x00")
+            if name == "xmlns" or name.startswith("xmlns:")
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _output_names(names: str, scope_key: tuple) -> Optional[tuple]:
+        """
+        Nomes de saída dos atributos (sem as declarações), ou None se já
+        são os do arquivo. Prefixo fora do escopo, nome com mais de um ":"
+        ou dois prefixos do mesmo namespace levantam `_Unsupported`.
+        """
+        labels = dict(scope_key[1])
+        output = []
+        changed = False
+        for name in names.split("\x00"):
+            if name == "xmlns" or name.startswith("xmlns:"):
+                continue
+            prefix, _, local = name.rpartition(":")
+            if prefix not in labels or ":" in prefix:
+                raise _Unsupported()
+            label = labels[prefix] + local
+            changed = changed or label != name
+            output.append(label)
+        if len(set(output)) != len(output):
+            raise _Unsupported()
+        return tuple(output) if changed else None
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _scope(parent_key: tuple, declarations: tuple, namespace_prefixes: tuple) -> tuple:
+        """Escopo de `parent_key` com as declarações ((xmlns[:prefixo], uri), ...)."""
+        namespaces = dict(parent_key[0])
+        for name, uri in declarations:
+            prefix = name[6:] or None
+            if prefix in ("xml", "xmlns") or (prefix is not None and not uri):
+                raise _Unsupported()
+            if prefix in namespaces and namespaces[prefix] != uri:
+                raise _Unsupported()
+            namespaces[prefix] = uri
+
+        prefixes = dict(namespace_prefixes)
+        # Atributo sem prefixo não tem namespace (o padrão vale só para elementos)
+        labels = {"": ""}
+        for prefix, uri in namespaces.items():
+            if prefix is not None:
+                labels[prefix] = f"{prefixes.get(uri, uri)}:"
+        return namespaces, labels, (tuple(namespaces.items()), tuple(labels.items()))
+
+    @staticmethod
+    def _name(uri: Optional[str], local: str, namespace_prefixes: Dict[str, str]) -> str:
+        if not uri:
+            return local
+        return f"{namespace_prefixes.get(uri, uri)}:{local}"
+
+    @staticmethod
+    def _tree_name(tag: str, namespace_prefixes: Dict[str, str]) -> str:
+        if not tag.startswith("{"):
+            return tag
+        uri, local = tag[1:].split("}", 1)
+        return XmpAttributeScanner._name(uri, local, namespace_prefixes)
+
+
+class _Scanner:
+    """Estado de um `XmpAttributeScanner.scan` (handlers do expat)."""
+
+    def __init__(self, namespace_prefixes: Dict[str, str]):
+        self.namespace_prefixes = namespace_prefixes
+        self.prefixes_key = tuple(namespace_prefixes.items())
+        self.data = {}
+        self.found = False
+        # (escopo do pai, papel); papel: "container" (acima do Description),
+        # "description", "property" (filho do Description), "skip"
+        # (estrutura dentro de uma propriedade, ignorada)
+        self.stack = []
+        self.scope = XmpAttributeScanner._scope(
+            ((("xml", XmpAttributeScanner.XML_NS),), ()), (), self.prefixes_key
+        )
+        self.property_name = None
+        # Texto da propriedade aberta enquanto ela for simples; senão None
+        self.property_text = None
+
+    def start(self, qname: str, attributes: dict) -> None:
+        scope = self.scope
+        if attributes:
+            attributes, scope = XmpAttributeScanner._attributes(
+                attributes, scope, self.prefixes_key
+            )
+        namespaces = scope[0]
+
+        prefix, _, local = qname.rpartition(":")
+        if prefix:
+            if prefix not in namespaces:
+                raise _Unsupported()
+            uri = namespaces[prefix]
+        else:
+            uri = namespaces.get(None)
+
+        parent_role = self.stack[-1][1] if self.stack else None
+        if uri == XmpAttributeScanner.RDF_NS and local == XmpAttributeScanner.DESCRIPTION:
+            # Description dentro de outro: a ordem do "primeiro vale"
+            # mudaria em relação ao ElementTree
+            if any(role != "container" for _, role in self.stack):
+                raise _Unsupported()
+            role = "description"
+            self.found = True
+            if attributes and self.data:
+                for name, value in attributes.items():
+                    self.data.setdefault(name, value)
+            elif attributes:
+                self.data.update(attributes)
+        elif parent_role == "description":
+            role = "property"
+        elif parent_role in ("property", "skip"):
+            role = "skip"
+        else:
+            role = "container"
+
+        if parent_role == "property":
+            # O filho do Description tem elementos: não é simples
+            self.property_text = None
+        if role == "property":
+            self.property_name = XmpAttributeScanner._name(uri, local, self.namespace_prefixes)
+            self.property_text = None if attributes else []
+
+        self.stack.append((self.scope, role))
+        self.scope = scope
+
+    def end(self, qname: str) -> None:
+        self.scope, role = self.stack.pop()
+        if role == "property" and self.property_text is not None:
+            self.data.setdefault(self.property_name, "".join(self.property_text))
+        self.property_text = None
+
+    def text(self, chunk: str) -> None:
+        if self.property_text is not None:
+            self.property_text.append(chunk)
+
+
+class _Unsupported(Exception):
+    """Construção fora do que o scanner trata: usar o ElementTree."""
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
 from ..engine_tasks.AsyncPipelineEngine import AsyncPipelineEngine
+from ..engine_tasks.CheckpointStore import CheckpointStore
 from ..engine_tasks.ExecutionContext import ExecutionContext
 from ..engine_tasks.MrkParseStep import MrkParseStep
+from ..engine_tasks.MrkPointsLayerStep import MrkPointsLayerStep
 from ..engine_tasks.PhotoMetadataStep import PhotoMetadataStep
+from ..engine_tasks.StreamChannel import StreamChannel
+from ..engine_tasks.TrackLayerStep import TrackLayerStep
 from ...i18n.TranslationManager import STR
 from ...utils.ProjectUtils import ProjectUtils
 from ...utils.QgisMessageUtil import QgisMessageUtil
@@ -13,6 +17,7 @@ from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
 from ...utils.vector.VectorLayerSource import VectorLayerSource
 from ...utils.Preferences import load_tool_prefs
 from ...utils.mrk.MetadataFields import MetadataFields
+from ...utils.mrk.MrkParseCache import MrkParseCache
 from ...core.config.LogUtils import LogUtils
 from .ReportGenerationService import ReportGenerationService
 
@@ -20,9 +25,25 @@ from .ReportGenerationService import ReportGenerationService
 class DroneCoordinatesRunner:
     """Executa o pipeline de MRK fora da UI principal do dialog."""
 
-    def __init__(self, iface, tool_key=ToolKey.DRONE_COORDINATES):
+    # Chaves do contexto lidas por `_on_pipeline_finished` (`result_keys`)
+    RESULT_KEYS = [
+        "layer",
+        "points",
+        "points_layer_name",
+        "track_layer",
+        "track_layer_name",
+        "auto_points_output_path",
+        "auto_track_output_path",
+        "reuse_existing_outputs",
+        "photo_metadata_json_path",
+        "source_mrk_file",
+    ]
+
+    def __init__(self, iface, tool_key=ToolKey.DRONE_COORDINATES, executor=None):
         self.iface = iface
         self.tool_key = tool_key
+        # TaskExecutor do pipeline (None = gerenciador de tarefas do QGIS)
+        self.executor = executor
         self.logger = LogUtils(tool=tool_key, class_name="DroneCoordinatesRunner")
         self._engine = None
         self._on_finished = None
@@ -48,13 +69,29 @@ class DroneCoordinatesRunner:
             file_path, STR.TRACK.lower()
         )
 
-        existing_points = VectorLayerSource.load_existing_vector_layer(
-            points_path, tool_key=self.tool_key
-        )
+        # GPKGs só são reaproveitados se gerados a partir do MRK atual
+        cache = MrkParseCache.shared()
+        outputs_fresh = cache.output_is_fresh(
+            points_path, file_path
+        ) and cache.output_is_fresh(track_path, file_path)
+
+        existing_points = existing_track = None
+        if outputs_fresh:
+            existing_points = VectorLayerSource.load_existing_vector_layer(
+                points_path, tool_key=self.tool_key
+            )
+            existing_track = VectorLayerSource.load_existing_vector_layer(
+                track_path, tool_key=self.tool_key
+            )
+        elif os.path.exists(points_path) or os.path.exists(track_path):
+            self.logger.info(
+                "GPKG desatualizado em relação ao MRK; gerando novamente",
+                code="MRK_OUTPUTS_STALE",
+                file_path=file_path,
+                points_path=points_path,
+                track_path=track_path,
+            )
 
-        existing_track = VectorLayerSource.load_existing_vector_layer(
-            track_path, tool_key=self.tool_key
-        )
         if existing_points and existing_track:
             self._load_layer(existing_points)
             self._load_layer(existing_track)
@@ -89,22 +126,32 @@ class DroneCoordinatesRunner:
         )
         extra_fields = None
         base_name = os.path.splitext(os.path.basename(file_path))[0]
-        context = ExecutionContext()
+        context = ExecutionContext(slots=MrkParseStep.CONTEXT_SLOTS)
         context.set("paths", [file_path])
         context.set("recursive", False)
         context.set("extra_fields", extra_fields)
         context.set("selected_required_fields", selected_required_fields)
         context.set("selected_custom_fields", selected_custom_fields)
         context.set("selected_mrk_fields", selected_mrk_fields)
+        # Sem relatório o PhotoMetadataStep lê só os campos selecionados
+        context.set("generate_report", bool(prefs.get("generate_report", False)))
         context.set("tool_key", self.tool_key)
         context.set("points_layer_name", f"{base_name}_{STR.POINTS}")
         context.set("track_layer_name", f"{base_name}_{STR.TRACK}")
         context.set("auto_points_output_path", points_path)
         context.set("auto_track_output_path", track_path)
         context.set("source_mrk_file", file_path)
+        context.set("reuse_existing_outputs", outputs_fresh)
 
-        # Montar steps conforme preferências (mesmo que DroneCoordinates plugin)
-        steps = [MrkParseStep()]
+        # Montar steps conforme preferências (mesmo que DroneCoordinates plugin).
+        # Em modo grafo, os pontos chegam em stream ao MrkPointsLayerStep
+        # durante a leitura do MRK; trilha e metadados de fotos rodam em
+        # paralelo depois dele.
+        steps = [
+            MrkParseStep(stream_batch_size=StreamChannel.DEFAULT_BATCH_SIZE),
+            MrkPointsLayerStep(),
+            TrackLayerStep(),
+        ]
         if apply_photos:
             steps.append(PhotoMetadataStep())
 
@@ -113,6 +160,10 @@ class DroneCoordinatesRunner:
             context=context,
             on_finished=self._on_pipeline_finished,
             on_error=self._on_pipeline_error,
+            mode=AsyncPipelineEngine.MODE_GRAPH,
+            checkpoint_store=CheckpointStore(self.tool_key),
+            executor=self.executor,
+            result_keys=self.RESULT_KEYS,
         )
         self._engine.start()
         return True
@@ -131,10 +182,12 @@ class DroneCoordinatesRunner:
         points_layer_name = context.get("points_layer_name", STR.POINTS)
         track_layer_name = context.get("track_layer_name", STR.TRACK)
 
+        reuse_existing = context.get("reuse_existing_outputs", False)
         points_layer = self._save_or_load_existing(
             layer,
             points_output_path,
             fallback_name=points_layer_name,
+            reuse_existing=reuse_existing,
         )
         if points_layer and points_layer.id() != layer.id():
             ProjectUtils.remove_layer_from_project(layer)
@@ -150,30 +203,36 @@ class DroneCoordinatesRunner:
                 if ok:
                     points_layer.triggerRepaint()
 
-        line_layer = VectorLayerGeometry.create_line_layer_from_points(
-            points,
-            name=track_layer_name,
-            group_by_fields=["mrk_path", "mrk_file"],
-            attribute_fields=MetadataFields.default_track_attribute_keys(),
-        )
-
-        track_layer = None
-        if line_layer and line_layer.isValid():
-            track_layer = self._save_or_load_existing(
-                line_layer,
-                track_output_path,
-                fallback_name=track_layer_name,
+        # Trilha já gerada/salva pelo TrackLayerStep; senão, monta aqui
+        track_layer = context.get("track_layer")
+        if track_layer and track_layer.isValid():
+            track_layer.setName(track_layer_name)
+            self._load_layer(track_layer)
+        else:
+            track_layer = None
+            line_layer = VectorLayerGeometry.create_line_layer_from_points(
+                points,
+                name=track_layer_name,
+                group_by_fields=["mrk_path", "mrk_file"],
+                attribute_fields=MetadataFields.default_track_attribute_keys(),
             )
+            if line_layer and line_layer.isValid():
+                track_layer = self._save_or_load_existing(
+                    line_layer,
+                    track_output_path,
+                    fallback_name=track_layer_name,
+                    reuse_existing=reuse_existing,
+                )
 
-            # Aplicar estilo QML na trilha conforme preferência
-            if (prefs.get("apply_style_track", False) and track_layer and track_layer.isValid()):
-                qml_path = prefs.get("qml_path_track", "").strip()
-                if qml_path and os.path.exists(qml_path):
-                    ok = track_layer.loadNamedStyle(qml_path)
-                    if isinstance(ok, tuple):
-                        ok = ok[0]
-                    if ok:
-                        track_layer.triggerRepaint()
+        # Aplicar estilo QML na trilha conforme preferência
+        if (prefs.get("apply_style_track", False) and track_layer and track_layer.isValid()):
+            qml_path = prefs.get("qml_path_track", "").strip()
+            if qml_path and os.path.exists(qml_path):
+                ok = track_layer.loadNamedStyle(qml_path)
+                if isinstance(ok, tuple):
+                    ok = ok[0]
+                if ok:
+                    track_layer.triggerRepaint()
 
         json_path = context.get("photo_metadata_json_path")
         generate_report = prefs.get("generate_report", False)
@@ -197,6 +256,11 @@ class DroneCoordinatesRunner:
                     "Runner com generate_report=True sem photo_metadata_json_path no contexto"
                 )
 
+        self._record_outputs(
+            context.get("source_mrk_file"),
+            [(points_layer, points_output_path), (track_layer, track_output_path)],
+        )
+
         QgisMessageUtil.bar_success(self.iface, STR.CONVERT_FILE_SUCCESS, duration=4)
         if callable(self._on_finished):
             self._on_finished(
@@ -224,10 +288,13 @@ class DroneCoordinatesRunner:
         output_path: str,
         *,
         fallback_name: str,
+        reuse_existing: bool = False,
     ):
-        existing = VectorLayerSource.load_existing_vector_layer(
-            output_path, tool_key=self.tool_key
-        )
+        existing = None
+        if reuse_existing:
+            existing = VectorLayerSource.load_existing_vector_layer(
+                output_path, tool_key=self.tool_key
+            )
         if existing:
             existing.setName(fallback_name)
             self._load_layer(existing)
@@ -250,6 +317,23 @@ class DroneCoordinatesRunner:
         self._load_layer(layer)
         return layer
 
+    def _record_outputs(self, source_path, layers_and_paths):
+        """
+        Marca os GPKGs gravados como gerados a partir do MRK atual. Camadas
+        que ficaram em memória (falha ao salvar) não contam.
+        """
+        if not source_path:
+            return
+        cache = MrkParseCache.shared()
+        for layer, output_path in layers_and_paths:
+            if not output_path or not layer or not layer.isValid():
+                continue
+            layer_path = layer.source().split("|")[0]
+            if MrkParseCache.normalize_path(layer_path) == MrkParseCache.normalize_path(
+                output_path
+            ):
+                cache.record_output(output_path, source_path)
+
     def _load_layer(self, layer):
         if not layer or not layer.isValid():
             return
@@ -12,10 +12,10 @@ from ..config.LogUtils import LogUtils
 from .ReportGenerationService import ReportGenerationService
 from ...utils.ExplorerUtils import ExplorerUtils
 from ...utils.ToolKeys import ToolKey
-from ...utils.mrk.ExifUtil import ExifUtil
 from ...utils.mrk.MetadataFields import MetadataFields
+from ...utils.mrk.CustomPhotosFieldsIncremental import CustomPhotosFieldsIncremental
 from ...utils.mrk.CustomPhotosFieldsUtil import CustomPhotosFieldsUtil
-from ...utils.mrk.XmpUtil import XmpUtil
+from ...utils.mrk.PhotoMetadata import PhotoMetadata
 from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
 
 
@@ -127,20 +127,16 @@ class PhotoFolderVectorizationService:
             "FolderLevel2": folder_level_2,
         }
 
-    def _extract_photo_payload(self, image_path: str) -> Dict[str, Any]:
+    def _extract_photo_payload(
+        self, image_path: str, fields: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
         """
         Extracao de metadados no mesmo padrao do fluxo DroneCoordinates.
+        `fields` (do PhotoMetadataCache) dispensa a leitura do arquivo.
         """
-        os_data = ExifUtil.extract_metadata_os(image_path, tool_key=self.tool_key)
-        image_data = ExifUtil.extract_metadata_image(image_path, tool_key=self.tool_key)
-        exif_data = ExifUtil.extract_metadata_exif(image_path, tool_key=self.tool_key)
-        xmp_data = XmpUtil.extract_metadata(image_path, tool_key=self.tool_key)
-
-        payload: Dict[str, Any] = {}
-        payload.update(os_data)
-        payload.update(image_data)
-        payload.update(exif_data)
-        payload.update(xmp_data)
+        if fields is None:
+            fields = PhotoMetadata.read_photo_fields(image_path, tool_key=self.tool_key)
+        payload: Dict[str, Any] = dict(fields)
 
         alias_map = {
             "drone-dji:AltitudeType": "AltitudeType",
@@ -299,7 +295,12 @@ class PhotoFolderVectorizationService:
         recursive: bool = True,
         generate_report: bool = True,
         layer_name: str = "Fotos_Sem_MRK",
+        cache=None,
     ) -> Dict[str, Any]:
+        """
+        Gera a camada de pontos das fotos de `base_folder`. `cache`:
+        `PhotoMetadataCache` opcional (fotos inalteradas não são relidas).
+        """
         if not os.path.isdir(base_folder):
             raise ValueError(f"Pasta invalida: {base_folder}")
 
@@ -322,8 +323,15 @@ class PhotoFolderVectorizationService:
         x_geom_key = MetadataFields.resolve_output_name("GpsLongitude")
         y_geom_key = MetadataFields.resolve_output_name("GpsLatitude")
 
+        cached = cache.lookup_many(files) if cache is not None else {}
+        read = []
         for file_path in files:
-            merged = self._extract_photo_payload(file_path)
+            fields = cached.get(file_path)
+            if fields is None and cache is not None:
+                identity = cache.identity(file_path)
+                fields = PhotoMetadata.read_photo_fields(file_path, tool_key=self.tool_key)
+                read.append((file_path, fields, identity))
+            merged = self._extract_photo_payload(file_path, fields)
 
             has_xmp = str(merged.get("xmp_encontrado", "nao")).lower() == "sim"
             if has_xmp:
@@ -356,6 +364,16 @@ class PhotoFolderVectorizationService:
             file_key = os.path.basename(file_path)
             raw_records[file_key] = canonical
 
+        if cache is not None:
+            cache.store_many(read)
+            self.logger.debug(
+                "Cache de metadados de fotos",
+                code="PHOTO_CACHE_USAGE",
+                photos=len(files),
+                hits=len(cached),
+                stored=len(read),
+            )
+
         # Calcula campos custom em lote para manter paridade com DroneCoordinates.
         try:
             custom_ready = {
@@ -364,17 +382,26 @@ class PhotoFolderVectorizationService:
                 if value.get("DateTimeOriginal") not in (None, "")
             }
             if custom_ready:
-                enriched = CustomPhotosFieldsUtil.calculate_all_custom_fields(
-                    custom_ready,
-                    tool_key=self.tool_key,
-                )
+                if cache is not None:
+                    state = CustomPhotosFieldsIncremental.shared(
+                        (
+                            "PhotoFolderVectorization",
+                            cache.normalize_path(base_folder),
+                            recursive,
+                        )
+                    )
+                    enriched = state.sync(custom_ready, tool_key=self.tool_key)
+                else:
+                    enriched = CustomPhotosFieldsUtil.calculate_all_custom_fields(
+                        custom_ready,
+                        tool_key=self.tool_key,
+                    )
                 for key, value in enriched.items():
                     raw_records[key].update(value)
         except Exception as exc:
             self.logger.warning(f"Falha ao calcular CUSTOM_FIELDS no modo sem MRK: {exc}")
 
-        for key, value in list(raw_records.items()):
-            raw_records[key] = MetadataFields.normalize_record_to_keys(value or {})
+        raw_records = MetadataFields.normalize_records_by_file(raw_records)
 
         for canonical in raw_records.values():
             canonical = self._filter_out_mrk_fields(canonical)
@@ -27,8 +27,12 @@ class ReportGenerationService:
         self.logger.info(f"Iniciando geracao de report a partir de: {json_path}")
 
         range_metadata_manager.load(tool_key=self.tool_key)
-        records = JSONUtil.load_records(json_path=json_path, tool_key=self.tool_key)
-        results: List[IMGMetadata] = [IMGMetadata(record).score() for record in records]
+        # Registros normalizados em lote e consumidos um a um: so os
+        # IMGMetadata pontuados ficam em memoria, nao a lista de registros
+        records = JSONUtil.iter_load_records(json_path=json_path, tool_key=self.tool_key)
+        results: List[IMGMetadata] = [
+            IMGMetadata(record, canonical=True).score() for record in records
+        ]
 
         agg = AggregateAnalyzer.analyze(results)
         engine = RenderEngine(tool_key=self.tool_key)
@@ -55,7 +59,7 @@ class ReportGenerationService:
         payload = {
             "json_path": json_path,
             "html_path": target_path,
-            "total_records": len(records),
+            "total_records": len(results),
             "total_scored": len(results),
         }
         self.logger.info(f"Report gerado com sucesso: {payload}")
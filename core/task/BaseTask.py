@@ -1,5 +1,11 @@
+import threading
+import time
+import tracemalloc
+
 from qgis.core import QgsTask, QgsMessageLog, Qgis
 from ..config.LogUtils import LogUtils
+from ..engine_tasks.ProcessPoolBackend import ProcessPoolBackend
+from ..engine_tasks.CancellationToken import CancellationToken, OperationCancelled
 
 
 class BaseTask(QgsTask):
@@ -26,14 +32,69 @@ class BaseTask(QgsTask):
         self.on_success = None
         self.on_error = None
 
+        # Métricas de execução (lidas pelo PipelineProfiler).
+        # Subclasses podem preencher `items_processed`.
+        self.items_processed = None
+        self.metrics = {
+            "started_at": None,
+            "finished_at": None,
+            "cpu_s": None,
+            "peak_mem_bytes": None,
+            "thread_id": None,
+        }
+
     def run(self) -> bool:
         self.logger.info("Task started")
+        self._start_metrics()
         try:
             return self._run()
+        except OperationCancelled:
+            # Utilitário interrompido pelo CancellationToken da task
+            self.logger.info("Task canceled")
+            return False
         except Exception as e:
             self.exception = e
             self.logger.critical(f"Unhandled exception in task: {e}")
             return False
+        finally:
+            self._stop_metrics()
+
+    def _start_metrics(self) -> None:
+        # Pico de memória é global ao processo (tracemalloc): com tasks
+        # concorrentes o valor é uma aproximação do consumo da task.
+        if tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._cpu_start = time.thread_time()
+        self.metrics["thread_id"] = threading.get_ident()
+        self.metrics["started_at"] = time.perf_counter()
+
+    def _stop_metrics(self) -> None:
+        self.metrics["finished_at"] = time.perf_counter()
+        self.metrics["cpu_s"] = round(time.thread_time() - self._cpu_start, 6)
+        if tracemalloc.is_tracing():
+            self.metrics["peak_mem_bytes"] = tracemalloc.get_traced_memory()[1]
+
+    def cancel_token(self, check_every: int = CancellationToken.DEFAULT_CHECK_EVERY):
+        """Token de cancelamento/progresso para passar aos utilitários."""
+        return CancellationToken.from_task(self, check_every=check_every)
+
+    def map_in_processes(self, func, items, batch_size=None, progress_range=(0, 100)):
+        """
+        Executa `func` (lote -> lista, livre de QGIS; ver `ProcessJobs`) no
+        pool de processos compartilhado.
+
+        O progresso dos lotes é mapeado em `progress_range` da task e o
+        `isCanceled()` da task interrompe o envio. Retorna None se cancelada.
+        O tempo de CPU dos workers não entra em `metrics["cpu_s"]`.
+        """
+        start, end = progress_range
+        return ProcessPoolBackend.shared().map(
+            func,
+            items,
+            batch_size=batch_size,
+            is_cancelled=self.isCanceled,
+            on_progress=lambda pct: self.setProgress(start + (end - start) * pct / 100.0),
+        )
 
     def finished(self, success: bool):
         if success:
@@ -5,10 +5,22 @@ import os
 from .BaseTask import BaseTask
 from ..config.LogUtils import LogUtils
 from ...utils.mrk.MrkParser import MrkParser
+from ...utils.mrk.MrkParseCache import MrkParseCache
+from ..model.MrkFileReader import MrkFileReader
+from ..engine_tasks.StreamChannel import StreamChannel
 
 
 class MrkParseTask(BaseTask):
-    """Task para ler arquivos MRK e extrair pontos."""
+    """
+    Task para ler arquivos MRK e extrair pontos.
+
+    Com `stream` (StreamChannel) os pontos são publicados em lotes de
+    `batch_size` à medida que a pasta é lida (`MrkParser.iter_folder`), em
+    vez de acumulados no resultado; os pontos são os mesmos do modo em lote.
+
+    Com `use_cache` (padrão) MRKs já lidos e inalterados vêm do
+    `MrkParseCache`.
+    """
 
     def __init__(
         self,
@@ -16,11 +28,17 @@ class MrkParseTask(BaseTask):
         recursive: bool,
         extra_fields: Optional[Dict[str, Any]],
         tool_key: str,
+        stream: Optional[StreamChannel] = None,
+        batch_size: Optional[int] = None,
+        use_cache: bool = True,
     ):
         super().__init__("Lendo MRKs", tool_key)
         self.paths = paths
         self.recursive = recursive
         self.extra_fields = extra_fields or {}
+        self.stream = stream
+        self.batch_size = batch_size or StreamChannel.DEFAULT_BATCH_SIZE
+        self.use_cache = use_cache
 
     def _run(self) -> bool:
         if self.isCanceled():
@@ -31,7 +49,10 @@ class MrkParseTask(BaseTask):
             f"Iniciando leitura de MRKs (paths={self.paths}, recursive={self.recursive})"
         )
 
+        cancel_token = self.cancel_token()
+        cache = MrkParseCache.shared() if self.use_cache else None
         all_points = []
+        points_total = 0
         for path in self.paths:
             base = path
             points = []
@@ -43,6 +64,8 @@ class MrkParseTask(BaseTask):
                     base_folder=base,
                     extra_fields=self.extra_fields,
                     tool_key=self.tool_key,
+                    cancel_token=cancel_token,
+                    cache=cache,
                 )
                 logger.info(f"Encontrados {len(points)} pontos no arquivo {path}")
             else:
@@ -51,11 +74,36 @@ class MrkParseTask(BaseTask):
                 if not os.path.isdir(base):
                     continue
 
+                if self.stream is not None:
+                    # Streaming: mesmos pontos de parse_folder (folder_level*
+                    # calculados para a pasta toda), sem acumular a pasta
+                    files = self._list_mrk_files(base)
+                    order = {file_path: i for i, file_path in enumerate(files, 1)}
+                    for batch in MrkParser.iter_folder(
+                        base,
+                        recursive=self.recursive,
+                        tool_key=self.tool_key,
+                        cancel_token=cancel_token,
+                        batch_size=self.batch_size,
+                        cache=cache,
+                    ):
+                        if self.isCanceled():
+                            return False
+                        points_total += self._publish(batch, base)
+                        done = order.get(batch[-1].get("mrk_path"))
+                        if done:
+                            self.setProgress(100.0 * done / len(files))
+                    logger.info(f"Publicados {points_total} pontos de {base} em stream")
+                    continue
+
                 points = MrkParser.parse_folder(
                     base,
                     recursive=self.recursive,
                     extra_fields=self.extra_fields,
                     tool_key=self.tool_key,
+                    cancel_token=cancel_token,
+                    parallel=True,
+                    cache=cache,
                 )
                 logger.info(f"Encontrados {len(points)} pontos em {base}")
 
@@ -63,6 +111,9 @@ class MrkParseTask(BaseTask):
             # MrkParser.parse_folder() retorna folder_name e folder_path
             # Usamos folder_path para fornecer path absoluto ao PhotoMetadata
             if points:
+                if self.stream is not None:
+                    points_total += self._publish(points, base)
+                    continue
                 for p in points:
                     # Usa path absoluto para cruzamento de metadados
                     p["mrk_folder"] = p.get("folder_path", base)
@@ -75,8 +126,21 @@ class MrkParseTask(BaseTask):
                 os.path.dirname(first_path) if os.path.isfile(first_path) else first_path
             )
 
+        self.items_processed = points_total if self.stream is not None else len(all_points)
         self.result = {
             "points": all_points,
             "base_folder": base_folder,
+            "points_total": self.items_processed,
         }
         return True
+
+    def _list_mrk_files(self, folder: str) -> List[str]:
+        """Mesma varredura do `MrkParser.parse_folder`."""
+        return MrkFileReader.list_files(folder, self.recursive)
+
+    def _publish(self, points: List[Dict[str, Any]], base: str) -> int:
+        for p in points:
+            p["mrk_folder"] = p.get("folder_path", base)
+        for batch in StreamChannel.chunked(points, self.batch_size):
+            self.stream.put(batch, self.isCanceled)
+        return len(points)
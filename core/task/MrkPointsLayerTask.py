@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from typing import Any, Dict, List, Optional
+
+from .BaseTask import BaseTask
+from ..engine_tasks.StreamChannel import StreamChannel
+from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
+
+
+class MrkPointsLayerTask(BaseTask):
+    """
+    Task consumidora de stream: enquanto o `MrkParseTask` ainda lê os MRKs,
+    converte cada lote em feições prontas (coordenadas + atributos já
+    convertidos, `VectorLayerGeometry.build_point_rows`) e acumula os pontos.
+
+    Não cria objetos do QGIS: a camada é montada a partir dessas linhas no
+    `MrkPointsLayerStep.on_success`, na thread principal.
+    """
+
+    def __init__(
+        self,
+        *,
+        stream: StreamChannel,
+        field_specs: List[tuple],
+        extra_fields: Optional[Dict[str, Any]],
+        tool_key: str,
+    ):
+        super().__init__("Montando pontos MRK", tool_key)
+        self.stream = stream
+        self.field_specs = field_specs
+        self.extra_fields = extra_fields
+
+    def _run(self) -> bool:
+        points = []
+        rows = []
+        skipped = 0
+
+        for batch in self.stream.batches(self.isCanceled):
+            batch_rows, batch_skipped = VectorLayerGeometry.build_point_rows(
+                batch,
+                self.field_specs,
+                geometry_keys=("lon", "lat"),
+                extra_fields=self.extra_fields,
+            )
+            rows.extend(batch_rows)
+            skipped += batch_skipped
+            points.extend(batch)
+
+        self.items_processed = len(points)
+        self.logger.info(
+            "Pontos MRK recebidos via stream",
+            code="MRK_STREAM_LAYER",
+            received=len(points),
+            skipped=skipped,
+            **self.stream.stats(),
+        )
+        self.result = {
+            "points": points,
+            "rows": rows,
+            "skipped": skipped,
+            "points_total": len(points),
+        }
+        return True
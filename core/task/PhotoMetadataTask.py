@@ -4,11 +4,18 @@ from qgis.core import QgsProject
 from .BaseTask import BaseTask
 from ..config.LogUtils import LogUtils
 from ...utils.mrk.PhotoMetadata import PhotoMetadata
+from ...utils.mrk.PhotoMetadataCache import PhotoMetadataCache
 from ...utils.mrk.MetadataFields import MetadataFields
 
 
 class PhotoMetadataTask(BaseTask):
-    """Task que cruza metadados de fotos com atributos de uma camada de pontos."""
+    """
+    Task que cruza metadados de fotos com atributos de uma camada de pontos.
+
+    Com `use_cache` (padrão) fotos já lidas e inalteradas vêm do
+    `PhotoMetadataCache`. Com `project_fields` só os campos selecionados
+    são lidos das fotos (ver `PhotoMetadata.enrich`).
+    """
 
     def __init__(
         self,
@@ -20,6 +27,9 @@ class PhotoMetadataTask(BaseTask):
         selected_custom_fields: list,
         selected_mrk_fields: list,
         tool_key: str,
+        workers: int = None,
+        use_cache: bool = True,
+        project_fields: bool = False,
     ):
         super().__init__("Cruzando fotos", tool_key)
         self.layer_id = layer_id
@@ -29,6 +39,10 @@ class PhotoMetadataTask(BaseTask):
         self.selected_required_fields = selected_required_fields or []
         self.selected_custom_fields = selected_custom_fields or []
         self.selected_mrk_fields = selected_mrk_fields or []
+        # Threads de leitura das fotos (None = PhotoMetadata.DEFAULT_WORKERS)
+        self.workers = workers
+        self.use_cache = use_cache
+        self.project_fields = project_fields
 
     def _run(self) -> bool:
         if self.isCanceled():
@@ -121,6 +135,10 @@ class PhotoMetadataTask(BaseTask):
             selected_custom_fields=self.selected_custom_fields,
             selected_mrk_fields=self.selected_mrk_fields,
             return_report=True,
+            cancel_token=self.cancel_token(),
+            workers=self.workers,
+            cache=PhotoMetadataCache.shared() if self.use_cache else None,
+            project_fields=self.project_fields,
         )
         enriched = enrich_result.get("points", pontos) if isinstance(enrich_result, dict) else pontos
         json_dump_path = enrich_result.get("json_dump_path") if isinstance(enrich_result, dict) else None
@@ -193,6 +211,7 @@ class PhotoMetadataTask(BaseTask):
                 data={"json_dump_path": json_dump_path},
             )
 
+        self.items_processed = len(pontos)
         self.result = {
             "updates": updates,
             "field_names": list(field_names),
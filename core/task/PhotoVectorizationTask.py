@@ -2,10 +2,16 @@
 from .BaseTask import BaseTask
 from ..config.LogUtils import LogUtils
 from ..services.PhotoFolderVectorizationService import PhotoFolderVectorizationService
+from ...utils.mrk.PhotoMetadataCache import PhotoMetadataCache
 
 
 class PhotoVectorizationTask(BaseTask):
-    """Task que gera camada vetorial a partir de pasta de fotos (sem MRK)."""
+    """
+    Task que gera camada vetorial a partir de pasta de fotos (sem MRK).
+
+    Com `use_cache` (padrão) fotos já lidas e inalteradas vêm do
+    `PhotoMetadataCache`.
+    """
 
     def __init__(
         self,
@@ -13,11 +19,13 @@ class PhotoVectorizationTask(BaseTask):
         recursive: bool,
         layer_name: str,
         tool_key: str,
+        use_cache: bool = True,
     ):
         super().__init__("Gerando vetor de fotos", tool_key)
         self.base_folder = base_folder
         self.recursive = recursive
         self.layer_name = layer_name
+        self.use_cache = use_cache
 
     def _run(self) -> bool:
         if self.isCanceled():
@@ -32,6 +40,7 @@ class PhotoVectorizationTask(BaseTask):
                 recursive=self.recursive,
                 generate_report=False,  # Relatório será gerado pelo ReportGenerationStep
                 layer_name=self.layer_name,
+                cache=PhotoMetadataCache.shared() if self.use_cache else None,
             )
 
             if not result or not isinstance(result, dict):
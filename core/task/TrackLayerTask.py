@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from typing import Any, Dict, List, Optional
+
+from .BaseTask import BaseTask
+from ...utils.vector.VectorLayerGeometry import VectorLayerGeometry
+from ...utils.mrk.MetadataFields import MetadataFields
+
+
+class TrackLayerTask(BaseTask):
+    """
+    Task que agrupa e ordena os pontos do MRK nas linhas da trilha, fora da
+    thread principal.
+
+    Só produz dados simples (vértices e atributos de
+    `VectorLayerGeometry.build_line_records`); a camada é criada, gravada em
+    `output_path` e carregada pelo `TrackLayerStep.on_success`, na thread
+    principal. Com `reuse_existing=True` (quem chama já conferiu que o GPKG
+    é do MRK atual) as linhas nem são calculadas.
+    """
+
+    def __init__(
+        self,
+        *,
+        points: List[Dict[str, Any]],
+        layer_name: str,
+        output_path: Optional[str],
+        tool_key: str,
+        reuse_existing: bool = False,
+    ):
+        super().__init__("Gerando trilha", tool_key)
+        self.points = points or []
+        self.layer_name = layer_name
+        self.output_path = output_path
+        self.reuse_existing = reuse_existing
+
+    def _run(self) -> bool:
+        if self.isCanceled():
+            return False
+
+        self.items_processed = len(self.points)
+        self.result = {
+            "layer_name": self.layer_name,
+            "output_path": self.output_path,
+            "reuse_existing": bool(self.output_path and self.reuse_existing),
+            "field_names": [],
+            "lines": [],
+        }
+
+        records = VectorLayerGeometry.build_line_records(
+            self.points,
+            group_by_fields=["mrk_path", "mrk_file"],
+            attribute_fields=MetadataFields.default_track_attribute_keys(),
+            tool_key=self.tool_key,
+        )
+        if self.isCanceled():
+            return False
+
+        if records is not None:
+            self.result["field_names"], self.result["lines"] = records
+        return True
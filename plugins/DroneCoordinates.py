@@ -3,10 +3,13 @@ import os
 from qgis.core import QgsProject
 from ..plugins.BasePlugin import BasePluginMTL
 from ..core.engine_tasks.AsyncPipelineEngine import AsyncPipelineEngine
+from ..core.engine_tasks.CheckpointStore import CheckpointStore
 from ..core.engine_tasks.ExecutionContext import ExecutionContext
 from ..core.engine_tasks.MrkParseStep import MrkParseStep
+from ..core.engine_tasks.MrkPointsLayerStep import MrkPointsLayerStep
 from ..core.engine_tasks.PhotoMetadataStep import PhotoMetadataStep
 from ..core.engine_tasks.ReportGenerationStep import ReportGenerationStep
+from ..core.engine_tasks.StreamChannel import StreamChannel
 from ..utils.mrk.PhotoMetadata import PhotoMetadata
 from ..utils.vector.VectorLayerGeometry import VectorLayerGeometry
 from ..utils.vector.VectorLayerSource import VectorLayerSource
@@ -27,6 +30,9 @@ class DroneCordinates(BasePluginMTL):
 
     TOOL_KEY = ToolKey.DRONE_COORDINATES
 
+    # Chaves do contexto lidas por `_on_pipeline_finished` (`result_keys`)
+    RESULT_KEYS = ["layer", "points"]
+
     CHECKBOX_OPTIONS = {
         "recursive": STR.RECURSIVE_SEARCH,
         "photos": STR.PHOTOS_METADATA,
@@ -479,7 +485,7 @@ class DroneCordinates(BasePluginMTL):
 
         extra_fields = None
 
-        context = ExecutionContext()
+        context = ExecutionContext(slots=MrkParseStep.CONTEXT_SLOTS)
         context.set("paths", paths)
         context.set("recursive", recursive)
         context.set("extra_fields", extra_fields)
@@ -495,7 +501,12 @@ class DroneCordinates(BasePluginMTL):
         context.set("iface", self.iface)
         context.set("points_layer_name", "MRK_Pontos")
 
-        steps = [MrkParseStep()]
+        # Pontos em stream: a camada é preparada lote a lote enquanto os MRKs
+        # ainda são lidos; `layer`/`points` chegam ao contexto como antes
+        steps = [
+            MrkParseStep(stream_batch_size=StreamChannel.DEFAULT_BATCH_SIZE),
+            MrkPointsLayerStep(),
+        ]
         if apply_photos:
             steps.append(PhotoMetadataStep())
 
@@ -514,6 +525,9 @@ class DroneCordinates(BasePluginMTL):
             context=context,
             on_finished=self._on_pipeline_finished,
             on_error=self._on_pipeline_error,
+            checkpoint_store=CheckpointStore(self.TOOL_KEY),
+            mode=AsyncPipelineEngine.MODE_GRAPH,
+            result_keys=self.RESULT_KEYS,
         )
         engine.start()
 
@@ -553,9 +567,7 @@ class DroneCordinates(BasePluginMTL):
 
         # ===== TRAÃ‡O =====
         points = context.get("points", []) or []
-        normalized_points = [
-            MetadataFields.normalize_record_to_keys(point or {}) for point in points
-        ]
+        normalized_points = MetadataFields.normalize_records_to_keys(points)
         try:
             vl_line = VectorLayerGeometry.create_line_layer_from_points(
                 normalized_points,
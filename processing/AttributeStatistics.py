@@ -18,6 +18,8 @@ from qgis.core import (
 from ..i18n.TranslationManager import STR
 from ..resources.IconManager import IconManager as im
 from ..utils.ToolKeys import ToolKey
+from ..core.engine_tasks.ProcessJobs import ProcessJobs
+from ..core.engine_tasks.ProcessPoolBackend import ProcessPoolBackend
 from .BaseProcessingAlgorithm import BaseProcessingAlgorithm
 from .model.attribute_statistics_model import AttributeStatisticsModel
 
@@ -36,6 +38,8 @@ class AttributeStatistics(BaseProcessingAlgorithm):
     OUTPUT = "OUTPUT"
     DISPLAY_HELP = "DISPLAY_HELP"
     OPEN_OUTPUT_FOLDER = "OPEN_OUTPUT_FOLDER"
+    # Abaixo disso o custo de serializar para o pool de processos não compensa
+    PROCESS_POOL_MIN_VALUES = 200000
 
     STATS = {
         "MEAN": STR.MEAN,
@@ -130,6 +134,22 @@ class AttributeStatistics(BaseProcessingAlgorithm):
             )
         )
 
+    def _compute_stats(self, values_by_field, stats_enabled, feedback):
+        """Estatísticas por campo; campos grandes vão para o pool de processos."""
+        total_values = sum(len(v) for v in values_by_field.values())
+        if len(values_by_field) < 2 or total_values < self.PROCESS_POOL_MIN_VALUES:
+            return self._model.compute_all(values_by_field, stats_enabled)
+
+        jobs = [(fn, vals, stats_enabled) for fn, vals in values_by_field.items()]
+        results = ProcessPoolBackend.shared().map(
+            ProcessJobs.field_stats,
+            jobs,
+            batch_size=1,
+            is_cancelled=feedback.isCanceled,
+            on_progress=lambda pct: feedback.setProgress(80 + 0.2 * pct),
+        )
+        return None if results is None else dict(results)
+
     def processAlgorithm(self, parameters, context, feedback):
         layer = self.parameterAsLayer(parameters, self.INPUT_LAYER, context)
         if layer is None:
@@ -155,8 +175,16 @@ class AttributeStatistics(BaseProcessingAlgorithm):
                     val = float(v)
                     if math.isfinite(val):
                         values_by_field[fn].append(val)
+            if feedback.isCanceled():
+                break
             if total:
-                feedback.setProgress(int(100 * i / total))
+                feedback.setProgress(int(80 * i / total))
+        # Cancelado: sem CSV parcial (só o cabeçalho) no caminho de saída
+        computed = None if feedback.isCanceled() else self._compute_stats(
+            values_by_field, stats_enabled, feedback
+        )
+        if computed is None or feedback.isCanceled():
+            raise QgsProcessingException(STR.OPERATION_CANCELLED_BY_USER)
         force_ptbr = bool(self.parameterAsBool(parameters, self.PTBR_FORMAT, context))
         sep = ";" if (force_ptbr or ptbr_format) else ","
         dec = "," if (force_ptbr or ptbr_format) else "."
@@ -170,7 +198,6 @@ class AttributeStatistics(BaseProcessingAlgorithm):
         try:
             with open(output_path, "w", encoding="utf-8") as f:
                 f.write(sep.join(headers) + "\n")
-                computed = self._model.compute_all(values_by_field, stats_enabled)
                 for fn in numeric_fields:
                     vals = sorted(values_by_field[fn])
                     row = [fn, str(len(vals))]
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: `CustomPhotosFieldsUtil.calculate_all_custom_fields`, motor
+escalar x NumPy, em escala.
+
+Gera voos sintéticos no formato dos registros de foto DJI (faixas de ida e
+volta, intervalos de 2-3 s, alguns saltos de tempo, LRF e RTK variados),
+mede os dois motores para cada tamanho e confere que o resultado tem as
+mesmas fotos, chaves e ordem, com valores iguais dentro de `--tolerance`
+(textos, booleanos e `strip_id` iguais). Precisa das bibliotecas do QGIS
+(qgis.core) e do NumPy no Python usado, mas não abre interface.
+
+Uso:
+    python tests/benchmarks/bench_custom_fields_engines.py
+        [--sizes 1000,10000,50000] [--flights N] [--tolerance X]
+"""
+import argparse
+import importlib
+import math
+import pathlib
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def build_photos(photos, flights=4, seed=0):
+    """{arquivo: registro} de `flights` voos, em ordem embaralhada."""
+    rng = random.Random(seed)
+    records = {}
+    per_flight = max(1, photos // flights)
+    for flight in range(flights):
+        when = datetime(2024, 5, 1 + flight % 3, 9 + flight % 8, 0, 0)
+        lat, lon = -22.0 + flight * 0.01, -47.0
+        altitude = 800 + rng.random() * 5
+        heading = rng.choice([0, 90, 180, 270])
+        shutter = 1000 * flight
+        for n in range(per_flight):
+            if n and n % 40 == 0:
+                heading = (heading + 180 + rng.uniform(-5, 5)) % 360
+            step = 200 if rng.random() < 0.01 else rng.uniform(1.5, 3.0)
+            when += timedelta(seconds=int(step))
+            lat += math.cos(math.radians(heading)) * 1e-4
+            lon += math.sin(math.radians(heading)) * 1e-4
+            shutter += 1
+            yaw = heading - 360 if heading > 180 else heading
+            record = {
+                "DateTimeOriginal": when.strftime("%Y:%m:%d %H:%M:%S"),
+                "DroneSerialNumber": f"1581F5FJD{flight % 2}",
+                "CameraSerialNumber": "1ZNBJ7R0",
+                "AbsoluteAltitude": f"+{altitude + rng.uniform(-1, 1):.3f}",
+                "ShutterCount": str(shutter),
+                "GpsLatitude": lat,
+                "GpsLongitude": lon,
+                "FocalLength": 12.29,
+                "ExifImageWidth": 5280,
+                "ExifImageHeight": 3956,
+                "SensorTemperature": rng.choice([None, 35.5]),
+                "LensTemperature": 30.0,
+                "FlightXSpeed": f"{rng.uniform(-10, 10):+.2f}",
+                "FlightYSpeed": f"{rng.uniform(-10, 10):+.2f}",
+                "FlightZSpeed": "+0.0",
+                "ExposureTime": rng.choice([0.001, 0.0005]),
+                "FNumber": 2.8,
+                "GimbalYawDegree": f"{yaw + rng.uniform(-3, 3):+.1f}",
+                "FlightYawDegree": f"{yaw:+.1f}",
+                "GimbalPitchDegree": "-90.0",
+                "FlightPitchDegree": f"{rng.uniform(-5, 5):+.1f}",
+                "LightSource": rng.choice([0, 1, 21]),
+                "WhiteBalanceCCT": rng.choice([5500, 6500]),
+                "RtkFlag": rng.choice(["50", "16"]),
+                "RtkStdLon": rng.choice([0.01, 0.5]),
+                "RtkStdLat": 0.012,
+                "RtkStdHgt": 0.02,
+                "RtkDiffAge": rng.choice([1, 5]),
+                "DewarpFlag": rng.choice(["0", "1"]),
+            }
+            if rng.random() < 0.2:
+                record["LRFTargetDistance"] = rng.choice([0, 95.5, "120.2"])
+            records[f"DJI_{flight:02d}_{n:05d}_V.JPG"] = record
+    items = list(records.items())
+    rng.shuffle(items)
+    return dict(items)
+
+
+def compare(expected, result, tolerance):
+    """Primeira diferença entre os dois resultados, ou None."""
+    if list(expected) != list(result):
+        return "ordem das fotos"
+    for name, record in expected.items():
+        other = result[name]
+        if list(record) != list(other):
+            return f"{name}: chaves"
+        for key, value in record.items():
+            new = other[key]
+            if isinstance(value, tuple):
+                pairs = list(zip(value, new))
+            elif isinstance(value, float):
+                pairs = [(value, new)]
+            else:
+                if value != new:
+                    return f"{name}.{key}: {value!r} x {new!r}"
+                continue
+            for old, cur in pairs:
+                if not isinstance(cur, float) or abs(old - cur) > tolerance:
+                    return f"{name}.{key}: {value!r} x {new!r}"
+    return None
+
+
+def _timed(calculate, photos):
+    start = time.perf_counter()
+    result = calculate(photos)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--flights", type=int, default=4)
+    parser.add_argument("--tolerance", type=float, default=2e-4)
+    args = parser.parse_args()
+
+    Util = _plugin_module("utils.mrk.CustomPhotosFieldsUtil").CustomPhotosFieldsUtil
+    Numpy = _plugin_module("utils.mrk.CustomPhotosFieldsNumpy").CustomPhotosFieldsNumpy
+    if not Numpy.available():
+        raise SystemExit("NumPy não instalado")
+
+    print(f"{'fotos':>8} {'escalar (s)':>12} {'numpy (s)':>10} {'speedup':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        photos = build_photos(size, args.flights)
+        scalar_s, expected = _timed(
+            lambda batch: Util.calculate_all_custom_fields(batch, engine="scalar"), photos
+        )
+        # Direto no motor: sem o fallback para o escalar do calculate_all_custom_fields
+        numpy_s, result = _timed(Numpy.calculate_all_custom_fields, photos)
+        difference = compare(expected, result, args.tolerance)
+        if difference:
+            raise SystemExit(f"{size} fotos: motores diferem em {difference}")
+        print(f"{len(photos):>8} {scalar_s:>12.3f} {numpy_s:>10.3f} {scalar_s / numpy_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: `CustomPhotosFieldsIncremental.sync` x recálculo completo do
+`CustomPhotosFieldsUtil.calculate_all_custom_fields`.
+
+Monta um projeto sintético de `--photos` fotos (mesmos voos do
+bench_custom_fields_engines), sincroniza o estado uma vez e mede a entrada
+de `--added` fotos novas de outro drone no mesmo horário (fotos
+intercaladas com as antigas), comparando com o recálculo de tudo. O
+resultado das duas formas tem de ser igual dentro de `--tolerance`.
+Precisa das bibliotecas do QGIS (qgis.core) no Python usado, mas não abre
+interface.
+
+Uso:
+    python tests/benchmarks/bench_custom_fields_incremental.py
+        [--photos 50000] [--added 500] [--flights N]
+        [--engine auto|scalar|numpy] [--tolerance X]
+"""
+import argparse
+import importlib
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def _engines_bench():
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+    return importlib.import_module("bench_custom_fields_engines")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--photos", type=int, default=50_000)
+    parser.add_argument("--added", type=int, default=500)
+    parser.add_argument("--flights", type=int, default=8)
+    parser.add_argument("--engine", default="auto")
+    parser.add_argument("--tolerance", type=float, default=2e-4)
+    args = parser.parse_args()
+
+    Util = _plugin_module("utils.mrk.CustomPhotosFieldsUtil").CustomPhotosFieldsUtil
+    Incremental = _plugin_module(
+        "utils.mrk.CustomPhotosFieldsIncremental"
+    ).CustomPhotosFieldsIncremental
+    bench = _engines_bench()
+
+    photos = bench.build_photos(args.photos, args.flights, seed=1)
+    added = {
+        f"N_{name}": dict(record, DroneSerialNumber="1581F5FJDNOVO")
+        for name, record in bench.build_photos(args.added, 1, seed=7).items()
+    }
+    state = Incremental(engine=args.engine)
+    start = time.perf_counter()
+    state.sync(photos)
+    initial_s = time.perf_counter() - start
+
+    updated = {**photos, **added}
+    start = time.perf_counter()
+    result = state.sync(updated)
+    sync_s = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = Util.calculate_all_custom_fields(updated, engine=args.engine)
+    full_s = time.perf_counter() - start
+
+    difference = bench.compare(expected, result, args.tolerance)
+    if difference:
+        raise SystemExit(f"Incremental difere do recálculo completo em {difference}")
+    print(f"{len(photos)} fotos + {len(added)} novas (motor {args.engine})")
+    print(f"{'etapa':<22} {'tempo (s)':>10}")
+    print(f"{'estado inicial':<22} {initial_s:>10.3f}")
+    print(f"{'recálculo completo':<22} {full_s:>10.3f}")
+    print(f"{'incremental (sync)':<22} {sync_s:>10.3f}")
+    print(f"Speedup: {full_s / sync_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: vazão do pipeline de MRK (MrkParseStep -> TrackLayerStep) sem GUI.
+
+Roda o mesmo `AsyncPipelineEngine` do `DroneCoordinatesRunner` com o
+`ThreadPoolTaskExecutor` em vez do gerenciador de tarefas do QGIS, uma pasta
+de levantamento por vez. Precisa das bibliotecas do QGIS (qgis.core) no
+Python usado, mas não abre interface nem exige projeto.
+
+Uso:
+    python tests/benchmarks/bench_headless_pipeline.py <pasta> [<pasta> ...] [--workers N] [--graph]
+"""
+import argparse
+import importlib
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folders", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--graph", action="store_true")
+    args = parser.parse_args()
+
+    from qgis.core import QgsApplication
+
+    app = QgsApplication([], False)
+    app.initQgis()
+
+    engine_mod = _plugin_module("core.engine_tasks.AsyncPipelineEngine")
+    AsyncPipelineEngine = engine_mod.AsyncPipelineEngine
+    ExecutionContext = _plugin_module("core.engine_tasks.ExecutionContext").ExecutionContext
+    MrkParseStep = _plugin_module("core.engine_tasks.MrkParseStep").MrkParseStep
+    TrackLayerStep = _plugin_module("core.engine_tasks.TrackLayerStep").TrackLayerStep
+    executor_mod = _plugin_module("core.engine_tasks.TaskExecutor")
+
+    executor = executor_mod.ThreadPoolTaskExecutor(max_workers=args.workers)
+    mode = AsyncPipelineEngine.MODE_GRAPH if args.graph else AsyncPipelineEngine.MODE_SEQUENTIAL
+
+    print(f"{'pasta':<40} {'status':>10} {'pontos':>8} {'tempo (s)':>10} {'pontos/s':>10}")
+    total_points = 0
+    total_start = time.perf_counter()
+    for folder in args.folders:
+        context = ExecutionContext()
+        context.set("paths", [folder])
+        context.set("recursive", True)
+        context.set("extra_fields", None)
+        context.set("tool_key", "bench_headless_pipeline")
+        context.set("track_layer_name", "trilha")
+        status = {}
+        engine = AsyncPipelineEngine(
+            steps=[MrkParseStep(), TrackLayerStep()],
+            context=context,
+            on_finished=lambda c: status.setdefault("value", "ok"),
+            on_error=lambda errors: status.setdefault("value", "erro"),
+            on_cancelled=lambda c: status.setdefault("value", "cancelado"),
+            mode=mode,
+            executor=executor,
+        )
+        started = time.perf_counter()
+        executor.run_until_complete(engine)
+        elapsed = time.perf_counter() - started
+        points = len(context.get("points") or [])
+        total_points += points
+        print(
+            f"{folder[-40:]:<40} {status.get('value', '?'):>10} {points:>8} "
+            f"{elapsed:>10.3f} {points / elapsed if elapsed else 0:>10.0f}"
+        )
+
+    total = time.perf_counter() - total_start
+    print(f"total: {total_points} pontos em {total:.3f}s")
+    executor.shutdown()
+    app.exitQgis()
+
+
+if __name__ == "__main__":
+    main()
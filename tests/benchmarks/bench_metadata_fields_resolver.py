@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: `MetadataFields.normalize_record_to_keys` com o índice compilado.
+
+Gera registros no formato dos payloads de foto (atributos EXIF/XMP já
+sanitizados, nomes de sistema, chaves com namespace e campos fora do
+catálogo) e mede a normalização de 100k registros, um a um e em lote
+(`normalize_records_to_keys`, um mapeamento por formato de registro;
+`--layouts` formatos distintos), conferindo que os dois dão o mesmo
+resultado. Com `--baseline <ref>`
+carrega o `MetadataFields` de outra revisão do git (ex.: a anterior ao
+índice) e mede o mesmo conjunto nos dois, conferindo que os registros
+normalizados são iguais. Precisa das bibliotecas do QGIS (qgis.core) no
+Python usado, mas não abre interface.
+
+Uso:
+    python tests/benchmarks/bench_metadata_fields_resolver.py [--records N]
+        [--fields N] [--layouts N] [--baseline <ref git>]
+        [--baseline-records N]
+"""
+import argparse
+import importlib
+import importlib.util
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+EXTRA_NAMES = [
+    "arquivo",
+    "caminho",
+    "tamanho_mb",
+    "os_date",
+    "voo_id",
+    "xmp:CreateDate",
+    "drone-dji:GpsLatitude",
+    "xmp_bloco_1:drone-dji:AbsoluteAltitude",
+    "EXIF:Model",
+    "dt_full",
+    "folder_path",
+    "CampoDesconhecido",
+    "xmp_erro",
+]
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def load_baseline(reference, package):
+    """`MetadataFields` da revisão `reference`, no mesmo pacote do atual."""
+    source = subprocess.run(
+        ["git", "show", f"{reference}:utils/mrk/MetadataFields.py"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    ).stdout
+    with tempfile.NamedTemporaryFile("wb", suffix=".py", delete=False) as fh:
+        fh.write(source)
+    name = f"{package}._MetadataFieldsBaseline"
+    spec = importlib.util.spec_from_file_location(name, fh.name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        os.remove(fh.name)
+    return module.MetadataFields
+
+
+def build_records(MetadataFields, records, fields, layouts=8, seed=0):
+    rng = random.Random(seed)
+    names = sorted(
+        {field.attribute for field in MetadataFields.all_fields().values() if field.attribute}
+        | set(MetadataFields.all_fields())
+        | set(EXTRA_NAMES)
+    )
+    # Poucos "formatos" de registro, como fotos de um mesmo equipamento
+    layouts = [rng.sample(names, min(fields, len(names))) for _ in range(layouts)]
+    return [
+        {name: n for name in layouts[n % len(layouts)]} for n in range(records)
+    ]
+
+
+def _timed(MetadataFields, records):
+    start = time.perf_counter()
+    result = [MetadataFields.normalize_record_to_keys(record) for record in records]
+    return time.perf_counter() - start, result
+
+
+def _timed_batch(MetadataFields, records):
+    start = time.perf_counter()
+    result = MetadataFields.normalize_records_to_keys(records)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--fields", type=int, default=60)
+    parser.add_argument("--layouts", type=int, default=8)
+    parser.add_argument("--baseline")
+    parser.add_argument("--baseline-records", type=int, default=5_000)
+    args = parser.parse_args()
+
+    module = _plugin_module("utils.mrk.MetadataFields")
+    MetadataFields = module.MetadataFields
+    records = build_records(MetadataFields, args.records, args.fields, args.layouts)
+    print(f"{len(records)} registros x {args.fields} campos ({args.layouts} formatos)")
+
+    MetadataFields._field_index = None
+    start = time.perf_counter()
+    MetadataFields.field_index()
+    print(f"Índice compilado em {time.perf_counter() - start:.3f} s")
+
+    elapsed, single = _timed(MetadataFields, records)
+    per_record = elapsed / len(records) * 1e6
+    batch_elapsed, batch = _timed_batch(MetadataFields, records)
+    for n, (one, many) in enumerate(zip(single, batch)):
+        if list(one.items()) != list(many.items()):
+            raise SystemExit(f"Registro {n} difere entre um a um e lote")
+    batch_per_record = batch_elapsed / len(records) * 1e6
+    print(f"{'implementação':<16} {'registros':>10} {'tempo (s)':>10} {'µs/registro':>12}")
+    print(f"{'índice':<16} {len(records):>10} {elapsed:>10.3f} {per_record:>12.2f}")
+    print(
+        f"{'índice (lote)':<16} {len(records):>10} {batch_elapsed:>10.3f} "
+        f"{batch_per_record:>12.2f}"
+    )
+
+    if args.baseline:
+        Baseline = load_baseline(args.baseline, module.__name__.rsplit(".", 1)[0])
+        subset = records[: args.baseline_records]
+        base_elapsed, expected = _timed(Baseline, subset)
+        _, result = _timed(MetadataFields, subset)
+        for n, (old, new) in enumerate(zip(expected, result)):
+            if list(old.items()) != list(new.items()):
+                raise SystemExit(f"Registro {n} difere do baseline")
+        base_per_record = base_elapsed / len(subset) * 1e6
+        print(
+            f"{args.baseline:<16} {len(subset):>10} {base_elapsed:>10.3f} "
+            f"{base_per_record:>12.2f}"
+        )
+        print(f"Speedup por registro: {base_per_record / per_record:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
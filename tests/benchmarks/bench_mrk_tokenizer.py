@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: leitura de linhas MRK com a regex antiga x `MrkTokenizer`.
+
+Gera um MRK sintético (layout DJI, 100k linhas por padrão) e mede, no mesmo
+arquivo, o laço antigo de `MrkFileReader.read_arrays` (`LINE_RE.search`,
+só foto/lat/lon/alt) e o tokenizador atual (todas as colunas). Confere que
+foto/lat/lon/alt saem iguais nos dois caminhos. Não depende do QGIS.
+
+Uso:
+    python tests/benchmarks/bench_mrk_tokenizer.py [--lines N] [--repeat N] [--noise F]
+"""
+import argparse
+import importlib
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+MRK_LINE = (
+    "{n}\t{sow:.6f}\t[2241]\t{dn:>5},N\t{de:>5},E\t{dv:>5},V\t"
+    "{lat:.8f},Lat\t{lon:.8f},Lon\t{alt:.3f},Ellh\t"
+    "{sn:.6f}, {se:.6f}, {sv:.6f}\t{q},Q\n"
+)
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def write_synthetic_mrk(path, lines, noise):
+    """`noise`: fração de linhas fora do layout (vão para o caminho lento)."""
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as fh:
+        for n in range(1, lines + 1):
+            if rng.random() < noise:
+                fh.write(f"{n} {rng.uniform(-23, -22):.8f},Lat {rng.uniform(-48, -47):.8f},Lon 800,Ellh\n")
+                continue
+            fh.write(
+                MRK_LINE.format(
+                    n=n,
+                    sow=416519.0 + n * 2.1,
+                    dn=rng.randint(-40, 40),
+                    de=rng.randint(-40, 40),
+                    dv=rng.randint(120, 200),
+                    lat=rng.uniform(-23, -22),
+                    lon=rng.uniform(-48, -47),
+                    alt=rng.uniform(780, 840),
+                    sn=rng.uniform(0.005, 0.03),
+                    se=rng.uniform(0.005, 0.03),
+                    sv=rng.uniform(0.01, 0.05),
+                    q=rng.choice((50, 50, 50, 34, 16)),
+                )
+            )
+
+
+def read_regex(path, line_re):
+    """Laço de `MrkFileReader.read_arrays` antes do tokenizador."""
+    foto = array("q")
+    lat = array("d")
+    lon = array("d")
+    alt = array("d")
+    with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+        for line in fh:
+            m = line_re.search(line)
+            if not m:
+                continue
+            foto.append(int(m.group("foto")))
+            lat.append(float(m.group("lat")))
+            lon.append(float(m.group("lon")))
+            alt.append(float(m.group("alt")))
+    return {"foto": foto, "lat": lat, "lon": lon, "alt": alt}
+
+
+def best_of(repeat, fn, *args):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.0)
+    args = parser.parse_args()
+
+    MrkFileReader = _plugin_module("core.model.MrkFileReader").MrkFileReader
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "DJI_202401011200_001_Bench_Timestamp.MRK")
+        write_synthetic_mrk(path, args.lines, args.noise)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"Arquivo sintético: {args.lines} linhas, {size_mb:.1f} MB, ruído {args.noise:.0%}")
+
+        regex_s, old = best_of(args.repeat, read_regex, path, MrkFileReader.LINE_RE)
+        token_s, new = best_of(args.repeat, MrkFileReader.read_arrays, path)
+
+        for name in ("foto", "lat", "lon", "alt"):
+            if old[name] != new[name]:
+                raise SystemExit(f"Divergência na coluna '{name}'")
+
+        print(f"{'caminho':<12} {'colunas':>8} {'tempo (s)':>10} {'linhas/s':>12}")
+        for label, elapsed, columns in (
+            ("regex", regex_s, old),
+            ("tokenizer", token_s, new),
+        ):
+            print(
+                f"{label:<12} {len(columns):>8} {elapsed:>10.4f} "
+                f"{args.lines / elapsed:>12,.0f}"
+            )
+        print(f"tokenizer/regex: {token_s / regex_s:.2f}x o tempo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: dump de metadados de fotos em JSON Lines (`PhotoMetadataDump`,
+com e sem gzip) x documento JSON único (formato anterior, `json.dump` com
+`indent=2` e `json.load`).
+
+Gera `--records` registros no formato do dump do `PhotoMetadata.enrich`
+(~`--fields` campos por foto, em `--groups` pastas), grava e lê de volta
+em cada formato e mostra tempo, pico de memória do Python (tracemalloc) e
+tamanho do arquivo. A leitura do JSON Lines é registro a registro, como no
+`JSONUtil.iter_records`, sem guardar os registros.
+
+Uso:
+    python tests/benchmarks/bench_photo_metadata_dump.py [--records N]
+        [--fields N] [--groups N]
+"""
+import argparse
+import importlib
+import json
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def build_groups(records, fields, groups, seed=0):
+    """{pasta: {arquivo: registro}} com textos e números variados."""
+    rng = random.Random(seed)
+    names = [f"Campo{n:03d}" for n in range(fields)]
+    out = {}
+    for n in range(records):
+        folder = f"D:/campanha/voo_{n % groups:03d}"
+        record = {}
+        for k, name in enumerate(names):
+            record[name] = rng.random() * 1000 if k % 3 else f"valor {rng.randint(0, 99999)}"
+        out.setdefault(folder, {})[f"DJI_{n:06d}_V.JPG"] = record
+    return out
+
+
+def _measure(action):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--fields", type=int, default=60)
+    parser.add_argument("--groups", type=int, default=20)
+    args = parser.parse_args()
+
+    PhotoMetadataDump = _plugin_module("core.model.PhotoMetadataDump").PhotoMetadataDump
+    groups = build_groups(args.records, args.fields, args.groups)
+    folder = tempfile.mkdtemp(prefix="bench_dump_")
+
+    def write_document(path):
+        payload = {
+            "groups": {
+                name: {"points": len(records), "raw_records": records}
+                for name, records in groups.items()
+            }
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False, indent=2, default=str)
+
+    def read_document(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        return sum(len(group["raw_records"]) for group in data["groups"].values())
+
+    def write_lines(path):
+        with PhotoMetadataDump(path) as dump:
+            for name, records in groups.items():
+                dump.write_group(name, records, points=len(records))
+
+    def read_lines(path):
+        return sum(1 for _ in PhotoMetadataDump.records(path))
+
+    formats = [
+        ("json (documento)", "dump.json", write_document, read_document),
+        ("jsonl", "dump.jsonl", write_lines, read_lines),
+        ("jsonl.gz", "dump.jsonl.gz", write_lines, read_lines),
+    ]
+    print(f"{args.records} registros x {args.fields} campos ({args.groups} pastas)")
+    print(
+        f"{'formato':<18} {'gravar (s)':>10} {'ler (s)':>8} "
+        f"{'pico leitura (MB)':>18} {'arquivo (MB)':>13}"
+    )
+    try:
+        for label, name, write, read in formats:
+            path = os.path.join(folder, name)
+            write_s, _, _ = _measure(lambda: write(path))
+            read_s, peak, total = _measure(lambda: read(path))
+            if total != args.records:
+                raise SystemExit(f"{label}: lidos {total} de {args.records} registros")
+            print(
+                f"{label:<18} {write_s:>10.2f} {read_s:>8.2f} "
+                f"{peak / 2**20:>18.1f} {os.path.getsize(path) / 2**20:>13.1f}"
+            )
+    finally:
+        for _, name, _, _ in formats:
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: leitura de metadados de fotos completa x projetada.
+
+Mede `PhotoMetadata._index_photos_complete` numa pasta de fotos DJI (ou em
+fotos sintéticas com EXIF e XMP no formato DJI) lendo todos os campos e só
+os de cada seleção (`PhotoMetadata.projected_fields`), e confere que os
+campos selecionados têm o mesmo valor nos dois casos. Precisa das
+bibliotecas do QGIS (qgis.core) no Python usado, mas não abre interface.
+
+Uso:
+    python tests/benchmarks/bench_photo_metadata_projection.py [<pasta>]
+        [--photos N] [--repeat N]
+"""
+import argparse
+import importlib
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+SELECTIONS = {
+    "coordenadas+data": ["GpsLatitude", "GpsLongitude", "DateTimeOriginal"],
+    "só EXIF": ["Model", "FocalLength", "ISOSpeedRatings", "ExposureTime"],
+    "atitude (XMP)": ["AbsoluteAltitude", "GimbalYawDegree", "FlightYawDegree"],
+}
+
+XMP_ATTRIBUTES = {
+    "tiff:Make": "DJI",
+    "tiff:Model": "M3E",
+    "dc:format": "image/jpg",
+    "xmp:ModifyDate": "2024-01-01",
+    "xmp:CreateDate": "2024-01-01",
+    "drone-dji:Version": "1.0",
+    "drone-dji:ImageSource": "WideCamera",
+    "drone-dji:GpsStatus": "RTK",
+    "drone-dji:AltitudeType": "RtkAlt",
+    "drone-dji:GpsLatitude": "-22.12{n:04d}",
+    "drone-dji:GpsLongitude": "-47.05{n:04d}",
+    "drone-dji:AbsoluteAltitude": "+{alt:.3f}",
+    "drone-dji:RelativeAltitude": "+120.100",
+    "drone-dji:GimbalRollDegree": "+0.00",
+    "drone-dji:GimbalYawDegree": "-{yaw}.50",
+    "drone-dji:GimbalPitchDegree": "-90.00",
+    "drone-dji:FlightRollDegree": "+1.20",
+    "drone-dji:FlightYawDegree": "-{yaw}.20",
+    "drone-dji:FlightPitchDegree": "+2.10",
+    "drone-dji:FlightXSpeed": "+5.0",
+    "drone-dji:FlightYSpeed": "+0.1",
+    "drone-dji:FlightZSpeed": "+0.0",
+    "drone-dji:CamReverse": "0",
+    "drone-dji:GimbalReverse": "0",
+    "drone-dji:SelfData": "Undefined",
+    "drone-dji:CalibratedFocalLength": "3713.29",
+    "drone-dji:CalibratedOpticalCenterX": "2647.02",
+    "drone-dji:CalibratedOpticalCenterY": "1969.28",
+    "drone-dji:RtkFlag": "50",
+    "drone-dji:RtkStdLon": "0.01",
+    "drone-dji:RtkStdLat": "0.01",
+    "drone-dji:RtkStdHgt": "0.02",
+    "drone-dji:RtkDiffAge": "1.0",
+    "drone-dji:DewarpData": "2022-06-08;" + ",".join(["0.1"] * 9),
+    "drone-dji:DewarpFlag": "0",
+    "drone-dji:UTCAtExposure": "2024:01:01 12:00:00.000",
+    "drone-dji:ShutterType": "Mechanical",
+    "drone-dji:ShutterCount": "{n}",
+    "drone-dji:CameraSerialNumber": "53HQN4T0000000",
+    "drone-dji:DroneModel": "M3E",
+    "drone-dji:DroneSerialNumber": "1581F5FJ000000",
+    "drone-dji:CaptureUUID": "0000-{n:04d}",
+    "drone-dji:PictureQuality": "Normal",
+    "drone-dji:SurveyingMode": "1",
+    "drone-dji:LRFStatus": "Normal",
+    "drone-dji:LRFTargetDistance": "120.1",
+    "drone-dji:SensorTemperature": "40.0",
+    "drone-dji:LensTemperature": "38.5",
+}
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def _xmp_packet(n):
+    attributes = " ".join(
+        f'{name}="{value.format(n=n, alt=800 + n / 10, yaw=n % 90)}"'
+        for name, value in XMP_ATTRIBUTES.items()
+    )
+    return (
+        '<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF '
+        'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"><rdf:Description '
+        'xmlns:tiff="http://ns.adobe.com/tiff/1.0/" '
+        'xmlns:xmp="http://ns.adobe.com/xap/1.0/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:drone-dji="http://www.dji.com/drone-dji/1.0/" '
+        f"{attributes}/></rdf:RDF></x:xmpmeta>"
+    )
+
+
+def write_synthetic_photos(folder, photos):
+    """Fotos DJI pequenas com o conjunto de tags EXIF e XMP de uma M3E."""
+    from PIL import Image
+    from PIL.TiffImagePlugin import IFDRational
+
+    for n in range(1, photos + 1):
+        exif = Image.Exif()
+        exif[0x010F] = "DJI"
+        exif[0x0110] = "M3E"
+        exif[0x0112] = 1
+        exif[0x011A] = IFDRational(72, 1)
+        exif[0x011B] = IFDRational(72, 1)
+        exif[0x0128] = 2
+        exif[0x0131] = "10.01.0021"
+        exif[0x0132] = f"2024:01:01 12:{n // 60 % 60:02d}:{n % 60:02d}"
+        exif[0x0213] = 1
+        exif_ifd = exif.get_ifd(0x8769)
+        exif_ifd[0x829A] = IFDRational(1, 1000)
+        exif_ifd[0x829D] = IFDRational(28, 10)
+        exif_ifd[0x8822] = 2
+        exif_ifd[0x8827] = 100
+        exif_ifd[0x9000] = b"0230"
+        exif_ifd[0x9003] = exif[0x0132]
+        exif_ifd[0x9004] = exif[0x0132]
+        exif_ifd[0x9201] = IFDRational(9965784, 1000000)
+        exif_ifd[0x9202] = IFDRational(297, 100)
+        exif_ifd[0x9204] = IFDRational(0, 1)
+        exif_ifd[0x9205] = IFDRational(297, 100)
+        exif_ifd[0x9207] = 2
+        exif_ifd[0x9208] = 1
+        exif_ifd[0x9209] = 32
+        exif_ifd[0x920A] = IFDRational(1229, 100)
+        exif_ifd[0x927C] = b"DJI" + bytes(256)
+        exif_ifd[0xA000] = b"0100"
+        exif_ifd[0xA001] = 1
+        exif_ifd[0xA002] = 160
+        exif_ifd[0xA003] = 120
+        exif_ifd[0xA300] = b"\x03"
+        exif_ifd[0xA401] = 0
+        exif_ifd[0xA402] = 0
+        exif_ifd[0xA403] = 0
+        exif_ifd[0xA404] = IFDRational(1, 1)
+        exif_ifd[0xA405] = 24
+        exif_ifd[0xA406] = 0
+        exif_ifd[0xA408] = 0
+        exif_ifd[0xA409] = 0
+        exif_ifd[0xA40A] = 0
+        exif_ifd[0xA432] = tuple(IFDRational(v, 10) for v in (123, 123, 28, 28))
+        gps = exif.get_ifd(0x8825)
+        gps[0] = b"\x02\x03\x00\x00"
+        gps[1] = "S"
+        gps[2] = (IFDRational(22, 1), IFDRational(7, 1), IFDRational(n, 100))
+        gps[3] = "W"
+        gps[4] = (IFDRational(47, 1), IFDRational(3, 1), IFDRational(n, 100))
+        gps[5] = 0
+        gps[6] = IFDRational(800 + n, 10)
+        gps[18] = "WGS-84"
+
+        path = os.path.join(folder, f"DJI_20240101120000_{n:04d}_V.JPG")
+        Image.new("RGB", (160, 120)).save(
+            path,
+            "JPEG",
+            exif=exif.tobytes(),
+            xmp=_xmp_packet(n).encode("utf-8"),
+        )
+
+
+def _timed(PhotoMetadata, folder, fields, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result, _ = PhotoMetadata._index_photos_complete(
+            folder, recursive=False, workers=1, fields=fields
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--photos", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    PhotoMetadata = _plugin_module("utils.mrk.PhotoMetadata").PhotoMetadata
+    MetadataFields = _plugin_module("utils.mrk.MetadataFields").MetadataFields
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.folder
+        if folder is None:
+            folder = tmp
+            write_synthetic_photos(folder, args.photos)
+        total = sum(
+            1 for name in os.listdir(folder) if PhotoMetadata.DJI_RE.search(name)
+        )
+        print(f"Pasta: {folder} ({total} fotos)")
+
+        full_s, full = _timed(PhotoMetadata, folder, None, args.repeat)
+        full = {
+            seq: MetadataFields.normalize_record_to_keys(payload)
+            for seq, payload in full.items()
+        }
+        print(f"{'seleção':<20} {'campos':>7} {'tempo (s)':>10} {'speedup':>8}")
+        print(f"{'completa':<20} {'-':>7} {full_s:>10.3f} {1:>7.2f}x")
+
+        for label, selected in SELECTIONS.items():
+            fields = PhotoMetadata.projected_fields(set(selected))
+            elapsed, result = _timed(PhotoMetadata, folder, fields, args.repeat)
+            for seq, payload in result.items():
+                record = MetadataFields.normalize_record_to_keys(payload)
+                for key in selected:
+                    if repr(record.get(key)) != repr(full[seq].get(key)):
+                        raise SystemExit(f"{label}: {key} difere na foto {seq}")
+            print(
+                f"{label:<20} {len(fields):>7} {elapsed:>10.3f} "
+                f"{full_s / elapsed:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
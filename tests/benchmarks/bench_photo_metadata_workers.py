@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: leitura de metadados de fotos com 1..N threads.
+
+Mede `PhotoMetadata._index_photos_complete` numa pasta de fotos DJI (ou em
+fotos sintéticas geradas com PIL) para cada valor de `--workers` e confere
+que o resultado é igual ao da leitura sequencial. Precisa das bibliotecas
+do QGIS (qgis.core) no Python usado, mas não abre interface.
+
+Numa pasta local o cache do sistema esconde a latência: para simular um
+compartilhamento de rede use `--latency-ms` (espera antes de cada foto, como
+um `open` remoto) ou aponte para uma pasta na rede/USB.
+
+Uso:
+    python tests/benchmarks/bench_photo_metadata_workers.py [<pasta>] [--photos N]
+        [--workers 1,2,4,8] [--latency-ms MS] [--repeat N]
+"""
+import argparse
+import importlib
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+XMP = (
+    '<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF '
+    'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"><rdf:Description '
+    'xmlns:drone-dji="http://www.dji.com/drone-dji/1.0/" '
+    'drone-dji:AbsoluteAltitude="+{alt:.3f}" drone-dji:RelativeAltitude="+120.100" '
+    'drone-dji:GimbalYawDegree="-{n}.5" drone-dji:FlightYawDegree="-{n}.2" '
+    'drone-dji:GimbalPitchDegree="-90.0" drone-dji:FlightPitchDegree="+1.0" '
+    'drone-dji:FlightXSpeed="+5.0" drone-dji:FlightYSpeed="+0.1" '
+    'drone-dji:FlightZSpeed="+0.0" drone-dji:RtkFlag="50"/></rdf:RDF></x:xmpmeta>'
+)
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def write_synthetic_photos(folder, photos, padding_mb):
+    """Fotos DJI pequenas + `padding_mb` de dados após o EOI (tamanho real)."""
+    from PIL import Image
+    from PIL.TiffImagePlugin import IFDRational
+
+    padding = b"\x00" * int(padding_mb * 1024 * 1024)
+    for n in range(1, photos + 1):
+        exif = Image.Exif()
+        exif[0x010F] = "DJI"
+        exif[0x0110] = "FC6310R"
+        exif[0x0132] = f"2024:01:01 12:{n // 60 % 60:02d}:{n % 60:02d}"
+        exif_ifd = exif.get_ifd(0x8769)
+        exif_ifd[0x9003] = exif[0x0132]
+        exif_ifd[0x920A] = IFDRational(88, 10)
+        gps = exif.get_ifd(0x8825)
+        gps[2] = (IFDRational(22, 1), IFDRational(7, 1), IFDRational(n, 100))
+        gps[4] = (IFDRational(47, 1), IFDRational(3, 1), IFDRational(n, 100))
+
+        path = os.path.join(folder, f"DJI_20240101120000_{n:04d}_V.JPG")
+        Image.new("RGB", (160, 120)).save(
+            path,
+            "JPEG",
+            exif=exif.tobytes(),
+            xmp=XMP.format(alt=800 + n / 10, n=n % 90).encode("utf-8"),
+        )
+        with open(path, "ab") as fh:
+            fh.write(padding)
+
+
+def emulate_latency(ExifUtil, latency_ms):
+    """Espera `latency_ms` antes de cada cabeçalho (libera o GIL, como I/O)."""
+    read_header = ExifUtil.read_header
+
+    def slow_read_header(image_path, tool_key=None):
+        time.sleep(latency_ms / 1000.0)
+        return read_header(image_path, tool_key=tool_key)
+
+    ExifUtil.read_header = staticmethod(slow_read_header)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--photos", type=int, default=300)
+    parser.add_argument("--padding-mb", type=float, default=4.0)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    PhotoMetadata = _plugin_module("utils.mrk.PhotoMetadata").PhotoMetadata
+    if args.latency_ms:
+        emulate_latency(_plugin_module("utils.mrk.ExifUtil").ExifUtil, args.latency_ms)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.folder
+        if folder is None:
+            folder = tmp
+            write_synthetic_photos(folder, args.photos, args.padding_mb)
+        total = sum(
+            1 for name in os.listdir(folder) if PhotoMetadata.DJI_RE.search(name)
+        )
+        print(f"Pasta: {folder} ({total} fotos, latência {args.latency_ms:g} ms)")
+
+        baseline = None
+        baseline_s = None
+        print(f"{'workers':>8} {'tempo (s)':>10} {'fotos/s':>10} {'speedup':>8}")
+        for workers in worker_counts:
+            best = None
+            result = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = PhotoMetadata._index_photos_complete(
+                    folder, recursive=False, workers=workers
+                )
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            if baseline is None:
+                baseline, baseline_s = repr(result), best
+            elif repr(result) != baseline:
+                raise SystemExit(f"Resultado com {workers} workers difere do primeiro")
+            print(
+                f"{workers:>8} {best:>10.3f} {total / best:>10,.1f} "
+                f"{baseline_s / best:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
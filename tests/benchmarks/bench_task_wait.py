@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: CPU gasta pela task "pai" enquanto espera as subtasks.
+
+Compara as estratégias antigas de espera de `PipelineTask` (laço com
+`processEvents()`) e `_ParallelGroupTask` (`processEvents()` + `sleep(0.01)`)
+com o `CompletionEvent`. Não depende do QGIS: `processEvents()` é simulado
+por uma chamada vazia, o que subestima o custo real do laço antigo.
+
+Uso:
+    python tests/benchmarks/bench_task_wait.py [segundos_de_espera]
+"""
+import importlib.util
+import pathlib
+import sys
+import threading
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _load_completion_event():
+    path = ROOT / "core" / "engine_tasks" / "CompletionEvent.py"
+    spec = importlib.util.spec_from_file_location("CompletionEvent", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.CompletionEvent
+
+
+def _process_events():
+    pass
+
+
+def wait_spin(done: threading.Event):
+    while not done.is_set():
+        _process_events()
+
+
+def wait_poll_sleep(done: threading.Event):
+    while not done.is_set():
+        _process_events()
+        time.sleep(0.01)
+
+
+def measure(strategy, wait_seconds: float):
+    result = {}
+    done = threading.Event()
+    completion = _load_completion_event()()
+
+    def waiter():
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        if strategy == "event":
+            completion.wait(lambda: False)
+        elif strategy == "spin":
+            wait_spin(done)
+        else:
+            wait_poll_sleep(done)
+        result["cpu"] = time.thread_time() - cpu_start
+        result["latency"] = time.perf_counter() - wall_start - wait_seconds
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(wait_seconds)
+    done.set()
+    completion.set()
+    thread.join()
+    return result
+
+
+def main():
+    wait_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"Espera simulada: {wait_seconds:.1f}s")
+    print(f"{'estratégia':<12} {'CPU (s)':>10} {'CPU (%)':>9} {'latência (ms)':>14}")
+    for strategy in ("spin", "poll_sleep", "event"):
+        r = measure(strategy, wait_seconds)
+        print(
+            f"{strategy:<12} {r['cpu']:>10.4f} {100 * r['cpu'] / wait_seconds:>8.1f}% "
+            f"{1000 * r['latency']:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: leitura do XMP pelo `XmpAttributeScanner` x ElementTree.
+
+Mede, sobre os pacotes XMP de uma pasta de fotos DJI (ou pacotes sintéticos
+no formato DJI), o parser antigo (ElementTree, atributos do primeiro
+`rdf:Description`), o `parse_tree` (ElementTree, mesmas regras do scanner)
+e o `scan`. Confere que `scan` == `parse_tree` em todos os pacotes e que
+os campos do parser antigo têm o mesmo valor. Não precisa do QGIS.
+
+Uso:
+    python tests/benchmarks/bench_xmp_scanner.py [<pasta>] [--packets N]
+        [--repeat N]
+"""
+import argparse
+import importlib
+import os
+import pathlib
+import sys
+import time
+from xml.etree import ElementTree as ET
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from bench_photo_metadata_projection import _xmp_packet  # noqa: E402
+
+RDF_DESCRIPTION = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}Description"
+NAMESPACE_PREFIXES = {
+    "http://www.dji.com/drone-dji/1.0/": "drone-dji",
+    "http://ns.adobe.com/xap/1.0/": "xmp",
+    "http://purl.org/dc/elements/1.1/": "dc",
+    "http://ns.adobe.com/camera-raw-settings/1.0/": "crs",
+    "http://pix4d.com/camera/1.0": "Camera",
+    "http://ns.adobe.com/exif/1.0/aux/": "aux",
+    "http://ns.adobe.com/photoshop/1.0/": "photoshop",
+    "http://ns.adobe.com/tiff/1.0/": "tiff",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf",
+}
+
+
+def _plugin_module(name):
+    # O plugin é um pacote (imports relativos): importa pelo nome da pasta
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{name}")
+
+
+def load_packets(folder):
+    """XMP (texto latin1, como o `XmpUtil`) de cada JPEG da pasta."""
+    JpegHeaderReader = _plugin_module("core.model.JpegHeaderReader").JpegHeaderReader
+    packets = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith((".jpg", ".jpeg")):
+            continue
+        header = JpegHeaderReader.read(os.path.join(folder, name))
+        raw = ((header.xmp if header else None) or b"").decode("latin1", errors="ignore")
+        start = raw.find("<x:xmpmeta")
+        end = raw.find("</x:xmpmeta>", start)
+        if start != -1 and end != -1:
+            packets.append(raw[start : end + len("</x:xmpmeta>")])
+    return packets
+
+
+def parse_element_tree(xmp_text):
+    """O parser de antes: atributos do primeiro `rdf:Description`."""
+    description = ET.fromstring(xmp_text).find(f".//{RDF_DESCRIPTION}")
+    data = {}
+    for name, value in description.attrib.items():
+        if name.startswith("{"):
+            uri, local = name[1:].split("}", 1)
+            name = f"{NAMESPACE_PREFIXES.get(uri, uri)}:{local}"
+        data[name] = value
+    return data
+
+
+def _timed(parse, packets, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [parse(packet) for packet in packets]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--packets", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Scanner = _plugin_module("core.model.XmpAttributeScanner").XmpAttributeScanner
+
+    if args.folder:
+        packets = load_packets(args.folder)
+        print(f"Pasta: {args.folder} ({len(packets)} pacotes XMP)")
+    else:
+        packets = [_xmp_packet(n) for n in range(1, args.packets + 1)]
+        print(f"Pacotes sintéticos DJI: {len(packets)}")
+    if not packets:
+        raise SystemExit("Nenhum pacote XMP encontrado")
+
+    old_s, old = _timed(parse_element_tree, packets, args.repeat)
+    tree_s, tree = _timed(
+        lambda packet: Scanner.parse_tree(packet, NAMESPACE_PREFIXES), packets, args.repeat
+    )
+    scan_s, scanned = _timed(
+        lambda packet: Scanner.scan(packet, NAMESPACE_PREFIXES), packets, args.repeat
+    )
+
+    fallbacks = 0
+    for n, (old_data, tree_data, scan_data) in enumerate(zip(old, tree, scanned)):
+        if scan_data is None:
+            fallbacks += 1
+        elif scan_data != tree_data:
+            raise SystemExit(f"scan difere do parse_tree no pacote {n}")
+        for key, value in old_data.items():
+            if tree_data.get(key) != value:
+                raise SystemExit(f"{key} difere do parser antigo no pacote {n}")
+
+    print(f"{'parser':<26} {'tempo (s)':>10} {'pacotes/s':>11} {'speedup':>8}")
+    for label, elapsed in (
+        ("ElementTree (antigo)", old_s),
+        ("parse_tree", tree_s),
+        ("scan", scan_s),
+    ):
+        print(
+            f"{label:<26} {elapsed:>10.3f} {len(packets) / elapsed:>11,.0f} "
+            f"{old_s / elapsed:>7.2f}x"
+        )
+    print(f"Pacotes com fallback para ElementTree: {fallbacks}")
+
+
+if __name__ == "__main__":
+    main()
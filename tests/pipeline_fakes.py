@@ -0,0 +1,122 @@
+"""
+Steps/tasks mínimos para exercitar o `AsyncPipelineEngine` nos testes, com
+o `ThreadPoolTaskExecutor` no papel do gerenciador de tarefas do QGIS.
+"""
+import threading
+
+from qgis_stubs import load_modules
+
+(
+    engine_module,
+    context_module,
+    step_module,
+    task_module,
+    executor_module,
+) = load_modules(
+    "core/engine_tasks/AsyncPipelineEngine.py",
+    "core/engine_tasks/ExecutionContext.py",
+    "core/engine_tasks/BaseStep.py",
+    "core/task/BaseTask.py",
+    "core/engine_tasks/TaskExecutor.py",
+)
+AsyncPipelineEngine = engine_module.AsyncPipelineEngine
+ExecutionContext = context_module.ExecutionContext
+BaseStep = step_module.BaseStep
+BaseTask = task_module.BaseTask
+ThreadPoolTaskExecutor = executor_module.ThreadPoolTaskExecutor
+
+
+class FakeTask(BaseTask):
+    """Roda `work(context)` na thread do pool; o retorno vira `result`."""
+
+    def __init__(self, name, work, context):
+        super().__init__(name, tool_key="tests")
+        self._work = work
+        self._context = context
+
+    def _run(self):
+        self.result = self._work(self._context)
+        return not self.isCanceled()
+
+
+class FakeStep(BaseStep):
+    """
+    Step com `reads`/`writes` declarados. `work(context)` devolve um dict
+    {chave: valor} que `on_success` grava no contexto. Cada execução é
+    registrada em `log` (lista compartilhada entre os steps do teste).
+    """
+
+    def __init__(self, name, work=None, reads=None, writes=None, log=None):
+        self._name = name
+        self._work = work or (lambda context: {})
+        self._reads = reads
+        self._writes = writes
+        self.log = log if log is not None else []
+        self.errors = []
+
+    def name(self):
+        return self._name
+
+    def reads(self):
+        return self._reads
+
+    def writes(self):
+        return self._writes
+
+    def create_task(self, context):
+        def work(ctx):
+            self.log.append(("start", self._name))
+            try:
+                return self._work(ctx)
+            finally:
+                self.log.append(("end", self._name))
+
+        return FakeTask(self._name, work, context)
+
+    def on_success(self, context, result):
+        for key, value in (result or {}).items():
+            context.set(key, value)
+
+    def on_error(self, context, exception):
+        self.errors.append(exception)
+
+
+class Gate:
+    """Bloqueia steps até `open()`; conta quantos estão esperando ao mesmo tempo."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+
+    def wait(self, timeout=5.0):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            return self._event.wait(timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def open(self):
+        self._event.set()
+
+
+def run_pipeline(steps, context=None, timeout=10.0, max_workers=4, **engine_kwargs):
+    """Roda a pipeline até o fim; devolve (engine, context, outcome)."""
+    context = context or ExecutionContext({"tool_key": "tests"})
+    outcome = {}
+    engine_kwargs.setdefault("on_finished", lambda ctx: outcome.setdefault("finished", ctx))
+    engine_kwargs.setdefault("on_error", lambda errors: outcome.setdefault("error", errors))
+    engine_kwargs.setdefault(
+        "on_cancelled", lambda ctx: outcome.setdefault("cancelled", ctx)
+    )
+    executor = ThreadPoolTaskExecutor(max_workers=max_workers, tool_key="tests")
+    try:
+        engine = AsyncPipelineEngine(steps, context, executor=executor, **engine_kwargs)
+        outcome["completed"] = executor.run_until_complete(engine, timeout=timeout)
+    finally:
+        executor.shutdown()
+    return engine, context, outcome
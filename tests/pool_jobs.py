@@ -0,0 +1,21 @@
+"""Jobs do `ProcessPoolBackend` para os testes (importáveis pelos workers)."""
+import os
+
+
+def square_with_pid(batch):
+    return [(value * value, os.getpid()) for value in batch]
+
+
+def fail_on_negative(batch):
+    for value in batch:
+        if value < 0:
+            raise ValueError(f"valor negativo: {value}")
+    return list(batch)
+
+
+def exit_outside(batch):
+    """Derruba o worker (mas não o processo que chamou): quebra o pool."""
+    parent_pid, value = batch[0]
+    if os.getpid() != parent_pid:
+        os._exit(1)
+    return [value for _, value in batch]
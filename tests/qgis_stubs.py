@@ -0,0 +1,381 @@
+"""
+Stubs mínimos do QGIS (e do `QVariant` do PyQt5) e carregamento dos módulos
+do plugin para os testes que rodam sem QGIS instalado.
+
+`load_modules()` instala os stubs só enquanto carrega os módulos pedidos e
+depois os remove de `sys.modules`, para não mascarar outros testes que
+instalam seus próprios stubs de `qgis`.
+"""
+import importlib.util
+import os
+import pathlib
+import queue
+import sys
+import tempfile
+import threading
+import types
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+class StubLogUtils:
+    DEBUG = "DEBUG"
+    INFO = "INFO"
+
+    def __init__(self, *, tool, class_name, level="INFO"):
+        self.tool = tool
+        self.class_name = class_name
+
+    def _log(self, *args, **kwargs):
+        return None
+
+    debug = info = warning = error = critical = _log
+
+
+class StubExplorerUtils:
+    @staticmethod
+    def get_temp_folder(tool_key, *subfolders):
+        path = os.path.join(tempfile.gettempdir(), "cadmus_tests", *map(str, subfolders))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+class _MainLoop:
+    """Fila de sinais emitidos fora da thread principal (conexão enfileirada)."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def post(self, callback, args):
+        self._queue.put((callback, args))
+
+    def processEvents(self):
+        while True:
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+
+MAIN_LOOP = _MainLoop()
+
+
+class Signal:
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def emit(self, *args):
+        on_main = threading.current_thread() is threading.main_thread()
+        for callback in list(self._callbacks):
+            if on_main:
+                callback(*args)
+            else:
+                MAIN_LOOP.post(callback, args)
+
+
+class QgsTask:
+    CanCancel = 1
+
+    def __init__(self, description="", flags=0):
+        self._description = description
+        self._canceled = False
+        self._progress = 0.0
+        self.progressChanged = Signal()
+
+    def description(self):
+        return self._description
+
+    def isCanceled(self):
+        return self._canceled
+
+    def cancel(self):
+        self._canceled = True
+
+    def setProgress(self, value):
+        self._progress = float(value)
+        self.progressChanged.emit(self._progress)
+
+    def progress(self):
+        return self._progress
+
+    def run(self):
+        return True
+
+    def finished(self, ok):
+        return None
+
+
+class QgsApplication:
+    @staticmethod
+    def instance():
+        return MAIN_LOOP
+
+
+class QgsMessageLog:
+    @staticmethod
+    def logMessage(*args, **kwargs):
+        return None
+
+
+class Qgis:
+    Critical = 2
+
+
+class QgsField:
+    def __init__(self, name="", type=None):
+        self._name = name
+        self._type = type
+
+    def name(self):
+        return self._name
+
+    def type(self):
+        return self._type
+
+
+class QgsProject:
+    """Projeto único; guarda as camadas adicionadas."""
+
+    _instance = None
+
+    def __init__(self):
+        self.layers = {}
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def addMapLayer(self, layer):
+        self.layers[layer.id()] = layer
+        return layer
+
+    def mapLayer(self, layer_id):
+        return self.layers.get(layer_id)
+
+
+class QgsFields(list):
+    def names(self):
+        return [field.name() for field in self]
+
+    def indexOf(self, name):
+        names = self.names()
+        return names.index(name) if name in names else -1
+
+
+class QgsPointXY(tuple):
+    def __new__(cls, x, y):
+        return super().__new__(cls, (x, y))
+
+
+class QgsGeometry:
+    @staticmethod
+    def fromPointXY(point):
+        return ("Point", tuple(point))
+
+    @staticmethod
+    def fromPolylineXY(points):
+        return ("LineString", [tuple(p) for p in points])
+
+
+class QgsFeature:
+    def __init__(self, fields=None):
+        self._fields = fields if fields is not None else QgsFields()
+        self._attributes = [None] * len(self._fields)
+        self._geometry = None
+
+    def setGeometry(self, geometry):
+        self._geometry = geometry
+
+    def geometry(self):
+        return self._geometry
+
+    def setAttributes(self, attributes):
+        self._attributes = list(attributes)
+
+    def attributes(self):
+        return list(self._attributes)
+
+    def setAttribute(self, name, value):
+        self._attributes[self._fields.indexOf(name)] = value
+
+    def attribute(self, name):
+        return self._attributes[self._fields.indexOf(name)]
+
+
+class QgsVectorLayer:
+    """
+    Camada em memória mínima. `created_in` registra a thread que criou a
+    camada (objetos de camada do QGIS têm afinidade de thread).
+    """
+
+    _ids = 0
+
+    def __init__(self, uri="", name="", provider="memory"):
+        QgsVectorLayer._ids += 1
+        self._id = f"{name}_{QgsVectorLayer._ids}"
+        self._name = name
+        self._fields = QgsFields()
+        self._features = []
+        self.created_in = threading.current_thread()
+
+    def id(self):
+        return self._id
+
+    def name(self):
+        return self._name
+
+    def setName(self, name):
+        self._name = name
+
+    def isValid(self):
+        return True
+
+    def dataProvider(self):
+        return self
+
+    def addAttributes(self, fields):
+        self._fields.extend(fields)
+        return True
+
+    def updateFields(self):
+        return None
+
+    def fields(self):
+        return self._fields
+
+    def startEditing(self):
+        return True
+
+    def commitChanges(self):
+        return True
+
+    def addFeature(self, feature):
+        self._features.append(feature)
+        return True
+
+    def updateExtents(self):
+        return None
+
+    def featureCount(self):
+        return len(self._features)
+
+    def getFeatures(self):
+        return iter(self._features)
+
+
+class QVariant:
+    Bool = 1
+    Int = 2
+    LongLong = 4
+    Double = 6
+    String = 10
+
+
+def _qgis_modules():
+    qgis = types.ModuleType("qgis")
+    core = types.ModuleType("qgis.core")
+    core.QgsTask = QgsTask
+    core.QgsApplication = QgsApplication
+    core.QgsMessageLog = QgsMessageLog
+    core.Qgis = Qgis
+    core.QgsField = QgsField
+    core.QgsProject = QgsProject
+    core.QgsVectorLayer = QgsVectorLayer
+    core.QgsFields = QgsFields
+    core.QgsFeature = QgsFeature
+    core.QgsGeometry = QgsGeometry
+    core.QgsPointXY = QgsPointXY
+    # Usados só por operações que os testes não exercitam
+    for name in (
+        "QgsVectorFileWriter",
+        "QgsWkbTypes",
+        "QgsFeatureRequest",
+        "QgsDistanceArea",
+        "QgsCoordinateReferenceSystem",
+    ):
+        setattr(core, name, type(name, (), {}))
+    qgis.core = core
+    pyqt5 = types.ModuleType("PyQt5")
+    qtcore = types.ModuleType("PyQt5.QtCore")
+    qtcore.QVariant = QVariant
+    pyqt5.QtCore = qtcore
+    # `qgis.PyQt` reexporta o PyQt5
+    qgis_pyqt = types.ModuleType("qgis.PyQt")
+    qgis_pyqt.QtCore = qtcore
+    qgis.PyQt = qgis_pyqt
+    return {
+        "qgis": qgis,
+        "qgis.core": core,
+        "qgis.PyQt": qgis_pyqt,
+        "qgis.PyQt.QtCore": qtcore,
+        "PyQt5": pyqt5,
+        "PyQt5.QtCore": qtcore,
+        "processing": types.ModuleType("processing"),
+    }
+
+
+def package(name, path):
+    module = sys.modules.get(name)
+    if module is None:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return module
+
+
+def load(name, relative_path):
+    if name in sys.modules and getattr(sys.modules[name], "__file__", None):
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def install_packages():
+    package("Cadmus", ROOT)
+    package("Cadmus.core", ROOT / "core")
+    package("Cadmus.core.config", ROOT / "core" / "config")
+    package("Cadmus.core.engine_tasks", ROOT / "core" / "engine_tasks")
+    package("Cadmus.core.model", ROOT / "core" / "model")
+    package("Cadmus.core.task", ROOT / "core" / "task")
+    package("Cadmus.utils", ROOT / "utils")
+    package("Cadmus.utils.mrk", ROOT / "utils" / "mrk")
+    package("Cadmus.utils.adapter", ROOT / "utils" / "adapter")
+    package("Cadmus.utils.vector", ROOT / "utils" / "vector")
+
+    current = getattr(sys.modules.get("Cadmus.core.config.LogUtils"), "LogUtils", None)
+    if not all(hasattr(current, attr) for attr in ("DEBUG", "critical")):
+        logutils_module = types.ModuleType("Cadmus.core.config.LogUtils")
+        logutils_module.LogUtils = StubLogUtils
+        sys.modules["Cadmus.core.config.LogUtils"] = logutils_module
+
+    explorer_module = types.ModuleType("Cadmus.utils.ExplorerUtils")
+    explorer_module.ExplorerUtils = StubExplorerUtils
+    sys.modules.setdefault("Cadmus.utils.ExplorerUtils", explorer_module)
+
+
+def load_modules(*relative_paths):
+    """Carrega `core/...py`/`utils/...py` como `Cadmus....` com o QGIS simulado."""
+    install_packages()
+    stubs = _qgis_modules()
+    added = [name for name in stubs if name not in sys.modules]
+    for name in added:
+        sys.modules[name] = stubs[name]
+    try:
+        modules = []
+        for relative_path in relative_paths:
+            name = "Cadmus." + relative_path[:-3].replace("/", ".")
+            modules.append(load(name, relative_path))
+        return modules
+    finally:
+        for name in added:
+            sys.modules.pop(name, None)
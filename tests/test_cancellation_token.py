@@ -0,0 +1,168 @@
+import importlib.util
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+class StubLogUtils:
+    def __init__(self, *, tool, class_name, level="INFO"):
+        self.tool = tool
+        self.class_name = class_name
+
+    def _log(self, *args, **kwargs):
+        return None
+
+    debug = info = warning = error = critical = _log
+
+
+def _package(name, path):
+    module = sys.modules.get(name)
+    if module is None:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return module
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_package("Cadmus", ROOT)
+_package("Cadmus.core", ROOT / "core")
+_package("Cadmus.core.config", ROOT / "core" / "config")
+_package("Cadmus.core.engine_tasks", ROOT / "core" / "engine_tasks")
+_package("Cadmus.utils", ROOT / "utils")
+_package("Cadmus.utils.mrk", ROOT / "utils" / "mrk")
+
+logutils_module = types.ModuleType("Cadmus.core.config.LogUtils")
+logutils_module.LogUtils = StubLogUtils
+sys.modules.setdefault("Cadmus.core.config.LogUtils", logutils_module)
+
+token_module = _load(
+    "Cadmus.core.engine_tasks.CancellationToken",
+    "core/engine_tasks/CancellationToken.py",
+)
+mrk_module = _load("Cadmus.utils.mrk.MrkParser", "utils/mrk/MrkParser.py")
+
+CancellationToken = token_module.CancellationToken
+OperationCancelled = token_module.OperationCancelled
+MrkParser = mrk_module.MrkParser
+
+MRK_LINE = (
+    "{n}\t416519.123456\t[2241]\t  -23,N\t  14,E\t  161,V\t"
+    "-22.12345678,Lat\t-47.12345678,Lon\t812.345,Ellh\t0.01, 0.01, 0.02\t50,Q\n"
+)
+
+
+class CancellationTokenTests(unittest.TestCase):
+    def test_tick_checks_callback_only_at_batch_boundaries(self):
+        calls = []
+
+        def is_cancelled():
+            calls.append(1)
+            return False
+
+        token = CancellationToken(is_cancelled, check_every=100)
+        for _ in range(1000):
+            token.tick()
+
+        self.assertEqual(len(calls), 10)
+
+    def test_cancel_raises_on_next_boundary(self):
+        token = CancellationToken(check_every=10)
+        for _ in range(5):
+            token.tick()
+        token.cancel()
+
+        with self.assertRaises(OperationCancelled):
+            for _ in range(10):
+                token.tick()
+
+    def test_child_maps_progress_and_shares_cancellation(self):
+        values = []
+        token = CancellationToken(on_progress=values.append)
+        child = token.child(50, 100)
+
+        child.set_progress(0)
+        child.set_progress(50)
+        child.set_progress(100)
+        self.assertEqual(values, [50.0, 75.0, 100.0])
+
+        token.cancel()
+        self.assertTrue(child.is_cancelled())
+
+    def test_callback_result_is_memoized(self):
+        flags = {"cancelled": False, "calls": 0}
+
+        def is_cancelled():
+            flags["calls"] += 1
+            return flags["cancelled"]
+
+        token = CancellationToken(is_cancelled)
+        self.assertFalse(token.is_cancelled())
+        flags["cancelled"] = True
+        self.assertTrue(token.is_cancelled())
+        self.assertTrue(token.is_cancelled())
+        self.assertEqual(flags["calls"], 2)
+
+
+class MrkParserCancellationTests(unittest.TestCase):
+    LINES = 400000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.mrk_path = os.path.join(
+            cls.tmp_dir.name, "DJI_202401011200_001_Voo_Timestamp.MRK"
+        )
+        with open(cls.mrk_path, "w", encoding="utf-8") as fh:
+            for n in range(1, cls.LINES + 1):
+                fh.write(MRK_LINE.format(n=n))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_parse_file_without_token_reads_every_line(self):
+        points = MrkParser.parse_file(self.mrk_path, gerarpastas=False)
+        self.assertEqual(len(points), self.LINES)
+
+    def test_parse_folder_cancel_latency_is_well_under_one_second(self):
+        cancelled = threading.Event()
+        token = CancellationToken(cancelled.is_set)
+        outcome = {}
+
+        def worker():
+            try:
+                MrkParser.parse_folder(self.tmp_dir.name, cancel_token=token)
+                outcome["result"] = "finished"
+            except OperationCancelled:
+                outcome["result"] = "cancelled"
+            outcome["at"] = time.perf_counter()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        time.sleep(0.05)
+        cancel_at = time.perf_counter()
+        cancelled.set()
+        thread.join(timeout=10)
+
+        self.assertEqual(outcome.get("result"), "cancelled")
+        self.assertLess(outcome["at"] - cancel_at, 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from qgis_stubs import load_modules
+
+(checkpoint_module, context_module) = load_modules(
+    "core/engine_tasks/CheckpointStore.py", "core/engine_tasks/ExecutionContext.py"
+)
+CheckpointStore = checkpoint_module.CheckpointStore
+ExecutionContext = context_module.ExecutionContext
+
+# PhotoMetadataStep -> PhotoMetadata -> ExifUtil importa o PIL
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+if HAS_PIL:
+    (photo_step_module,) = load_modules("core/engine_tasks/PhotoMetadataStep.py")
+    PhotoMetadataStep = photo_step_module.PhotoMetadataStep
+
+
+class CheckpointStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.store = CheckpointStore("test_tool", folder=self.folder.name)
+
+    def _save(self, step="StepA", payload=None):
+        fingerprint = CheckpointStore.fingerprint(step, {"input": 1})
+        self.store.save_async(step, fingerprint, payload or {"points": [1, 2]}).result(5)
+        return fingerprint
+
+    def test_first_run_does_not_resume(self):
+        self.assertFalse(self.store.begin_run())
+        self.assertEqual(self.store.last_run_status(), CheckpointStore.RUN_RUNNING)
+
+    def test_failed_or_cancelled_run_is_resumable(self):
+        for status in (CheckpointStore.RUN_FAILED, CheckpointStore.RUN_CANCELLED):
+            self.store.begin_run()
+            fingerprint = self._save()
+            self.store.end_run(status)
+            self.assertTrue(CheckpointStore.flush(5))
+
+            self.assertTrue(self.store.begin_run())
+            self.assertEqual(
+                self.store.load("StepA", fingerprint), (True, {"points": [1, 2]})
+            )
+
+    def test_interrupted_run_is_resumable(self):
+        self.store.begin_run()
+        # QGIS fechado sem end_run: o estado fica "running"
+        self.assertTrue(CheckpointStore("test_tool", folder=self.folder.name).begin_run())
+
+    def test_success_clears_checkpoints_and_disables_resume(self):
+        self.store.begin_run()
+        fingerprint = self._save()
+        self.store.end_run(CheckpointStore.RUN_SUCCESS)
+        self.assertTrue(CheckpointStore.flush(5))
+
+        self.assertEqual(self.store.load("StepA", fingerprint), (False, None))
+        self.assertEqual(os.listdir(self.folder.name), [])
+        self.assertFalse(self.store.begin_run())
+
+    def test_clear_after_save_runs_in_order(self):
+        self.store.begin_run()
+        fingerprint = CheckpointStore.fingerprint("StepA", {"input": 1})
+        self.store.save_async("StepA", fingerprint, {"big": list(range(100000))})
+        self.store.end_run(CheckpointStore.RUN_SUCCESS)
+        self.assertTrue(CheckpointStore.flush(5))
+        self.assertEqual(self.store.load("StepA", fingerprint), (False, None))
+
+    def test_fingerprint_changes_with_key(self):
+        self.assertNotEqual(
+            CheckpointStore.fingerprint("StepA", {"input": 1}),
+            CheckpointStore.fingerprint("StepA", {"input": 2}),
+        )
+
+
+@unittest.skipUnless(HAS_PIL, "Pillow não instalado")
+class PhotoMetadataCheckpointKeyTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.photo = self._write("DJI_20240101120000_0001_V.JPG", b"jpeg")
+        self.context = ExecutionContext(
+            {"base_folder": self.folder, "recursive": False, "points": []}
+        )
+
+    def _write(self, name, data):
+        path = os.path.join(self.folder, name)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def _fingerprint(self):
+        step = PhotoMetadataStep()
+        return CheckpointStore.fingerprint(step.name(), step.checkpoint_key(self.context))
+
+    def test_unchanged_photos_keep_fingerprint(self):
+        self._write("notas.txt", b"ignorado")
+        first = self._fingerprint()
+        self._write("notas.txt", b"outro conteudo")
+        self.assertEqual(self._fingerprint(), first)
+
+    def test_added_removed_or_rewritten_photo_changes_fingerprint(self):
+        first = self._fingerprint()
+        extra = self._write("DJI_20240101120001_0002_V.JPG", b"jpeg")
+        added = self._fingerprint()
+        self.assertNotEqual(added, first)
+
+        os.remove(extra)
+        self.assertEqual(self._fingerprint(), first)
+
+        # Reexportada: mesmo nome, tamanho diferente
+        self._write(os.path.basename(self.photo), b"jpeg reexportado")
+        self.assertNotEqual(self._fingerprint(), first)
+
+    def test_photo_touched_changes_fingerprint(self):
+        first = self._fingerprint()
+        stat = os.stat(self.photo)
+        os.utime(self.photo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertNotEqual(self._fingerprint(), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
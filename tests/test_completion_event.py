@@ -0,0 +1,79 @@
+import threading
+import time
+import unittest
+
+from pipeline_fakes import engine_module
+from qgis_stubs import load_modules
+
+(event_module,) = load_modules("core/engine_tasks/CompletionEvent.py")
+CompletionEvent = event_module.CompletionEvent
+PipelineTask = engine_module.PipelineTask
+
+
+def set_later(event, delay=0.05):
+    timer = threading.Timer(delay, event.set)
+    timer.start()
+    return timer
+
+
+class CompletionEventTest(unittest.TestCase):
+    def test_set_wakes_waiter_without_polling(self):
+        event = CompletionEvent(poll_interval=5.0)
+        set_later(event)
+
+        started = time.perf_counter()
+        self.assertTrue(event.wait())
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(event.stats()["wakeups"], 0)
+
+    def test_wait_blocks_without_burning_cpu(self):
+        event = CompletionEvent(poll_interval=0.05)
+        set_later(event, 0.3)
+        event.wait()
+
+        stats = event.stats()
+        self.assertGreaterEqual(stats["wait_wall_s"], 0.25)
+        self.assertLess(stats["wait_cpu_s"], 0.05)
+
+    def test_cancellation_is_noticed_by_the_safety_poll(self):
+        event = CompletionEvent(poll_interval=0.01)
+        cancelled = threading.Event()
+        threading.Timer(0.05, cancelled.set).start()
+
+        self.assertFalse(event.wait(cancelled.is_set))
+        self.assertGreaterEqual(event.stats()["wakeups"], 1)
+
+    def test_already_set_returns_immediately(self):
+        event = CompletionEvent()
+        event.set()
+        self.assertTrue(event.wait())
+        event.clear()
+        self.assertFalse(event.is_set())
+
+
+class PipelineTaskTest(unittest.TestCase):
+    def _run_in_thread(self, task):
+        outcome = {}
+        thread = threading.Thread(target=lambda: outcome.setdefault("ok", task.run()))
+        thread.start()
+        return thread, outcome
+
+    def test_mark_done_releases_run(self):
+        task = PipelineTask("pipeline")
+        thread, outcome = self._run_in_thread(task)
+        task.mark_done()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(outcome["ok"])
+
+    def test_cancel_releases_run_with_failure(self):
+        task = PipelineTask("pipeline")
+        thread, outcome = self._run_in_thread(task)
+        task.cancel()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(outcome["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import threading
+import unittest
+
+from pipeline_fakes import ExecutionContext, FakeStep, run_pipeline
+
+
+class Recorder:
+    """Valor que registra a thread em que foi serializado (e pode travar)."""
+
+    def __init__(self, gate=None):
+        self.payload = list(range(1000))
+        self.pickled_in = None
+        self.gate = gate
+
+    def __reduce__(self):
+        self.pickled_in = threading.current_thread().name
+        if self.gate is not None:
+            self.gate.wait(5)
+        return (list, (self.payload,))
+
+
+def spill_context():
+    context = ExecutionContext({"tool_key": "tests"})
+    context.SPILL_MIN_BYTES = 0
+    context.declare("big", spillable=True)
+    return context
+
+
+class SpillAsyncTest(unittest.TestCase):
+    def test_pickles_off_the_calling_thread(self):
+        context = spill_context()
+        value = Recorder()
+        context.set("big", value)
+
+        future = context.spill_async("big")
+        self.assertTrue(future.result(5))
+        self.assertTrue(context.is_spilled("big"))
+        self.assertNotEqual(value.pickled_in, threading.current_thread().name)
+        self.assertEqual(context.get("big"), value.payload)
+
+    def test_read_during_spill_keeps_value_in_memory(self):
+        gate = threading.Event()
+        context = spill_context()
+        value = Recorder(gate)
+        context.set("big", value)
+
+        future = context.spill_async("big")
+        self.assertIs(context.get("big"), value)
+        gate.set()
+
+        self.assertFalse(future.result(5))
+        self.assertFalse(context.is_spilled("big"))
+        self.assertIs(context.get("big"), value)
+
+    def test_replaced_during_spill_keeps_new_value(self):
+        gate = threading.Event()
+        context = spill_context()
+        context.set("big", Recorder(gate))
+
+        future = context.spill_async("big")
+        context.set("big", [1, 2, 3])
+        gate.set()
+
+        self.assertFalse(future.result(5))
+        self.assertEqual(context.get("big"), [1, 2, 3])
+
+    def test_small_values_are_not_spilled(self):
+        context = ExecutionContext()
+        context.declare("big", spillable=True)
+        context.set("big", [1])
+        self.assertIsNone(context.spill_async("big"))
+
+
+def produce(context):
+    return {"big": list(range(50000))}
+
+
+class EngineSpillTest(unittest.TestCase):
+    def _run(self, **engine_kwargs):
+        context = spill_context()
+        steps = [
+            FakeStep("produce", produce, reads=[], writes=["big"]),
+            FakeStep("other", lambda ctx: {"small": 1}, reads=[], writes=["small"]),
+        ]
+        engine, context, outcome = run_pipeline(
+            steps, context, mode="sequential", **engine_kwargs
+        )
+        self.assertTrue(context.flush_spills(5))
+        self.assertIn("finished", outcome)
+        return context
+
+    def test_key_read_by_callback_is_not_spilled(self):
+        context = self._run(result_keys=["big"])
+        self.assertEqual(context.memory_report()["spilled"], {})
+
+    def test_undeclared_callbacks_disable_spill(self):
+        context = self._run()
+        self.assertEqual(context.memory_report()["spilled"], {})
+
+    def test_unread_key_is_spilled_and_still_readable(self):
+        context = self._run(result_keys=["small"])
+        self.assertTrue(context.is_spilled("big"))
+        self.assertEqual(context.get("big"), list(range(50000)))
+
+    def test_key_read_by_later_step_is_not_spilled(self):
+        context = spill_context()
+        steps = [
+            FakeStep("produce", produce, reads=[], writes=["big"]),
+            FakeStep("consume", lambda ctx: {"n": len(ctx.get("big"))}, reads=["big"], writes=["n"]),
+        ]
+        _, context, outcome = run_pipeline(steps, context, result_keys=["n"])
+        self.assertTrue(context.flush_spills(5))
+        self.assertEqual(context.get("n"), 50000)
+        self.assertEqual(context.memory_report()["by_step"][0]["spilled_keys"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import importlib.util
+import unittest
+
+from qgis_stubs import load_modules
+from benchmarks.bench_custom_fields_engines import build_photos, compare
+
+util_module, numpy_module = load_modules(
+    "utils/mrk/CustomPhotosFieldsUtil.py", "utils/mrk/CustomPhotosFieldsNumpy.py"
+)
+CustomPhotosFieldsUtil = util_module.CustomPhotosFieldsUtil
+CustomPhotosFieldsNumpy = numpy_module.CustomPhotosFieldsNumpy
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+# Arredondamento do NumPy (mesma tolerância do benchmark)
+TOLERANCE = 2e-4
+
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy não instalado")
+class NumpyScalarParityTest(unittest.TestCase):
+    def assertParity(self, photos):
+        scalar = CustomPhotosFieldsUtil.calculate_all_custom_fields(photos, engine="scalar")
+        numpy = CustomPhotosFieldsNumpy.calculate_all_custom_fields(photos)
+        self.assertIsNone(compare(scalar, numpy, TOLERANCE))
+
+    def test_single_flight(self):
+        self.assertParity(build_photos(300, flights=1, seed=1))
+
+    def test_many_flights_with_gaps(self):
+        self.assertParity(build_photos(2000, flights=5, seed=2))
+
+    def test_tiny_inputs(self):
+        for size in (1, 2, 3):
+            self.assertParity(build_photos(size, flights=1, seed=size))
+
+    def test_auto_engine_uses_numpy_result(self):
+        photos = build_photos(500, flights=2, seed=3)
+        auto = CustomPhotosFieldsUtil.calculate_all_custom_fields(photos, engine="auto")
+        scalar = CustomPhotosFieldsUtil.calculate_all_custom_fields(photos, engine="scalar")
+        self.assertIsNone(compare(scalar, auto, TOLERANCE))
+
+
+class EngineSelectionTest(unittest.TestCase):
+    def test_default_engine_is_auto(self):
+        self.assertEqual(CustomPhotosFieldsUtil.ENGINE, "auto")
+
+    def test_default_engine_matches_scalar(self):
+        photos = build_photos(50, flights=2, seed=4)
+        default = CustomPhotosFieldsUtil.calculate_all_custom_fields(photos)
+        scalar = CustomPhotosFieldsUtil.calculate_all_custom_fields(photos, engine="scalar")
+        self.assertIsNone(compare(scalar, default, TOLERANCE))
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CustomPhotosFieldsUtil.calculate_all_custom_fields(
+                build_photos(3, flights=1), engine="gpu"
+            )
+
+    @unittest.skipIf(HAS_NUMPY, "NumPy instalado")
+    def test_numpy_engine_without_numpy_raises(self):
+        with self.assertRaises(ImportError):
+            CustomPhotosFieldsUtil.calculate_all_custom_fields(
+                build_photos(3, flights=1), engine="numpy"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
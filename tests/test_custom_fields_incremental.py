@@ -0,0 +1,106 @@
+import unittest
+
+from qgis_stubs import load_modules
+from benchmarks.bench_custom_fields_engines import build_photos, compare
+
+util_module, incremental_module = load_modules(
+    "utils/mrk/CustomPhotosFieldsUtil.py",
+    "utils/mrk/CustomPhotosFieldsIncremental.py",
+)
+CustomPhotosFieldsUtil = util_module.CustomPhotosFieldsUtil
+CustomPhotosFieldsIncremental = incremental_module.CustomPhotosFieldsIncremental
+
+TOLERANCE = 1e-6
+
+
+class CustomPhotosFieldsIncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self.photos = build_photos(600, flights=3, seed=1)
+        self.state = CustomPhotosFieldsIncremental(engine="scalar")
+        self.state.sync(self.photos)
+
+    def assertMatchesFull(self, metadata, result):
+        expected = CustomPhotosFieldsUtil.calculate_all_custom_fields(
+            metadata, engine="scalar"
+        )
+        self.assertIsNone(compare(expected, result, TOLERANCE))
+
+    def test_initial_sync_matches_full_compute(self):
+        self.assertMatchesFull(self.photos, self.state.results())
+
+    def test_added_files(self):
+        added = {
+            f"N_{name}": dict(record, DroneSerialNumber="1581F5FJDNOVO")
+            for name, record in build_photos(40, flights=1, seed=7).items()
+        }
+        updated = {**self.photos, **added}
+        self.assertMatchesFull(updated, self.state.sync(updated))
+        self.assertEqual(len(self.state), len(updated))
+
+    def test_removed_files(self):
+        names = list(self.photos)
+        updated = {name: self.photos[name] for name in names if name not in names[::25]}
+        self.assertMatchesFull(updated, self.state.sync(updated))
+        self.assertEqual(len(self.state), len(updated))
+
+    def test_modified_files(self):
+        updated = dict(self.photos)
+        for name in list(updated)[:: 30]:
+            updated[name] = dict(updated[name], AbsoluteAltitude="+950.000", FlightXSpeed="+9.50")
+        self.assertMatchesFull(updated, self.state.sync(updated))
+
+    def test_unchanged_sync_returns_same_result(self):
+        before = self.state.results()
+        self.assertEqual(self.state.sync(dict(self.photos)), before)
+
+
+class SharedStatesTest(unittest.TestCase):
+    def setUp(self):
+        CustomPhotosFieldsIncremental.release_all()
+        self.addCleanup(CustomPhotosFieldsIncremental.release_all)
+        original = CustomPhotosFieldsIncremental.MAX_SHARED_BYTES
+        self.addCleanup(setattr, CustomPhotosFieldsIncremental, "MAX_SHARED_BYTES", original)
+
+    def test_shared_returns_same_state_until_released(self):
+        state = CustomPhotosFieldsIncremental.shared("a")
+        self.assertIs(CustomPhotosFieldsIncremental.shared("a"), state)
+        self.assertTrue(CustomPhotosFieldsIncremental.release("a"))
+        self.assertFalse(CustomPhotosFieldsIncremental.release("a"))
+        self.assertIsNot(CustomPhotosFieldsIncremental.shared("a"), state)
+
+    def test_many_small_states_fit_the_memory_budget(self):
+        for key in range(20):
+            state = CustomPhotosFieldsIncremental.shared(key)
+            state.engine = "scalar"
+            state.sync(build_photos(30, flights=1, seed=key))
+        self.assertEqual(len(CustomPhotosFieldsIncremental._shared), 20)
+
+    def test_least_recently_used_states_leave_over_budget(self):
+        sizes = []
+        for key in ("old", "mid", "new"):
+            state = CustomPhotosFieldsIncremental.shared(key)
+            state.engine = "scalar"
+            state.sync(build_photos(60, flights=1, seed=len(sizes)))
+            sizes.append(state.approx_bytes())
+
+        CustomPhotosFieldsIncremental.MAX_SHARED_BYTES = sizes[1] + sizes[2]
+        CustomPhotosFieldsIncremental.shared("mid")
+        state = CustomPhotosFieldsIncremental.shared("new")
+        state.sync(build_photos(61, flights=1, seed=9))
+
+        self.assertEqual(list(CustomPhotosFieldsIncremental._shared), ["mid", "new"])
+        self.assertLessEqual(
+            CustomPhotosFieldsIncremental.shared_bytes(),
+            CustomPhotosFieldsIncremental.MAX_SHARED_BYTES * 1.1,
+        )
+
+    def test_state_being_synced_is_never_evicted(self):
+        CustomPhotosFieldsIncremental.MAX_SHARED_BYTES = 1
+        state = CustomPhotosFieldsIncremental.shared("only")
+        state.engine = "scalar"
+        state.sync(build_photos(30, flights=1, seed=3))
+        self.assertEqual(list(CustomPhotosFieldsIncremental._shared), ["only"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import importlib.util
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+import types
+import unittest
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _package(name, path):
+    module = sys.modules.get(name)
+    if module is None:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return module
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_package("Cadmus", ROOT)
+_package("Cadmus.core", ROOT / "core")
+_package("Cadmus.core.model", ROOT / "core" / "model")
+
+_load("Cadmus.core.model.JpegHeader", "core/model/JpegHeader.py")
+JpegHeaderReader = _load(
+    "Cadmus.core.model.JpegHeaderReader", "core/model/JpegHeaderReader.py"
+).JpegHeaderReader
+
+MAKERNOTE = b"DJI-MAKERNOTE-DATA"
+XMP = b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF/></x:xmpmeta>'
+
+
+def _segment(marker, payload):
+    return bytes((0xFF, marker)) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def _entry(tag, typ, count, value):
+    return struct.pack("<HHL", tag, typ, count) + value
+
+
+def _tiff():
+    # IFD0 (Make, ExifIFD) em 8; Exif IFD (MakerNote) em 38; dados em 56
+    ifd0 = (
+        struct.pack("<H", 2)
+        + _entry(0x010F, 2, 4, b"DJI\x00")
+        + _entry(0x8769, 4, 1, struct.pack("<L", 38))
+        + struct.pack("<L", 0)
+    )
+    exif_ifd = (
+        struct.pack("<H", 1)
+        + _entry(0x927C, 7, len(MAKERNOTE), struct.pack("<L", 56))
+        + struct.pack("<L", 0)
+    )
+    return b"II*\x00" + struct.pack("<L", 8) + ifd0 + exif_ifd + MAKERNOTE
+
+
+def _jpeg(with_scan=True):
+    data = b"\xff\xd8"
+    data += _segment(0xE0, b"JFIF\x00\x01\x01\x01\x00\x96\x00\x96\x00\x00")
+    data += _segment(0xE1, JpegHeaderReader.EXIF_ID + _tiff())
+    data += _segment(0xE1, JpegHeaderReader.XMP_ID + XMP)
+    data += _segment(0xED, b"\x00" * 4000)  # ignorado (seek)
+    data += _segment(0xC2, b"\x08" + struct.pack(">HH", 3000, 4000) + b"\x03" + b"\x00" * 9)
+    if with_scan:
+        data += _segment(0xDA, b"\x00" * 10) + b"\x55" * 200_000 + b"\xff\xd9"
+    return data
+
+
+class JpegHeaderReaderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, data):
+        path = os.path.join(self.tmp_dir.name, "DJI_0001.JPG")
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def test_reads_segments_until_start_of_scan(self):
+        path = self._write(_jpeg())
+        header = JpegHeaderReader.read(path)
+
+        self.assertEqual((header.width, header.height), (4000, 3000))
+        self.assertEqual((header.bits, header.components), (8, 3))
+        self.assertTrue(header.progressive)
+        self.assertEqual((header.jfif_unit, header.jfif_density), (1, (150, 150)))
+        self.assertEqual(header.xmp, XMP)
+        self.assertEqual(header.stat.st_size, os.path.getsize(path))
+        # Nem o APP13 nem o scan são lidos
+        self.assertLess(header.bytes_read, 1000)
+
+    def test_parses_ifds_and_makernote_offset(self):
+        path = self._write(_jpeg())
+        header = JpegHeaderReader.read(path)
+        JpegHeaderReader.parse_exif(header)
+
+        make = header.directories["ifd0"][0x010F]
+        self.assertEqual(JpegHeaderReader.decode_value(*make[:3], header.byte_order), "DJI")
+        self.assertIn(0x927C, header.directories["exif"])
+
+        offset, length = header.makernote
+        with open(path, "rb") as fh:
+            fh.seek(offset)
+            self.assertEqual(fh.read(length), MAKERNOTE)
+
+    def test_returns_none_without_start_of_scan(self):
+        self.assertIsNone(JpegHeaderReader.read(self._write(_jpeg(with_scan=False))))
+        self.assertIsNone(JpegHeaderReader.read(self._write(b"\x89PNG\r\n\x1a\n")))
+
+
+if __name__ == "__main__":
+    unittest.main()
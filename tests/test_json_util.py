@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import types
+import unittest
+
+from qgis_stubs import ROOT, load_modules, package
+
+package("Cadmus.utils.report", ROOT / "utils" / "report")
+dump_module, json_module = load_modules(
+    "core/model/PhotoMetadataDump.py", "utils/report/JSONUtil.py"
+)
+PhotoMetadataDump = dump_module.PhotoMetadataDump
+JSONUtil = json_module.JSONUtil
+
+RECORDS = {
+    f"DJI_{n:04d}_V.JPG": {"DateTimeOriginal": "2024:05:01 09:00:00", "AbsoluteAltitude": n}
+    for n in range(1, 6)
+}
+
+
+class JSONUtilRecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def test_dump_records_are_generated_lazily(self):
+        path = os.path.join(self.folder.name, "dump.jsonl")
+        with PhotoMetadataDump(path, base_folder="C:/voo") as dump:
+            dump.write_group("C:/voo/m1", RECORDS)
+
+        records = JSONUtil.iter_load_records(path)
+        self.assertIsInstance(records, types.GeneratorType)
+        self.assertEqual(list(records), JSONUtil.load_records(path))
+
+    def test_legacy_document_is_still_accepted(self):
+        path = os.path.join(self.folder.name, "legacy.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(RECORDS, fh)
+
+        records = list(JSONUtil.iter_load_records(path))
+        self.assertEqual(records, JSONUtil.load_records(path))
+        self.assertEqual(len(records), len(RECORDS))
+        self.assertEqual(records[0]["File"], "DJI_0001_V.JPG")
+
+
+if __name__ == "__main__":
+    unittest.main()
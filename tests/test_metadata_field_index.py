@@ -0,0 +1,271 @@
+import random
+import unittest
+
+from qgis_stubs import load_modules
+
+(fields_module,) = load_modules("utils/mrk/MetadataFields.py")
+MetadataFields = fields_module.MetadataFields
+
+
+class LegacyLookup:
+    """
+    Busca de campos anterior ao `MetadataFieldIndex` (varredura do catálogo a
+    cada chamada), mantida aqui como referência de comportamento.
+    """
+
+    def __init__(self):
+        self.fields = MetadataFields.all_fields()
+        self.attribute_to_key = {field.attribute: key for key, field in self.fields.items()}
+        self.pascal = MetadataFields._to_pascal_case
+
+    def sanitize(self, raw_field_name):
+        if not raw_field_name or not isinstance(raw_field_name, str):
+            return None
+        normalized = raw_field_name.strip()
+        for prefix in ("xmp:", "drone-dji:", "crs:", "tiff:", "rdf:", "EXIF:", "GPS:"):
+            if normalized.startswith(prefix):
+                normalized = normalized[len(prefix):]
+                break
+        field_mappings = {
+            "arquivo": "File",
+            "caminho": "Path",
+            "tamanho_mb": "SizeMb",
+            "data_criacao": "DateTime",
+            "dt_criacao": "DateTime",
+            "os_date": "DateTime",
+            "folder_path": "FolderLevel1",
+            "voo_id": "FlightNumber",
+            "width_px": "ExifImageWidth",
+            "height_px": "ExifImageHeight",
+            "coverage_width": "EstimatedCoverage",
+            "gpsstatus": "GpsStatus",
+            "gpsversion": "GpsStatus",
+            "createdate": "DateTime",
+            "modifydate": "DateTime",
+        }
+        normalized_lower = normalized.lower()
+        if normalized_lower in field_mappings:
+            return field_mappings[normalized_lower]
+        if normalized in self.fields:
+            return self.fields[normalized].attribute
+        for field_name, field_obj in self.fields.items():
+            if field_name.lower() == normalized_lower:
+                return field_obj.attribute
+        pascal_case = self.pascal(normalized.replace(" ", "_").replace("-", "_"))
+        for field_name, field_obj in self.fields.items():
+            if field_name.lower() == pascal_case.lower():
+                return field_obj.attribute
+        return None
+
+    def resolve_key(self, key_or_attribute):
+        if not key_or_attribute:
+            return key_or_attribute
+        if key_or_attribute in self.fields:
+            return key_or_attribute
+        if key_or_attribute in self.attribute_to_key:
+            return self.attribute_to_key[key_or_attribute]
+        candidate = self.pascal(key_or_attribute)
+        if candidate in self.fields:
+            return candidate
+        return key_or_attribute
+
+    def candidates(self, key_or_attribute):
+        if not key_or_attribute:
+            return []
+        raw = str(key_or_attribute).strip()
+        if not raw:
+            return []
+        out = []
+
+        def push(value):
+            if value and value not in out:
+                out.append(value)
+
+        push(raw)
+        push(self.resolve_key(raw))
+        parts = [p for p in raw.split(":") if p]
+        if len(parts) > 1:
+            push(parts[-1])
+            push(self.resolve_key(parts[-1]))
+        pascal = self.pascal(raw)
+        push(pascal)
+        push(self.resolve_key(pascal))
+        if len(parts) > 1:
+            tail_pascal = self.pascal(parts[-1])
+            push(tail_pascal)
+            push(self.resolve_key(tail_pascal))
+        return [candidate for candidate in out if candidate in self.fields]
+
+    def record_key(self, key):
+        candidates = self.candidates(key)
+        return candidates[0] if candidates else self.resolve_key(key)
+
+    def source_key(self, raw_field_name):
+        attribute = self.sanitize(raw_field_name)
+        if attribute is None:
+            return None
+        return self.record_key(attribute)
+
+    def normalize(self, record):
+        normalized = {}
+        for key, value in (record or {}).items():
+            target_key = self.record_key(key)
+            if target_key not in normalized:
+                normalized[target_key] = value
+                continue
+            if normalized[target_key] in (None, "") and value not in (None, ""):
+                normalized[target_key] = value
+        return normalized
+
+
+def catalog_names():
+    """Chaves e atributos do catálogo com as variantes vistas nos payloads."""
+    fields = MetadataFields.all_fields()
+    base = set(fields) | {field.attribute for field in fields.values() if field.attribute}
+    base |= set(MetadataFields.SYSTEM_FIELD_ALIASES)
+    names = set(base)
+    for name in base:
+        names.update(
+            (
+                name.lower(),
+                name.upper(),
+                f"  {name} ",
+                f"drone-dji:{name}",
+                f"xmp_bloco_1:drone-dji:{name}",
+                f"EXIF:{name}",
+                f"MRK:{name}",
+                name.replace("_", "-"),
+                name.replace("_", " "),
+            )
+        )
+    names |= {
+        "",
+        "   ",
+        ":",
+        "CampoDesconhecido",
+        "xmp_erro",
+        "gps_latitude",
+        "exif_image_width",
+        "Gps:Latitude",
+    }
+    return sorted(names)
+
+
+class FieldIndexEquivalenceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.legacy = LegacyLookup()
+        cls.names = catalog_names()
+
+    def test_sanitize_matches_legacy(self):
+        for name in self.names + [None, 42]:
+            self.assertEqual(
+                MetadataFields.sanitize_field_name(name), self.legacy.sanitize(name), name
+            )
+
+    def test_resolve_key_and_candidates_match_legacy(self):
+        for name in self.names:
+            self.assertEqual(MetadataFields.resolve_key(name), self.legacy.resolve_key(name), name)
+            self.assertEqual(
+                MetadataFields.resolve_candidates(name), self.legacy.candidates(name), name
+            )
+
+    def test_source_key_matches_legacy(self):
+        for name in self.names:
+            self.assertEqual(MetadataFields.source_key(name), self.legacy.source_key(name), name)
+
+    def test_repeated_lookups_are_stable(self):
+        # Segunda passada vem dos mapas pré-calculados/LRU
+        first = [MetadataFields.sanitize_field_name(name) for name in self.names]
+        second = [MetadataFields.sanitize_field_name(name) for name in self.names]
+        self.assertEqual(first, second)
+
+    def test_catalog_maps(self):
+        fields = MetadataFields.all_fields()
+        self.assertEqual(
+            MetadataFields.attribute_to_key_map(),
+            {field.attribute: key for key, field in fields.items()},
+        )
+        self.assertEqual(
+            MetadataFields.key_to_attribute_map(),
+            {key: field.attribute for key, field in fields.items()},
+        )
+        # Cópias: alterar o retorno não mexe no índice
+        MetadataFields.all_fields().clear()
+        self.assertEqual(MetadataFields.all_fields(), fields)
+
+    def test_index_is_rebuilt_when_catalog_changes(self):
+        index = MetadataFields.field_index()
+        self.assertIs(MetadataFields.field_index(), index)
+
+        original = MetadataFields.MRK_FIELDS
+        MetadataFields.MRK_FIELDS = {}
+        try:
+            rebuilt = MetadataFields.field_index()
+            self.assertIsNot(rebuilt, index)
+            self.assertLess(len(rebuilt.fields), len(index.fields))
+        finally:
+            MetadataFields.MRK_FIELDS = original
+        self.assertEqual(MetadataFields.field_index().fields, index.fields)
+
+
+def build_records(names, count, layouts=6, seed=0):
+    rng = random.Random(seed)
+    shapes = [rng.sample(names, 40) for _ in range(layouts)]
+    values = [None, "", 0, "x", 1.5]
+    return [
+        {name: rng.choice(values) for name in shapes[n % layouts]} for n in range(count)
+    ]
+
+
+class RecordNormalizationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.legacy = LegacyLookup()
+        cls.names = [name for name in catalog_names() if name.strip()]
+
+    def assertSameRecord(self, result, expected):
+        # Ordem das chaves faz parte do resultado (dump/camadas)
+        self.assertEqual(list(result.items()), list(expected.items()))
+
+    def test_single_record_matches_legacy(self):
+        for record in build_records(self.names, 60, seed=1):
+            self.assertSameRecord(
+                MetadataFields.normalize_record_to_keys(record), self.legacy.normalize(record)
+            )
+
+    def test_collisions_keep_first_filled_value(self):
+        record = {"GpsLatitude": "", "drone-dji:GpsLatitude": -22.5, "GPSLatitude": -1.0}
+        expected = self.legacy.normalize(record)
+        self.assertSameRecord(MetadataFields.normalize_record_to_keys(record), expected)
+        self.assertEqual(expected["GpsLatitude"], -22.5)
+
+    def test_batch_matches_per_record(self):
+        records = build_records(self.names, 300, seed=2)
+        records.insert(5, {})
+        records.insert(9, None)
+        batch = MetadataFields.normalize_records_to_keys(records)
+        self.assertEqual(len(batch), len(records))
+        for record, result in zip(records, batch):
+            self.assertSameRecord(result, MetadataFields.normalize_record_to_keys(record))
+            self.assertSameRecord(result, self.legacy.normalize(record))
+
+    def test_same_signature_reuses_one_plan(self):
+        index = MetadataFields.field_index()
+        index.record_plan.cache_clear()
+        records = build_records(self.names, 120, layouts=3, seed=3)
+        MetadataFields.normalize_records_to_keys(records)
+        self.assertEqual(index.record_plan.cache_info().misses, 3)
+
+    def test_records_by_file_keep_file_order(self):
+        records = build_records(self.names, 10, seed=4)
+        by_file = {f"DJI_{n:04d}_V.JPG": record for n, record in enumerate(records)}
+        result = MetadataFields.normalize_records_by_file(by_file)
+        self.assertEqual(list(result), list(by_file))
+        for name, record in by_file.items():
+            self.assertSameRecord(result[name], self.legacy.normalize(record))
+        self.assertEqual(MetadataFields.normalize_records_by_file(None), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
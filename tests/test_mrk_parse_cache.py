@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from qgis_stubs import load_modules
+
+cache_module, parser_module, reader_module = load_modules(
+    "utils/mrk/MrkParseCache.py", "utils/mrk/MrkParser.py", "core/model/MrkFileReader.py"
+)
+MrkParseCache = cache_module.MrkParseCache
+MrkParser = parser_module.MrkParser
+MrkFileReader = reader_module.MrkFileReader
+
+MRK_LINE = (
+    "{n}\t416519.{n:06d}\t[2241]\t  -23,N\t  14,E\t  161,V\t"
+    "-22.{n:08d},Lat\t-47.{n:08d},Lon\t812.345,Ellh\t0.01, 0.01, 0.02\t50,Q\n"
+)
+
+
+def shift_mtime(path, seconds=10):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+class MrkParseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache = MrkParseCache(db_path=os.path.join(self.folder.name, "cache.sqlite"))
+        self.mrk = self._write("DJI_202401011200_001_Voo_Timestamp.MRK", 20)
+
+    def _write(self, name, count):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            for n in range(1, count + 1):
+                fh.write(MRK_LINE.format(n=n))
+        return path
+
+    def _store(self, path):
+        arrays = MrkFileReader.read_arrays(path)
+        self.cache.store(path, arrays, MrkParseCache.identity(path))
+        return arrays
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.lookup(self.mrk))
+        arrays = self._store(self.mrk)
+        self.assertEqual(self.cache.lookup(self.mrk), arrays)
+
+    def test_touched_file_with_same_content_stays_valid(self):
+        arrays = self._store(self.mrk)
+        shift_mtime(self.mrk)
+        self.assertEqual(self.cache.lookup(self.mrk), arrays)
+
+    def test_changed_content_invalidates(self):
+        self._store(self.mrk)
+        with open(self.mrk, "r+", encoding="utf-8") as fh:
+            content = fh.read()
+            fh.seek(0)
+            fh.write(content.replace("812.345", "999.999"))
+        shift_mtime(self.mrk)
+        self.assertIsNone(self.cache.lookup(self.mrk))
+
+    def test_size_change_invalidates(self):
+        self._store(self.mrk)
+        with open(self.mrk, "a", encoding="utf-8") as fh:
+            fh.write(MRK_LINE.format(n=99))
+        self.assertIsNone(self.cache.lookup(self.mrk))
+
+    def test_changed_during_read_is_not_stored(self):
+        before = MrkParseCache.identity(self.mrk)
+        arrays = MrkFileReader.read_arrays(self.mrk)
+        shift_mtime(self.mrk)
+        self.cache.store(self.mrk, arrays, before)
+        self.assertIsNone(self.cache.lookup(self.mrk))
+
+    def test_old_format_version_is_dropped(self):
+        self._store(self.mrk)
+        connection = sqlite3.connect(self.cache.db_path)
+        connection.execute("PRAGMA user_version = 1")
+        connection.commit()
+        connection.close()
+
+        reopened = MrkParseCache(db_path=self.cache.db_path)
+        self.assertIsNone(reopened.lookup(self.mrk))
+
+    def test_parse_with_cache_matches_without(self):
+        expected = MrkParser.parse_file(self.mrk)
+        self.assertEqual(MrkParser.parse_file(self.mrk, cache=self.cache), expected)
+        # Segunda leitura vem do cache
+        self.assertIsNotNone(self.cache.lookup(self.mrk))
+        self.assertEqual(MrkParser.parse_file(self.mrk, cache=self.cache), expected)
+        self.assertEqual(
+            MrkParser.parse_folder(self.folder.name, cache=self.cache),
+            MrkParser.parse_folder(self.folder.name),
+        )
+
+    def test_output_freshness(self):
+        output = os.path.join(self.folder.name, "pontos.gpkg")
+        with open(output, "wb") as fh:
+            fh.write(b"gpkg")
+        self.cache.record_output(output, self.mrk)
+        self.assertTrue(self.cache.output_is_fresh(output, self.mrk))
+
+        shift_mtime(self.mrk)  # mesmo conteúdo
+        self.assertTrue(self.cache.output_is_fresh(output, self.mrk))
+
+        with open(self.mrk, "a", encoding="utf-8") as fh:
+            fh.write(MRK_LINE.format(n=99))
+        self.assertFalse(self.cache.output_is_fresh(output, self.mrk))
+
+    def test_unrecorded_output_is_fresh_only_if_newer(self):
+        output = os.path.join(self.folder.name, "trilha.gpkg")
+        with open(output, "wb") as fh:
+            fh.write(b"gpkg")
+        shift_mtime(output, seconds=-100)
+        self.assertFalse(self.cache.output_is_fresh(output, self.mrk))
+        shift_mtime(output, seconds=200)
+        self.assertTrue(self.cache.output_is_fresh(output, self.mrk))
+
+    def test_entries_are_capped(self):
+        original = MrkParseCache.MAX_ENTRIES
+        MrkParseCache.MAX_ENTRIES = 2
+        self.addCleanup(setattr, MrkParseCache, "MAX_ENTRIES", original)
+        paths = [self._write(f"DJI_20240101120{n}_00{n}_V_Timestamp.MRK", 3) for n in range(3)]
+        for path in paths:
+            self._store(path)
+        self.assertIsNone(self.cache.lookup(paths[0]))
+        self.assertIsNotNone(self.cache.lookup(paths[2]))
+
+    def test_unusable_database_disables_cache(self):
+        cache = MrkParseCache(db_path=os.path.join(self.folder.name, "missing", "db.sqlite"))
+        self.assertIsNone(cache.lookup(self.mrk))
+        self.assertIsNotNone(cache._disabled_reason)
+        self.assertEqual(MrkParser.parse_file(self.mrk, cache=cache), MrkParser.parse_file(self.mrk))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from qgis_stubs import ROOT, load_modules
+
+parser_module, backend_module, token_module = load_modules(
+    "utils/mrk/MrkParser.py",
+    "core/engine_tasks/ProcessPoolBackend.py",
+    "core/engine_tasks/CancellationToken.py",
+)
+MrkParser = parser_module.MrkParser
+ProcessPoolBackend = backend_module.ProcessPoolBackend
+CancellationToken = token_module.CancellationToken
+OperationCancelled = token_module.OperationCancelled
+
+MRK_LINE = (
+    "{n}\t416519.{n:06d}\t[2241]\t  -23,N\t  14,E\t  161,V\t"
+    "-22.{n:08d},Lat\t-47.{n:08d},Lon\t812.345,Ellh\t0.01, 0.01, 0.02\t50,Q\n"
+)
+LAYOUT = {
+    ("voo1",): 120,
+    ("voo2",): 80,
+    ("voo2", "bloco"): 60,
+    ("voo3", "bloco", "parte"): 40,
+}
+
+
+def setUpModule():
+    # Os workers ("spawn") importam `Cadmus.core.engine_tasks.ProcessJobs`:
+    # expõe a raiz do plugin com o nome do pacote
+    global _packages
+    _packages = tempfile.TemporaryDirectory()
+    try:
+        os.symlink(ROOT, os.path.join(_packages.name, "Cadmus"), target_is_directory=True)
+    except (OSError, NotImplementedError):
+        return
+    sys.path.insert(0, _packages.name)
+    ProcessPoolBackend.shutdown_shared()
+
+
+def tearDownModule():
+    ProcessPoolBackend.shutdown_shared()
+    if _packages.name in sys.path:
+        sys.path.remove(_packages.name)
+    _packages.cleanup()
+
+
+class ParseFolderParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        for flight, (parts, count) in enumerate(LAYOUT.items(), 1):
+            folder = os.path.join(self.folder.name, *parts)
+            os.makedirs(folder, exist_ok=True)
+            name = f"DJI_2024010112{flight:02d}_{flight:03d}_V{flight}_Timestamp.MRK"
+            with open(os.path.join(folder, name), "w", encoding="utf-8") as fh:
+                for n in range(1, count + 1):
+                    fh.write(MRK_LINE.format(n=n))
+
+        original = MrkParser.PARALLEL_MIN_BYTES
+        MrkParser.PARALLEL_MIN_BYTES = 0
+        self.addCleanup(setattr, MrkParser, "PARALLEL_MIN_BYTES", original)
+
+    def _require_pool(self):
+        if _packages.name not in sys.path or not ProcessPoolBackend.shared().available():
+            self.skipTest("pool de processos indisponível neste ambiente")
+
+    def test_parallel_output_equals_serial(self):
+        self._require_pool()
+        serial = MrkParser.parse_folder(self.folder.name, parallel=False)
+        parallel = MrkParser.parse_folder(self.folder.name, parallel=True)
+
+        self.assertEqual(len(serial), sum(LAYOUT.values()))
+        self.assertEqual(parallel, serial)
+        # O pool não quebrou no meio (senão teria caído para a leitura local)
+        self.assertIsNotNone(ProcessPoolBackend.shared()._executor)
+
+    def test_parallel_columnar_equals_serial(self):
+        self._require_pool()
+        serial = MrkParser.parse_folder(self.folder.name, parallel=False, columnar=True)
+        parallel = MrkParser.parse_folder(self.folder.name, parallel=True, columnar=True)
+        self.assertEqual(list(parallel), list(serial))
+        self.assertEqual(list(serial), MrkParser.parse_folder(self.folder.name))
+
+    def test_pool_is_used_only_when_worth_it(self):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.folder.name)
+            for name in names
+        )
+        token = CancellationToken()
+        _, use_pool, _ = MrkParser._load_arrays(files, token, True, None)
+        self.assertTrue(use_pool)
+        _, use_pool, _ = MrkParser._load_arrays(files[:1], token, True, None)
+        self.assertFalse(use_pool)
+
+        MrkParser.PARALLEL_MIN_BYTES = 1 << 40
+        _, use_pool, _ = MrkParser._load_arrays(files, token, True, None)
+        self.assertFalse(use_pool)
+
+    def test_cancelled_parse_raises(self):
+        token = CancellationToken()
+        token.cancel()
+        for parallel in (False, True):
+            with self.assertRaises(OperationCancelled):
+                MrkParser.parse_folder(self.folder.name, parallel=parallel, cancel_token=token)
+
+
+if __name__ == "__main__":
+    unittest.main()
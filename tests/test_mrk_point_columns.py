@@ -0,0 +1,118 @@
+import importlib.util
+import os
+import pathlib
+import pickle
+import sys
+import tempfile
+import types
+import unittest
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+class StubLogUtils:
+    def __init__(self, *, tool, class_name, level="INFO"):
+        self.tool = tool
+        self.class_name = class_name
+
+    def _log(self, *args, **kwargs):
+        return None
+
+    debug = info = warning = error = critical = _log
+
+
+def _package(name, path):
+    module = sys.modules.get(name)
+    if module is None:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return module
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_package("Cadmus", ROOT)
+_package("Cadmus.core", ROOT / "core")
+_package("Cadmus.core.config", ROOT / "core" / "config")
+_package("Cadmus.core.engine_tasks", ROOT / "core" / "engine_tasks")
+_package("Cadmus.core.model", ROOT / "core" / "model")
+_package("Cadmus.utils", ROOT / "utils")
+_package("Cadmus.utils.mrk", ROOT / "utils" / "mrk")
+
+logutils_module = types.ModuleType("Cadmus.core.config.LogUtils")
+logutils_module.LogUtils = StubLogUtils
+sys.modules.setdefault("Cadmus.core.config.LogUtils", logutils_module)
+
+MrkPointColumns = _load(
+    "Cadmus.core.model.MrkPointColumns", "core/model/MrkPointColumns.py"
+).MrkPointColumns
+MrkParser = _load("Cadmus.utils.mrk.MrkParser", "utils/mrk/MrkParser.py").MrkParser
+
+MRK_LINE = (
+    "{n}\t416519.123456\t[2241]\t  -23,N\t  14,E\t  161,V\t"
+    "-22.12345678,Lat\t-47.12345678,Lon\t812.345,Ellh\t0.01, 0.01, 0.02\t50,Q\n"
+)
+
+
+class MrkPointColumnsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        # Profundidades diferentes: folder_level2 só existe no segundo voo
+        for index, parts in enumerate((("voo1",), ("voo2", "bloco"))):
+            folder = os.path.join(cls.tmp_dir.name, *parts)
+            os.makedirs(folder)
+            name = f"DJI_202401011200_00{index + 1}_Voo_Timestamp.MRK"
+            with open(os.path.join(folder, name), "w", encoding="utf-8") as fh:
+                for n in range(1, 501):
+                    fh.write(MRK_LINE.format(n=n))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_columnar_parse_matches_dict_parse(self):
+        points = MrkParser.parse_folder(self.tmp_dir.name)
+        columns = MrkParser.parse_folder(self.tmp_dir.name, columnar=True)
+
+        self.assertIsInstance(columns, MrkPointColumns)
+        self.assertEqual(len(columns), 1000)
+        self.assertEqual(list(columns), points)
+        self.assertEqual(columns[-1], points[-1])
+
+    def test_update_row_and_pickle_round_trip(self):
+        columns = MrkParser.parse_folder(self.tmp_dir.name, columnar=True)
+        columns.update_row(0, {"Foto_date": "2024-01-01", "foto": None})
+
+        restored = pickle.loads(pickle.dumps(columns))
+        self.assertEqual(restored[0]["Foto_date"], "2024-01-01")
+        self.assertIsNone(restored[0]["foto"])
+        self.assertIsNone(restored[1]["Foto_date"])
+        self.assertEqual(list(restored), list(columns))
+
+    def test_concat_fills_missing_columns_with_none(self):
+        merged = MrkPointColumns.concat(
+            [
+                MrkPointColumns.from_points([{"foto": 1, "folder_level1": "a"}]),
+                MrkPointColumns.from_points([{"foto": 2, "folder_level2": "b"}]),
+            ]
+        )
+        self.assertEqual(
+            list(merged),
+            [
+                {"foto": 1, "folder_level1": "a", "folder_level2": None},
+                {"foto": 2, "folder_level1": None, "folder_level2": "b"},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
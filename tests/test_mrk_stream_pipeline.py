@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from pipeline_fakes import ExecutionContext, FakeStep, run_pipeline
+from qgis_stubs import load_modules
+from test_mrk_streaming import write_mrk
+
+parse_step_module, points_step_module = load_modules(
+    "core/engine_tasks/MrkParseStep.py", "core/engine_tasks/MrkPointsLayerStep.py"
+)
+MrkParseStep = parse_step_module.MrkParseStep
+MrkPointsLayerStep = points_step_module.MrkPointsLayerStep
+
+
+class MrkStreamPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        base = self.folder.name
+        write_mrk(os.path.join(base, "voo1"), "DJI_202401011200_001_A_Timestamp.MRK", 7)
+        write_mrk(os.path.join(base, "voo2"), "DJI_202401011300_002_B_Timestamp.MRK", 5)
+
+    def _context(self):
+        return ExecutionContext(
+            {
+                "paths": [self.folder.name],
+                "recursive": True,
+                "extra_fields": None,
+                "points_layer_name": "pontos",
+                "tool_key": "tests",
+            },
+            slots=MrkParseStep.CONTEXT_SLOTS,
+        )
+
+    def _run_with_report(self, result_keys):
+        """Pipeline do plugin: pontos em stream e um step final que não lê `points`."""
+        context = self._context()
+        context.SPILL_MIN_BYTES = 0
+        seen = {}
+
+        def finished(ctx):
+            ctx.flush_spills(5)
+            seen["spilled"] = ctx.is_spilled("points")
+            seen["points"] = ctx.get("points")
+
+        report = FakeStep(
+            "ReportGenerationStep",
+            reads=["layer", "photo_metadata_json_path"],
+            writes=["report_payload"],
+        )
+        _, _, outcome = run_pipeline(
+            [MrkParseStep(stream_batch_size=3), MrkPointsLayerStep(), report],
+            context=context,
+            mode="graph",
+            on_finished=finished,
+            result_keys=result_keys,
+        )
+        self.assertTrue(outcome["completed"])
+        return seen
+
+    @staticmethod
+    def _features(layer):
+        return [(f.geometry(), f.attributes()) for f in layer.getFeatures()]
+
+    def test_stream_matches_list_mode_and_builds_layer_on_main_thread(self):
+        _, list_context, list_outcome = run_pipeline(
+            [MrkParseStep()], context=self._context()
+        )
+        _, stream_context, stream_outcome = run_pipeline(
+            [MrkParseStep(stream_batch_size=3), MrkPointsLayerStep()],
+            context=self._context(),
+            mode="graph",
+        )
+        self.assertIn("finished", list_outcome)
+        self.assertIn("finished", stream_outcome)
+
+        points = stream_context.get("points")
+        self.assertEqual(len(points), 12)
+        self.assertEqual(points, list_context.get("points"))
+        self.assertEqual(stream_context.get("mrk_points_total"), 12)
+
+        layer = stream_context.get("layer")
+        self.assertIs(layer.created_in, threading.main_thread())
+        self.assertEqual(layer.name(), "pontos")
+        self.assertEqual(
+            layer.fields().names(), list_context.get("layer").fields().names()
+        )
+        self.assertEqual(
+            self._features(layer), self._features(list_context.get("layer"))
+        )
+
+    def test_points_are_registered_by_the_caller(self):
+        self.assertTrue(self._context().slot("points").spillable)
+        self.assertIsNone(ExecutionContext().slot("points"))
+
+    def test_points_unread_by_callbacks_are_spilled(self):
+        seen = self._run_with_report(["layer"])
+        self.assertTrue(seen["spilled"])
+        self.assertEqual(len(seen["points"]), 12)
+
+    def test_points_read_by_callbacks_stay_in_memory(self):
+        seen = self._run_with_report(["layer", "points"])
+        self.assertFalse(seen["spilled"])
+        self.assertEqual(len(seen["points"]), 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from qgis_stubs import load_modules
+
+channel_module, task_module = load_modules(
+    "core/engine_tasks/StreamChannel.py", "core/task/MrkParseTask.py"
+)
+StreamChannel = channel_module.StreamChannel
+StreamClosedError = channel_module.StreamClosedError
+MrkParseTask = task_module.MrkParseTask
+
+MRK_LINE = (
+    "{n}\t416519.{n:06d}\t[2241]\t  -23,N\t  14,E\t  161,V\t"
+    "-22.{n:08d},Lat\t-47.{n:08d},Lon\t812.345,Ellh\t0.01, 0.01, 0.02\t50,Q\n"
+)
+
+
+def write_mrk(folder, name, count):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, name), "w", encoding="utf-8") as fh:
+        for n in range(1, count + 1):
+            fh.write(MRK_LINE.format(n=n))
+
+
+class StreamChannelTest(unittest.TestCase):
+    def test_failure_is_raised_after_queued_batches(self):
+        channel = StreamChannel("points", capacity=0)
+        channel.put([1, 2])
+        channel.put([3])
+        channel.fail(ValueError("MRK corrompido"))
+
+        self.assertEqual(channel.get(), [1, 2])
+        self.assertEqual(channel.get(), [3])
+        with self.assertRaises(StreamClosedError):
+            channel.get()
+
+    def test_close_delivers_everything_then_none(self):
+        channel = StreamChannel("points", capacity=2)
+        received = []
+
+        def consume():
+            received.extend(channel.batches())
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for n in range(20):
+            channel.put([n])
+        channel.close()
+        consumer.join(5)
+
+        self.assertEqual(received, [[n] for n in range(20)])
+
+    def test_cancel_interrupts_consumer(self):
+        channel = StreamChannel("points")
+        channel.put([1])
+        channel.cancel()
+        with self.assertRaises(StreamClosedError):
+            channel.get()
+
+
+class MrkStreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        base = self.folder.name
+        # Profundidades diferentes: folder_level* dependem da pasta toda
+        write_mrk(os.path.join(base, "voo1"), "DJI_202401011200_001_A_Timestamp.MRK", 7)
+        write_mrk(
+            os.path.join(base, "voo2", "bloco", "parte"),
+            "DJI_202401011300_002_B_Timestamp.MRK",
+            5,
+        )
+        write_mrk(os.path.join(base, "voo2"), "DJI_202401011400_003_C_Timestamp.MRK", 3)
+
+    def _batch_points(self):
+        task = MrkParseTask([self.folder.name], True, None, "tests", use_cache=False)
+        self.assertTrue(task._run())
+        return task.result
+
+    def _streamed_points(self, batch_size):
+        channel = StreamChannel("points", capacity=0)
+        task = MrkParseTask(
+            [self.folder.name],
+            True,
+            None,
+            "tests",
+            stream=channel,
+            batch_size=batch_size,
+            use_cache=False,
+        )
+        self.assertTrue(task._run())
+        channel.close()
+        batches = list(channel.batches())
+        self.assertTrue(all(len(batch) <= batch_size for batch in batches))
+        return task.result, [point for batch in batches for point in batch]
+
+    def test_streaming_matches_batch_output(self):
+        expected = self._batch_points()
+        self.assertEqual(len(expected["points"]), 15)
+        self.assertTrue(any("folder_level3" in p for p in expected["points"]))
+
+        for batch_size in (1, 4, 500):
+            result, streamed = self._streamed_points(batch_size)
+            self.assertEqual(streamed, expected["points"])
+            self.assertEqual(result["points"], [])
+            self.assertEqual(result["points_total"], expected["points_total"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from qgis_stubs import load_modules
+
+tokenizer_module, parser_module, fields_module = load_modules(
+    "core/model/MrkTokenizer.py",
+    "utils/mrk/MrkParser.py",
+    "utils/mrk/MetadataFields.py",
+)
+MrkTokenizer = tokenizer_module.MrkTokenizer
+MrkParser = parser_module.MrkParser
+MetadataFields = fields_module.MetadataFields
+
+MRK_LINE = (
+    "{n}\t416519.123456\t[{week}]\t  -23,N\t  14,E\t  161,V\t"
+    "-22.12345678,Lat\t-47.12345678,Lon\t812.345,Ellh\t0.01, 0.01, 0.02\t{flag},Q\n"
+)
+NEW_COLUMNS = {
+    "gps_sow": 416519.123456,
+    "gps_week": 2241,
+    "offset_n": -23.0,
+    "offset_e": 14.0,
+    "offset_v": 161.0,
+    "std_n": 0.01,
+    "std_e": 0.01,
+    "std_v": 0.02,
+    "fix_flag": 50,
+}
+
+
+class MrkTokenizerTest(unittest.TestCase):
+    def test_fixed_layout_reads_all_columns(self):
+        values = MrkTokenizer.parse_line(MRK_LINE.format(n=7, week=2241, flag=50))
+        row = dict(zip((name for name, _ in MrkTokenizer.COLUMNS), values))
+        self.assertEqual(row["foto"], 7)
+        self.assertEqual((row["lat"], row["lon"], row["alt"]), (-22.12345678, -47.12345678, 812.345))
+        self.assertEqual({k: row[k] for k in NEW_COLUMNS}, NEW_COLUMNS)
+
+    def test_negative_one_is_a_value_not_missing(self):
+        line = MRK_LINE.format(n=-1, week=-1, flag=-1)
+        row = MrkTokenizer.row_with_missing(next(MrkTokenizer.iter_rows([line])))
+        self.assertEqual((row[0], row[5], row[12]), (-1, -1, -1))
+
+        columns = MrkTokenizer.tokenize([line])
+        for name in ("foto", "gps_week", "fix_flag"):
+            self.assertEqual(list(MrkTokenizer.with_missing("q", columns[name])), [-1])
+
+    def test_fallback_line_leaves_new_columns_missing(self):
+        line = "5 xx -22.5,Lat -47.5,Lon 800,Ellh\n"
+        row = MrkTokenizer.row_with_missing(next(MrkTokenizer.iter_rows([line])))
+        self.assertEqual(row[:4], (5, -22.5, -47.5, 800.0))
+        self.assertEqual(set(row[4:]), {None})
+
+        columns = MrkTokenizer.tokenize([line])
+        self.assertEqual(list(MrkTokenizer.with_missing("q", columns["fix_flag"])), [None])
+        self.assertEqual(list(MrkTokenizer.with_missing("d", columns["std_v"])), [None])
+
+
+class MrkOutputColumnsTest(unittest.TestCase):
+    """Fixa as colunas que os pontos do MRK passaram a ter (atributos/relatórios)."""
+
+    def test_points_carry_the_rtk_columns(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "DJI_202401011200_001_Voo_Timestamp.MRK")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(MRK_LINE.format(n=1, week=2241, flag=50))
+            points = MrkParser.parse_file(path)
+
+        self.assertEqual(len(points), 1)
+        point = points[0]
+        self.assertEqual({k: point[k] for k in NEW_COLUMNS}, NEW_COLUMNS)
+        self.assertLessEqual(
+            {"foto", "lat", "lon", "alt", "mrk_file", "flight_number"}, set(point)
+        )
+
+    def test_rtk_columns_resolve_to_catalogue_attributes(self):
+        expected = {
+            "gps_sow": "GpsSow",
+            "gps_week": "GpsWeek",
+            "offset_n": "OffsetN",
+            "offset_e": "OffsetE",
+            "offset_v": "OffsetV",
+            "std_n": "StdN",
+            "std_e": "StdE",
+            "std_v": "StdV",
+            "fix_flag": "FixFlag",
+        }
+        for key, attribute in expected.items():
+            self.assertEqual(MetadataFields.resolve_output_name(key), attribute)
+        # Antes do catálogo das colunas RTK estes nomes não eram reconhecidos
+        self.assertEqual(MetadataFields.sanitize_field_name("FIXFLAG"), "FixFlag")
+        self.assertEqual(MetadataFields.sanitize_field_name("GpsWeek"), "GpsWeek")
+
+
+if __name__ == "__main__":
+    unittest.main()
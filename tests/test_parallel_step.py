@@ -0,0 +1,152 @@
+import threading
+import time
+import unittest
+
+from pipeline_fakes import FakeStep, run_pipeline
+from qgis_stubs import load_modules
+
+(parallel_module,) = load_modules("core/engine_tasks/ParallelStep.py")
+ParallelStep = parallel_module.ParallelStep
+
+
+class CapturingParallelStep(ParallelStep):
+    """Guarda o progresso publicado pelo grupo."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.progress = []
+
+    def create_task(self, context):
+        task = super().create_task(context)
+        task.progressChanged.connect(self.progress.append)
+        return task
+
+
+class Flaky:
+    """Falha nas primeiras `failures` chamadas."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, context):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call <= self.failures:
+            raise RuntimeError(f"falha {call}")
+        return {"flaky": call}
+
+
+class ParallelStepTest(unittest.TestCase):
+    def test_concurrency_limit_is_respected(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def work(context):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return {}
+
+        group = ParallelStep(
+            [FakeStep(f"s{n}", work, [], []) for n in range(6)], max_concurrency=2
+        )
+        _, context, outcome = run_pipeline([group], max_workers=6)
+
+        self.assertIn("finished", outcome)
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(len(context.get("parallel_result")), 6)
+
+    def test_progress_is_weighted_by_work_size(self):
+        light_done = threading.Event()
+        heavy = FakeStep("heavy", lambda ctx: light_done.wait(5) and {}, [], [])
+        heavy.work_size = lambda context: 3.0
+        light = FakeStep("light", lambda ctx: {}, [], [])
+        light_success = light.on_success
+        light.on_success = lambda ctx, result: (light_success(ctx, result), light_done.set())
+
+        group = CapturingParallelStep([heavy, light])
+        _, _, outcome = run_pipeline([group])
+
+        self.assertIn("finished", outcome)
+        # light (peso 1 de 4) terminou primeiro: 25%, não 50%
+        self.assertEqual(group.progress, [25.0, 100.0])
+
+    def test_fail_fast_stops_remaining_steps(self):
+        log = []
+        failure = ValueError("quebrou")
+
+        def broken(context):
+            raise failure
+
+        steps = [
+            FakeStep("ok", lambda ctx: {"a": 1}, [], [], log),
+            FakeStep("broken", broken, [], [], log),
+            FakeStep("never", lambda ctx: {"b": 1}, [], [], log),
+        ]
+        group = ParallelStep(steps, max_concurrency=1)
+        _, context, outcome = run_pipeline([group])
+
+        self.assertEqual(outcome["error"][0], failure)
+        self.assertNotIn(("start", "never"), log)
+        self.assertEqual(steps[1].errors, [failure])
+
+    def test_collect_keeps_going_and_records_errors(self):
+        def broken(context):
+            raise ValueError("quebrou")
+
+        steps = [
+            FakeStep("a", lambda ctx: {"a": 1}, [], []),
+            FakeStep("broken", broken, [], []),
+            FakeStep("b", lambda ctx: {"b": 2}, [], []),
+        ]
+        group = ParallelStep(steps, error_policy=ParallelStep.ERROR_COLLECT)
+        _, context, outcome = run_pipeline([group])
+
+        self.assertIn("finished", outcome)
+        self.assertEqual((context.get("a"), context.get("b")), (1, 2))
+        self.assertEqual(sorted(context.get("parallel_result")), ["a", "b"])
+        errors = context.get("parallel_errors")
+        self.assertEqual([e["step"] for e in errors], ["broken"])
+        self.assertEqual(errors[0]["attempts"], 1)
+
+    def test_retry_succeeds_within_max_retries(self):
+        flaky = Flaky(failures=2)
+        group = ParallelStep(
+            [FakeStep("flaky", flaky, [], [])],
+            error_policy=ParallelStep.ERROR_RETRY,
+            max_retries=2,
+        )
+        _, context, outcome = run_pipeline([group])
+
+        self.assertIn("finished", outcome)
+        self.assertEqual(flaky.calls, 3)
+        self.assertEqual(context.get("flaky"), 3)
+
+    def test_retry_gives_up_after_max_retries(self):
+        flaky = Flaky(failures=5)
+        step = FakeStep("flaky", flaky, [], [])
+        group = ParallelStep([step], error_policy=ParallelStep.ERROR_RETRY, max_retries=2)
+        _, _, outcome = run_pipeline([group])
+
+        self.assertIn("error", outcome)
+        self.assertEqual(flaky.calls, 3)
+        self.assertEqual(len(step.errors), 1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ParallelStep([], max_concurrency=0)
+        with self.assertRaises(ValueError):
+            ParallelStep([], error_policy="ignore")
+        with self.assertRaises(TypeError):
+            ParallelStep(FakeStep("x"))
+
+
+if __name__ == "__main__":
+    unittest.main()
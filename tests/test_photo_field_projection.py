@@ -0,0 +1,132 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from qgis_stubs import load_modules
+
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+if HAS_PIL:
+    from PIL import ExifTags, Image, TiffImagePlugin
+
+    photo_module, fields_module, xmp_module, exif_module, custom_module = load_modules(
+        "utils/mrk/PhotoMetadata.py",
+        "utils/mrk/MetadataFields.py",
+        "utils/mrk/XmpUtil.py",
+        "utils/mrk/ExifUtil.py",
+        "utils/mrk/CustomPhotosFieldsUtil.py",
+    )
+    PhotoMetadata = photo_module.PhotoMetadata
+    MetadataFields = fields_module.MetadataFields
+    XmpUtil = xmp_module.XmpUtil
+    ExifUtil = exif_module.ExifUtil
+    CustomPhotosFieldsUtil = custom_module.CustomPhotosFieldsUtil
+
+XMP = (
+    b'<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+    b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    b'<rdf:Description xmlns:drone-dji="http://www.dji.com/drone-dji/1.0/"'
+    b' drone-dji:RelativeAltitude="+120.50" drone-dji:AbsoluteAltitude="+812.30"'
+    b' drone-dji:GimbalYawDegree="-10.2" drone-dji:FlightXSpeed="1.5"/>'
+    b"</rdf:RDF></x:xmpmeta>"
+)
+
+
+def write_photo(path):
+    """JPEG com EXIF (IFD0, Exif, GPS) e XMP da DJI."""
+    rational = TiffImagePlugin.IFDRational
+    exif = Image.Exif()
+    exif[ExifTags.Base.Model] = "FC6310"
+    exif[ExifTags.Base.Software] = "v01.00"
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    exif_ifd[ExifTags.Base.FNumber] = rational(28, 10)
+    exif_ifd[ExifTags.Base.ISOSpeedRatings] = 100
+    exif_ifd[ExifTags.Base.FocalLength] = rational(88, 10)
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    gps[ExifTags.GPS.GPSLatitudeRef] = "S"
+    gps[ExifTags.GPS.GPSLatitude] = (rational(22), rational(30), rational(105, 10))
+    gps[ExifTags.GPS.GPSMapDatum] = "WGS-84"
+    Image.new("RGB", (16, 8)).save(path, exif=exif, xmp=XMP)
+
+
+@unittest.skipUnless(HAS_PIL, "Pillow não instalado")
+class FieldProjectionTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.photo = os.path.join(folder.name, "DJI_20240101120000_0001_V.JPG")
+        write_photo(self.photo)
+
+    def _keys(self, fields):
+        return MetadataFields.normalize_record_to_keys(fields)
+
+    def assertProjectionMatches(self, selected):
+        fields = PhotoMetadata.projected_fields(selected)
+        full = self._keys(PhotoMetadata.read_photo_fields(self.photo))
+        projected = self._keys(PhotoMetadata.read_photo_fields(self.photo, fields=fields))
+        for key in fields:
+            self.assertEqual(projected.get(key), full.get(key), key)
+        return full, projected
+
+    def test_projected_values_match_full_read(self):
+        full, projected = self.assertProjectionMatches({"Model", "RelativeAltitude", "GpsLatitude"})
+        self.assertEqual(projected["RelativeAltitude"], "+120.50")
+        self.assertEqual(projected["GpsLatitude"], full["GpsLatitude"])
+        # Fora da projeção: nem EXIF nem XMP são decodificados
+        for key in ("FNumber", "ISOSpeedRatings", "GPSMapDatum", "GimbalYawDegree", "FlightXSpeed"):
+            self.assertIn(key, full)
+            self.assertNotIn(key, projected)
+
+    def test_every_single_field_matches(self):
+        full = self._keys(PhotoMetadata.read_photo_fields(self.photo))
+        for key in full:
+            if key in MetadataFields.all_fields():
+                self.assertProjectionMatches({key})
+
+    def test_without_selection_reads_everything(self):
+        self.assertIsNone(PhotoMetadata.projected_fields(set()))
+        self.assertEqual(
+            PhotoMetadata.read_photo_fields(self.photo, fields=None),
+            PhotoMetadata.read_photo_fields(self.photo),
+        )
+
+    def test_projection_adds_date_and_custom_inputs(self):
+        fields = PhotoMetadata.projected_fields({"Model"})
+        self.assertEqual(fields, {"Model", "DateTimeOriginal"})
+
+        custom_key = MetadataFields.custom_keys()[0]
+        fields = PhotoMetadata.projected_fields({custom_key})
+        self.assertTrue(set(CustomPhotosFieldsUtil.INPUT_KEYS) <= fields)
+
+    def test_xmp_is_skipped_when_no_key_comes_from_it(self):
+        self.assertNotIn("FNumber", XmpUtil.provided_keys())
+        with mock.patch.object(
+            XmpUtil, "_extract_xmp_text_raw", wraps=XmpUtil._extract_xmp_text_raw
+        ) as raw:
+            XmpUtil.extract_metadata(self.photo, fields={"FNumber"})
+            self.assertEqual(raw.call_count, 0)
+            data = XmpUtil.extract_metadata(self.photo, fields={"RelativeAltitude"})
+            self.assertEqual(raw.call_count, 1)
+        self.assertEqual(self._keys(data)["RelativeAltitude"], "+120.50")
+        self.assertNotIn("GimbalYawDegree", self._keys(data))
+
+    def test_header_and_pil_paths_project_alike(self):
+        fields = PhotoMetadata.projected_fields({"Model", "FNumber", "GpsLatitude"})
+        header = ExifUtil.read_header(self.photo)
+        self.assertIsNotNone(header)
+        self.assertEqual(
+            ExifUtil.extract_metadata_exif(self.photo, header=header, fields=fields),
+            ExifUtil.extract_metadata_exif(self.photo, fields=fields),
+        )
+
+    def test_source_key_resolves_raw_names(self):
+        self.assertEqual(MetadataFields.source_key("drone-dji:RelativeAltitude"), "RelativeAltitude")
+        self.assertEqual(MetadataFields.source_key("GPSLatitude"), "GpsLatitude")
+        self.assertEqual(MetadataFields.source_key("ISOSpeedRatings"), "ISOSpeedRatings")
+        self.assertIsNone(MetadataFields.source_key("Make"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from fractions import Fraction
+
+from qgis_stubs import load_modules
+
+(cache_module,) = load_modules("utils/mrk/PhotoMetadataCache.py")
+PhotoMetadataCache = cache_module.PhotoMetadataCache
+
+FIELDS = {"DateTimeOriginal": "2024:05:01 09:00:00", "AbsoluteAltitude": 812.3}
+
+
+class PhotoMetadataCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache = self._cache()
+
+    def _cache(self, **kwargs):
+        return PhotoMetadataCache(
+            db_path=os.path.join(self.folder.name, "db", "cache.sqlite"), **kwargs
+        )
+
+    def _photo(self, name, content=b"jpeg"):
+        path = os.path.join(self.folder.name, name)
+        with open(path, "wb") as fh:
+            fh.write(content)
+        return path
+
+    def test_hit_returns_stored_fields(self):
+        path = self._photo("DJI_0001.JPG")
+        self.assertEqual(self.cache.store_many([(path, FIELDS)]), 1)
+        self.assertEqual(self._cache().lookup(path), FIELDS)
+
+    def test_miss_for_unknown_photo(self):
+        path = self._photo("DJI_0002.JPG")
+        self.assertIsNone(self.cache.lookup(path))
+
+    def test_projection_only_serves_contained_fields(self):
+        path = self._photo("DJI_0003.JPG")
+        self.cache.store(path, FIELDS, fields=["AbsoluteAltitude", "DateTimeOriginal"])
+        self.assertEqual(self.cache.lookup(path, ["AbsoluteAltitude"]), FIELDS)
+        self.assertIsNone(self.cache.lookup(path, ["GpsLatitude"]))
+        self.assertIsNone(self.cache.lookup(path))
+
+    def test_mtime_change_invalidates(self):
+        path = self._photo("DJI_0004.JPG")
+        self.cache.store(path, FIELDS)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertIsNone(self.cache.lookup(path))
+
+    def test_size_change_invalidates(self):
+        path = self._photo("DJI_0005.JPG")
+        self.cache.store(path, FIELDS)
+        stat = os.stat(path)
+        with open(path, "ab") as fh:
+            fh.write(b"more")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIsNone(self.cache.lookup(path))
+
+    def test_changed_during_read_is_not_stored(self):
+        path = self._photo("DJI_0006.JPG")
+        before = PhotoMetadataCache.identity(path)
+        with open(path, "ab") as fh:
+            fh.write(b"more")
+        self.assertEqual(self.cache.store_many([(path, FIELDS, before)]), 0)
+
+    def test_eviction_by_entries_keeps_most_recently_used(self):
+        cache = self._cache(max_entries=2)
+        paths = [self._photo(f"DJI_{n:04d}.JPG") for n in range(3)]
+        cache.store(paths[0], FIELDS)
+        cache.store(paths[1], FIELDS)
+        self.assertIsNotNone(cache.lookup(paths[0]))
+        cache.store(paths[2], FIELDS)
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.lookup(paths[1]))
+        self.assertIsNotNone(cache.lookup(paths[0]))
+        self.assertIsNotNone(cache.lookup(paths[2]))
+
+    def test_eviction_by_bytes(self):
+        entry = len(PhotoMetadataCache.encode_payload(FIELDS).encode("utf-8"))
+        cache = self._cache(max_bytes=entry * 2)
+        for n in range(5):
+            cache.store(self._photo(f"DJI_{n:04d}.JPG"), FIELDS)
+        self.assertEqual(cache.stats(), {"entries": 2, "bytes": entry * 2})
+
+    def test_deferred_eviction_removes_oldest_once(self):
+        cache = self._cache(max_entries=2)
+        paths = [self._photo(f"DJI_{n:04d}.JPG") for n in range(5)]
+        for path in paths:
+            cache.store_many([(path, FIELDS)], evict=False)
+        self.assertEqual(cache.stats()["entries"], 5)
+
+        self.assertEqual(cache.evict(), 3)
+        self.assertEqual(cache.evict(), 0)
+        self.assertEqual(
+            [cache.lookup(path) is not None for path in paths],
+            [False, False, False, True, True],
+        )
+
+    def test_eviction_reads_oldest_through_used_at_index(self):
+        self.cache.store(self._photo("DJI_0001.JPG"), FIELDS)
+        connection = sqlite3.connect(self.cache.db_path)
+        try:
+            plan = connection.execute(
+                "EXPLAIN QUERY PLAN SELECT path, bytes FROM photos ORDER BY used_at ASC"
+            ).fetchall()
+        finally:
+            connection.close()
+        self.assertIn("photos_used_at", " ".join(str(row[-1]) for row in plan))
+
+    def test_payload_round_trip_preserves_types(self):
+        fields = {
+            "Make": "DJI",
+            "ExposureTime": Fraction(1, 2000),
+            "GPSLatitude": (Fraction(22, 1), Fraction(7, 1), Fraction(1234, 100)),
+            "MakerNote": b"\x00\xffraw",
+            "Tags": {34853: {1: "S"}, "__tuple__": 1},
+            "Empty": None,
+        }
+        decoded = PhotoMetadataCache.decode_payload(
+            PhotoMetadataCache.encode_payload(fields)
+        )
+        self.assertEqual(decoded, fields)
+        self.assertIsInstance(decoded["GPSLatitude"], tuple)
+        self.assertIsInstance(decoded["MakerNote"], bytes)
+
+    def test_unsupported_value_is_not_stored(self):
+        path = self._photo("DJI_0007.JPG")
+        self.assertEqual(self.cache.store_many([(path, {"Bad": object()})]), 0)
+        self.assertIsNone(self.cache.lookup(path))
+
+    def test_payload_is_plain_json(self):
+        path = self._photo("DJI_0008.JPG")
+        self.cache.store(path, FIELDS)
+        ((payload,),) = self.cache._query_all("SELECT payload FROM photos", ())
+        self.assertIsInstance(payload, str)
+        self.assertIn('"AbsoluteAltitude":812.3', payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import importlib.util
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import types
+import unittest
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _package(name, path):
+    module = sys.modules.get(name)
+    if module is None:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return module
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_package("Cadmus", ROOT)
+_package("Cadmus.core", ROOT / "core")
+_package("Cadmus.core.model", ROOT / "core" / "model")
+
+PhotoMetadataDump = _load(
+    "Cadmus.core.model.PhotoMetadataDump", "core/model/PhotoMetadataDump.py"
+).PhotoMetadataDump
+
+GROUPS = {
+    "C:/voo/m1": {
+        "DJI_0001_V.JPG": {"DateTimeOriginal": "2024:05:01 09:00:00", "Nota": "ç\nã\u2028"},
+        "DJI_0002_V.JPG": {"AbsoluteAltitude": 812.5, "LRFTargetDistance": None},
+    },
+    "C:/voo/m2": {"DJI_0003_V.JPG": {"RtkFlag": "50"}},
+}
+
+
+class PhotoMetadataDumpTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def _write(self, name):
+        path = os.path.join(self.folder.name, name)
+        with PhotoMetadataDump(path, base_folder="C:/voo", points_total=3) as dump:
+            for folder, records in GROUPS.items():
+                dump.write_group(folder, records, points=len(records))
+        return path, dump
+
+    def _expected(self):
+        return [
+            (record, folder, file_key)
+            for folder, records in GROUPS.items()
+            for file_key, record in records.items()
+        ]
+
+    def test_group_from_generator_is_written_record_by_record(self):
+        path = os.path.join(self.folder.name, "dump.jsonl")
+        records = GROUPS["C:/voo/m1"]
+        written_before = []
+
+        with PhotoMetadataDump(path) as dump:
+            def produce():
+                for file_key, record in records.items():
+                    written_before.append(dump.records)
+                    yield file_key, record
+
+            dump.write_group("C:/voo/m1", produce())
+
+        self.assertEqual(written_before, [0, 1])
+        self.assertEqual((dump.groups, dump.records), (1, 2))
+        self.assertEqual(
+            list(PhotoMetadataDump.records(path)),
+            [(record, "C:/voo/m1", file_key) for file_key, record in records.items()],
+        )
+
+    def test_round_trip_plain_and_gzip(self):
+        for name in ("dump.jsonl", "dump.jsonl.gz"):
+            path, dump = self._write(name)
+            self.assertEqual(dump.compress, name.endswith(".gz"))
+            self.assertTrue(PhotoMetadataDump.is_dump(path))
+            self.assertEqual(list(PhotoMetadataDump.records(path)), self._expected())
+
+            entries = list(PhotoMetadataDump.entries(path))
+            self.assertEqual(entries[0]["base_folder"], "C:/voo")
+            self.assertEqual(entries[1], {"type": "group", "folder": "C:/voo/m1", "points": 2})
+            self.assertEqual(entries[-1], {"type": "end", "groups": 2, "records": 3})
+
+    def test_legacy_json_is_not_dump(self):
+        path = os.path.join(self.folder.name, "legado.json")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write('{\n  "groups": {}\n}\n')
+        self.assertFalse(PhotoMetadataDump.is_dump(path))
+        with self.assertRaises(ValueError):
+            list(PhotoMetadataDump.entries(path))
+
+    def test_incomplete_dump_raises_after_records(self):
+        path, _ = self._write("dump.jsonl")
+        with open(path, "r", encoding="utf-8", newline="\n") as fh:
+            lines = fh.readlines()
+        with open(path, "w", encoding="utf-8", newline="\n") as fh:
+            fh.writelines(lines[:-1])
+
+        read = []
+        with self.assertRaises(ValueError):
+            for entry in PhotoMetadataDump.records(path):
+                read.append(entry)
+        self.assertEqual(read, self._expected())
+
+    def test_abort_removes_file(self):
+        path = os.path.join(self.folder.name, "dump.jsonl")
+        with self.assertRaises(RuntimeError):
+            with PhotoMetadataDump(path) as dump:
+                dump.write_group("C:/voo/m1", GROUPS["C:/voo/m1"])
+                raise RuntimeError("cancelado")
+        self.assertFalse(os.path.exists(path))
+
+    def test_follow_reads_while_writing(self):
+        path = os.path.join(self.folder.name, "dump.jsonl")
+        dump = PhotoMetadataDump(path).open()
+        first_group = threading.Event()
+
+        def writer():
+            folders = list(GROUPS)
+            dump.write_group(folders[0], GROUPS[folders[0]])
+            first_group.wait(5)
+            dump.write_group(folders[1], GROUPS[folders[1]])
+            dump.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        read = []
+        for entry in PhotoMetadataDump.records(path, follow=True, timeout=5):
+            read.append(entry)
+            if len(read) == 2:
+                # Ainda sem o segundo grupo: o leitor espera o gravador
+                first_group.set()
+        thread.join()
+        self.assertEqual(read, self._expected())
+
+    def test_follow_timeout(self):
+        path = os.path.join(self.folder.name, "dump.jsonl")
+        dump = PhotoMetadataDump(path).open()
+        self.addCleanup(dump.abort)
+        with self.assertRaises(TimeoutError):
+            list(PhotoMetadataDump.records(path, follow=True, timeout=0.3))
+
+
+if __name__ == "__main__":
+    unittest.main()
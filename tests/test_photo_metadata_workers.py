@@ -0,0 +1,158 @@
+import importlib.util
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from qgis_stubs import load_modules
+
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+if HAS_PIL:
+    photo_module, token_module = load_modules(
+        "utils/mrk/PhotoMetadata.py", "core/engine_tasks/CancellationToken.py"
+    )
+    PhotoMetadata = photo_module.PhotoMetadata
+    CancellationToken = token_module.CancellationToken
+    OperationCancelled = token_module.OperationCancelled
+
+
+def photo_name(n):
+    return f"DJI_20240101120000_{n:04d}_V.JPG"
+
+
+class FakeReader:
+    """`read_photo_fields` com latência aleatória; conta leituras simultâneas."""
+
+    def __init__(self, seed=0):
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.threads = set()
+
+    def __call__(self, image_path, tool_key=None, fields=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.threads.add(threading.current_thread().name)
+            delay = self._random.uniform(0, 0.004)
+        time.sleep(delay)
+        with self._lock:
+            self.active -= 1
+        n = int(os.path.basename(image_path).split("_")[2])
+        return {
+            "DateTimeOriginal": f"2024:01:01 12:{n // 60:02d}:{n % 60:02d}",
+            "ImageWidth": 4000 + n,
+        }
+
+
+@unittest.skipUnless(HAS_PIL, "Pillow não instalado")
+class PhotoMetadataWorkersTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        for n in range(1, 41):
+            open(os.path.join(self.folder, photo_name(n)), "wb").close()
+        # Não é foto DJI: ignorada nos dois modos
+        open(os.path.join(self.folder, "capa.jpg"), "wb").close()
+
+    def _index(self, workers, reader=None):
+        reader = reader or FakeReader(seed=workers)
+        with mock.patch.object(PhotoMetadata, "read_photo_fields", staticmethod(reader)):
+            indexed, dump = PhotoMetadata._index_photos_complete(
+                self.folder, recursive=False, workers=workers
+            )
+        return indexed, dump
+
+    def test_parallel_matches_sequential_in_order(self):
+        serial_indexed, serial_dump = self._index(workers=1)
+        reader = FakeReader(seed=7)
+        parallel_indexed, parallel_dump = self._index(workers=4, reader=reader)
+
+        self.assertEqual(len(serial_indexed), 40)
+        self.assertEqual(list(parallel_indexed.items()), list(serial_indexed.items()))
+        self.assertEqual(list(parallel_dump.items()), list(serial_dump.items()))
+        self.assertGreater(reader.max_active, 1)
+        self.assertLessEqual(reader.max_active, 4)
+
+    def test_dump_records_match_normalized_group(self):
+        _, raw_by_file = self._index(workers=1)
+        MetadataFields = photo_module.MetadataFields
+        mrk_keys = [k.value for k in MetadataFields.MRK_FIELDS.keys()]
+        mrk_by_seq = {"0002": {key: f"mrk-{key}" for key in mrk_keys}}
+
+        allowed_keys = PhotoMetadata._dump_allowed_keys()
+        expected = {}
+        for fname, payload in MetadataFields.normalize_records_by_file(raw_by_file).items():
+            record = {key: payload.get(key) for key in allowed_keys}
+            if "_0002_" in fname:
+                record.update(mrk_by_seq["0002"])
+            expected[fname] = record
+
+        records = PhotoMetadata._iter_dump_records(raw_by_file, mrk_by_seq)
+        self.assertNotIsInstance(records, (list, dict))
+        self.assertEqual(list(records), list(expected.items()))
+
+    def test_single_worker_reads_on_calling_thread(self):
+        reader = FakeReader()
+        self._index(workers=1, reader=reader)
+        self.assertEqual(reader.threads, {threading.current_thread().name})
+
+    def test_map_ordered_keeps_bounded_window(self):
+        submitted = []
+        consumed = []
+        lock = threading.Lock()
+
+        def work(item):
+            with lock:
+                submitted.append(item)
+            time.sleep(0.001)
+            return item * 2
+
+        items = list(range(100))
+        workers = 2
+        window = workers * PhotoMetadata.WORKER_QUEUE_FACTOR
+        for result in PhotoMetadata._map_ordered(
+            work, items, CancellationToken(), workers
+        ):
+            with lock:
+                # Nunca há mais que `window` itens à frente do consumidor
+                self.assertLessEqual(len(submitted) - len(consumed), window + 1)
+            consumed.append(result)
+
+        self.assertEqual(consumed, [item * 2 for item in items])
+
+    def test_cancel_stops_and_drops_queued_photos(self):
+        reported = []
+        token = CancellationToken(
+            is_cancelled=lambda: len(reported) > 5,
+            on_progress=reported.append,
+        )
+        calls = []
+
+        def work(item):
+            calls.append(item)
+            time.sleep(0.002)
+            return item
+
+        results = []
+        with self.assertRaises(OperationCancelled):
+            for result in PhotoMetadata._map_ordered(work, list(range(200)), token, 2):
+                results.append(result)
+
+        self.assertEqual(results, list(range(len(results))))
+        self.assertLess(len(calls), 200)
+
+    def test_resolve_workers(self):
+        self.assertEqual(PhotoMetadata.resolve_workers(None), PhotoMetadata.DEFAULT_WORKERS)
+        self.assertEqual(PhotoMetadata.resolve_workers(0), 1)
+        self.assertEqual(PhotoMetadata.resolve_workers(3), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import threading
+import unittest
+
+from pipeline_fakes import AsyncPipelineEngine, ExecutionContext, FakeStep, run_pipeline
+
+GRAPH = AsyncPipelineEngine.MODE_GRAPH
+
+
+def dependencies(steps):
+    engine = AsyncPipelineEngine(steps, ExecutionContext(), mode=GRAPH, executor=object())
+    return engine._build_dependencies()
+
+
+def index_of(log, event):
+    return log.index(event)
+
+
+class GraphDependenciesTest(unittest.TestCase):
+    def test_ready_set_follows_reads_and_writes(self):
+        steps = [
+            FakeStep("mrk", reads=["paths"], writes=["points"]),
+            FakeStep("track", reads=["points"], writes=["track"]),
+            FakeStep("photos", reads=["points"], writes=["json"]),
+            FakeStep("report", reads=["track", "json"], writes=["report"]),
+        ]
+        self.assertEqual(dependencies(steps), [set(), {0}, {0}, {1, 2}])
+
+    def test_conflicting_writes_are_serialized(self):
+        steps = [
+            FakeStep("a", reads=[], writes=["layer"]),
+            FakeStep("b", reads=[], writes=["layer"]),
+            FakeStep("c", reads=[], writes=["other"]),
+        ]
+        self.assertEqual(dependencies(steps), [set(), {0}, set()])
+
+    def test_writer_waits_for_earlier_reader(self):
+        steps = [
+            FakeStep("reader", reads=["layer"], writes=["stats"]),
+            FakeStep("writer", reads=[], writes=["layer"]),
+        ]
+        self.assertEqual(dependencies(steps), [set(), {0}])
+
+    def test_undeclared_step_is_a_barrier(self):
+        steps = [
+            FakeStep("a", reads=[], writes=["x"]),
+            FakeStep("legacy"),
+            FakeStep("b", reads=[], writes=["y"]),
+        ]
+        self.assertEqual(dependencies(steps), [set(), {0}, {1}])
+
+
+class GraphExecutionTest(unittest.TestCase):
+    def test_independent_steps_run_concurrently(self):
+        log = []
+        # Se track/photos rodassem em série a barreira estouraria o timeout
+        barrier = threading.Barrier(2, timeout=5)
+
+        def branch(key):
+            def work(context):
+                barrier.wait()
+                return {key: len(context.get("points"))}
+
+            return work
+
+        steps = [
+            FakeStep("mrk", lambda ctx: {"points": [1, 2, 3]}, [], ["points"], log),
+            FakeStep("track", branch("track"), ["points"], ["track"], log),
+            FakeStep("photos", branch("json"), ["points"], ["json"], log),
+            FakeStep(
+                "report",
+                lambda ctx: {"report": ctx.get("track") + ctx.get("json")},
+                ["track", "json"],
+                ["report"],
+                log,
+            ),
+        ]
+        _, context, outcome = run_pipeline(steps, mode=GRAPH)
+
+        self.assertIn("finished", outcome)
+        self.assertEqual(context.get("report"), 6)
+        self.assertLess(index_of(log, ("end", "mrk")), index_of(log, ("start", "track")))
+        for branch_name in ("track", "photos"):
+            self.assertLess(
+                index_of(log, ("end", branch_name)), index_of(log, ("start", "report"))
+            )
+
+    def test_conflicting_writers_never_overlap(self):
+        log = []
+        active = []
+        overlap = []
+
+        def writer(value):
+            def work(context):
+                active.append(value)
+                overlap.append(len(active))
+                active.remove(value)
+                return {"layer": value}
+
+            return work
+
+        steps = [
+            FakeStep("a", writer("a"), [], ["layer"], log),
+            FakeStep("b", writer("b"), [], ["layer"], log),
+        ]
+        _, context, outcome = run_pipeline(steps, mode=GRAPH)
+
+        self.assertIn("finished", outcome)
+        self.assertEqual(overlap, [1, 1])
+        self.assertEqual(context.get("layer"), "b")
+        self.assertLess(index_of(log, ("end", "a")), index_of(log, ("start", "b")))
+
+    def test_failure_stops_dependents_and_reports_error(self):
+        log = []
+        failure = ValueError("MRK corrompido")
+
+        def broken(context):
+            raise failure
+
+        track = FakeStep("track", broken, ["points"], ["track"], log)
+        steps = [
+            FakeStep("mrk", lambda ctx: {"points": [1]}, [], ["points"], log),
+            track,
+            FakeStep("report", lambda ctx: {"report": 1}, ["track"], ["report"], log),
+        ]
+        _, context, outcome = run_pipeline(steps, mode=GRAPH)
+
+        self.assertNotIn("finished", outcome)
+        self.assertEqual(outcome["error"], [failure])
+        self.assertEqual(track.errors, [failure])
+        self.assertNotIn(("start", "report"), log)
+        self.assertFalse(context.has("report"))
+
+    def test_failure_cancels_running_siblings(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(context):
+            started.set()
+            release.wait(5)
+            return {"json": 1}
+
+        def broken(context):
+            started.wait(5)
+            raise RuntimeError("falhou")
+
+        photos = FakeStep("photos", slow, [], ["json"])
+        steps = [FakeStep("track", broken, [], ["track"]), photos]
+        context = ExecutionContext({"tool_key": "tests"})
+
+        def finish_slow(errors):
+            release.set()
+
+        engine, _, outcome = run_pipeline(steps, context, mode=GRAPH, on_error=finish_slow)
+
+        self.assertFalse(engine.is_running())
+        self.assertNotIn("finished", outcome)
+        self.assertFalse(context.has("json"))
+        self.assertEqual(len(context.get_errors()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
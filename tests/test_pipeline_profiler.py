@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import time
+import types
+import unittest
+
+from pipeline_fakes import FakeStep, run_pipeline
+from qgis_stubs import load_modules
+
+(profiler_module,) = load_modules("core/engine_tasks/PipelineProfiler.py")
+PipelineProfiler = profiler_module.PipelineProfiler
+
+
+def fake_task(started_at, finished_at, cpu_s=0.01, items=None):
+    return types.SimpleNamespace(
+        metrics={
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "cpu_s": cpu_s,
+            "peak_mem_bytes": 2048,
+            "thread_id": 7,
+        },
+        items_processed=items,
+    )
+
+
+class PipelineProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.profiler = PipelineProfiler("tests")
+        self.profiler.start()
+
+    def test_record_splits_queue_wait_and_wall_time(self):
+        task = fake_task(None, None, items=10)
+        self.profiler.task_queued(task, "StepA")
+        queued_at = time.perf_counter()
+        task.metrics["started_at"] = queued_at + 0.5
+        task.metrics["finished_at"] = queued_at + 2.0
+
+        record = self.profiler.task_finished(task, "success")
+        self.assertAlmostEqual(record["queue_wait_s"], 0.5, places=2)
+        self.assertAlmostEqual(record["wall_s"], 1.5, places=6)
+        self.assertEqual(
+            (record["name"], record["status"], record["items"], record["peak_mem_kb"]),
+            ("StepA", "success", 10, 2.0),
+        )
+
+    def test_uninstrumented_task_gets_total_time_only(self):
+        task = types.SimpleNamespace()
+        self.profiler.task_queued(task, "Raw")
+        record = self.profiler.task_finished(task, "error")
+        self.assertIsNone(record["queue_wait_s"])
+        self.assertIsNone(record["cpu_s"])
+        self.assertGreaterEqual(record["wall_s"], 0.0)
+
+    def test_unknown_task_is_ignored(self):
+        self.assertIsNone(self.profiler.task_finished(object(), "success"))
+        self.assertEqual(self.profiler.records(), [])
+
+    def test_chrome_trace_has_queue_step_and_counter_events(self):
+        task = fake_task(None, None)
+        self.profiler.task_queued(task, "StepA", kind="subtask", parent="Group")
+        now = time.perf_counter()
+        task.metrics.update(started_at=now + 0.1, finished_at=now + 0.3)
+        self.profiler.task_finished(task, "success")
+        self.profiler.step_skipped("StepB", "checkpoint")
+        self.profiler.context_sampled("StepA", 4096)
+
+        events = self.profiler.to_chrome_trace()["traceEvents"]
+        by_name = {event["name"]: event for event in events}
+        self.assertEqual(by_name["StepA (fila)"]["cat"], "queue")
+        self.assertEqual(by_name["StepA"]["ph"], "X")
+        self.assertEqual(by_name["StepA"]["args"]["parent"], "Group")
+        self.assertEqual(by_name["StepB"]["ph"], "i")
+        self.assertEqual(by_name["ExecutionContext (KB)"]["args"], {"kb": 4.0})
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = self.profiler.export_chrome_trace(os.path.join(folder, "trace.json"))
+            with open(path, encoding="utf-8") as fh:
+                self.assertEqual(len(json.load(fh)["traceEvents"]), len(events))
+
+    def test_stop_is_idempotent(self):
+        self.profiler.stop("success")
+        self.assertIsNone(self.profiler.stop("success"))
+
+
+class EngineProfilingTest(unittest.TestCase):
+    def test_every_step_is_recorded(self):
+        steps = [
+            FakeStep("parse", lambda ctx: {"points": [1, 2]}, [], ["points"]),
+            FakeStep("track", lambda ctx: {"track": 1}, ["points"], ["track"]),
+        ]
+        skipped = FakeStep("never", reads=[], writes=["x"])
+        skipped.should_run = lambda context: False
+        engine, _, outcome = run_pipeline(steps + [skipped], mode="graph")
+
+        self.assertIn("finished", outcome)
+        records = {record["name"]: record for record in engine.profiler.records()}
+        self.assertEqual(records["parse"]["status"], "success")
+        self.assertEqual(records["track"]["status"], "success")
+        self.assertIsNotNone(records["track"]["cpu_s"])
+        self.assertIsNotNone(records["track"]["queue_wait_s"])
+        self.assertEqual(records["never"]["status"], "skipped")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import threading
+import unittest
+
+import pool_jobs
+from qgis_stubs import load_modules
+
+(backend_module,) = load_modules("core/engine_tasks/ProcessPoolBackend.py")
+ProcessPoolBackend = backend_module.ProcessPoolBackend
+
+
+class ProcessPoolBackendTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = ProcessPoolBackend(max_workers=2, tool_key="tests")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.shutdown()
+
+    def test_results_keep_input_order(self):
+        if not self.backend.available():
+            self.skipTest("pool de processos indisponível neste ambiente")
+        items = list(range(40))
+        results = self.backend.map(pool_jobs.square_with_pid, items, batch_size=3)
+        self.assertEqual([value for value, _ in results], [n * n for n in items])
+        self.assertNotIn(os.getpid(), {pid for _, pid in results})
+
+    def test_few_batches_run_locally(self):
+        results = self.backend.map(pool_jobs.square_with_pid, [1, 2, 3], batch_size=10)
+        self.assertEqual(results, [(1, os.getpid()), (4, os.getpid()), (9, os.getpid())])
+
+    def test_progress_reaches_100(self):
+        progress = []
+        self.backend.map(
+            pool_jobs.square_with_pid, list(range(12)), batch_size=2, on_progress=progress.append
+        )
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 100.0)
+
+    def test_cancel_returns_none(self):
+        cancelled = threading.Event()
+        cancelled.set()
+        for min_batches in (1, 100):  # pool e execução local
+            self.assertIsNone(
+                self.backend.map(
+                    pool_jobs.square_with_pid,
+                    list(range(20)),
+                    batch_size=2,
+                    is_cancelled=cancelled.is_set,
+                    min_batches=min_batches,
+                )
+            )
+
+    def test_job_exception_reaches_caller(self):
+        with self.assertRaises(ValueError):
+            self.backend.map(pool_jobs.fail_on_negative, [1, 2, -3, 4], batch_size=1)
+
+    def test_empty_input(self):
+        self.assertEqual(self.backend.map(pool_jobs.square_with_pid, []), [])
+
+
+class ProcessPoolFallbackTest(unittest.TestCase):
+    def test_broken_pool_reruns_locally(self):
+        backend = ProcessPoolBackend(max_workers=1, tool_key="tests")
+        self.addCleanup(backend.shutdown)
+        if not backend.available():
+            self.skipTest("pool de processos indisponível neste ambiente")
+        items = [(os.getpid(), n) for n in range(4)]
+        self.assertEqual(backend.map(pool_jobs.exit_outside, items, batch_size=1), [0, 1, 2, 3])
+
+    def test_missing_interpreter_runs_locally(self):
+        backend = ProcessPoolBackend(max_workers=2, tool_key="tests")
+        backend.resolve_python_executable = lambda: None
+        self.assertFalse(backend.available())
+        results = backend.map(pool_jobs.square_with_pid, list(range(6)), batch_size=1)
+        self.assertEqual([value for value, _ in results], [0, 1, 4, 9, 16, 25])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import threading
+import time
+import unittest
+
+from pipeline_fakes import (
+    AsyncPipelineEngine,
+    ExecutionContext,
+    FakeStep,
+    FakeTask,
+    ThreadPoolTaskExecutor,
+    run_pipeline,
+)
+
+
+class ThreadPoolTaskExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolTaskExecutor(max_workers=2, tool_key="tests")
+        self.addCleanup(self.executor.shutdown)
+
+    def test_run_in_pool_and_finished_on_calling_thread(self):
+        threads = {}
+        task = FakeTask("t", lambda ctx: threads.setdefault("run", threading.current_thread()), None)
+        task.on_success = lambda result: threads.setdefault("finished", threading.current_thread())
+
+        self.executor.submit(task)
+        self.assertTrue(self.executor.run_until(lambda: "finished" in threads, timeout=5))
+        self.assertIsNot(threads["run"], threading.current_thread())
+        self.assertIs(threads["finished"], threading.current_thread())
+        self.assertEqual(self.executor.in_flight(), 0)
+
+    def test_sequential_pipeline_runs_headless(self):
+        steps = [
+            FakeStep("a", lambda ctx: {"x": 1}),
+            FakeStep("b", lambda ctx: {"y": ctx.get("x") + 1}),
+        ]
+        engine, context, outcome = run_pipeline(steps, max_workers=1)
+        self.assertTrue(outcome["completed"])
+        self.assertIn("finished", outcome)
+        self.assertEqual(context.get("y"), 2)
+        self.assertFalse(engine.is_running())
+
+    def test_timeout_cancels_engine(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        cancelled = []
+
+        def slow(context):
+            # Tasks reais checam o cancelamento (isCanceled/CancellationToken)
+            while not release.wait(0.01) and not context.is_cancelled():
+                pass
+            return {}
+
+        engine = AsyncPipelineEngine(
+            [FakeStep("slow", slow)],
+            ExecutionContext({"tool_key": "tests"}),
+            executor=self.executor,
+            on_cancelled=cancelled.append,
+        )
+        started = time.perf_counter()
+        self.assertFalse(self.executor.run_until_complete(engine, timeout=0.3))
+        self.assertLess(time.perf_counter() - started, 3.0)
+        self.assertFalse(engine.is_running())
+        self.assertEqual(len(cancelled), 1)
+        self.assertTrue(cancelled[0].is_cancelled())
+
+    def test_cancel_from_step_stops_pipeline(self):
+        holder = {}
+        log = []
+
+        def cancel_pipeline(context):
+            holder["engine"].cancel()
+            return {"x": 1}
+
+        steps = [
+            FakeStep("cancels", cancel_pipeline, log=log),
+            FakeStep("after", lambda ctx: {"y": 1}, log=log),
+        ]
+        context = ExecutionContext({"tool_key": "tests"})
+        outcome = {}
+        engine = AsyncPipelineEngine(
+            steps,
+            context,
+            executor=self.executor,
+            on_finished=lambda ctx: outcome.setdefault("finished", True),
+            on_cancelled=lambda ctx: outcome.setdefault("cancelled", True),
+        )
+        holder["engine"] = engine
+        self.executor.run_until_complete(engine, timeout=5)
+
+        self.assertEqual(outcome, {"cancelled": True})
+        self.assertNotIn(("start", "after"), log)
+        self.assertFalse(context.has("y"))
+        self.assertEqual(self.executor.in_flight(), 0)
+
+    def test_single_worker_does_not_deadlock_with_parent_task(self):
+        # A PipelineTask ("pai") ganha thread própria: a única vaga do pool
+        # fica para os steps
+        steps = [FakeStep(f"s{n}", lambda ctx, n=n: {f"k{n}": n}) for n in range(3)]
+        _, context, outcome = run_pipeline(steps, max_workers=1, timeout=5)
+        self.assertTrue(outcome["completed"])
+        self.assertEqual([context.get(f"k{n}") for n in range(3)], [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import importlib.util
+import pathlib
+import sys
+import types
+import unittest
+from xml.etree import ElementTree as ET
+
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _package(name, path):
+    module = sys.modules.get(name)
+    if module is None:
+        module = types.ModuleType(name)
+        module.__path__ = [str(path)]
+        sys.modules[name] = module
+    return module
+
+
+def _load(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_package("Cadmus", ROOT)
+_package("Cadmus.core", ROOT / "core")
+_package("Cadmus.core.model", ROOT / "core" / "model")
+
+XmpAttributeScanner = _load(
+    "Cadmus.core.model.XmpAttributeScanner", "core/model/XmpAttributeScanner.py"
+).XmpAttributeScanner
+
+PREFIXES = {
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf",
+    "http://ns.adobe.com/tiff/1.0/": "tiff",
+    "http://www.dji.com/drone-dji/1.0/": "drone-dji",
+}
+RDF = 'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"'
+
+# Pacote no formato das DJI: atributos planos + elementos simples + estrutura
+DJI_XMP = (
+    '<x:xmpmeta xmlns:x="adobe:ns:meta/" x:xmptk="XMP Core 5.4.0">\n'
+    f" <rdf:RDF {RDF}>\n"
+    '  <rdf:Description rdf:about="DJI Meta Data"\n'
+    '    xmlns:tiff="http://ns.adobe.com/tiff/1.0/"\n'
+    '    xmlns:drone-dji="http://www.dji.com/drone-dji/1.0/"\n'
+    '    xmlns:xmpMM="http://ns.adobe.com/xap/1.0/mm/"\n'
+    '    tiff:Make="DJI" tiff:Model="M3E"\n'
+    '    drone-dji:AbsoluteAltitude="+812.345"\n'
+    '    drone-dji:GimbalYawDegree="-12.50"\n'
+    '    drone-dji:DewarpData="2022-06-08;0.1,\n\t0.2">\n'
+    "   <drone-dji:SerialNumber>1581F5FJ &amp; 01</drone-dji:SerialNumber>\n"
+    "   <drone-dji:Empty/>\n"
+    "   <!-- DJI -->\n"
+    "   <drone-dji:Notes><![CDATA[a < b]]></drone-dji:Notes>\n"
+    "   <xmpMM:History><rdf:Seq>\n"
+    '    <rdf:li drone-dji:AbsoluteAltitude="0">x</rdf:li>\n'
+    "   </rdf:Seq></xmpMM:History>\n"
+    "  </rdf:Description>\n"
+    '  <rdf:Description xmlns:dji="http://www.dji.com/drone-dji/1.0/"\n'
+    '    dji:AbsoluteAltitude="+1.000" dji:RtkFlag="50"/>\n'
+    " </rdf:RDF>\n"
+    "</x:xmpmeta>"
+)
+
+
+class XmpAttributeScannerTests(unittest.TestCase):
+    def test_scan_matches_element_tree(self):
+        scanned = XmpAttributeScanner.scan(DJI_XMP, PREFIXES)
+
+        self.assertEqual(scanned, XmpAttributeScanner.parse_tree(DJI_XMP, PREFIXES))
+        self.assertEqual(scanned["drone-dji:AbsoluteAltitude"], "+812.345")
+        self.assertEqual(scanned["drone-dji:DewarpData"], "2022-06-08;0.1,  0.2")
+        self.assertEqual(scanned["drone-dji:SerialNumber"], "1581F5FJ & 01")
+        self.assertEqual(scanned["drone-dji:Empty"], "")
+        self.assertEqual(scanned["drone-dji:Notes"], "a < b")
+        self.assertEqual(scanned["drone-dji:RtkFlag"], "50")
+        self.assertNotIn("xmpMM:History", scanned)
+
+    def test_unsupported_structures_fall_back_to_element_tree(self):
+        packets = [
+            # Description aninhado
+            f'<a {RDF}><rdf:Description><p><rdf:Description rdf:y="2"/></p>'
+            "</rdf:Description></a>",
+            # Prefixo redefinido com outro namespace
+            f'<a {RDF}><rdf:Description xmlns:d="urn:a" d:x="1">'
+            '<d:y xmlns:d="urn:b">2</d:y></rdf:Description></a>',
+        ]
+        for packet in packets:
+            self.assertIsNone(XmpAttributeScanner.scan(packet, PREFIXES))
+            self.assertEqual(
+                XmpAttributeScanner.parse(packet, PREFIXES),
+                XmpAttributeScanner.parse_tree(packet, PREFIXES),
+            )
+
+    def test_missing_description_and_invalid_xml(self):
+        self.assertIsNone(XmpAttributeScanner.parse(f"<a {RDF}><b/></a>", PREFIXES))
+        for packet in [
+            f'<a {RDF}><rdf:Description rdf:x="1"></a>',
+            # Prefixo não declarado
+            f'<a {RDF}><rdf:Description dji:x="1"/></a>',
+        ]:
+            with self.assertRaises(ET.ParseError):
+                XmpAttributeScanner.parse(packet, PREFIXES)
+
+
+if __name__ == "__main__":
+    unittest.main()
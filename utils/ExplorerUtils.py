@@ -261,7 +261,10 @@ class ExplorerUtils:
         source_json_path: str = "", default_stem: str = "report_metadata"
     ) -> str:
         """Monta sufixo amigavel para nome de HTML de report."""
-        json_stem = Path(source_json_path).stem if source_json_path else default_stem
+        source = Path(source_json_path) if source_json_path else None
+        if source is not None and source.suffix.lower() == ".gz":
+            source = source.with_suffix("")
+        json_stem = source.stem if source is not None else default_stem
         return ExplorerUtils.sanitize_path_component(json_stem) or default_stem
 
     @staticmethod
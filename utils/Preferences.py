@@ -36,6 +36,13 @@ class Preferences:
             with open(Preferences.PREF_FILE, "w", encoding="utf-8") as f:
                 f.write("{}")
 
+    @staticmethod
+    def data_folder(*subfolders):
+        """Pasta persistente do plugin no perfil do usuário (criada se faltar)."""
+        path = os.path.join(Preferences.PREF_FOLDER, *subfolders)
+        os.makedirs(path, exist_ok=True)
+        return path
+
     def load_prefs():
         """Carrega todo o JSON de preferências."""
         Preferences._ensure_pref_folder()
@@ -5,6 +5,7 @@ from qgis.PyQt.QtCore import QVariant
 from qgis.core import QgsVectorLayer, QgsWkbTypes, QgsField, QgsFeature
 
 from ...core.config.LogUtils import LogUtils
+from ...core.engine_tasks.CancellationToken import CancellationToken
 from ...core.enum.OutputFieldKey import OutputFieldKey
 from ...core.model.Field import Field
 from ..ToolKeys import ToolKey
@@ -150,8 +151,14 @@ class SequentialPointBreakJudge:
         fusion_azimuth_tolerance: float = 10.0,
         max_desvio: int = 5,
         conflict_resolver=None,
+        cancel_token=None,
     ):
-        """Executa o julgamento completo de segmentação de pontos em tiros/faixas."""
+        """
+        Executa o julgamento completo de segmentação de pontos em tiros/faixas.
+
+        `cancel_token` (CancellationToken) recebe o progresso da avaliação e
+        interrompe o laço de pontos com `OperationCancelled`.
+        """
         layer = self._load_layer()
         self._validate_layer(layer, field_id, field_time)
         field_name_map = self._resolve_output_fields(
@@ -189,6 +196,7 @@ class SequentialPointBreakJudge:
             border_distance_threshold=border_distance_threshold,
             retroactive_window=retroactive_window,
             max_desvio=max_desvio,
+            cancel_token=cancel_token,
         )
         eval_time = time.time() - eval_start
         self.logger.info(
@@ -352,9 +360,11 @@ class SequentialPointBreakJudge:
         border_distance_threshold: float,
         retroactive_window: int,
         max_desvio: int,
+        cancel_token=None,
     ):
         """Avalia os pontos ordenados, calcula scores e determina quebras de segmento."""
         import time
+        cancel_token = CancellationToken.ensure(cancel_token)
         start_time = time.time()
         total_points = len(ordered_points)
         self.logger.info(
@@ -374,7 +384,9 @@ class SequentialPointBreakJudge:
         progress_interval = max(1, total_points // 10)  # Log every 10% or at least every point if small
 
         for index in range(1, len(ordered_points)):
+            cancel_token.tick()
             if index % progress_interval == 0 or index == total_points - 1:
+                cancel_token.set_progress((index / total_points) * 100)
                 elapsed = time.time() - start_time
                 progress_percent = (index / total_points) * 100
                 self.logger.info(
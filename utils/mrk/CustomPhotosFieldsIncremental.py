@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""
+Campos custom de uma pasta de fotos que cresce (voos novos copiados para a
+mesma pasta), sem recalcular o conjunto inteiro.
+
+O estado guarda as entradas, o resultado de cada foto, a ordem cronológica
+e um resumo por voo (`get_voo_id`). A cada `sync` só as fotos novas ou
+alteradas e as vizinhas imediatas (as únicas cujos campos de sequência
+mudam: `is_valid_sequence` só liga fotos adjacentes a até `MAX_DT_DIFF`)
+passam pelo `calculate_all_custom_fields`, em janelas. Os campos que
+dependem do conjunto são refeitos a partir do que está guardado:
+`strip_id`/`trajectory_smoothness` numa passada pelos valores já
+calculados e `abrupt_change_flag` pelas medianas dos resumos por voo.
+
+O resultado é o de `calculate_all_custom_fields` sobre todas as fotos;
+fotos com o mesmo DateTimeOriginal ficam na ordem em que entraram.
+"""
+import heapq
+import statistics
+import sys
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+from ...core.config.LogUtils import LogUtils
+from ..ToolKeys import ToolKey
+from .CustomPhotosFieldsUtil import DECIMAL_PLACES, CustomPhotosFieldsUtil
+
+
+class _FlightSummary:
+    """Segmentos válidos de um voo (valores ordenados, para as medianas)."""
+
+    __slots__ = ("photos", "time_values", "geo_values")
+
+    def __init__(self):
+        self.photos = 0
+        self.time_values: List[float] = []
+        self.geo_values: List[float] = []
+
+
+class CustomPhotosFieldsIncremental:
+    """Estado incremental do `CustomPhotosFieldsUtil.calculate_all_custom_fields`."""
+
+    # Acima desta fração de fotos novas/alteradas/removidas recalcula tudo
+    FULL_RECOMPUTE_RATIO = 0.5
+    # Memória (estimada) dos estados guardados por `shared`; acima dela os
+    # menos usados saem primeiro. O limite é por memória, não por quantidade:
+    # uma missão com dezenas de voos (um estado por pasta de MRK) cabe inteira.
+    MAX_SHARED_BYTES = 256 * 1024 * 1024
+    # Estrutura por foto além dos dicts (chave de ordem, nome, listas)
+    _PHOTO_OVERHEAD_BYTES = 200
+
+    _shared: "OrderedDict[Hashable, CustomPhotosFieldsIncremental]" = OrderedDict()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, engine: Optional[str] = None):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.clear()
+
+    @classmethod
+    def shared(cls, key: Hashable) -> "CustomPhotosFieldsIncremental":
+        """
+        Estado da sessão para `key` (ex.: pasta de fotos).
+
+        Os estados ficam até `release`/`release_all` (chamado no unload do
+        plugin) ou até saírem pelo limite `MAX_SHARED_BYTES`, aplicado a cada
+        `sync` de um estado compartilhado.
+        """
+        with cls._shared_lock:
+            state = cls._shared.pop(key, None)
+            if state is None:
+                state = cls()
+            cls._shared[key] = state
+            return state
+
+    @classmethod
+    def release(cls, key: Hashable) -> bool:
+        """Descarta o estado compartilhado de `key`. True se existia."""
+        with cls._shared_lock:
+            return cls._shared.pop(key, None) is not None
+
+    @classmethod
+    def release_all(cls) -> int:
+        """Descarta todos os estados compartilhados. Retorna quantos havia."""
+        with cls._shared_lock:
+            count = len(cls._shared)
+            cls._shared.clear()
+            return count
+
+    @classmethod
+    def shared_bytes(cls) -> int:
+        with cls._shared_lock:
+            states = list(cls._shared.values())
+        return sum(state.approx_bytes() for state in states)
+
+    @classmethod
+    def _evict_shared(cls, keep: "CustomPhotosFieldsIncremental") -> int:
+        """Remove os estados menos usados até caber em `MAX_SHARED_BYTES`."""
+        evicted = 0
+        with cls._shared_lock:
+            sizes = {key: state.approx_bytes() for key, state in cls._shared.items()}
+            total = sum(sizes.values())
+            for key in list(cls._shared):
+                if total <= cls.MAX_SHARED_BYTES:
+                    break
+                if cls._shared[key] is keep:
+                    continue
+                del cls._shared[key]
+                total -= sizes[key]
+                evicted += 1
+        return evicted
+
+    @staticmethod
+    def _record_bytes(record: Dict) -> int:
+        return sys.getsizeof(record) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in record.items()
+        )
+
+    def approx_bytes(self) -> int:
+        """Memória estimada do estado (uma foto amostrada x quantidade)."""
+        with self._lock:
+            names = self._names
+            if not names:
+                return 0
+            name = names[len(names) // 2]
+            per_photo = (
+                self._record_bytes(self._inputs[name])
+                + self._record_bytes(self._results[name])
+                + self._PHOTO_OVERHEAD_BYTES
+            )
+            return per_photo * len(names)
+
+    @staticmethod
+    def _get_logger(tool_key: str = ToolKey.UNTRACEABLE) -> LogUtils:
+        return LogUtils(tool=tool_key, class_name="CustomPhotosFieldsIncremental")
+
+    def clear(self) -> None:
+        self._inputs: Dict[str, Dict] = {}
+        self._results: Dict[str, Dict] = {}
+        self._sort_keys: Dict[str, tuple] = {}
+        # Ordem cronológica: (datetime, ordem de chegada) e nomes, em paralelo
+        self._keys: List[tuple] = []
+        self._names: List[str] = []
+        self._flights: Dict[str, _FlightSummary] = {}
+        self._medians = (0.0, 0.0)
+        self._arrivals = 0
+        self._parsed = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def results(self) -> Dict[str, Dict]:
+        """Cópia do resultado de todas as fotos, em ordem cronológica."""
+        return {name: dict(self._results[name]) for name in self._names}
+
+    # -----------------------------
+    # Sincronização
+    # -----------------------------
+
+    def sync(
+        self, metadata_dict: Dict[str, Dict], tool_key: str = ToolKey.UNTRACEABLE
+    ) -> Dict[str, Dict]:
+        """
+        Atualiza o estado para as fotos de `metadata_dict` (novas entram,
+        alteradas são refeitas, ausentes saem) e devolve o mesmo que
+        `calculate_all_custom_fields(metadata_dict)`.
+        """
+        logger = self._get_logger(tool_key)
+        metadata_dict = metadata_dict or {}
+        with self._lock:
+            removed = [name for name in self._inputs if name not in metadata_dict]
+            changed = {}
+            for name, data in metadata_dict.items():
+                stored = self._inputs.get(name)
+                if stored is None or stored != data:
+                    changed[name] = data
+
+            touched = len(removed) + len(changed)
+            if not touched:
+                return self.results()
+
+            try:
+                if not self._names or touched > len(self._names) * self.FULL_RECOMPUTE_RATIO:
+                    mode = "full"
+                    self._rebuild(metadata_dict, tool_key)
+                else:
+                    mode = "incremental"
+                    recomputed = self._apply(removed, changed, tool_key)
+                    logger.debug(
+                        "Campos custom recalculados de forma incremental",
+                        code="CUSTOM_FIELDS_INCREMENTAL",
+                        photos=len(self._names),
+                        added_or_changed=len(changed),
+                        removed=len(removed),
+                        recomputed=recomputed,
+                        flights=len(self._flights),
+                    )
+            except Exception:
+                # Estado parcial: a próxima chamada recalcula tudo
+                self.clear()
+                raise
+
+            logger.debug(
+                "Estado de campos custom sincronizado",
+                code="CUSTOM_FIELDS_SYNC",
+                mode=mode,
+                photos=len(self._names),
+            )
+            results = self.results()
+
+        evicted = self._evict_shared(keep=self)
+        if evicted:
+            logger.debug(
+                "Estados de campos custom descartados pelo limite de memória",
+                code="CUSTOM_FIELDS_SHARED_EVICT",
+                evicted=evicted,
+                max_bytes=self.MAX_SHARED_BYTES,
+            )
+        return results
+
+    def _rebuild(self, metadata_dict: Dict[str, Dict], tool_key: str) -> None:
+        """Cálculo completo; empates de data na ordem de chegada (atual, depois novas)."""
+        arrival = {name: key[1] for name, key in self._sort_keys.items()}
+        next_arrival = self._arrivals
+        for name in metadata_dict:
+            if name not in arrival:
+                arrival[name] = next_arrival
+                next_arrival += 1
+        ordered = sorted(metadata_dict, key=arrival.__getitem__)
+
+        self.clear()
+        self._arrivals = next_arrival
+        inputs = {name: dict(metadata_dict[name]) for name in ordered}
+        for name, data in inputs.items():
+            self._sort_keys[name] = (self._parse(data), arrival[name])
+
+        results = CustomPhotosFieldsUtil.calculate_all_custom_fields(
+            inputs, tool_key=tool_key, engine=self.engine
+        )
+        self._inputs = inputs
+        self._results = results
+        self._names = list(results)
+        self._keys = [self._sort_keys[name] for name in self._names]
+        for record in results.values():
+            self._add_summary(record)
+        self._medians = self._current_medians()
+
+    def _apply(self, removed: List[str], changed: Dict[str, Dict], tool_key: str) -> int:
+        """Aplica remoções/inserções, recalcula as janelas afetadas e os campos globais."""
+        affected = set()
+        for name in removed:
+            self._remove(name, affected)
+        for name, data in changed.items():
+            arrival = None
+            if name in self._inputs:
+                arrival = self._sort_keys[name][1]
+                self._remove(name, affected)
+            self._insert(name, dict(data), arrival, affected)
+
+        positions = sorted(
+            bisect_left(self._keys, self._sort_keys[name])
+            for name in affected
+            if name in self._sort_keys
+        )
+        if not positions:
+            return 0
+
+        recomputed = self._recompute_windows(positions, tool_key)
+        self._update_strips(positions[0])
+        self._update_abrupt_flags(recomputed)
+        return len(recomputed)
+
+    # -----------------------------
+    # Ordem cronológica
+    # -----------------------------
+
+    def _parse(self, data: Dict):
+        raw = data["DateTimeOriginal"]
+        dt = self._parsed.get(raw)
+        if dt is None:
+            dt = self._parsed[raw] = CustomPhotosFieldsUtil.parse_datetime(raw)
+        return dt
+
+    def _mark(self, positions: tuple, affected: set) -> None:
+        for index in positions:
+            if 0 <= index < len(self._names):
+                affected.add(self._names[index])
+
+    def _remove(self, name: str, affected: set) -> None:
+        position = bisect_left(self._keys, self._sort_keys.pop(name))
+        del self._keys[position]
+        del self._names[position]
+        del self._inputs[name]
+        self._remove_summary(self._results.pop(name))
+        affected.discard(name)
+        # Quem ficou antes e depois da foto removida
+        self._mark((position - 1, position), affected)
+
+    def _insert(self, name: str, data: Dict, arrival: Optional[int], affected: set) -> None:
+        if arrival is None:
+            arrival = self._arrivals
+            self._arrivals += 1
+        key = (self._parse(data), arrival)
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._names.insert(position, name)
+        self._sort_keys[name] = key
+        self._inputs[name] = data
+        self._mark((position - 1, position, position + 1), affected)
+
+    # -----------------------------
+    # Recalculo local
+    # -----------------------------
+
+    def _recompute_windows(self, positions: List[int], tool_key: str) -> List[str]:
+        """
+        Recalcula as fotos em `positions` com uma foto de contexto de cada
+        lado. Trechos a até 2 posições um do outro viram uma janela só (a
+        foto entre eles é recalculada junto), para as janelas não se
+        sobreporem; todas vão numa chamada só, em ordem cronológica.
+        """
+        runs = []
+        for position in positions:
+            if runs and position - runs[-1][1] <= 2:
+                runs[-1][1] = position
+            else:
+                runs.append([position, position])
+
+        window = {}
+        targets = []
+        last = len(self._names) - 1
+        for start, end in runs:
+            for index in range(max(0, start - 1), min(last, end + 1) + 1):
+                name = self._names[index]
+                window[name] = self._inputs[name]
+                if start <= index <= end:
+                    targets.append(name)
+
+        results = CustomPhotosFieldsUtil.calculate_all_custom_fields(
+            window, tool_key=tool_key, engine=self.engine
+        )
+        for name in targets:
+            old = self._results.get(name)
+            if old is not None:
+                self._remove_summary(old)
+            self._results[name] = results[name]
+            self._add_summary(results[name])
+        return targets
+
+    def _update_strips(self, start: int) -> None:
+        """`trajectory_smoothness` e `strip_id` a partir de `start` (regra do escalar)."""
+        strip_id = self._results[self._names[start - 1]]["strip_id"] if start else 1
+        prev_segment_dir = None
+        for index in range(start - 1, -1, -1):
+            record = self._results[self._names[index]]
+            if record["is_valid_sequence_prev"]:
+                prev_segment_dir = record["displacement_direction"]
+                break
+
+        for name in self._names[start:]:
+            record = self._results[name]
+            trajectory_smoothness = 0.0
+            if record["is_valid_sequence_prev"]:
+                current_segment_dir = record["displacement_direction"]
+                if prev_segment_dir is not None:
+                    trajectory_smoothness = CustomPhotosFieldsUtil.angle_difference(
+                        current_segment_dir, prev_segment_dir
+                    )
+                    if trajectory_smoothness > CustomPhotosFieldsUtil.STRIP_CHANGE_THRESHOLD:
+                        strip_id += 1
+                prev_segment_dir = current_segment_dir
+            record["trajectory_smoothness"] = round(trajectory_smoothness, DECIMAL_PLACES)
+            record["strip_id"] = strip_id
+
+    # -----------------------------
+    # Resumo por voo / medianas
+    # -----------------------------
+
+    def _add_summary(self, record: Dict) -> None:
+        summary = self._flights.get(record["voo_id"])
+        if summary is None:
+            summary = self._flights[record["voo_id"]] = _FlightSummary()
+        summary.photos += 1
+        if record["is_valid_sequence_prev"]:
+            insort(summary.time_values, record["time_since_previous"])
+            insort(summary.geo_values, record["geodesic_distance_previous"])
+
+    def _remove_summary(self, record: Dict) -> None:
+        summary = self._flights[record["voo_id"]]
+        summary.photos -= 1
+        if record["is_valid_sequence_prev"]:
+            for values, value in (
+                (summary.time_values, record["time_since_previous"]),
+                (summary.geo_values, record["geodesic_distance_previous"]),
+            ):
+                del values[bisect_left(values, value)]
+        if not summary.photos:
+            del self._flights[record["voo_id"]]
+
+    def _current_medians(self) -> tuple:
+        """Medianas de todos os segmentos válidos (juntando os resumos ordenados)."""
+        medians = []
+        for attribute in ("time_values", "geo_values"):
+            values = list(
+                heapq.merge(*(getattr(summary, attribute) for summary in self._flights.values()))
+            )
+            medians.append(statistics.median(values) if values else 0.0)
+        return tuple(medians)
+
+    def _update_abrupt_flags(self, recomputed: List[str]) -> None:
+        """Mediana mudou: reavalia todas as fotos; senão só as recalculadas."""
+        medians = self._current_medians()
+        names = self._names if medians != self._medians else recomputed
+        self._medians = medians
+        median_time, median_geo = medians
+        for name in names:
+            record = self._results[name]
+            record["abrupt_change_flag"] = (
+                median_time > 0 and record["time_since_previous"] > median_time * 2
+            ) or (median_geo > 0 and record["geodesic_distance_previous"] > median_geo * 2)
@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+"""
+Motor NumPy do `CustomPhotosFieldsUtil.calculate_all_custom_fields`.
+
+Lê cada foto uma vez (data, voo e números), monta colunas na ordem
+cronológica e calcula em lote a validação de vizinhança, distâncias,
+azimutes, velocidades, faixas (`strip_id`) e medianas. As regras, as
+chaves e a ordem do resultado são as do motor escalar; os valores batem
+dentro da tolerância de ponto flutuante (trigonometria e arredondamento do
+NumPy).
+
+Entrada que o motor escalar trataria com erro (campo lido com `[]`
+ausente, valor não numérico, divisão por zero) levanta exceção aqui: o
+`calculate_all_custom_fields` volta para o escalar, que reproduz o
+comportamento de antes.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError:  # O QGIS traz o NumPy; sem ele fica o motor escalar
+    np = None
+
+from .CustomPhotosFieldsUtil import DECIMAL_PLACES, CustomPhotosFieldsUtil
+
+EPOCH = datetime(1970, 1, 1)
+EARTH_RADIUS = 6371000
+SENSOR_WIDTH_MM = 7.49
+
+# Campos lidos com data[...] pelo motor escalar
+REQUIRED_KEYS = (
+    "DateTimeOriginal",
+    "AbsoluteAltitude",
+    "FlightXSpeed",
+    "FlightYSpeed",
+    "FlightZSpeed",
+    "GimbalYawDegree",
+    "FlightYawDegree",
+    "GimbalPitchDegree",
+    "FlightPitchDegree",
+)
+
+# Ordem das chaves custom do motor escalar ({**individual, **quality, ...})
+CUSTOM_KEYS = (
+    "shutter_life_pct",
+    "ground_sample_distance_cm",
+    "total_heat_index",
+    "motion_blur_risk",
+    "exposure_value_ev",
+    "coverage_width",
+    "linear_velocity_instant",
+    "rtk_effective_precision",
+    "incidence_angle",
+    "predicted_overlap",
+    "is_ideal_overlap",
+    "abrupt_change_flag",
+    "gimbal_angular_velocity",
+    "orthorectification_potential",
+    "vertical_stability",
+    "speed_variation_index",
+    "rtk_stability_score",
+    "capture_efficiency",
+    "photogrammetry_quality_index",
+    "next_time_since",
+    "next_geodesic_distance",
+    "next_distance_3d",
+    "next_avg_velocity",
+    "next_displacement_direction",
+    "is_valid_sequence_prev",
+    "is_valid_sequence_next",
+    "voo_id",
+    "GimbalOffset",
+    "3DSpeed",
+    "speed_3d_kmh",
+    "yaw_alignment_error",
+    "time_since_previous",
+    "geodesic_distance_previous",
+    "distance_3d_previous",
+    "avg_velocity_between_photos",
+    "displacement_direction",
+    "estimated_coverage",
+    "trajectory_smoothness",
+    "strip_id",
+    "light_source_classification",
+    "light_consistency",
+)
+
+
+class CustomPhotosFieldsNumpy:
+    """Campos CUSTOM_FIELDS calculados em colunas (arrays NumPy)."""
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    @staticmethod
+    def calculate_all_custom_fields(metadata_dict: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Mesmo resultado de `CustomPhotosFieldsUtil.calculate_all_custom_fields`."""
+        if not metadata_dict:
+            return {}
+
+        items = list(metadata_dict.items())
+        for _, data in items:
+            missing = [key for key in REQUIRED_KEYS if key not in data]
+            if missing:
+                raise KeyError(missing[0])
+
+        # Datas convertidas uma vez; sorted é estável, como no escalar
+        parsed = {}
+        stamps = []
+        for _, data in items:
+            raw = data["DateTimeOriginal"]
+            dt = parsed.get(raw)
+            if dt is None:
+                dt = parsed[raw] = CustomPhotosFieldsUtil.parse_datetime(raw)
+            stamps.append(dt)
+        order = sorted(range(len(items)), key=stamps.__getitem__)
+        items = [items[i] for i in order]
+        stamps = [stamps[i] for i in order]
+        records = [data for _, data in items]
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            columns = CustomPhotosFieldsNumpy._compute(records, stamps)
+
+        values = [columns[key] for key in CUSTOM_KEYS]
+        result = {}
+        for (filename, data), row in zip(items, zip(*values)):
+            result[filename] = {**data, **dict(zip(CUSTOM_KEYS, row))}
+        return result
+
+    # -----------------------------
+    # Colunas
+    # -----------------------------
+
+    @staticmethod
+    def _column(records: List[Dict], key: str, default=None) -> "np.ndarray":
+        safe_float = CustomPhotosFieldsUtil.safe_float
+        return np.array([safe_float(data.get(key, default)) for data in records], dtype=float)
+
+    @staticmethod
+    def _round(values: "np.ndarray", places: int = DECIMAL_PLACES) -> "np.ndarray":
+        return np.round(values, places)
+
+    @staticmethod
+    def _angle_difference(a: "np.ndarray", b: "np.ndarray") -> "np.ndarray":
+        diff = np.abs(np.mod(a - b, 360))
+        return np.where(diff <= 180, diff, 360 - diff)
+
+    @staticmethod
+    def _segments(
+        lat1: "np.ndarray",
+        lon1: "np.ndarray",
+        alt1: "np.ndarray",
+        t1: "np.ndarray",
+        lat2: "np.ndarray",
+        lon2: "np.ndarray",
+        alt2: "np.ndarray",
+        t2: "np.ndarray",
+    ) -> Dict[str, "np.ndarray"]:
+        """Campos de sequência (haversine, 3D, velocidade, azimute) por par de fotos."""
+        dt_diff = np.abs(t1 - t2)
+
+        phi1 = np.radians(lat1)
+        phi2 = np.radians(lat2)
+        delta_phi = np.radians(lat2 - lat1)
+        delta_lambda = np.radians(lon2 - lon1)
+        a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+        if np.any((a < 0) | (a > 1)):
+            # math.sqrt do escalar levanta ValueError (latitude fora de +-90)
+            raise ValueError("math domain error")
+        geo_dist = EARTH_RADIUS * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+        dist_3d = np.sqrt(geo_dist**2 + np.abs(alt1 - alt2) ** 2)
+        avg_vel = np.where(dt_diff > 0, dist_3d / dt_diff, 0.0)
+
+        y = np.sin(delta_lambda) * np.cos(phi2)
+        x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(delta_lambda)
+        bearing = np.mod(np.degrees(np.arctan2(y, x)) + 360, 360)
+
+        return {
+            "time_since": dt_diff,
+            "geodesic_distance": geo_dist,
+            "distance_3d": dist_3d,
+            "avg_velocity": avg_vel,
+            "displacement_direction": bearing,
+        }
+
+    @staticmethod
+    def _compute(records: List[Dict], stamps: List[datetime]) -> Dict[str, list]:
+        """Colunas custom (listas Python, ordem cronológica)."""
+        util = CustomPhotosFieldsUtil
+        column = CustomPhotosFieldsNumpy._column
+        r = CustomPhotosFieldsNumpy._round
+        angle_difference = CustomPhotosFieldsNumpy._angle_difference
+        n = len(records)
+
+        t = np.array([(dt - EPOCH).total_seconds() for dt in stamps], dtype=float)
+        voo = [util.voo_id_at(data, dt) for data, dt in zip(records, stamps)]
+        alt = np.array([util.safe_float(data["AbsoluteAltitude"]) for data in records], dtype=float)
+        shutter = np.array([util.safe_int(data.get("ShutterCount")) for data in records], dtype=np.int64)
+        lat = np.array(
+            [
+                util.safe_float(data.get("LRFTargetLat") or data.get("GpsLatitude", 0))
+                for data in records
+            ],
+            dtype=float,
+        )
+        lon = np.array(
+            [
+                util.safe_float(data.get("LRFTargetLon") or data.get("GpsLongitude", 0))
+                for data in records
+            ],
+            dtype=float,
+        )
+        lrf = column(records, "LRFTargetDistance", 0)
+        focal = column(records, "FocalLength", 12.29)
+        img_w = column(records, "ExifImageWidth", 5280)
+        img_h = column(records, "ExifImageHeight", 3956)
+        sens_temp = column(records, "SensorTemperature")
+        lens_temp = column(records, "LensTemperature")
+        xspd = column(records, "FlightXSpeed")
+        yspd = column(records, "FlightYSpeed")
+        zspd = column(records, "FlightZSpeed")
+        exp_time = column(records, "ExposureTime", 0)
+        fnumber = column(records, "FNumber", 2.8)
+        gim_yaw = column(records, "GimbalYawDegree")
+        flight_yaw = column(records, "FlightYawDegree")
+        gim_pitch = column(records, "GimbalPitchDegree")
+        flight_pitch = column(records, "FlightPitchDegree")
+        rtk_std = (
+            column(records, "RtkStdLon", 999)
+            + column(records, "RtkStdLat", 999)
+            + column(records, "RtkStdHgt", 999)
+        ) / 3
+        rtk_diff_age = column(records, "RtkDiffAge", 999)
+        rtk_fixed = np.array([data.get("RtkFlag") == "50" for data in records], dtype=bool)
+        dewarp_off = np.array([data.get("DewarpFlag") == "0" for data in records], dtype=bool)
+
+        if np.any(img_w == 0):
+            raise ZeroDivisionError("float division by zero")
+        if np.any((exp_time > 0) & (fnumber == 0)):
+            raise ValueError("math domain error")
+
+        # Vizinhança: par (i, i-1); is_valid_sequence é simétrico
+        same_voo = np.array([a == b for a, b in zip(voo[1:], voo[:-1])], dtype=bool)
+        pair_valid = (
+            same_voo
+            & (np.abs(t[1:] - t[:-1]) <= util.MAX_DT_DIFF)
+            & (np.abs(alt[1:] - alt[:-1]) <= util.MAX_ALT_DIFF)
+            & ~(np.abs(shutter[1:] - shutter[:-1]) > util.MAX_SHUTTER_JUMP)
+        )
+        valid_prev = np.zeros(n, dtype=bool)
+        valid_prev[1:] = pair_valid
+        valid_next = np.zeros(n, dtype=bool)
+        valid_next[:-1] = pair_valid
+
+        prev_pairs = CustomPhotosFieldsNumpy._segments(
+            lat[1:], lon[1:], alt[1:], t[1:], lat[:-1], lon[:-1], alt[:-1], t[:-1]
+        )
+        next_pairs = CustomPhotosFieldsNumpy._segments(
+            lat[:-1], lon[:-1], alt[:-1], t[:-1], lat[1:], lon[1:], alt[1:], t[1:]
+        )
+        prev_seq = {}
+        next_seq = {}
+        for name in prev_pairs:
+            prev_values = np.zeros(n)
+            prev_values[1:] = np.where(pair_valid, prev_pairs[name], 0.0)
+            prev_seq[name] = r(prev_values)
+            next_values = np.zeros(n)
+            next_values[:-1] = np.where(pair_valid, next_pairs[name], 0.0)
+            next_seq[name] = r(next_values)
+        prev_time = prev_seq["time_since"]
+        prev_geo = prev_seq["geodesic_distance"]
+        prev_dir = prev_seq["displacement_direction"]
+
+        # Cobertura estimada
+        effective_distance = np.where(lrf <= 0, alt, lrf)
+        aspect_ratio = np.where(img_w > 0, img_h / img_w, 0.75)
+        width_m = np.where(
+            (effective_distance > 0) & (focal > 0),
+            effective_distance * SENSOR_WIDTH_MM / focal,
+            0.0,
+        )
+        coverage_width = r(width_m)
+        coverage_height = r(width_m * aspect_ratio)
+
+        # Campos individuais
+        lrf_distance = np.where(lrf == 0, alt * 0.85, lrf)
+        pixel_pitch = SENSOR_WIDTH_MM / img_w
+        has_gsd = (lrf_distance > 0) & (focal > 0)
+        gsd_cm = np.where(has_gsd, lrf_distance * pixel_pitch / focal * 100, 0.0)
+        gsd_m = gsd_cm / 100
+        total_heat_index = np.where(
+            (sens_temp > 0) & (lens_temp > 0),
+            (sens_temp + lens_temp) / 2,
+            np.where(sens_temp != 0, sens_temp, lens_temp),
+        )
+        speed_3d = np.sqrt(xspd**2 + yspd**2 + zspd**2)
+        motion_blur_risk = r(np.where(gsd_m > 0, speed_3d * exp_time / gsd_m, 0.0))
+        exposure_value_ev = np.where(exp_time > 0, np.log2(fnumber**2 / exp_time), 0.0)
+
+        # Gimbal / alinhamento
+        gim_norm = np.mod(np.mod(gim_yaw, 360) + 360, 360)
+        flight_norm = np.mod(np.mod(flight_yaw, 360) + 360, 360)
+        diff = np.abs(gim_norm - flight_norm)
+        gimbal_offset = np.abs(
+            np.where(
+                (diff > 150) & (diff < 300),
+                np.abs(180 - diff),
+                np.where(diff > 300, np.abs(360 - diff), diff),
+            )
+        )
+        displacement_dir = np.where(valid_prev, prev_dir, flight_yaw)
+        yaw_gap = np.abs(flight_yaw - displacement_dir)
+        yaw_alignment_error = r(np.minimum(yaw_gap, 360 - yaw_gap))
+
+        # Qualidade
+        high, medium, low, no_rtk = util.RTK_PRECISION_LABELS
+        rtk_high = rtk_fixed & (rtk_std < 0.02)
+        rtk_prec = np.select([rtk_high, rtk_std < 0.1, rtk_std < 1.0], [high, medium, low], no_rtk)
+
+        prev_std = np.zeros(n)
+        prev_std[1:] = rtk_std[:-1]
+        rtk_stability_score = np.where(
+            valid_prev,
+            np.maximum(0.0, 100.0 - np.minimum(100.0, np.abs(rtk_std - prev_std) * 100.0)),
+            0.0,
+        )
+        incidence_angle = r(np.abs(gim_pitch + flight_pitch))
+
+        has_coverage = valid_prev & (coverage_width > 0)
+        geo_ratio = np.where(has_coverage, prev_geo / coverage_width, 0.0)
+        predicted_overlap = np.where(
+            has_coverage, np.maximum(0.0, np.minimum(100.0, (1.0 - geo_ratio) * 100.0)), 0.0
+        )
+        ortho_potential = np.minimum(
+            100,
+            np.where(rtk_high, 30, 0)
+            + np.where(incidence_angle < 5, 25, 0)
+            + np.where(dewarp_off, 20, 0)
+            + np.where(rtk_diff_age < 2, 15, 0)
+            + np.where(predicted_overlap > 70, 10, 0),
+        )
+
+        prev_gim_yaw = np.zeros(n)
+        prev_gim_yaw[1:] = gim_yaw[:-1]
+        gimbal_angular_velocity = np.where(
+            valid_prev & (prev_time > 0),
+            angle_difference(gim_yaw, prev_gim_yaw) / prev_time,
+            0.0,
+        )
+        prev_alt = np.zeros(n)
+        prev_alt[1:] = alt[:-1]
+        vertical_stability = np.where(valid_prev, np.abs(alt - prev_alt), 0.0)
+        prev_speed = np.zeros(n)
+        prev_speed[1:] = speed_3d[:-1]
+        mean_speed = (prev_speed + speed_3d) / 2
+        speed_variation_index = np.where(
+            valid_prev & (mean_speed > 0), np.abs(prev_speed - speed_3d) / 2 / mean_speed, 0.0
+        )
+        photogrammetry_quality_index = np.minimum(
+            100,
+            ortho_potential
+            + np.where(motion_blur_risk < util.BLUR_THRESHOLD, 10, 0)
+            + np.where(yaw_alignment_error < 5, 10, 0)
+            + np.where(predicted_overlap >= util.IDEAL_OVERLAP, 10, 0),
+        )
+
+        # Faixas: ângulo entre segmentos válidos consecutivos
+        valid_index = np.flatnonzero(valid_prev)
+        turns = angle_difference(prev_dir[valid_index[1:]], prev_dir[valid_index[:-1]])
+        trajectory_smoothness = np.zeros(n)
+        trajectory_smoothness[valid_index[1:]] = turns
+        strip_change = np.zeros(n, dtype=np.int64)
+        strip_change[valid_index[1:]] = turns > util.STRIP_CHANGE_THRESHOLD
+        strip_id = 1 + np.cumsum(strip_change)
+
+        # Mudança abrupta: acima do dobro da mediana dos segmentos válidos
+        median_time = float(np.median(prev_time[valid_prev])) if valid_index.size else 0.0
+        median_geo = float(np.median(prev_geo[valid_prev])) if valid_index.size else 0.0
+        abrupt_change_flag = ((median_time > 0) & (prev_time > median_time * 2)) | (
+            (median_geo > 0) & (prev_geo > median_geo * 2)
+        )
+
+        # Fonte de luz: poucos valores distintos por voo
+        light = {}
+        light_labels = []
+        light_consistency = []
+        for data in records:
+            source = data.get("LightSource")
+            cct = data.get("WhiteBalanceCCT")
+            labels = light.get((source, cct))
+            if labels is None:
+                labels = light[(source, cct)] = (
+                    util._get_light_source_label(source),
+                    util._check_light_consistency(source, cct),
+                )
+            light_labels.append(labels[0])
+            light_consistency.append(labels[1])
+
+        return {
+            "shutter_life_pct": r(shutter / 400000 * 100).tolist(),
+            # Sem GSD o escalar devolve o int 0
+            "ground_sample_distance_cm": [
+                value if ok else 0 for value, ok in zip(r(gsd_cm).tolist(), has_gsd.tolist())
+            ],
+            "total_heat_index": r(total_heat_index).tolist(),
+            "motion_blur_risk": motion_blur_risk.tolist(),
+            "exposure_value_ev": r(exposure_value_ev).tolist(),
+            "coverage_width": coverage_width.tolist(),
+            "linear_velocity_instant": r(speed_3d).tolist(),
+            "rtk_effective_precision": rtk_prec.tolist(),
+            "incidence_angle": incidence_angle.tolist(),
+            "predicted_overlap": r(predicted_overlap).tolist(),
+            "is_ideal_overlap": (predicted_overlap >= util.IDEAL_OVERLAP).tolist(),
+            "abrupt_change_flag": abrupt_change_flag.tolist(),
+            "gimbal_angular_velocity": r(gimbal_angular_velocity).tolist(),
+            "orthorectification_potential": ortho_potential.tolist(),
+            "vertical_stability": r(vertical_stability).tolist(),
+            "speed_variation_index": r(speed_variation_index).tolist(),
+            "rtk_stability_score": r(rtk_stability_score).tolist(),
+            "capture_efficiency": r(geo_ratio).tolist(),
+            "photogrammetry_quality_index": photogrammetry_quality_index.tolist(),
+            "next_time_since": next_seq["time_since"].tolist(),
+            "next_geodesic_distance": next_seq["geodesic_distance"].tolist(),
+            "next_distance_3d": next_seq["distance_3d"].tolist(),
+            "next_avg_velocity": next_seq["avg_velocity"].tolist(),
+            "next_displacement_direction": next_seq["displacement_direction"].tolist(),
+            "is_valid_sequence_prev": valid_prev.tolist(),
+            "is_valid_sequence_next": valid_next.tolist(),
+            "voo_id": voo,
+            "GimbalOffset": r(gimbal_offset).tolist(),
+            "3DSpeed": r(speed_3d).tolist(),
+            "speed_3d_kmh": r(speed_3d * 3.6, 1).tolist(),
+            "yaw_alignment_error": yaw_alignment_error.tolist(),
+            "time_since_previous": prev_time.tolist(),
+            "geodesic_distance_previous": prev_geo.tolist(),
+            "distance_3d_previous": prev_seq["distance_3d"].tolist(),
+            "avg_velocity_between_photos": prev_seq["avg_velocity"].tolist(),
+            "displacement_direction": prev_dir.tolist(),
+            "estimated_coverage": list(zip(coverage_width.tolist(), coverage_height.tolist())),
+            "trajectory_smoothness": r(trajectory_smoothness).tolist(),
+            "strip_id": strip_id.tolist(),
+            "light_source_classification": light_labels,
+            "light_consistency": light_consistency,
+        }
@@ -44,6 +44,50 @@ class CustomPhotosFieldsUtil:
     BLUR_THRESHOLD = 0.5  # motion blur in pixels
     COVERAGE_FACTOR = 1.45  # approx for 84Â° HFOV
     STRIP_CHANGE_THRESHOLD = 150  # degrees
+    # rtk_effective_precision, da melhor para a pior
+    RTK_PRECISION_LABELS = ("Alta", "MÃ©dia", "Baixa", "Sem RTK")
+
+    # Motor padrao do calculate_all_custom_fields: "auto" usa o NumPy quando
+    # instalado e o escalar quando nao ha NumPy ou o lote nao e suportado;
+    # "numpy" exige o NumPy; "scalar" nunca o usa.
+    ENGINE = "auto"
+
+    # Campos da foto lidos no calculo (chaves do MetadataFields); com
+    # projecao de campos (PhotoMetadata) entram sempre que houver CUSTOM.
+    INPUT_KEYS = (
+        "DateTimeOriginal",
+        "DroneSerialNumber",
+        "CameraSerialNumber",
+        "AbsoluteAltitude",
+        "ShutterCount",
+        "LRFTargetDistance",
+        "LRFTargetLat",
+        "LRFTargetLon",
+        "GpsLatitude",
+        "GpsLongitude",
+        "FocalLength",
+        "ExifImageWidth",
+        "ExifImageHeight",
+        "SensorTemperature",
+        "LensTemperature",
+        "FlightXSpeed",
+        "FlightYSpeed",
+        "FlightZSpeed",
+        "ExposureTime",
+        "FNumber",
+        "GimbalYawDegree",
+        "FlightYawDegree",
+        "GimbalPitchDegree",
+        "FlightPitchDegree",
+        "LightSource",
+        "WhiteBalanceCCT",
+        "RtkFlag",
+        "RtkStdLon",
+        "RtkStdLat",
+        "RtkStdHgt",
+        "RtkDiffAge",
+        "DewarpFlag",
+    )
 
     @staticmethod
     def safe_float(val: any, default: float = 0.0) -> float:
@@ -67,11 +111,16 @@ class CustomPhotosFieldsUtil:
     @staticmethod
     def get_voo_id(data: Dict) -> str:
         """VOO_ID = drone_sn[:8] + camera_sn[:8] + YYYY-MM-DD."""
+        return CustomPhotosFieldsUtil.voo_id_at(
+            data, CustomPhotosFieldsUtil.parse_datetime(data["DateTimeOriginal"])
+        )
+
+    @staticmethod
+    def voo_id_at(data: Dict, dt: datetime) -> str:
+        """`get_voo_id` com o DateTimeOriginal ja convertido (`parse_datetime`)."""
         drone_sn = data.get("DroneSerialNumber", "UNKNOWN")
         camera_sn = data.get("CameraSerialNumber", "UNKNOWN")
-        date_str = CustomPhotosFieldsUtil.parse_datetime(data["DateTimeOriginal"]).strftime(
-            "%Y-%m-%d"
-        )
+        date_str = dt.strftime("%Y-%m-%d")
         return f"{drone_sn[:8]}_{camera_sn[:8]}_{date_str}"
 
     @staticmethod
@@ -391,14 +440,15 @@ class CustomPhotosFieldsUtil:
         ]
         avg_std = sum(rtk_stds) / 3
 
+        high, medium, low, no_rtk = CustomPhotosFieldsUtil.RTK_PRECISION_LABELS
         if rtk_flag == "50" and avg_std < 0.02:
-            rtk_prec = "Alta"
+            rtk_prec = high
         elif avg_std < 0.1:
-            rtk_prec = "MÃ©dia"
+            rtk_prec = medium
         elif avg_std < 1.0:
-            rtk_prec = "Baixa"
+            rtk_prec = low
         else:
-            rtk_prec = "Sem RTK"
+            rtk_prec = no_rtk
 
         prev_avg_std = 0.0
         rtk_stability_score = 0.0
@@ -432,7 +482,7 @@ class CustomPhotosFieldsUtil:
 
         # Ortho score
         score = 0
-        if rtk_prec == "Alta":
+        if rtk_prec == high:
             score += 30
         if inc_angle < 5:
             score += 25
@@ -516,8 +566,16 @@ class CustomPhotosFieldsUtil:
         cls,
         metadata_dict: Dict[str, Dict],
         tool_key: str = ToolKey.UNTRACEABLE,
+        engine: Optional[str] = None,
     ) -> Dict[str, Dict]:
-        """Orquestra todos calculos custom."""
+        """
+        Orquestra todos calculos custom.
+
+        `engine` ("auto", "numpy" ou "scalar"; padrao `ENGINE`) escolhe o
+        motor: o NumPy (`CustomPhotosFieldsNumpy`) calcula em colunas e bate
+        com o escalar dentro da tolerancia de ponto flutuante. Entrada que o
+        motor NumPy nao trata volta para o escalar.
+        """
         logger = cls._get_logger(tool_key)
         logger.debug(
             f"Iniciando calculo de campos custom para {len(metadata_dict) if metadata_dict else 0} fotos"
@@ -525,6 +583,30 @@ class CustomPhotosFieldsUtil:
         if not metadata_dict:
             return {}
 
+        engine = engine or cls.ENGINE
+        if engine not in ("auto", "numpy", "scalar"):
+            raise ValueError(f"Motor de campos custom desconhecido: {engine}")
+        if engine != "scalar":
+            from .CustomPhotosFieldsNumpy import CustomPhotosFieldsNumpy
+
+            if CustomPhotosFieldsNumpy.available():
+                try:
+                    return CustomPhotosFieldsNumpy.calculate_all_custom_fields(metadata_dict)
+                except Exception as exc:
+                    logger.debug(
+                        "Motor NumPy indisponivel para o lote; usando o escalar",
+                        code="CUSTOM_FIELDS_NUMPY_FALLBACK",
+                        photos=len(metadata_dict),
+                        error=str(exc),
+                    )
+            elif engine == "numpy":
+                raise ImportError("NumPy nao instalado: motor 'numpy' indisponivel")
+
+        return cls._calculate_all_custom_fields_scalar(metadata_dict)
+
+    @classmethod
+    def _calculate_all_custom_fields_scalar(cls, metadata_dict: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Motor escalar (uma foto por vez, `math`)."""
         # Ordenar por datetime
         sorted_items = sorted(
             metadata_dict.items(),
@@ -3,12 +3,19 @@
 Utilities para extracao de metadados EXIF/OS/PIL de imagens.
 """
 
+import math
 import os
+import re
+import struct
 from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional
 
-from PIL import ExifTags, Image
+from PIL import ExifTags, Image, TiffImagePlugin, TiffTags
 
 from ...core.config.LogUtils import LogUtils
+from ...core.model.JpegHeader import JpegHeader
+from ...core.model.JpegHeaderReader import JpegHeaderReader
 from ..ToolKeys import ToolKey
 from .MetadataFields import MetadataFields
 
@@ -16,13 +23,52 @@ from .MetadataFields import MetadataFields
 class ExifUtil:
     """Utilitario para extrair metadados de arquivo de imagem."""
 
+    _JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+    _XMP_ORIENTATION_RE = re.compile(rb'tiff:Orientation(="|>)([0-9])')
+
     @staticmethod
     def _get_logger(tool_key: str = ToolKey.UNTRACEABLE) -> LogUtils:
         return LogUtils(tool=tool_key, class_name="ExifUtil")
 
     @staticmethod
-    def extract_metadata_os(
+    def read_header(
         image_path: str, tool_key: str = ToolKey.UNTRACEABLE
+    ) -> Optional[JpegHeader]:
+        """
+        Le o cabecalho JPEG (ate o SOS) uma unica vez, para os
+        `extract_metadata_*` e o `XmpUtil.extract_metadata` via `header=`.
+
+        Retorna None quando o arquivo deve seguir pelo PIL: nao e JPEG, esta
+        truncado ou tem um layout que o PIL nao abre (bits/componentes).
+        """
+        try:
+            header = JpegHeaderReader.read(image_path)
+            if header is None or not ExifUtil._is_pil_compatible(header):
+                return None
+            JpegHeaderReader.parse_exif(header)
+            return header
+        except (OSError, ValueError, struct.error) as exc:
+            ExifUtil._get_logger(tool_key).debug(
+                "Cabecalho JPEG ilegivel; usando PIL",
+                code="JPEG_HEADER_FALLBACK",
+                path=image_path,
+                error=str(exc),
+            )
+            return None
+
+    @staticmethod
+    def _is_pil_compatible(header: JpegHeader) -> bool:
+        return (
+            header.width is not None
+            and header.bits == 8
+            and header.components in ExifUtil._JPEG_MODES
+        )
+
+    @staticmethod
+    def extract_metadata_os(
+        image_path: str,
+        tool_key: str = ToolKey.UNTRACEABLE,
+        header: Optional[JpegHeader] = None,
     ) -> dict:
         """
         Extrai metadados do sistema operacional.
@@ -32,11 +78,13 @@ class ExifUtil:
         - Path: caminho completo (era "path")
         - SizeMb: tamanho em MB (era "size_mb")
         - DateTime: data do sistema operacional (era "os_date")
+
+        Com `header` (de `read_header`) usa o stat ja lido.
         """
         logger = ExifUtil._get_logger(tool_key)
         data = {}
         try:
-            stat = os.stat(image_path)
+            stat = header.stat if header is not None else os.stat(image_path)
             data["File"] = os.path.basename(image_path)
             data["Path"] = image_path
             data["SizeMb"] = round(stat.st_size / (1024 * 1024), 2)
@@ -51,7 +99,9 @@ class ExifUtil:
 
     @staticmethod
     def extract_metadata_image(
-        image_path: str, tool_key: str = ToolKey.UNTRACEABLE
+        image_path: str,
+        tool_key: str = ToolKey.UNTRACEABLE,
+        header: Optional[JpegHeader] = None,
     ) -> dict:
         """
         Extrai metadados de dimensao/formato/dpi via PIL.
@@ -61,10 +111,22 @@ class ExifUtil:
         - ExifImageHeight: altura em pixels (era "height_px")
         - Format: formato_modo (era "format")
         - DPIWidth: DPI horizontal (era "dpi")
+
+        Com `header` os valores vem do SOF/JFIF/EXIF, com as mesmas regras
+        do PIL, sem abrir a imagem de novo.
         """
         logger = ExifUtil._get_logger(tool_key)
         data = {}
         try:
+            if header is not None:
+                data["ExifImageWidth"] = header.width
+                data["ExifImageHeight"] = header.height
+                image_format = "MPO" if header.is_mpo else "JPEG"
+                data["Format"] = f"{image_format}_{ExifUtil._JPEG_MODES[header.components]}"
+                dpi = ExifUtil._header_dpi(header)
+                if dpi:
+                    data["DPIWidth"], data["DPIHeight"] = dpi
+                return data
             with Image.open(image_path) as img:
                 data["ExifImageWidth"], data["ExifImageHeight"] = img.size
                 data["Format"] = f"{img.format}_{img.mode}"
@@ -79,40 +141,170 @@ class ExifUtil:
 
     @staticmethod
     def extract_metadata_exif(
-        image_path: str, tool_key: str = ToolKey.UNTRACEABLE
+        image_path: str,
+        tool_key: str = ToolKey.UNTRACEABLE,
+        header: Optional[JpegHeader] = None,
+        fields: Optional[Iterable[str]] = None,
     ) -> dict:
         """
         Extrai e sanitiza campos EXIF disponiveis.
         
         Apenas campos autorizados em MetadataFields sao retornados.
         Campos nao autorizados sao descartados (log em DEBUG).
+
+        Com `header` os IFDs ja lidos sao convertidos como o
+        `_getexif()` do PIL faria.
+
+        Com `fields` (chaves do MetadataFields) so as tags desses campos sao
+        decodificadas e sanitizadas; os valores sao os mesmos.
         """
         logger = ExifUtil._get_logger(tool_key)
         data = {}
+        projection = (
+            ExifUtil._projected_tags(frozenset(fields)) if fields is not None else None
+        )
         try:
-            with Image.open(image_path) as img:
-                exif_raw = img._getexif() or {}
-                exif = {ExifTags.TAGS.get(k, k): v for k, v in exif_raw.items()}
-                
-                # Expande GPSInfo para chaves individuais (GPSLatitude, GPSLongitude, GPSMapDatum, etc.).
-                gps_info = exif.get("GPSInfo")
-                if isinstance(gps_info, dict):
-                    gps_named = {
-                        ExifTags.GPSTAGS.get(k, k): v for k, v in gps_info.items()
-                    }
-                    for gk, gv in gps_named.items():
-                        exif[gk] = gv
-                
-                # SANITIZA campos EXIF contra MetadataFields
-                for key, value in exif.items():
-                    canonical_name = MetadataFields.sanitize_field_name(str(key))
-                    if canonical_name:
-                        data[canonical_name] = value
-                    else:
-                        # Campo nao autorizado - log em DEBUG
-                        logger.debug(f"Campo EXIF rejeitado (nao autorizado): {key}")
+            if header is not None:
+                exif_raw = ExifUtil._header_exif(header, projection)
+            else:
+                with Image.open(image_path) as img:
+                    exif_raw = img._getexif() or {}
+            exif = {ExifTags.TAGS.get(k, k): v for k, v in exif_raw.items()}
+            
+            # Expande GPSInfo para chaves individuais (GPSLatitude, GPSLongitude, GPSMapDatum, etc.).
+            gps_info = exif.get("GPSInfo")
+            if isinstance(gps_info, dict):
+                gps_named = {
+                    ExifTags.GPSTAGS.get(k, k): v for k, v in gps_info.items()
+                }
+                for gk, gv in gps_named.items():
+                    exif[gk] = gv
+            
+            # SANITIZA campos EXIF contra MetadataFields
+            names = projection[2] if projection is not None else None
+            for key, value in exif.items():
+                if names is not None and key not in names:
+                    continue
+                canonical_name = MetadataFields.sanitize_field_name(str(key))
+                if canonical_name:
+                    data[canonical_name] = value
+                else:
+                    # Campo nao autorizado - log em DEBUG
+                    logger.debug(f"Campo EXIF rejeitado (nao autorizado): {key}")
                         
         except Exception as exc:
             logger.warning(f"Erro ao extrair EXIF de {image_path}: {exc}")
         
         return data
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _projected_tags(fields: frozenset) -> tuple:
+        """
+        (tags IFD0/Exif, tags GPS, nomes) dos campos em `fields`. Os
+        ponteiros Exif/GPSInfo entram para que os IFDs sejam seguidos.
+        """
+        base = {
+            tag for tag, name in ExifTags.TAGS.items()
+            if MetadataFields.source_key(name) in fields
+        }
+        gps = {
+            tag for tag, name in ExifTags.GPSTAGS.items()
+            if MetadataFields.source_key(name) in fields
+        }
+        names = {ExifTags.TAGS[tag] for tag in base}
+        names |= {ExifTags.GPSTAGS[tag] for tag in gps}
+        base.add(ExifTags.IFD.Exif)
+        if gps:
+            base.add(ExifTags.IFD.GPSInfo)
+        return frozenset(base), frozenset(gps), frozenset(names)
+
+    # -----------------------------
+    # Cabecalho JPEG -> valores do PIL
+    # -----------------------------
+
+    @staticmethod
+    def _header_ifd(
+        header: JpegHeader,
+        name: str,
+        group: Optional[int] = None,
+        tags: Optional[frozenset] = None,
+    ) -> dict:
+        """
+        IFD de `header.directories` com os tipos/formatos do `getexif()`;
+        com `tags`, so essas entradas sao decodificadas.
+        """
+        entries = header.directories.get(name, {})
+        values = {}
+        # O PIL itera os IFDs como conjunto: mesma ordem de chaves
+        for tag in set(entries):
+            if tags is not None and tag not in tags:
+                continue
+            typ, quantity, raw, _ = entries[tag]
+            value = JpegHeaderReader.decode_value(
+                typ, quantity, raw, header.byte_order,
+                rational=TiffImagePlugin.IFDRational,
+            )
+            info = TiffTags.lookup(tag, group)
+            if isinstance(value, tuple) and info.length == 1:
+                value = value[0]
+            elif isinstance(value, str):
+                value = info.cvt_enum(value)
+            values[tag] = value
+        return values
+
+    @staticmethod
+    def _header_ifd0(header: JpegHeader, tags: Optional[frozenset] = None) -> dict:
+        ifd0 = ExifUtil._header_ifd(header, "ifd0", tags=tags)
+        # Como `Image.getexif()`: Orientation do XMP quando falta no EXIF
+        wanted = tags is None or ExifTags.Base.Orientation in tags
+        if wanted and ExifTags.Base.Orientation not in ifd0 and header.xmp:
+            match = ExifUtil._XMP_ORIENTATION_RE.search(header.xmp)
+            if match:
+                ifd0[ExifTags.Base.Orientation] = int(match[2])
+        return ifd0
+
+    @staticmethod
+    def _header_exif(header: JpegHeader, projection: Optional[tuple] = None) -> dict:
+        """
+        Equivalente a `img._getexif()` (IFD0 + Exif + GPSInfo aninhado);
+        `projection` (de `_projected_tags`) limita as tags decodificadas.
+        """
+        if header.exif is None:
+            return {}
+        base, gps = projection[:2] if projection is not None else (None, None)
+        merged = ExifUtil._header_ifd0(header, base)
+        if ExifTags.IFD.Exif in merged:
+            merged.update(
+                ExifUtil._header_ifd(header, "exif", ExifTags.IFD.Exif, base)
+            )
+        if ExifTags.IFD.GPSInfo in merged:
+            merged[ExifTags.IFD.GPSInfo] = (
+                ExifUtil._header_ifd(header, "gps", ExifTags.IFD.GPSInfo, gps)
+                if "gps" in header.directories
+                else None
+            )
+        return merged
+
+    @staticmethod
+    def _header_dpi(header: JpegHeader) -> Optional[tuple]:
+        """`img.info["dpi"]`: JFIF e, sem ele, XResolution/ResolutionUnit."""
+        if header.jfif_unit == 1:
+            return header.jfif_density
+        if header.jfif_unit == 2:
+            return tuple(d * 2.54 for d in header.jfif_density)
+        if header.exif is None:
+            return None
+        ifd0 = ExifUtil._header_ifd0(header)
+        try:
+            resolution_unit = ifd0[ExifTags.Base.ResolutionUnit]
+            dpi = ifd0[ExifTags.Base.XResolution]
+            if isinstance(dpi, tuple):
+                dpi = float(dpi[0]) / dpi[1]
+            if math.isnan(dpi):
+                raise ValueError("DPI is not a number")
+            if resolution_unit == 3:
+                dpi *= 2.54
+            return dpi, dpi
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            return 72, 72
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+from ...core.model.Field import Field
+
+
+class MetadataFieldIndex:
+    """
+    Índice compilado do catálogo do `MetadataFields`, montado uma vez por
+    versão do catálogo (`MetadataFields.field_index()`).
+
+    Tabelas imutáveis (hash):
+    - `fields` (chave -> Field), `attribute_to_key`, `key_to_attribute`;
+    - `lower_to_attribute`: busca sem diferenciar maiúsculas; o primeiro
+      campo do catálogo vale, como na varredura linear que substitui;
+    - `aliases`: nomes de sistema/variantes (`arquivo`, `createdate`...).
+
+    Cada resolução (`sanitize`, `resolve_key`, `candidates`, `record_key`,
+    `source_key`) é pré-calculada para as chaves e atributos do catálogo;
+    nomes fora dele são calculados uma vez e guardados num LRU
+    (`UNKNOWN_CACHE_SIZE`). As regras são as mesmas de antes: só a busca
+    deixou de ser linear.
+
+    `record_plan` faz o mesmo por formato de registro (tupla ordenada das
+    chaves): as fotos de um mesmo equipamento têm as mesmas chaves, então
+    o mapeamento do registro inteiro sai do cache (`PLAN_CACHE_SIZE`).
+    """
+
+    UNKNOWN_CACHE_SIZE = 8192
+    PLAN_CACHE_SIZE = 256
+
+    def __init__(
+        self,
+        fields: Dict[str, Field],
+        aliases: Mapping[str, str],
+        namespace_prefixes: Iterable[str],
+        pascal_case: Callable[[str], str],
+        version: Hashable = None,
+    ):
+        self.version = version
+        self.fields = MappingProxyType(dict(fields))
+        self.attribute_to_key = MappingProxyType(
+            {field.attribute: key for key, field in fields.items()}
+        )
+        self.key_to_attribute = MappingProxyType(
+            {key: field.attribute for key, field in fields.items()}
+        )
+        lower_to_attribute = {}
+        for key, field in fields.items():
+            lower_to_attribute.setdefault(key.lower(), field.attribute)
+        self.lower_to_attribute = MappingProxyType(lower_to_attribute)
+        self.aliases = MappingProxyType(dict(aliases))
+        self.namespace_prefixes = tuple(namespace_prefixes)
+        self._pascal_case = pascal_case
+
+        known = (*self.fields, *(a for a in self.attribute_to_key if a))
+        self.sanitize = self._memoized(self._sanitize, known)
+        self.resolve_key = self._memoized(self._resolve_key, known)
+        self.candidates = self._memoized(self._candidates, known)
+        self.record_key = self._memoized(self._record_key, known)
+        self.source_key = self._memoized(self._source_key, known)
+        self.record_plan = lru_cache(maxsize=self.PLAN_CACHE_SIZE)(self._record_plan)
+
+    def _memoized(self, compute: Callable, known: Iterable[str]) -> Callable:
+        precomputed = MappingProxyType({name: compute(name) for name in known})
+        unknown = lru_cache(maxsize=self.UNKNOWN_CACHE_SIZE, typed=True)(compute)
+
+        def lookup(name):
+            try:
+                return precomputed[name]
+            except KeyError:
+                return unknown(name)
+
+        return lookup
+
+    # -----------------------------
+    # Regras (mesmas do MetadataFields)
+    # -----------------------------
+
+    def _sanitize(self, raw_field_name: str) -> Optional[str]:
+        if not raw_field_name or not isinstance(raw_field_name, str):
+            return None
+
+        normalized = raw_field_name.strip()
+        for prefix in self.namespace_prefixes:
+            if normalized.startswith(prefix):
+                normalized = normalized[len(prefix):]
+                break
+
+        normalized_lower = normalized.lower()
+        if normalized_lower in self.aliases:
+            return self.aliases[normalized_lower]
+
+        if normalized in self.fields:
+            return self.fields[normalized].attribute
+
+        if normalized_lower in self.lower_to_attribute:
+            return self.lower_to_attribute[normalized_lower]
+
+        pascal_case = self._pascal_case(normalized.replace(" ", "_").replace("-", "_"))
+        return self.lower_to_attribute.get(pascal_case.lower())
+
+    def _resolve_key(self, key_or_attribute: str) -> str:
+        if not key_or_attribute:
+            return key_or_attribute
+
+        if key_or_attribute in self.fields:
+            return key_or_attribute
+
+        if key_or_attribute in self.attribute_to_key:
+            return self.attribute_to_key[key_or_attribute]
+
+        candidate = self._pascal_case(key_or_attribute)
+        if candidate in self.fields:
+            return candidate
+
+        return key_or_attribute
+
+    def _candidates(self, key_or_attribute: str) -> Tuple[str, ...]:
+        if not key_or_attribute:
+            return ()
+
+        raw = str(key_or_attribute).strip()
+        if not raw:
+            return ()
+
+        out = []
+
+        def _push(value: str):
+            if value and value not in out:
+                out.append(value)
+
+        _push(raw)
+        _push(self.resolve_key(raw))
+
+        parts = [p for p in raw.split(":") if p]
+        if len(parts) > 1:
+            tail = parts[-1]
+            _push(tail)
+            _push(self.resolve_key(tail))
+
+        pascal = self._pascal_case(raw)
+        _push(pascal)
+        _push(self.resolve_key(pascal))
+
+        if len(parts) > 1:
+            tail_pascal = self._pascal_case(parts[-1])
+            _push(tail_pascal)
+            _push(self.resolve_key(tail_pascal))
+
+        return tuple(candidate for candidate in out if candidate in self.fields)
+
+    def _record_key(self, key_or_attribute: str) -> str:
+        candidates = self.candidates(key_or_attribute)
+        return candidates[0] if candidates else self.resolve_key(key_or_attribute)
+
+    def _source_key(self, raw_field_name: str) -> Optional[str]:
+        attribute = self.sanitize(raw_field_name)
+        if attribute is None:
+            return None
+        return self.record_key(attribute)
+
+    def _record_plan(self, signature: Tuple[Hashable, ...]) -> Tuple[Tuple[str, ...], bool]:
+        """
+        (chave de destino de cada nome de `signature`, destinos todos
+        distintos). Com destinos repetidos o registro precisa da mesclagem
+        do `MetadataFields.normalize_record_to_keys`.
+        """
+        targets = tuple(self.record_key(name) for name in signature)
+        return targets, len(set(targets)) == len(targets)
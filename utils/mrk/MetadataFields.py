@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from ...core.model.Field import Field
 from ..adapter.StringAdapter import StringAdapter
 from ...core.enum import MetadataFieldKey
+from .MetadataFieldIndex import MetadataFieldIndex
 
 
 class MetadataFields:
@@ -1004,16 +1005,146 @@ class MetadataFields:
             description="Segundo nivel de pasta no caminho do MRK. [Folder2]",
             level=5,
         ),
+        MetadataFieldKey.GPS_SOW: Field(
+            normalized="MRK:GpsSow",
+            core="mrk",
+            label="GPS Seconds of Week",
+            attribute="GpsSow",
+            description="Segundos da semana GPS do disparo, lidos do MRK. [GpsSow]",
+            level=5,
+        ),
+        MetadataFieldKey.GPS_WEEK: Field(
+            normalized="MRK:GpsWeek",
+            core="mrk",
+            label="GPS Week",
+            attribute="GpsWeek",
+            description="Semana GPS do disparo, lida do MRK. [GpsWeek]",
+            level=5,
+        ),
+        MetadataFieldKey.OFFSET_N: Field(
+            normalized="MRK:OffsetN",
+            core="mrk",
+            label="RTK Offset North",
+            attribute="OffsetN",
+            description="Deslocamento Norte (mm) da antena RTK em relacao a camera, lido do MRK. [OffsetN]",
+            level=5,
+        ),
+        MetadataFieldKey.OFFSET_E: Field(
+            normalized="MRK:OffsetE",
+            core="mrk",
+            label="RTK Offset East",
+            attribute="OffsetE",
+            description="Deslocamento Leste (mm) da antena RTK em relacao a camera, lido do MRK. [OffsetE]",
+            level=5,
+        ),
+        MetadataFieldKey.OFFSET_V: Field(
+            normalized="MRK:OffsetV",
+            core="mrk",
+            label="RTK Offset Vertical",
+            attribute="OffsetV",
+            description="Deslocamento vertical (mm) da antena RTK em relacao a camera, lido do MRK. [OffsetV]",
+            level=5,
+        ),
+        MetadataFieldKey.STD_N: Field(
+            normalized="MRK:StdN",
+            core="mrk",
+            label="RTK Std North",
+            attribute="StdN",
+            description="Desvio padrao Norte (m) da posicao RTK, lido do MRK. [StdN]",
+            level=5,
+        ),
+        MetadataFieldKey.STD_E: Field(
+            normalized="MRK:StdE",
+            core="mrk",
+            label="RTK Std East",
+            attribute="StdE",
+            description="Desvio padrao Leste (m) da posicao RTK, lido do MRK. [StdE]",
+            level=5,
+        ),
+        MetadataFieldKey.STD_V: Field(
+            normalized="MRK:StdV",
+            core="mrk",
+            label="RTK Std Vertical",
+            attribute="StdV",
+            description="Desvio padrao vertical (m) da posicao RTK, lido do MRK. [StdV]",
+            level=5,
+        ),
+        MetadataFieldKey.FIX_FLAG: Field(
+            normalized="MRK:FixFlag",
+            core="mrk",
+            label="RTK Fix Flag",
+            attribute="FixFlag",
+            description="Flag da solucao no MRK: 50 fixo, 34 flutuante, 16 simples, 0 sem posicao. [FixFlag]",
+            level=5,
+        ),
     }
 
+    # Prefixos removidos por `sanitize_field_name`
+    SANITIZE_NAMESPACE_PREFIXES = (
+        "xmp:",
+        "drone-dji:",
+        "crs:",
+        "tiff:",
+        "rdf:",
+        "EXIF:",
+        "GPS:",
+    )
+
+    # Mapeamento especial para campos de sistema (nome em minusculas)
+    SYSTEM_FIELD_ALIASES = {
+        "arquivo": "File",
+        "caminho": "Path",
+        "tamanho_mb": "SizeMb",
+        "data_criacao": "DateTime",
+        "dt_criacao": "DateTime",
+        "os_date": "DateTime",
+        "folder_path": "FolderLevel1",
+        "voo_id": "FlightNumber",
+        "width_px": "ExifImageWidth",
+        "height_px": "ExifImageHeight",
+        "coverage_width": "EstimatedCoverage",
+        # Variantes de nomes EXIF brutos
+        "gpsstatus": "GpsStatus",
+        "gpsversion": "GpsStatus",
+        # Variantes de datas
+        "createdate": "DateTime",
+        "modifydate": "DateTime",
+    }
+
+    _field_index: Optional[MetadataFieldIndex] = None
+
+    @classmethod
+    def _catalog_version(cls) -> tuple:
+        catalogs = (cls.EXIF_FIELDS, cls.DJI_XMP_FIELDS, cls.CUSTOM_FIELDS, cls.MRK_FIELDS)
+        return tuple((id(catalog), len(catalog)) for catalog in catalogs)
+
+    @classmethod
+    def field_index(cls) -> MetadataFieldIndex:
+        """
+        Indice compilado do catalogo (ver `MetadataFieldIndex`); refeito so
+        quando algum dos catalogos e trocado ou muda de tamanho.
+        """
+        version = cls._catalog_version()
+        index = cls._field_index
+        if index is None or index.version != version:
+            fields: Dict[str, Field] = {}
+            fields.update({key.value: field for key, field in cls.EXIF_FIELDS.items()})
+            fields.update({key.value: field for key, field in cls.DJI_XMP_FIELDS.items()})
+            fields.update({key.value: field for key, field in cls.CUSTOM_FIELDS.items()})
+            fields.update({key.value: field for key, field in cls.MRK_FIELDS.items()})
+            index = MetadataFieldIndex(
+                fields,
+                aliases=cls.SYSTEM_FIELD_ALIASES,
+                namespace_prefixes=cls.SANITIZE_NAMESPACE_PREFIXES,
+                pascal_case=cls._to_pascal_case,
+                version=version,
+            )
+            cls._field_index = index
+        return index
+
     @classmethod
     def all_fields(cls) -> Dict[str, Field]:
-        fields: Dict[str, Field] = {}
-        fields.update({key.value: field for key, field in cls.EXIF_FIELDS.items()})
-        fields.update({key.value: field for key, field in cls.DJI_XMP_FIELDS.items()})
-        fields.update({key.value: field for key, field in cls.CUSTOM_FIELDS.items()})
-        fields.update({key.value: field for key, field in cls.MRK_FIELDS.items()})
-        return fields
+        return dict(cls.field_index().fields)
 
     @staticmethod
     def _to_pascal_case(value: str) -> str:
@@ -1046,7 +1177,7 @@ class MetadataFields:
 
     @classmethod
     def key_to_attribute_map(cls) -> Dict[str, str]:
-        return {key.value: field.attribute for key, field in cls.all_fields().items()}
+        return dict(cls.field_index().key_to_attribute)
 
     @classmethod
     def sanitize_field_name(cls, raw_field_name: str) -> Optional[str]:
@@ -1065,76 +1196,16 @@ class MetadataFields:
         Returns:
             Nome canonizado do atributo se mapeado com sucesso, None caso contrario
         """
-        if not raw_field_name or not isinstance(raw_field_name, str):
-            return None
-
-        # Remove espacos
-        normalized = raw_field_name.strip()
-
-        # Remove prefixos de namespace
-        namespace_prefixes = (
-            "xmp:",
-            "drone-dji:",
-            "crs:",
-            "tiff:",
-            "rdf:",
-            "EXIF:",
-            "GPS:",
-        )
-        for prefix in namespace_prefixes:
-            if normalized.startswith(prefix):
-                normalized = normalized[len(prefix) :]
-                break
-
-        # Mapeamento especial para campos de sistema
-        field_mappings = {
-            "arquivo": "File",
-            "caminho": "Path",
-            "tamanho_mb": "SizeMb",
-            "data_criacao": "DateTime",
-            "dt_criacao": "DateTime",
-            "os_date": "DateTime",
-            "folder_path": "FolderLevel1",
-            "voo_id": "FlightNumber",
-            "width_px": "ExifImageWidth",
-            "height_px": "ExifImageHeight",
-            "coverage_width": "EstimatedCoverage",
-            # Variantes de nomes EXIF brutos
-            "gpsstatus": "GpsStatus",
-            "gpsversion": "GpsStatus",
-            # Variantes de datas
-            "createdate": "DateTime",
-            "modifydate": "DateTime",
-        }
-
-        # Verifica mapemento especial (case-insensitive)
-        normalized_lower = normalized.lower()
-        if normalized_lower in field_mappings:
-            return field_mappings[normalized_lower]
-
-        # Tenta encontrar nos campos canonicos
-        all_fields_dict = cls.all_fields()
+        return cls.field_index().sanitize(raw_field_name)
 
-        # Primeiro: busca exata (case-sensitive)
-        if normalized in all_fields_dict:
-            return all_fields_dict[normalized].attribute
-
-        # Segundo: busca case-insensitive
-        normalized_lower = normalized.lower()
-        for field_name, field_obj in all_fields_dict.items():
-            if field_name.lower() == normalized_lower:
-                return field_obj.attribute
-
-        # Terceiro: tenta conversao para PascalCase
-        pascal_case = cls._to_pascal_case(
-            normalized.replace(" ", "_").replace("-", "_")
-        )
-        for field_name, field_obj in all_fields_dict.items():
-            if field_name.lower() == pascal_case.lower():
-                return field_obj.attribute
-
-        # Nenhuma correspondencia encontrada
-        return None
+    @classmethod
+    def source_key(cls, raw_field_name: str) -> Optional[str]:
+        """
+        Chave canonica que um campo bruto (EXIF/XMP) recebe no registro
+        normalizado: `sanitize_field_name` seguido da mesma resolucao de
+        `normalize_record_to_keys`. None se o campo nao for autorizado.
+        """
+        return cls.field_index().source_key(raw_field_name)
 
     @classmethod
     def is_authorized_field(cls, field_name: str) -> bool:
@@ -1151,11 +1222,12 @@ class MetadataFields:
 
     @classmethod
     def attribute_to_key_map(cls) -> Dict[str, str]:
-        return {field.attribute: key for key, field in cls.all_fields().items()}
+        return dict(cls.field_index().attribute_to_key)
 
     @classmethod
     def get_field(cls, key: str) -> Optional[Field]:
-        return cls.all_fields().get(cls.resolve_key(key))
+        index = cls.field_index()
+        return index.fields.get(index.resolve_key(key))
 
     @classmethod
     def get_attribute(cls, key: str, default: Optional[str] = None) -> Optional[str]:
@@ -1166,20 +1238,7 @@ class MetadataFields:
 
     @classmethod
     def resolve_key(cls, key_or_attribute: str) -> str:
-        if not key_or_attribute:
-            return key_or_attribute
-
-        if key_or_attribute in cls.all_fields():
-            return key_or_attribute
-
-        if key_or_attribute in cls.attribute_to_key_map():
-            return cls.attribute_to_key_map()[key_or_attribute]
-
-        candidate = cls._to_pascal_case(key_or_attribute)
-        if candidate in cls.all_fields():
-            return candidate
-
-        return key_or_attribute
+        return cls.field_index().resolve_key(key_or_attribute)
 
     @classmethod
     def resolve_candidates(cls, key_or_attribute: str) -> List[str]:
@@ -1192,56 +1251,17 @@ class MetadataFields:
         - formatos com namespace/prefixo (ex.: `EXIF:SizeMb`, `xmp_bloco_1:drone-dji:GpsLatitude`)
         - variantes normalizadas em snake_case/PascalCase.
         """
-        if not key_or_attribute:
-            return []
-
-        raw = str(key_or_attribute).strip()
-        if not raw:
-            return []
-
-        seen = set()
-        out: List[str] = []
-
-        def _push(value: str):
-            if value and value not in seen:
-                seen.add(value)
-                out.append(value)
-
-        _push(raw)
-        _push(cls.resolve_key(raw))
-
-        # Se vier com namespace (EXIF:, MRK:, xmp_bloco_1:drone-dji:...), tenta sufixos.
-        parts = [p for p in raw.split(":") if p]
-        if len(parts) > 1:
-            tail = parts[-1]
-            _push(tail)
-            _push(cls.resolve_key(tail))
-
-        # Variantes por estilo de nome (snake -> Pascal etc.)
-        pascal = cls._to_pascal_case(raw)
-        _push(pascal)
-        _push(cls.resolve_key(pascal))
-
-        if len(parts) > 1:
-            tail_pascal = cls._to_pascal_case(parts[-1])
-            _push(tail_pascal)
-            _push(cls.resolve_key(tail_pascal))
-
-        # Mantem apenas candidatos que realmente existem no catalogo.
-        catalog = cls.all_fields()
-        return [candidate for candidate in out if candidate in catalog]
+        return list(cls.field_index().candidates(key_or_attribute))
 
     @classmethod
     def resolve_output_name(cls, key_or_attribute: str) -> str:
         if not key_or_attribute:
             return key_or_attribute
 
-        resolved_key = cls.resolve_key(key_or_attribute)
-        if resolved_key in cls.all_fields():
-            return cls.all_fields()[resolved_key].attribute
-
-        if key_or_attribute in cls.attribute_to_key_map():
-            return key_or_attribute
+        index = cls.field_index()
+        field = index.fields.get(index.resolve_key(key_or_attribute))
+        if field is not None:
+            return field.attribute
 
         return key_or_attribute
 
@@ -1257,10 +1277,11 @@ class MetadataFields:
         *,
         allowed_keys: Optional[Iterable[str]] = None,
     ) -> List[str]:
-        normalized = [cls.resolve_key(name) for name in (names or [])]
+        index = cls.field_index()
+        normalized = [index.resolve_key(name) for name in (names or [])]
         normalized = StringAdapter.unique_preserve_order(normalized)
         if allowed_keys is None:
-            return StringAdapter.filter_known_keys(normalized, cls.all_fields())
+            return [name for name in normalized if name in index.fields]
 
         allowed_set = set(allowed_keys)
         return [name for name in normalized if name in allowed_set]
@@ -1271,11 +1292,59 @@ class MetadataFields:
         Converte um registro com nomes de atributos de camada para chaves internas de metadata.
         Campos nao catalogados sao mantidos inalterados.
         """
-        normalized = {}
-        for key, value in (record or {}).items():
-            candidates = cls.resolve_candidates(key)
-            target_key = candidates[0] if candidates else cls.resolve_key(key)
+        record = record or {}
+        plan = cls.field_index().record_plan(tuple(record))
+        return cls._apply_record_plan(plan, record)
+
+    @classmethod
+    def normalize_records_to_keys(
+        cls, records: Iterable[Dict[str, object]]
+    ) -> List[Dict[str, object]]:
+        """
+        Versao em lote de `normalize_record_to_keys` (mesmo resultado, na mesma
+        ordem). Os registros sao agrupados pela assinatura (tupla ordenada das
+        chaves): o mapeamento e calculado uma vez por assinatura e aplicado a
+        todos os registros do grupo.
+        """
+        return list(cls.iter_records_to_keys(records))
 
+    @classmethod
+    def iter_records_to_keys(
+        cls, records: Iterable[Dict[str, object]]
+    ) -> Iterator[Dict[str, object]]:
+        """
+        Como `normalize_records_to_keys`, mas gerando um registro por vez:
+        quem grava em stream não precisa da lista normalizada inteira.
+        """
+        record_plan = cls.field_index().record_plan
+        plans = {}
+        for record in records:
+            record = record or {}
+            signature = tuple(record)
+            plan = plans.get(signature)
+            if plan is None:
+                plan = plans[signature] = record_plan(signature)
+            yield cls._apply_record_plan(plan, record)
+
+    @classmethod
+    def normalize_records_by_file(
+        cls, records_by_file: Dict[str, Dict[str, object]]
+    ) -> Dict[str, Dict[str, object]]:
+        """`normalize_records_to_keys` para registros por arquivo ({arquivo: registro})."""
+        records_by_file = records_by_file or {}
+        return dict(
+            zip(records_by_file, cls.normalize_records_to_keys(records_by_file.values()))
+        )
+
+    @staticmethod
+    def _apply_record_plan(plan: tuple, record: Dict[str, object]) -> Dict[str, object]:
+        """Aplica um `MetadataFieldIndex.record_plan` aos valores de `record`."""
+        targets, distinct = plan
+        if distinct:
+            return dict(zip(targets, record.values()))
+
+        normalized = {}
+        for target_key, value in zip(targets, record.values()):
             if target_key not in normalized:
                 normalized[target_key] = value
                 continue
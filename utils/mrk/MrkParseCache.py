@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+from ...core.config.LogUtils import LogUtils
+from ...core.model.MrkTokenizer import MrkTokenizer
+from ..ExplorerUtils import ExplorerUtils
+
+
+class MrkParseCache:
+    """
+    Cache persistente (SQLite) da leitura de MRKs e da validade das saídas.
+
+    Tabela `mrk_files`: colunas numéricas de cada MRK já lido
+    (`MrkFileReader.read_arrays`, uma coluna BLOB com os bytes da `array`
+    por nome de `MrkTokenizer.COLUMNS`). Os campos de texto saem do
+    nome/pasta do arquivo e são recalculados na hora.
+
+    Tabela `outputs`: identidade do MRK usado para gerar cada GPKG
+    (pontos/trilha) do `DroneCoordinatesRunner`.
+
+    Regras de validade (o MRK é identificado pelo caminho absoluto):
+    - tamanho e mtime iguais ao registrado: válido (sem ler o arquivo);
+    - tamanho igual e mtime diferente: compara o hash do conteúdo (blake2b);
+      igual, o registro é atualizado e continua válido (ex.: arquivo copiado);
+    - tamanho diferente, hash diferente ou `FORMAT_VERSION` antiga: inválido,
+      o MRK é lido de novo e o registro substituído;
+    - banco com `PRAGMA user_version` diferente de `FORMAT_VERSION` (colunas
+      mudaram): `mrk_files` é recriada vazia;
+    - saída sem registro (gerada antes do cache): válida só se for mais nova
+      que o MRK.
+
+    Falhas do SQLite (disco cheio, banco travado/corrompido) nunca quebram a
+    leitura: o cache é desativado e os MRKs são lidos normalmente.
+
+    O banco fica em `%TEMP%/cadmus/mrk_cache/mrk_cache.sqlite`.
+    """
+
+    CACHE_FOLDER = "mrk_cache"
+    DB_NAME = "mrk_cache.sqlite"
+    FORMAT_VERSION = 3
+    MAX_ENTRIES = 2000
+    _HASH_CHUNK = 1024 * 1024
+    _COLUMNS = MrkTokenizer.COLUMNS
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, tool_key: str = "MrkParseCache", db_path: Optional[str] = None):
+        self.tool_key = tool_key
+        self.db_path = db_path or os.path.join(
+            ExplorerUtils.get_temp_folder(tool_key, self.CACHE_FOLDER), self.DB_NAME
+        )
+        self.logger = LogUtils(tool=tool_key, class_name="MrkParseCache")
+        self._lock = threading.Lock()
+        self._disabled_reason = None
+        self._ready = False
+
+    @classmethod
+    def shared(cls) -> "MrkParseCache":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    # -----------------------------
+    # Identidade
+    # -----------------------------
+
+    @staticmethod
+    def normalize_path(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    @staticmethod
+    def identity(file_path: str) -> Optional[Tuple[int, int]]:
+        """(tamanho, mtime_ns) ou None se o arquivo não existir."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def content_hash(file_path: str) -> Optional[str]:
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(file_path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(MrkParseCache._HASH_CHUNK), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    # -----------------------------
+    # MRKs lidos
+    # -----------------------------
+
+    def lookup(self, file_path: str) -> Optional[Dict[str, array]]:
+        """Colunas numéricas do MRK se o registro ainda for válido; senão None."""
+        key = self.normalize_path(file_path)
+        identity = self.identity(file_path)
+        if identity is None:
+            return None
+
+        row = self._query_one(
+            "SELECT size, mtime_ns, content_hash, version, "
+            + ", ".join(name for name, _ in self._COLUMNS)
+            + " FROM mrk_files WHERE path = ?",
+            (key,),
+        )
+        if row is None:
+            return None
+
+        size, mtime_ns, content_hash, version = row[:4]
+        if version != self.FORMAT_VERSION or size != identity[0]:
+            return None
+        if mtime_ns != identity[1]:
+            if self.content_hash(file_path) != content_hash:
+                return None
+            self._execute(
+                "UPDATE mrk_files SET mtime_ns = ? WHERE path = ?", (identity[1], key)
+            )
+
+        arrays = {}
+        for (name, typecode), blob in zip(self._COLUMNS, row[4:]):
+            values = array(typecode)
+            values.frombytes(blob)
+            arrays[name] = values
+        return arrays
+
+    def store(
+        self,
+        file_path: str,
+        arrays: Dict[str, array],
+        identity: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """
+        Grava as colunas lidas. `identity` é a identidade tirada ANTES da
+        leitura: se o arquivo mudou durante a leitura, nada é gravado.
+        """
+        current = self.identity(file_path)
+        if current is None or (identity is not None and identity != current):
+            return
+        identity = current
+        names = [name for name, _ in self._COLUMNS]
+        self._execute(
+            "INSERT OR REPLACE INTO mrk_files "
+            f"(path, size, mtime_ns, content_hash, version, points, {', '.join(names)}, parsed_at) "
+            f"VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(names))}, ?)",
+            (
+                self.normalize_path(file_path),
+                identity[0],
+                identity[1],
+                self.content_hash(file_path),
+                self.FORMAT_VERSION,
+                len(arrays["foto"]),
+                *(arrays[name].tobytes() for name in names),
+                time.time(),
+            ),
+        )
+        self._execute(
+            "DELETE FROM mrk_files WHERE path IN ("
+            "SELECT path FROM mrk_files ORDER BY parsed_at DESC LIMIT -1 OFFSET ?)",
+            (self.MAX_ENTRIES,),
+        )
+
+    def invalidate(self, file_path: str) -> None:
+        self._execute(
+            "DELETE FROM mrk_files WHERE path = ?", (self.normalize_path(file_path),)
+        )
+
+    # -----------------------------
+    # Saídas geradas a partir de MRKs
+    # -----------------------------
+
+    def record_output(self, output_path: str, source_path: str) -> None:
+        """Registra que `output_path` foi gerado a partir do MRK atual."""
+        identity = self.identity(source_path)
+        if identity is None or not os.path.isfile(output_path):
+            return
+        self._execute(
+            "INSERT OR REPLACE INTO outputs "
+            "(output_path, source_path, size, mtime_ns, content_hash, written_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.normalize_path(output_path),
+                self.normalize_path(source_path),
+                identity[0],
+                identity[1],
+                self.content_hash(source_path),
+                time.time(),
+            ),
+        )
+
+    def output_is_fresh(self, output_path: str, source_path: str) -> bool:
+        """True se `output_path` existe e foi gerado a partir do MRK atual."""
+        output_identity = self.identity(output_path)
+        source_identity = self.identity(source_path)
+        if output_identity is None or source_identity is None:
+            return False
+
+        row = self._query_one(
+            "SELECT source_path, size, mtime_ns, content_hash FROM outputs "
+            "WHERE output_path = ?",
+            (self.normalize_path(output_path),),
+        )
+        if row is None:
+            # Saída anterior ao cache: vale se for mais nova que o MRK
+            return output_identity[1] >= source_identity[1]
+
+        recorded_source, size, mtime_ns, content_hash = row
+        if recorded_source != self.normalize_path(source_path) or size != source_identity[0]:
+            return False
+        if mtime_ns == source_identity[1]:
+            return True
+        return self.content_hash(source_path) == content_hash
+
+    # -----------------------------
+    # SQLite
+    # -----------------------------
+
+    def clear(self) -> None:
+        self._execute("DELETE FROM mrk_files")
+        self._execute("DELETE FROM outputs")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=5.0)
+        if not self._ready:
+            schema = connection.execute("PRAGMA user_version").fetchone()[0]
+            if schema != self.FORMAT_VERSION:
+                # Banco de outra versão: colunas de `mrk_files` diferentes
+                connection.execute("DROP TABLE IF EXISTS mrk_files")
+                connection.execute(f"PRAGMA user_version = {int(self.FORMAT_VERSION)}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS mrk_files ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                "content_hash TEXT, version INTEGER, points INTEGER, "
+                + "".join(f"{name} BLOB, " for name, _ in self._COLUMNS)
+                + "parsed_at REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                "output_path TEXT PRIMARY KEY, source_path TEXT, size INTEGER, "
+                "mtime_ns INTEGER, content_hash TEXT, written_at REAL)"
+            )
+            connection.commit()
+            self._ready = True
+        return connection
+
+    def _query_one(self, sql: str, params: tuple):
+        with self._lock:
+            if self._disabled_reason:
+                return None
+            try:
+                connection = self._connect()
+                try:
+                    return connection.execute(sql, params).fetchone()
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            if self._disabled_reason:
+                return
+            try:
+                connection = self._connect()
+                try:
+                    connection.execute(sql, params)
+                    connection.commit()
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    def _disable(self, error: Exception) -> None:
+        self._disabled_reason = str(error)
+        self.logger.warning(
+            f"Cache de MRK desativado ({error}); lendo arquivos normalmente",
+            code="MRK_CACHE_UNAVAILABLE",
+            db_path=self.db_path,
+        )
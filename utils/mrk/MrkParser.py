@@ -1,72 +1,45 @@
 # -*- coding: utf-8 -*-
 import os
-import re
+import time
+from itertools import islice
+from typing import Dict
 
 from ...core.config.LogUtils import LogUtils
+from ...core.engine_tasks.CancellationToken import CancellationToken
+from ...core.engine_tasks.ProcessJobs import ProcessJobs
+from ...core.engine_tasks.ProcessPoolBackend import ProcessPoolBackend
+from ...core.model.MrkFileReader import MrkFileReader
+from ...core.model.MrkPointColumns import MrkPointColumns
 
 
 class MrkParser:
 
-    LINE_RE = re.compile(
-        r"(?P<foto>\d+).*?"
-        r"(?P<lat>-?\d+\.\d+),Lat.*?"
-        r"(?P<lon>-?\d+\.\d+),Lon.*?"
-        r"(?P<alt>-?\d+(?:\.\d+)?),Ellh",
-        re.IGNORECASE,
-    )
+    LINE_RE = MrkFileReader.LINE_RE
+    DATE_RE = MrkFileReader.DATE_RE
+    FILE_META_RE = MrkFileReader.FILE_META_RE
 
-    DATE_RE = re.compile(r"DJI_(\d{8})", re.IGNORECASE)
+    # Modo paralelo só compensa a partir deste volume de MRK (bytes): abaixo,
+    # iniciar/serializar para os processos custa mais que ler tudo na thread.
+    PARALLEL_MIN_BYTES = 4 * 1024 * 1024
 
-    FILE_META_RE = re.compile(
-        r"DJI_\d+_(?P<flight_number>\d+?)_(?P<flight_name>[^_]+?)_Timestamp",
-        re.IGNORECASE,
-    )
+    # Um logger por tool_key (evita criar `LogUtils` a cada chamada)
+    _LOGGERS: Dict[str, LogUtils] = {}
 
     @staticmethod
     def _extract_file_metadata(file_name: str) -> dict:
-        match = MrkParser.FILE_META_RE.search(file_name)
-
-        if not match:
-            return {"flight_number": None, "flight_name": None}
-
-        return {
-            "flight_number": match.group("flight_number"),
-            "flight_name": match.group("flight_name"),
-        }
+        return MrkFileReader.file_metadata(file_name)
 
     @staticmethod
     def _generate_folder_fields(
         file_dir: str, base_folder: str, tool_key: str = "untraceable"
     ) -> dict:
-
-        file_dir = os.path.abspath(file_dir)
-        base_folder = os.path.abspath(base_folder)
-        logger = LogUtils(tool=tool_key, class_name="MrkParser")
-
-        folders = []
-        current = file_dir
-
-        while True:
-
-            name = os.path.basename(current)
-            if name:
-                folders.append(name)
-
-            if current.lower() == base_folder.lower():
-                break
-
-            parent = os.path.dirname(current)
-
-            if parent == current:
-                break
-
-            current = parent
-
-        data = {}
-        for i, name in enumerate(folders, 1):
-            data[f"folder_level{i}"] = name
-        logger.debug(
-            f"Generated folder fields: {data} for file_dir: {file_dir} and base_folder: {base_folder}"
+        data = MrkFileReader.folder_fields(file_dir, base_folder)
+        MrkParser._get_logger(tool_key).debug(
+            "Generated folder fields",
+            code="MRK_FOLDER_FIELDS",
+            file_dir=file_dir,
+            base_folder=base_folder,
+            fields=data,
         )
         return data
 
@@ -77,48 +50,135 @@ class MrkParser:
         extra_fields=None,
         gerarpastas=True,
         tool_key="untraceable",
+        cancel_token=None,
+        parallel=False,
+        columnar=False,
+        cache=None,
     ):
         """
         Lê todos os MRK de uma pasta e retorna lista de pontos.
+
+        `cancel_token` (CancellationToken) é verificado entre arquivos e a
+        cada lote de linhas; cancelado, levanta `OperationCancelled`.
+
+        Com `parallel=True` os arquivos são lidos no pool de processos
+        (`ProcessPoolBackend`) quando há 2+ arquivos e ao menos
+        `PARALLEL_MIN_BYTES`. Os resultados são concatenados na ordem do
+        `os.walk`, então a saída é idêntica à do modo serial.
+
+        Com `columnar=True` devolve `MrkPointColumns` em vez da lista de
+        dicts (mesmos pontos, bem menos memória).
+
+        Com `cache` (`MrkParseCache`) arquivos inalterados não são relidos.
         """
         logger = MrkParser._get_logger(tool_key)
+        cancel_token = CancellationToken.ensure(cancel_token)
 
-        points = []
         folder = os.path.abspath(folder)
+        started = time.perf_counter()
 
-        total_files = 0
-        for root, _, files in os.walk(folder):
-            for f in files:
-                if not f.lower().endswith(".mrk"):
-                    continue
-
-                file_path = os.path.join(root, f)
-                file_points = MrkParser.parse_file(
-                    file_path,
-                    base_folder=folder,
-                    extra_fields=extra_fields,
-                    gerarpastas=gerarpastas,
-                    tool_key=tool_key,
-                )
-                total_files += 1
-                points.extend(file_points)
-
-            if not recursive:
-                break
+        files = MrkFileReader.list_files(folder, recursive)
+        per_file, use_pool, cached = MrkParser._load_arrays(
+            files, cancel_token, parallel, cache
+        )
+        folder_memo = {}
+        parts = [
+            MrkParser._build_points(
+                file_path, arrays, folder, gerarpastas, columnar, folder_memo
+            )
+            for file_path, arrays in zip(files, per_file)
+        ]
 
-        if gerarpastas:
-            points = MrkParser._normalize_folder_fields(points)
+        if columnar:
+            # concat já completa os folder_level* ausentes com None
+            points = MrkPointColumns.concat(parts)
+        else:
+            points = [point for part in parts for point in part]
+            if gerarpastas:
+                points = MrkParser._normalize_folder_fields(points)
 
+        elapsed = time.perf_counter() - started
         logger.debug(
             "MRK folder parsing completed",
             code="MRK_FOLDER_PARSED",
             folder=folder,
-            mrk_count=total_files,
+            mrk_count=len(files),
+            cached_count=cached,
             points_count=len(points),
             recursive=recursive,
+            mode="parallel" if use_pool else "serial",
+            columnar=columnar,
+            elapsed_s=round(elapsed, 3),
+            points_per_s=round(len(points) / elapsed) if elapsed > 0 else None,
         )
         return points
 
+    @staticmethod
+    def _load_arrays(files, cancel_token, parallel, cache):
+        """
+        Colunas numéricas de cada arquivo (ordem de `files`): do cache quando
+        válido, senão lidas (em série ou no pool) e gravadas no cache.
+
+        Retorna (colunas por arquivo, usou o pool, quantos vieram do cache).
+        """
+        per_file = [None] * len(files)
+        if cache is not None:
+            for index, file_path in enumerate(files):
+                per_file[index] = cache.lookup(file_path)
+        missing = [index for index, arrays in enumerate(per_file) if arrays is None]
+        identities = {}
+        if cache is not None:
+            # Identidade antes da leitura: arquivo alterado no meio não é gravado
+            identities = {index: cache.identity(files[index]) for index in missing}
+
+        missing_files = [files[index] for index in missing]
+        use_pool = parallel and MrkParser._worth_parallel(missing_files)
+        if use_pool:
+            parsed = ProcessPoolBackend.shared().map(
+                ProcessJobs.mrk_arrays,
+                missing_files,
+                batch_size=1,
+                is_cancelled=cancel_token.is_cancelled,
+                on_progress=cancel_token.set_progress,
+            )
+            if parsed is None:
+                cancel_token.raise_if_cancelled()
+        else:
+            parsed = []
+            for file_path in missing_files:
+                cancel_token.raise_if_cancelled()
+                parsed.append(MrkFileReader.read_arrays(file_path, cancel_token))
+
+        for index, arrays in zip(missing, parsed):
+            per_file[index] = arrays
+            if cache is not None:
+                cache.store(files[index], arrays, identities[index])
+
+        return per_file, use_pool, len(files) - len(missing)
+
+    @staticmethod
+    def _build_points(
+        file_path, arrays, base_folder, gerarpastas, columnar, folder_memo=None
+    ):
+        constants = MrkFileReader.file_constants(
+            file_path, base_folder, gerarpastas, folder_memo
+        )
+        if columnar:
+            return MrkFileReader.columns_from_arrays(arrays, constants)
+        return MrkFileReader.points_from_arrays(arrays, constants)
+
+    @staticmethod
+    def _worth_parallel(files: list) -> bool:
+        if len(files) < 2:
+            return False
+        total = 0
+        for file_path in files:
+            try:
+                total += os.path.getsize(file_path)
+            except OSError:
+                continue
+        return total >= MrkParser.PARALLEL_MIN_BYTES
+
     @staticmethod
     def parse_file(
         file_path,
@@ -126,14 +186,20 @@ class MrkParser:
         extra_fields=None,
         gerarpastas=True,
         tool_key="untraceable",
+        cancel_token=None,
+        columnar=False,
+        cache=None,
     ):
         """
-        Lê um único arquivo MRK e retorna lista de pontos.
+        Lê um único arquivo MRK e retorna lista de pontos
+        (`MrkPointColumns` com `columnar=True`). `cache` como em
+        `parse_folder`.
         """
         logger = MrkParser._get_logger(tool_key)
+        cancel_token = CancellationToken.ensure(cancel_token)
 
         if not file_path:
-            return []
+            return MrkPointColumns() if columnar else []
 
         file_path = os.path.abspath(file_path)
         if not os.path.isfile(file_path):
@@ -142,50 +208,16 @@ class MrkParser:
                 code="MRK_FILE_NOT_FOUND",
                 file_path=file_path,
             )
-            return []
-
-        root = os.path.dirname(file_path)
-        file_name = os.path.basename(file_path)
-        base_folder = os.path.abspath(base_folder or root)
+            return MrkPointColumns() if columnar else []
 
-        file_meta = MrkParser._extract_file_metadata(file_name)
-        date_match = MrkParser.DATE_RE.search(file_name)
-        data_mrk = date_match.group(1) if date_match else None
-
-        folder_fields = {}
-        if gerarpastas:
-            folder_fields = MrkParser._generate_folder_fields(root, base_folder, tool_key)
-            logger.debug(
-                f"Generated folder fields for file: {file_path} - {folder_fields}"
-            )
-
-        points = []
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as fh:
-            for line in fh:
-                m = MrkParser.LINE_RE.search(line)
-                if not m:
-                    continue
-
-                point = {
-                    "foto": int(m.group("foto")),
-                    "lat": float(m.group("lat")),
-                    "lon": float(m.group("lon")),
-                    "alt": float(m.group("alt")),
-                    "date_name": data_mrk,
-                    "folder": os.path.basename(root),
-                    "folder_path": root,
-                    "mrk_file": file_name,
-                    "mrk_path": file_path,
-                    "flight_number": file_meta["flight_number"],
-                    "flight_name": file_meta["flight_name"],
-                }
-
-                if gerarpastas:
-                    point.update(folder_fields)
-
-                points.append(point)
+        per_file, _, cached = MrkParser._load_arrays(
+            [file_path], cancel_token, False, cache
+        )
+        points = MrkParser._build_points(
+            file_path, per_file[0], base_folder, gerarpastas, columnar
+        )
 
-        if gerarpastas:
+        if gerarpastas and not columnar:
             points = MrkParser._normalize_folder_fields(points)
 
         logger.debug(
@@ -193,9 +225,127 @@ class MrkParser:
             code="MRK_FILE_PARSED",
             file_path=file_path,
             points_count=len(points),
+            cached=bool(cached),
         )
         return points
 
+    # -----------------------------
+    # Leitura em stream (geradores)
+    # -----------------------------
+
+    @staticmethod
+    def iter_folder(
+        folder,
+        recursive=True,
+        gerarpastas=True,
+        tool_key="untraceable",
+        cancel_token=None,
+        batch_size=None,
+        cache=None,
+    ):
+        """
+        Gerador com os mesmos pontos de `parse_folder` (dicts, mesma ordem e
+        mesmos `folder_level*`), produzidos à medida que as linhas são lidas:
+        a memória não cresce com o número de pontos.
+
+        Com `batch_size` gera listas de até `batch_size` pontos. Com `cache`
+        (`MrkParseCache`), arquivos válidos vêm do cache e os demais são lidos
+        inteiros em colunas tipadas (um arquivo por vez) para serem gravados.
+        """
+        cancel_token = CancellationToken.ensure(cancel_token)
+        folder = os.path.abspath(folder)
+        files = MrkFileReader.list_files(folder, recursive)
+
+        # folder_level* calculados por pasta, antes de ler qualquer linha:
+        # com a profundidade máxima já conhecida, cada ponto sai completo
+        folder_memo = {}
+        constants = [
+            MrkFileReader.file_constants(file_path, folder, gerarpastas, folder_memo)
+            for file_path in files
+        ]
+        if gerarpastas:
+            MrkParser._pad_folder_levels(constants)
+
+        points = MrkParser._iter_files(files, constants, cancel_token, cache, tool_key)
+        return MrkParser._batched(points, batch_size) if batch_size else points
+
+    @staticmethod
+    def iter_file(
+        file_path,
+        base_folder=None,
+        gerarpastas=True,
+        tool_key="untraceable",
+        cancel_token=None,
+        batch_size=None,
+        cache=None,
+    ):
+        """Gerador com os pontos de `parse_file` (ver `iter_folder`)."""
+        cancel_token = CancellationToken.ensure(cancel_token)
+        if not file_path:
+            return iter(())
+
+        file_path = os.path.abspath(file_path)
+        if not os.path.isfile(file_path):
+            MrkParser._get_logger(tool_key).warning(
+                "MRK file not found",
+                code="MRK_FILE_NOT_FOUND",
+                file_path=file_path,
+            )
+            return iter(())
+
+        constants = MrkFileReader.file_constants(file_path, base_folder, gerarpastas)
+        points = MrkParser._iter_files(
+            [file_path], [constants], cancel_token, cache, tool_key
+        )
+        return MrkParser._batched(points, batch_size) if batch_size else points
+
+    @staticmethod
+    def _iter_files(files, constants, cancel_token, cache, tool_key):
+        count = 0
+        for file_path, file_constants in zip(files, constants):
+            cancel_token.raise_if_cancelled()
+            if cache is None:
+                points = MrkFileReader.iter_points(file_path, file_constants, cancel_token)
+            else:
+                per_file, _, _ = MrkParser._load_arrays(
+                    [file_path], cancel_token, False, cache
+                )
+                points = MrkFileReader.iter_points_from_arrays(per_file[0], file_constants)
+            for point in points:
+                count += 1
+                yield point
+
+        MrkParser._get_logger(tool_key).debug(
+            "MRK streaming completed",
+            code="MRK_STREAM_COMPLETED",
+            mrk_count=len(files),
+            points_count=count,
+        )
+
+    @staticmethod
+    def _batched(points, batch_size):
+        size = max(1, int(batch_size))
+        iterator = iter(points)
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def _pad_folder_levels(constants: list) -> None:
+        """`_normalize_folder_fields` aplicado às constantes de cada arquivo."""
+        depth = max(
+            (
+                sum(1 for key in file_constants if key.startswith("folder_level"))
+                for file_constants in constants
+            ),
+            default=0,
+        )
+        for file_constants in constants:
+            for i in range(1, depth + 1):
+                file_constants.setdefault(f"folder_level{i}", None)
+
     @staticmethod
     def _normalize_folder_fields(points: list) -> list:
         """
@@ -211,9 +361,11 @@ class MrkParser:
                         if n > max_n:
                             max_n = n
                     except ValueError as e:
-                        logger = LogUtils(tool="mrk_parser", class_name="MrkParser")
-                        logger.warning(
-                            f"Unexpected folder field format: {k} in point: {p}. Error: {e}"
+                        MrkParser._get_logger("mrk_parser").warning(
+                            "Unexpected folder field format",
+                            code="MRK_FOLDER_FIELD_INVALID",
+                            field=k,
+                            error=str(e),
                         )
 
         if max_n == 0:
@@ -229,6 +381,7 @@ class MrkParser:
 
     @staticmethod
     def to_point_layer(points, name="MRK_Pontos", extra_fields=None):
+        """Camada de pontos a partir da lista de dicts ou de `MrkPointColumns`."""
         from ..vector.VectorLayerGeometry import VectorLayerGeometry
         from .MetadataFields import MetadataFields
         from qgis.PyQt.QtCore import QVariant
@@ -264,6 +417,11 @@ class MrkParser:
         Returns
         -------
         LogUtils
-            Instância de logger configurada para a classe
+            Instância de logger configurada para a classe (reaproveitada
+            entre chamadas com o mesmo tool_key)
         """
-        return LogUtils(tool=tool_key, class_name="MrkParser")
+        logger = MrkParser._LOGGERS.get(tool_key)
+        if logger is None:
+            logger = LogUtils(tool=tool_key, class_name="MrkParser")
+            MrkParser._LOGGERS[tool_key] = logger
+        return logger
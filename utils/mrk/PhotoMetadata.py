@@ -1,13 +1,20 @@
 ﻿# -*- coding: utf-8 -*-
 import os
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 
 from qgis.PyQt.QtCore import QVariant
 
 from ...core.config.LogUtils import LogUtils
+from ...core.engine_tasks.CancellationToken import CancellationToken
+from ...core.model.MrkPointColumns import MrkPointColumns
+from ...core.model.PhotoMetadataDump import PhotoMetadataDump
 from ..ExplorerUtils import ExplorerUtils
 from ..ToolKeys import ToolKey
+from .CustomPhotosFieldsIncremental import CustomPhotosFieldsIncremental
 from .CustomPhotosFieldsUtil import CustomPhotosFieldsUtil
 from .ExifUtil import ExifUtil
 from .MetadataFields import MetadataFields
@@ -19,6 +26,9 @@ TOOL_KEY = ToolKey.DRONE_COORDINATES
 class PhotoMetadata:
     """Manager de metadata de fotos para o fluxo DroneCoordinates."""
     LAST_JSON_DUMP_PATH = None
+    # Dump JSON Lines em gzip (`.jsonl.gz`); sem gzip o dump ainda em
+    # gravação pode ser acompanhado (`PhotoMetadataDump.records(follow=True)`)
+    DUMP_COMPRESS = False
 
     # Mantido para compatibilidade com chamadas existentes.
     FIELDS_PHOTO = {
@@ -43,6 +53,12 @@ class PhotoMetadata:
 
     DJI_RE = re.compile(r"_(\d{4})_[A-Z]\.JPG$", re.IGNORECASE)
 
+    # Leitura das fotos em threads: o custo é a latência de I/O (rede, USB),
+    # não CPU. `workers=None` usa o padrão; 1 lê em sequência.
+    DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+    # Fotos enviadas ao pool por worker antes de consumir os resultados
+    WORKER_QUEUE_FACTOR = 4
+
     @staticmethod
     def _dump_allowed_keys() -> list:
         """
@@ -57,23 +73,6 @@ class PhotoMetadata:
             + [k.value for k in MetadataFields.MRK_FIELDS.keys()]
         )
 
-    @staticmethod
-    def _normalize_dump_records(raw_by_file: dict) -> dict:
-        """
-        Converte registros por arquivo para formato:
-            { "ARQUIVO.JPG": {campo: valor, ...} }
-        mantendo apenas campos permitidos no MetadataFields.
-        """
-        allowed_keys = PhotoMetadata._dump_allowed_keys()
-        normalized = {}
-        for fname, payload in (raw_by_file or {}).items():
-            canonical_payload = MetadataFields.normalize_record_to_keys(payload or {})
-            record = {}
-            for key in allowed_keys:
-                record[key] = canonical_payload.get(key)
-            normalized[fname] = record
-        return normalized
-
     @staticmethod
     def _extract_photo_sequence(file_name: str) -> str:
         """Extrai sequencia de 4 digitos do padrao DJI (..._0001_X.JPG)."""
@@ -91,8 +90,7 @@ class PhotoMetadata:
         """
         index = {}
         mrk_keys = [k.value for k in MetadataFields.MRK_FIELDS.keys()]
-        for point in folder_points or []:
-            canonical_point = MetadataFields.normalize_record_to_keys(point or {})
+        for canonical_point in MetadataFields.normalize_records_to_keys(folder_points or []):
             foto = canonical_point.get("Foto")
             if foto is None:
                 continue
@@ -107,23 +105,24 @@ class PhotoMetadata:
         return index
 
     @staticmethod
-    def _merge_mrk_into_dump_records(raw_records: dict, mrk_by_seq: dict) -> dict:
+    def _iter_dump_records(raw_by_file: dict, mrk_by_seq: dict):
         """
-        Mescla campos MRK no dump por arquivo, quando houver match de sequencia.
+        Gera (arquivo, registro) no formato do dump, um por vez: campos
+        permitidos no MetadataFields, com os campos MRK mesclados quando a
+        sequencia da foto tem match. Nada é acumulado; o registro é gravado
+        e descartado antes de o próximo ser normalizado.
         """
-        if not raw_records:
-            return raw_records
+        allowed_keys = PhotoMetadata._dump_allowed_keys()
         mrk_keys = [k.value for k in MetadataFields.MRK_FIELDS.keys()]
-        for fname, record in raw_records.items():
+        canonical_payloads = MetadataFields.iter_records_to_keys(raw_by_file.values())
+        for fname, canonical_payload in zip(raw_by_file, canonical_payloads):
+            record = {key: canonical_payload.get(key) for key in allowed_keys}
             seq = PhotoMetadata._extract_photo_sequence(fname)
-            if not seq:
-                continue
-            mrk_ctx = mrk_by_seq.get(seq)
-            if not mrk_ctx:
-                continue
-            for key in mrk_keys:
-                record[key] = mrk_ctx.get(key)
-        return raw_records
+            mrk_ctx = mrk_by_seq.get(seq) if seq else None
+            if mrk_ctx:
+                for key in mrk_keys:
+                    record[key] = mrk_ctx.get(key)
+            yield fname, record
 
     @staticmethod
     def _safe_parse_datetime(value):
@@ -185,6 +184,23 @@ class PhotoMetadata:
         known_keys = set(MetadataFields.all_fields().keys())
         return selected & known_keys
 
+    @staticmethod
+    def projected_fields(selected_keys: set):
+        """
+        Campos a ler das fotos para atender `selected_keys` (chaves do
+        MetadataFields), ou None (tudo) se nada foi selecionado.
+
+        DateTimeOriginal entra sempre (dt_*); com algum campo CUSTOM entram
+        também as entradas do cálculo (`CustomPhotosFieldsUtil.INPUT_KEYS`).
+        """
+        if not selected_keys:
+            return None
+        fields = set(selected_keys)
+        fields.add("DateTimeOriginal")
+        if fields & set(MetadataFields.custom_keys()):
+            fields.update(CustomPhotosFieldsUtil.INPUT_KEYS)
+        return frozenset(fields)
+
     @staticmethod
     def _filter_payload(payload: dict, selected_keys: set) -> dict:
         if not selected_keys:
@@ -192,19 +208,45 @@ class PhotoMetadata:
         return {key: value for key, value in payload.items() if key in selected_keys}
 
     @staticmethod
-    def _extract_photo_payload(image_path: str, tool_key: str = TOOL_KEY) -> dict:
-        logger = PhotoMetadata._get_logger(tool_key)
+    def read_photo_fields(
+        image_path: str, tool_key: str = TOOL_KEY, fields: frozenset = None
+    ) -> dict:
+        """
+        Campos lidos da foto (SO + imagem + EXIF + XMP), já sanitizados pelo
+        MetadataFields. É o que o `PhotoMetadataCache` guarda.
 
-        os_data = ExifUtil.extract_metadata_os(image_path, tool_key=tool_key)
-        image_data = ExifUtil.extract_metadata_image(image_path, tool_key=tool_key)
-        exif_data = ExifUtil.extract_metadata_exif(image_path, tool_key=tool_key)
-        xmp_data = XmpUtil.extract_metadata(image_path, tool_key=tool_key)
+        Com `fields` (de `projected_fields`) EXIF/XMP só decodificam esses
+        campos e o XMP é pulado se nenhum deles vier de lá.
+        """
+        # Uma leitura do cabeçalho JPEG serve aos quatro extratores; sem ele
+        # (não JPEG, truncado...) cada um volta a ler o arquivo via PIL.
+        header = ExifUtil.read_header(image_path, tool_key=tool_key)
+        os_data = ExifUtil.extract_metadata_os(image_path, tool_key=tool_key, header=header)
+        image_data = ExifUtil.extract_metadata_image(image_path, tool_key=tool_key, header=header)
+        exif_data = ExifUtil.extract_metadata_exif(
+            image_path, tool_key=tool_key, header=header, fields=fields
+        )
+        xmp_data = XmpUtil.extract_metadata(
+            image_path, tool_key=tool_key, header=header, fields=fields
+        )
+
+        photo_fields = {}
+        photo_fields.update(os_data)
+        photo_fields.update(image_data)
+        photo_fields.update(exif_data)
+        photo_fields.update(xmp_data)
+        return photo_fields
+
+    @staticmethod
+    def _extract_photo_payload(
+        image_path: str, tool_key: str = TOOL_KEY, fields: dict = None
+    ) -> dict:
+        """Payload da foto; `fields` (do cache) dispensa a leitura do arquivo."""
+        logger = PhotoMetadata._get_logger(tool_key)
 
-        payload = {}
-        payload.update(os_data)
-        payload.update(image_data)
-        payload.update(exif_data)
-        payload.update(xmp_data)
+        if fields is None:
+            fields = PhotoMetadata.read_photo_fields(image_path, tool_key=tool_key)
+        payload = dict(fields)
 
         # Aliases criticos para compatibilidade com campos esperados no calculo custom.
         alias_map = {
@@ -276,13 +318,108 @@ class PhotoMetadata:
 
         return payload
 
+    @staticmethod
+    def resolve_workers(workers: int = None) -> int:
+        """Nº de threads de leitura: `DEFAULT_WORKERS` para None, mínimo 1."""
+        if workers is None:
+            return PhotoMetadata.DEFAULT_WORKERS
+        return max(1, int(workers))
+
+    @staticmethod
+    def _extract_payloads(
+        photo_files: list,
+        tool_key: str,
+        cancel_token,
+        workers: int,
+        cache=None,
+        fields: frozenset = None,
+    ):
+        """
+        Payloads de `photo_files`, na mesma ordem, lidos por até `workers`
+        threads. Progresso e cancelamento são tratados na thread que consome
+        (a da task); ao cancelar, as fotos ainda na fila são descartadas.
+
+        Com `cache` (`PhotoMetadataCache`) as fotos inalteradas vêm do banco
+        (uma consulta por pasta) e as lidas são gravadas ao final, sem
+        aplicar os limites do cache (`enrich` chama `evict()` uma vez).
+        `fields`: projeção repassada a `read_photo_fields`.
+        """
+        cached = (
+            cache.lookup_many(photo_files, fields=fields) if cache is not None else {}
+        )
+        read = []
+
+        def load(file_path):
+            photo_fields = cached.get(file_path)
+            if photo_fields is None:
+                identity = cache.identity(file_path) if cache is not None else None
+                photo_fields = PhotoMetadata.read_photo_fields(
+                    file_path, tool_key=tool_key, fields=fields
+                )
+                if cache is not None:
+                    read.append((file_path, photo_fields, identity))
+            return PhotoMetadata._extract_photo_payload(
+                file_path, tool_key, photo_fields
+            )
+
+        try:
+            yield from PhotoMetadata._map_ordered(
+                load, photo_files, cancel_token, workers
+            )
+        finally:
+            if cache is not None:
+                cache.store_many(read, fields=fields, evict=False)
+                PhotoMetadata._get_logger(tool_key).debug(
+                    "Cache de metadados de fotos",
+                    code="PHOTO_CACHE_USAGE",
+                    photos=len(photo_files),
+                    hits=len(cached),
+                    stored=len(read),
+                )
+
+    @staticmethod
+    def _map_ordered(fn, items: list, cancel_token, workers: int):
+        """`fn(item)` para cada item, em até `workers` threads, na ordem de `items`."""
+        total = len(items)
+        if workers <= 1 or total <= 1:
+            for i, item in enumerate(items):
+                # Leitura de EXIF/XMP é cara: verifica a cada foto
+                cancel_token.report(i, total)
+                yield fn(item)
+            return
+
+        window = workers * PhotoMetadata.WORKER_QUEUE_FACTOR
+        pending_items = iter(items)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="cadmus-photo"
+        ) as executor:
+            pending = deque(
+                executor.submit(fn, item) for item in islice(pending_items, window)
+            )
+            try:
+                for i in range(total):
+                    cancel_token.report(i, total)
+                    result = pending.popleft().result()
+                    next_item = next(pending_items, None)
+                    if next_item is not None:
+                        pending.append(executor.submit(fn, next_item))
+                    yield result
+            finally:
+                for future in pending:
+                    future.cancel()
+
     @staticmethod
     def _index_photos_complete(
         base_folder: str,
         recursive: bool,
         tool_key: str = TOOL_KEY,
+        cancel_token=None,
+        workers: int = None,
+        cache=None,
+        fields: frozenset = None,
     ) -> tuple:
         logger = PhotoMetadata._get_logger(tool_key)
+        cancel_token = CancellationToken.ensure(cancel_token)
 
         photo_files = []
         walker = os.walk(base_folder) if recursive else [(base_folder, [], os.listdir(base_folder))]
@@ -296,68 +433,151 @@ class PhotoMetadata:
 
         raw_by_file = {}
         indexed_by_number = {}
-        raw_dump_records = {}
 
-        for file_path in photo_files:
+        workers = PhotoMetadata.resolve_workers(workers)
+        payloads = PhotoMetadata._extract_payloads(
+            photo_files, tool_key, cancel_token, workers, cache=cache, fields=fields
+        )
+        for file_path, payload in zip(photo_files, payloads):
             fname = os.path.basename(file_path)
             seq_match = PhotoMetadata.DJI_RE.search(fname)
             if not seq_match:
                 continue
             seq = seq_match.group(1)
 
-            payload = PhotoMetadata._extract_photo_payload(file_path, tool_key=tool_key)
             raw_by_file[fname] = payload
             indexed_by_number[seq] = payload
 
         # Tenta enriquecer com campos custom quando o dataset possui base minima.
-        try:
-            required_for_custom = [
-                "DateTimeOriginal",
-                "AbsoluteAltitude",
-                "FlightXSpeed",
-                "FlightYSpeed",
-                "FlightZSpeed",
-                "GimbalYawDegree",
-                "FlightYawDegree",
-                "GimbalPitchDegree",
-                "FlightPitchDegree",
-            ]
-            missing_summary = {}
-            for _, payload in raw_by_file.items():
-                for req_key in required_for_custom:
-                    if payload.get(req_key) in (None, ""):
-                        missing_summary[req_key] = missing_summary.get(req_key, 0) + 1
-            if missing_summary:
-                logger.debug(
-                    "Campos ausentes antes do calculo custom",
-                    data={"missing_summary": missing_summary},
+        # Com projeção sem campo CUSTOM as entradas do cálculo nem foram lidas.
+        compute_custom = fields is None or bool(
+            fields & set(MetadataFields.custom_keys())
+        )
+        if compute_custom:
+            try:
+                required_for_custom = [
+                    "DateTimeOriginal",
+                    "AbsoluteAltitude",
+                    "FlightXSpeed",
+                    "FlightYSpeed",
+                    "FlightZSpeed",
+                    "GimbalYawDegree",
+                    "FlightYawDegree",
+                    "GimbalPitchDegree",
+                    "FlightPitchDegree",
+                ]
+                missing_summary = {}
+                for _, payload in raw_by_file.items():
+                    for req_key in required_for_custom:
+                        if payload.get(req_key) in (None, ""):
+                            missing_summary[req_key] = missing_summary.get(req_key, 0) + 1
+                if missing_summary:
+                    logger.debug(
+                        "Campos ausentes antes do calculo custom",
+                        data={"missing_summary": missing_summary},
+                    )
+
+                if cache is not None:
+                    # Sessão com cache: reabrir a pasta só recalcula as fotos
+                    # novas/alteradas e as vizinhas
+                    state = CustomPhotosFieldsIncremental.shared(
+                        ("PhotoMetadata", cache.normalize_path(base_folder))
+                    )
+                    custom_enriched = state.sync(raw_by_file, tool_key=tool_key)
+                else:
+                    custom_enriched = CustomPhotosFieldsUtil.calculate_all_custom_fields(
+                        raw_by_file,
+                        tool_key=tool_key,
+                    )
+                raw_by_file = custom_enriched
+                for fname, payload in custom_enriched.items():
+                    seq_match = PhotoMetadata.DJI_RE.search(fname)
+                    if not seq_match:
+                        continue
+                    indexed_by_number[seq_match.group(1)] = payload
+            except Exception as exc:
+                logger.warning(
+                    f"Falha ao calcular CUSTOM_FIELDS para pasta {base_folder}: {exc}"
                 )
 
-            custom_enriched = CustomPhotosFieldsUtil.calculate_all_custom_fields(
-                raw_by_file,
-                tool_key=tool_key,
-            )
-            raw_by_file = custom_enriched
-            for fname, payload in custom_enriched.items():
-                seq_match = PhotoMetadata.DJI_RE.search(fname)
-                if not seq_match:
-                    continue
-                indexed_by_number[seq_match.group(1)] = payload
-        except Exception as exc:
-            logger.warning(
-                f"Falha ao calcular CUSTOM_FIELDS para pasta {base_folder}: {exc}"
-            )
-
         logger.info(
             "Indexacao completa de fotos finalizada",
             data={
                 "base_folder": base_folder,
                 "total_photos": len(photo_files),
                 "indexed_keys": len(indexed_by_number),
+                "workers": workers,
             },
         )
-        raw_dump_records = PhotoMetadata._normalize_dump_records(raw_by_file)
-        return indexed_by_number, raw_dump_records
+        # Payloads brutos (os mesmos objetos do índice); o dump normaliza
+        # registro a registro em `_iter_dump_records`
+        return indexed_by_number, raw_by_file
+
+    # -----------------------------
+    # Dump JSON Lines
+    # -----------------------------
+
+    @staticmethod
+    def _open_dump(base_folder, recursive, points_total):
+        """Abre o `PhotoMetadataDump` do enriquecimento; None se falhar."""
+        logger = PhotoMetadata._get_logger(TOOL_KEY)
+        try:
+            path = ExplorerUtils.build_temp_file_path(
+                ExplorerUtils.REPORTS_TEMP_FOLDER,
+                ExplorerUtils.REPORTS_JSON_FOLDER,
+                tool_key=TOOL_KEY,
+                prefix="DPM",
+                extension=".jsonl.gz" if PhotoMetadata.DUMP_COMPRESS else ".jsonl",
+                file_stem_hint=ExplorerUtils.build_report_json_stem(
+                    base_folder=base_folder,
+                    points_total=points_total,
+                ),
+            )
+            return PhotoMetadataDump(
+                path,
+                compress=PhotoMetadata.DUMP_COMPRESS,
+                base_folder=base_folder,
+                recursive=recursive,
+                points_total=points_total,
+            ).open()
+        except OSError as exc:
+            logger.error(f"Falha ao criar dump de metadados: {exc}")
+            return None
+
+    @staticmethod
+    def _write_dump_group(dump, folder, records, **info):
+        """Grava um grupo no dump; em erro de disco descarta o dump (None)."""
+        try:
+            dump.write_group(folder, records, **info)
+            return dump
+        except OSError as exc:
+            PhotoMetadata._get_logger(TOOL_KEY).error(
+                f"Falha ao gravar dump de metadados {dump.path}: {exc}"
+            )
+            dump.abort()
+            return None
+
+    @staticmethod
+    def _close_dump(dump) -> str:
+        """Fecha o dump e devolve o caminho ("" sem dump)."""
+        if dump is None:
+            return ""
+        try:
+            dump.close()
+        except OSError as exc:
+            PhotoMetadata._get_logger(TOOL_KEY).error(
+                f"Falha ao finalizar dump de metadados {dump.path}: {exc}"
+            )
+            dump.abort()
+            return ""
+        PhotoMetadata._get_logger(TOOL_KEY).info(
+            "Dump de metadados gravado",
+            code="PHOTO_METADATA_DUMP",
+            path=dump.path,
+            groups=dump.groups,
+            records=dump.records,
+        )
+        return dump.path
 
     @staticmethod
     def enrich(
@@ -369,13 +589,32 @@ class PhotoMetadata:
         selected_custom_fields=None,
         selected_mrk_fields=None,
         return_report=False,
+        cancel_token=None,
+        workers=None,
+        cache=None,
+        project_fields=False,
     ):
+        """
+        Acrescenta aos pontos os metadados das fotos correspondentes.
+
+        `points`: lista de dicts ou `MrkPointColumns`; ambos são atualizados
+        no lugar e devolvidos. `workers`: threads de leitura das fotos
+        (None = `DEFAULT_WORKERS`, 1 = sequencial). `cache`:
+        `PhotoMetadataCache` opcional (fotos inalteradas não são relidas).
+
+        `project_fields`: lê das fotos só os campos selecionados
+        (`projected_fields`). O dump (`PhotoMetadataDump`, JSON Lines) fica
+        com os demais campos vazios: não usar quando o relatório for gerado
+        a partir dele.
+        """
         logger = PhotoMetadata._get_logger(TOOL_KEY)
+        cancel_token = CancellationToken.ensure(cancel_token)
         selected_keys = PhotoMetadata._build_selected_keys(
             selected_required_fields=selected_required_fields,
             selected_custom_fields=selected_custom_fields,
             selected_mrk_fields=selected_mrk_fields,
         )
+        fields = PhotoMetadata.projected_fields(selected_keys) if project_fields else None
 
         logger.info(
             "Iniciando enriquecimento de metadados de fotos",
@@ -387,11 +626,16 @@ class PhotoMetadata:
                 "total_points": len(points),
                 "selected_keys_count": len(selected_keys),
                 "selected_keys_sample": sorted(list(selected_keys))[:20],
+                "projected_fields": len(fields) if fields is not None else None,
             },
         )
 
+        # `MrkPointColumns` devolve cópias dos pontos: o resultado volta por
+        # `update_row` (índice do ponto guardado junto)
+        columnar = isinstance(points, MrkPointColumns)
         points_by_folder = {}
-        for point in points:
+        rows_by_folder = {}
+        for row, point in enumerate(points):
             folder = point.get("mrk_folder") or base_folder
             if folder and not os.path.isabs(folder) and base_folder:
                 candidate = os.path.join(base_folder, folder)
@@ -400,92 +644,97 @@ class PhotoMetadata:
             if folder and not os.path.isdir(folder) and base_folder:
                 folder = base_folder
             points_by_folder.setdefault(folder, []).append(point)
-
-        full_dump_payload = {
-            "base_folder": base_folder,
-            "recursive": recursive,
-            "points_total": len(points),
-            "groups": {},
-        }
+            rows_by_folder.setdefault(folder, []).append(row)
 
         total_found = 0
         total_missing = 0
 
-        for folder, folder_points in points_by_folder.items():
-            photo_index, raw_records = PhotoMetadata._index_photos_complete(
-                folder,
-                recursive=False,
-                tool_key=TOOL_KEY,
-            )
-            mrk_by_seq = PhotoMetadata._build_mrk_context_by_sequence(folder_points)
-            raw_records = PhotoMetadata._merge_mrk_into_dump_records(raw_records, mrk_by_seq)
-
-            full_dump_payload["groups"][folder] = {
-                "points": len(folder_points),
-                "indexed": len(photo_index),
-                "raw_records": raw_records,
-            }
-            first_record = next(iter(raw_records.values()), None) if raw_records else None
-            sample_keys = sorted(list(first_record.keys()))[:40] if first_record else []
-            logger.debug(
-                "Grupo indexado",
-                data={
-                    "folder": folder,
-                    "points_count": len(folder_points),
-                    "indexed_count": len(photo_index),
-                    "mrk_indexed_count": len(mrk_by_seq),
-                    "sample_keys": sample_keys,
-                },
-            )
-
-            empty_filtered = 0
-            for point in folder_points:
-                foto = point.get("foto")
-                if foto is None:
-                    continue
-
-                key = f"{int(foto):04d}"
-                photo_payload = photo_index.get(key)
-                if not photo_payload:
-                    total_missing += 1
-                    continue
-
-                total_found += 1
-                merged_payload = {}
-                merged_payload.update(photo_payload)
-                merged_payload.update(PhotoMetadata._extract_flight_context(point))
-                # Normaliza aliases/snake_case para as chaves canonicas do MetadataFields
-                # antes do filtro para nao perder campos custom apos mudanca de nomenclatura.
-                merged_payload = MetadataFields.normalize_record_to_keys(merged_payload)
-
-                filtered_payload = PhotoMetadata._filter_payload(merged_payload, selected_keys)
-                if selected_keys and not filtered_payload:
-                    empty_filtered += 1
-                point.update(filtered_payload)
-
-            if selected_keys:
-                logger.info(
-                    "Resumo filtro grupo",
+        # Registros gravados um a um: nem o dump nem o grupo normalizado
+        # ficam inteiros em memória
+        dump = PhotoMetadata._open_dump(base_folder, recursive, len(points))
+        try:
+            group_count = max(1, len(points_by_folder))
+            for group_index, (folder, folder_points) in enumerate(points_by_folder.items()):
+                photo_index, raw_by_file = PhotoMetadata._index_photos_complete(
+                    folder,
+                    recursive=False,
+                    tool_key=TOOL_KEY,
+                    cancel_token=cancel_token.child(
+                        100.0 * group_index / group_count,
+                        100.0 * (group_index + 1) / group_count,
+                    ),
+                    workers=workers,
+                    cache=cache,
+                    fields=fields,
+                )
+                mrk_by_seq = PhotoMetadata._build_mrk_context_by_sequence(folder_points)
+
+                if dump is not None:
+                    dump = PhotoMetadata._write_dump_group(
+                        dump,
+                        folder,
+                        PhotoMetadata._iter_dump_records(raw_by_file, mrk_by_seq),
+                        points=len(folder_points),
+                        indexed=len(photo_index),
+                    )
+                logger.debug(
+                    "Grupo indexado",
                     data={
                         "folder": folder,
-                        "selected_keys_count": len(selected_keys),
-                        "points_without_filtered_fields": empty_filtered,
+                        "points_count": len(folder_points),
+                        "indexed_count": len(photo_index),
+                        "mrk_indexed_count": len(mrk_by_seq),
+                        "photos_count": len(raw_by_file),
                     },
                 )
 
-        dump_path = ExplorerUtils.create_temp_json(
-            full_dump_payload,
-            tool_key=TOOL_KEY,
-            prefix="DPM",
-            subfolder=os.path.join(
-                ExplorerUtils.REPORTS_TEMP_FOLDER,
-                ExplorerUtils.REPORTS_JSON_FOLDER,
-            ),
-            file_stem_hint=ExplorerUtils.build_report_json_stem(
-                base_folder=base_folder,
-                points_total=len(points),
-            ),
-        )
+                empty_filtered = 0
+                for row, point in zip(rows_by_folder[folder], folder_points):
+                    foto = point.get("foto")
+                    if foto is None:
+                        continue
+
+                    key = f"{int(foto):04d}"
+                    photo_payload = photo_index.get(key)
+                    if not photo_payload:
+                        total_missing += 1
+                        continue
+
+                    total_found += 1
+                    merged_payload = {}
+                    merged_payload.update(photo_payload)
+                    merged_payload.update(PhotoMetadata._extract_flight_context(point))
+                    # Normaliza aliases/snake_case para as chaves canonicas do MetadataFields
+                    # antes do filtro para nao perder campos custom apos mudanca de nomenclatura.
+                    merged_payload = MetadataFields.normalize_record_to_keys(merged_payload)
+
+                    filtered_payload = PhotoMetadata._filter_payload(merged_payload, selected_keys)
+                    if selected_keys and not filtered_payload:
+                        empty_filtered += 1
+                    if columnar:
+                        points.update_row(row, filtered_payload)
+                    else:
+                        point.update(filtered_payload)
+
+                if selected_keys:
+                    logger.info(
+                        "Resumo filtro grupo",
+                        data={
+                            "folder": folder,
+                            "selected_keys_count": len(selected_keys),
+                            "points_without_filtered_fields": empty_filtered,
+                        },
+                    )
+        except BaseException:
+            if dump is not None:
+                dump.abort()
+            raise
+        finally:
+            if cache is not None:
+                # Limites do cache aplicados uma vez, depois de todas as pastas
+                cache.evict()
+
+        dump_path = PhotoMetadata._close_dump(dump)
         PhotoMetadata.LAST_JSON_DUMP_PATH = dump_path
 
         logger.info(
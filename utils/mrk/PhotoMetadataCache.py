@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from fractions import Fraction
+from numbers import Rational
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ...core.config.LogUtils import LogUtils
+
+
+class PhotoMetadataCache:
+    """
+    Cache persistente (SQLite) dos metadados lidos de cada foto.
+
+    Guarda, por foto, o conjunto de campos já sanitizados pelo
+    `MetadataFields` que sai de `PhotoMetadata.read_photo_fields`
+    (SO + imagem + EXIF + XMP), serializado em JSON com marcadores que
+    preservam os tipos (`IFDRational`, tuplas, bytes, chaves não-texto).
+    Nada do banco é executado ao ler: um valor que o JSON não representa
+    simplesmente não é gravado. Campos derivados (aliases, dt_*, CUSTOM)
+    continuam sendo calculados por quem usa.
+
+    Regras:
+    - chave: caminho absoluto normalizado; válido se tamanho e mtime forem
+      iguais aos registrados (só `stat`, sem abrir o arquivo);
+    - fotos lidas com projeção (`fields`) guardam a lista de campos e só
+      atendem consultas contidas nela; leitura completa atende qualquer uma;
+    - `lookup_many` consulta uma pasta inteira num único SELECT;
+    - limites `max_entries` / `max_bytes`: `evict()` remove as entradas
+      usadas há mais tempo (índice em `used_at`) até caber; quem grava em
+      lotes usa `store_many(..., evict=False)` e chama `evict()` uma vez ao
+      fim da execução;
+    - banco com `PRAGMA user_version` diferente de `FORMAT_VERSION` (campos
+      mudaram) é recriado vazio.
+
+    Falhas do SQLite nunca quebram a extração: o cache é desativado e as
+    fotos são lidas normalmente.
+
+    O banco fica na pasta de dados do plugin no perfil do usuário
+    (`Preferences.data_folder("photo_cache")`), fora do %TEMP% que o SO
+    limpa e que outros processos podem escrever; é compartilhado pelas
+    ferramentas de fotos.
+    """
+
+    CACHE_FOLDER = "photo_cache"
+    DB_NAME = "photo_metadata.sqlite"
+    FORMAT_VERSION = 3
+    MAX_ENTRIES = 200_000
+    MAX_BYTES = 512 * 1024 * 1024
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        tool_key: str = "PhotoMetadataCache",
+        db_path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.tool_key = tool_key
+        self.db_path = db_path or self.default_db_path()
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.logger = LogUtils(tool=tool_key, class_name="PhotoMetadataCache")
+        self._lock = threading.Lock()
+        self._disabled_reason = None
+        self._ready = False
+
+    @classmethod
+    def shared(cls) -> "PhotoMetadataCache":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def default_db_path(cls) -> str:
+        # Import tardio: Preferences depende do Qt para achar a pasta do perfil
+        from ..Preferences import Preferences
+
+        return os.path.join(Preferences.data_folder(cls.CACHE_FOLDER), cls.DB_NAME)
+
+    # -----------------------------
+    # Serialização
+    # -----------------------------
+
+    _TUPLE = "__tuple__"
+    _BYTES = "__bytes__"
+    _RATIONAL = "__rational__"
+    _ITEMS = "__items__"
+    _MARKERS = frozenset((_TUPLE, _BYTES, _RATIONAL, _ITEMS))
+
+    @classmethod
+    def _encode_value(cls, value):
+        """Valor -> estrutura JSON; TypeError se o tipo não for suportado."""
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, Rational):
+            # IFDRational/Fraction (int já saiu acima)
+            return {cls._RATIONAL: [int(value.numerator), int(value.denominator)]}
+        if isinstance(value, (bytes, bytearray)):
+            return {cls._BYTES: base64.b64encode(bytes(value)).decode("ascii")}
+        if isinstance(value, tuple):
+            return {cls._TUPLE: [cls._encode_value(item) for item in value]}
+        if isinstance(value, list):
+            return [cls._encode_value(item) for item in value]
+        if isinstance(value, dict):
+            plain = all(isinstance(key, str) for key in value) and not (
+                len(value) == 1 and next(iter(value)) in cls._MARKERS
+            )
+            if plain:
+                return {key: cls._encode_value(item) for key, item in value.items()}
+            return {
+                cls._ITEMS: [
+                    [cls._encode_value(key), cls._encode_value(item)]
+                    for key, item in value.items()
+                ]
+            }
+        raise TypeError(f"tipo não suportado no cache de fotos: {type(value).__name__}")
+
+    @classmethod
+    def _decode_object(cls, obj: dict):
+        if len(obj) != 1:
+            return obj
+        marker, data = next(iter(obj.items()))
+        if marker == cls._TUPLE:
+            return tuple(data)
+        if marker == cls._BYTES:
+            return base64.b64decode(data)
+        if marker == cls._RATIONAL:
+            return cls._rational(*data)
+        if marker == cls._ITEMS:
+            return {
+                tuple(key) if isinstance(key, list) else key: item for key, item in data
+            }
+        return obj
+
+    @staticmethod
+    def _rational(numerator: int, denominator: int):
+        try:
+            from PIL.TiffImagePlugin import IFDRational
+        except ImportError:
+            return Fraction(numerator, denominator) if denominator else float("nan")
+        return IFDRational(numerator, denominator)
+
+    @classmethod
+    def encode_payload(cls, photo_fields: dict) -> str:
+        return json.dumps(
+            cls._encode_value(photo_fields), ensure_ascii=False, separators=(",", ":")
+        )
+
+    @classmethod
+    def decode_payload(cls, payload: str) -> dict:
+        return json.loads(payload, object_hook=cls._decode_object)
+
+    # -----------------------------
+    # Identidade
+    # -----------------------------
+
+    @staticmethod
+    def normalize_path(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    @staticmethod
+    def identity(file_path: str) -> Optional[Tuple[int, int]]:
+        """(tamanho, mtime_ns) ou None se o arquivo não existir."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    # -----------------------------
+    # Consulta
+    # -----------------------------
+
+    @staticmethod
+    def _fields_column(fields: Optional[Iterable[str]]) -> str:
+        """Projeção gravada com a foto ("" = todos os campos)."""
+        return "" if fields is None else "\n".join(sorted(fields))
+
+    def lookup(self, file_path: str, fields: Optional[Iterable[str]] = None) -> Optional[dict]:
+        """Campos da foto se o registro ainda for válido; senão None."""
+        return self.lookup_many([file_path], fields).get(file_path)
+
+    def lookup_many(
+        self, file_paths: Iterable[str], fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, dict]:
+        """
+        {caminho (como recebido): campos} das fotos com registro válido que
+        cubra `fields` (None = exige leitura completa).
+
+        Um SELECT por pasta e um `stat` por foto; as fotos encontradas têm
+        `used_at` atualizado (base da remoção por limite).
+        """
+        wanted = None if fields is None else set(fields)
+        by_folder: Dict[str, Dict[str, str]] = {}
+        for file_path in file_paths:
+            key = self.normalize_path(file_path)
+            by_folder.setdefault(os.path.dirname(key), {})[key] = file_path
+
+        found = {}
+        hits = []
+        for folder, requested in by_folder.items():
+            rows = self._query_all(
+                "SELECT path, size, mtime_ns, fields, payload FROM photos "
+                "WHERE folder = ? AND version = ?",
+                (folder, self.FORMAT_VERSION),
+            )
+            for key, size, mtime_ns, stored_fields, payload in rows:
+                file_path = requested.get(key)
+                if file_path is None:
+                    continue
+                if stored_fields and (
+                    wanted is None or not wanted.issubset(stored_fields.split("\n"))
+                ):
+                    continue
+                if self.identity(file_path) != (size, mtime_ns):
+                    continue
+                try:
+                    found[file_path] = self.decode_payload(payload)
+                except Exception:
+                    continue
+                hits.append(key)
+
+        if hits:
+            now = time.time()
+            self._execute_many(
+                "UPDATE photos SET used_at = ? WHERE path = ?",
+                [(now, key) for key in hits],
+            )
+        return found
+
+    # -----------------------------
+    # Gravação / limites
+    # -----------------------------
+
+    def store(
+        self,
+        file_path: str,
+        photo_fields: dict,
+        identity: Optional[Tuple[int, int]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.store_many([(file_path, photo_fields, identity)], fields)
+
+    def store_many(
+        self,
+        items: Iterable[tuple],
+        fields: Optional[Iterable[str]] = None,
+        evict: bool = True,
+    ) -> int:
+        """
+        Grava `(caminho, campos[, identidade])` numa transação e, com
+        `evict`, aplica os limites. `identidade` é a tirada ANTES da leitura:
+        se o arquivo mudou desde então, a foto não é gravada. `fields`:
+        projeção usada na leitura (None = completa). Retorna o nº gravado.
+        """
+        fields_column = self._fields_column(fields)
+        now = time.time()
+        rows = []
+        for item in items:
+            file_path, photo_fields = item[0], item[1]
+            expected = item[2] if len(item) > 2 else None
+            current = self.identity(file_path)
+            if current is None or (expected is not None and expected != current):
+                continue
+            try:
+                payload = self.encode_payload(photo_fields)
+            except (TypeError, ValueError):
+                continue
+            key = self.normalize_path(file_path)
+            rows.append(
+                (
+                    key,
+                    os.path.dirname(key),
+                    current[0],
+                    current[1],
+                    self.FORMAT_VERSION,
+                    fields_column,
+                    payload,
+                    len(payload.encode("utf-8")),
+                    now,
+                    now,
+                )
+            )
+        if not rows:
+            return 0
+
+        self._execute_many(
+            "INSERT OR REPLACE INTO photos "
+            "(path, folder, size, mtime_ns, version, fields, payload, bytes, "
+            "stored_at, used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        if evict:
+            self.evict()
+        return len(rows)
+
+    def evict(self) -> int:
+        """
+        Remove as entradas menos usadas além de `max_entries`/`max_bytes`.
+
+        Um COUNT/SUM; se passar do limite, lê pelo índice de `used_at` só as
+        entradas mais antigas necessárias para caber.
+        """
+        totals = self._query_all("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM photos", ())
+        if not totals:
+            return 0
+        count, total_bytes = totals[0]
+        excess_entries = count - self.max_entries
+        excess_bytes = total_bytes - self.max_bytes
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return 0
+
+        evicted = self._delete_oldest(excess_entries, excess_bytes)
+        self.logger.debug(
+            "Cache de fotos reduzido",
+            code="PHOTO_CACHE_EVICTED",
+            evicted=evicted,
+            kept=count - evicted,
+        )
+        return evicted
+
+    def invalidate(self, file_path: str) -> None:
+        self._execute_many(
+            "DELETE FROM photos WHERE path = ?", [(self.normalize_path(file_path),)]
+        )
+
+    def invalidate_folder(self, folder: str) -> None:
+        self._execute_many(
+            "DELETE FROM photos WHERE folder = ?", [(self.normalize_path(folder),)]
+        )
+
+    def clear(self) -> None:
+        self._execute_many("DELETE FROM photos", [()])
+
+    def stats(self) -> Dict[str, int]:
+        totals = self._query_all("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM photos", ())
+        count, total_bytes = totals[0] if totals else (0, 0)
+        return {"entries": count, "bytes": total_bytes}
+
+    # -----------------------------
+    # SQLite
+    # -----------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=5.0)
+        if not self._ready:
+            schema = connection.execute("PRAGMA user_version").fetchone()[0]
+            if schema != self.FORMAT_VERSION:
+                connection.execute("DROP TABLE IF EXISTS photos")
+                connection.execute(f"PRAGMA user_version = {int(self.FORMAT_VERSION)}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS photos ("
+                "path TEXT PRIMARY KEY, folder TEXT, size INTEGER, mtime_ns INTEGER, "
+                "version INTEGER, fields TEXT, payload TEXT, bytes INTEGER, "
+                "stored_at REAL, used_at REAL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS photos_folder ON photos (folder)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS photos_used_at ON photos (used_at)"
+            )
+            connection.commit()
+            self._ready = True
+        return connection
+
+    def _query_all(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            if self._disabled_reason:
+                return []
+            try:
+                connection = self._connect()
+                try:
+                    return connection.execute(sql, params).fetchall()
+                finally:
+                    connection.close()
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+                return []
+
+    def _execute_many(self, sql: str, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        with self._lock:
+            if self._disabled_reason:
+                return
+            try:
+                connection = self._connect()
+                try:
+                    connection.executemany(sql, rows)
+                    connection.commit()
+                finally:
+                    connection.close()
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+
+    def _delete_oldest(self, excess_entries: int, excess_bytes: int) -> int:
+        """Apaga as entradas mais antigas até remover os dois excessos."""
+        with self._lock:
+            if self._disabled_reason:
+                return 0
+            try:
+                connection = self._connect()
+                try:
+                    if excess_bytes <= 0:
+                        deleted = connection.execute(
+                            "DELETE FROM photos WHERE path IN ("
+                            "SELECT path FROM photos ORDER BY used_at ASC LIMIT ?)",
+                            (excess_entries,),
+                        ).rowcount
+                    else:
+                        keys = []
+                        freed = 0
+                        cursor = connection.execute(
+                            "SELECT path, bytes FROM photos ORDER BY used_at ASC"
+                        )
+                        for key, size in cursor:
+                            if len(keys) >= excess_entries and freed >= excess_bytes:
+                                break
+                            keys.append((key,))
+                            freed += size or 0
+                        cursor.close()
+                        connection.executemany("DELETE FROM photos WHERE path = ?", keys)
+                        deleted = len(keys)
+                    connection.commit()
+                    return deleted
+                finally:
+                    connection.close()
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+                return 0
+
+    def _disable(self, error: Exception) -> None:
+        self._disabled_reason = str(error)
+        self.logger.warning(
+            f"Cache de fotos desativado ({error}); lendo arquivos normalmente",
+            code="PHOTO_CACHE_UNAVAILABLE",
+            db_path=self.db_path,
+        )
@@ -3,9 +3,13 @@
 
 import os
 from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional
 from xml.etree import ElementTree as ET
 
 from ...core.config.LogUtils import LogUtils
+from ...core.model.JpegHeader import JpegHeader
+from ...core.model.XmpAttributeScanner import XmpAttributeScanner
 from ..ToolKeys import ToolKey
 from .MetadataFields import MetadataFields
 
@@ -59,14 +63,42 @@ class XmpUtil:
         "dc:format",
     ]
 
+    # Campos do catalogo fora do DJI_XMP_FIELDS que o XMP da DJI tambem traz
+    _SHARED_ATTRIBUTES = (
+        "tiff:Make",
+        "tiff:Model",
+        "xmp:CreateDate",
+        "xmp:ModifyDate",
+    )
+
     @staticmethod
     def _get_logger(tool_key: str = ToolKey.UNTRACEABLE) -> LogUtils:
         return LogUtils(tool=tool_key, class_name="XmpUtil")
 
     @staticmethod
-    def _extract_xmp_text_raw(image_path: str) -> str:
-        with open(image_path, "rb") as fh:
-            raw = fh.read().decode("latin1", errors="ignore")
+    @lru_cache(maxsize=1)
+    def provided_keys() -> frozenset:
+        """Chaves do MetadataFields que podem vir do XMP."""
+        keys = set(MetadataFields.xmp_keys())
+        for name in (*XmpUtil._FIELD_PRIORITY, *XmpUtil._SHARED_ATTRIBUTES):
+            key = MetadataFields.source_key(name)
+            if key:
+                keys.add(key)
+        return frozenset(keys)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _is_projected(attr_name: str, fields: frozenset) -> bool:
+        return MetadataFields.source_key(attr_name) in fields
+
+    @staticmethod
+    def _extract_xmp_text_raw(image_path: str, header: Optional[JpegHeader] = None) -> str:
+        if header is not None:
+            # So o APP1 XMP do cabecalho, sem varrer o arquivo inteiro
+            raw = (header.xmp or b"").decode("latin1", errors="ignore")
+        else:
+            with open(image_path, "rb") as fh:
+                raw = fh.read().decode("latin1", errors="ignore")
 
         start = raw.find("<x:xmpmeta")
         if start == -1:
@@ -80,36 +112,26 @@ class XmpUtil:
         end += len(end_marker)
         return raw[start:end]
 
-    @staticmethod
-    def _normalize_attribute_name(attr_name: str) -> str:
-        if not attr_name.startswith("{"):
-            return attr_name
-
-        namespace, local_name = attr_name[1:].split("}", 1)
-        prefix = XmpUtil._NAMESPACE_PREFIXES.get(namespace, namespace)
-        return f"{prefix}:{local_name}"
-
     @staticmethod
     def _parse_xmp_xml(xmp_text: str) -> dict:
+        """
+        Atributos e elementos simples de todos os `rdf:Description`, pelo
+        `XmpAttributeScanner` (sem arvore; ElementTree so quando o pacote
+        tem algo que o scanner nao trata).
+        """
         data = {}
 
         try:
-            root = ET.fromstring(xmp_text)
+            parsed = XmpAttributeScanner.parse(xmp_text, XmpUtil._NAMESPACE_PREFIXES)
         except ET.ParseError as exc:
             data["xmp_erro"] = str(exc)
             return data
 
-        description = root.find(
-            ".//{http://www.w3.org/1999/02/22-rdf-syntax-ns#}Description"
-        )
-        if description is None:
+        if parsed is None:
             data["xmp_erro"] = "Bloco rdf:Description nao encontrado"
             return data
 
-        for attr_name, attr_value in description.attrib.items():
-            data[XmpUtil._normalize_attribute_name(attr_name)] = attr_value
-
-        return data
+        return parsed
 
     @staticmethod
     def _order_fields_by_priority(xmp_data: dict) -> dict:
@@ -162,7 +184,7 @@ class XmpUtil:
         return sanitized
 
     @staticmethod
-    def _extract_file_metadata(image_path: str) -> dict:
+    def _extract_file_metadata(image_path: str, stat: Optional[os.stat_result] = None) -> dict:
         """
         Extrai metadados do arquivo do sistema operacional.
         
@@ -172,7 +194,8 @@ class XmpUtil:
         - SizeMb: tamanho em megabytes
         - DateTime: data de criacao do arquivo
         """
-        stat = os.stat(image_path)
+        if stat is None:
+            stat = os.stat(image_path)
         return {
             "File": os.path.basename(image_path),
             "Path": image_path,
@@ -183,7 +206,12 @@ class XmpUtil:
         }
 
     @staticmethod
-    def extract_metadata(image_path: str, tool_key: str = ToolKey.UNTRACEABLE) -> dict:
+    def extract_metadata(
+        image_path: str,
+        tool_key: str = ToolKey.UNTRACEABLE,
+        header: Optional[JpegHeader] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> dict:
         """
         Extrai metadados XMP de uma imagem com validacao contra MetadataFields.
         
@@ -193,6 +221,11 @@ class XmpUtil:
         Args:
             image_path: Caminho para a imagem
             tool_key: Chave de ferramenta para logging
+            header: Cabecalho de `ExifUtil.read_header` (opcional); usa o
+                stat e o XMP ja lidos em vez de ler o arquivo
+            fields: Chaves do MetadataFields desejadas (opcional); so esses
+                atributos sao sanitizados e, se nenhuma vier do XMP
+                (`provided_keys`), o XMP nem e lido
             
         Returns:
             Dicionario com metadados sanitizados (apenas campos autorizados)
@@ -202,10 +235,16 @@ class XmpUtil:
 
         try:
             # Extrai metadados do arquivo (retorna nomes canonicos)
-            data = XmpUtil._extract_file_metadata(image_path)
+            data = XmpUtil._extract_file_metadata(
+                image_path, header.stat if header is not None else None
+            )
+            if fields is not None:
+                fields = frozenset(fields)
+                if not fields & XmpUtil.provided_keys():
+                    return data
             
             # Extrai XMP bruto
-            xmp_text = XmpUtil._extract_xmp_text_raw(image_path)
+            xmp_text = XmpUtil._extract_xmp_text_raw(image_path, header)
             if not xmp_text:
                 logger.debug(f"Nenhum bloco XMP encontrado em {image_path}")
                 return data
@@ -214,6 +253,12 @@ class XmpUtil:
             if "xmp_erro" in xmp_data:
                 logger.warning(f"Erro ao parsear XMP em {image_path}: {xmp_data.get('xmp_erro')}")
                 return data
+            if fields is not None:
+                xmp_data = {
+                    name: value
+                    for name, value in xmp_data.items()
+                    if XmpUtil._is_projected(name, fields)
+                }
 
             # SANITIZA dados XMP antes de adicionar ao resultado
             ordered_data = XmpUtil._order_fields_by_priority(xmp_data)
@@ -17,13 +17,19 @@ def _normalize_key(key: str) -> str:
 class IMGMetadata:
     """Modelo principal de imagem com todos os campos de MetadataFields e score embutido."""
 
-    def __init__(self, json_record: Optional[Dict[str, Any]] = None):
-        """Inicializa o objeto a partir de um registro JSON, preenchendo campos canonicos e extras."""
+    def __init__(self, json_record: Optional[Dict[str, Any]] = None, *, canonical: bool = False):
+        """
+        Inicializa o objeto a partir de um registro JSON, preenchendo campos canonicos e extras.
+        `canonical=True` indica registro ja normalizado (ex.: `JSONUtil.load_records`).
+        """
         all_keys = [k.value if hasattr(k, 'value') else str(k) for k in MetadataFields.all_fields().keys()]
         self._data: Dict[str, Any] = {key: None for key in all_keys}
         self._extras: Dict[str, Any] = {}
 
-        normalized = MetadataFields.normalize_record_to_keys(json_record or {})
+        if canonical:
+            normalized = json_record or {}
+        else:
+            normalized = MetadataFields.normalize_record_to_keys(json_record or {})
         for key, value in normalized.items():
             if key in self._data:
                 self._data[key] = value
@@ -1,8 +1,10 @@
 import json
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
 from ...core.config.LogUtils import LogUtils
+from ...core.model.PhotoMetadataDump import PhotoMetadataDump
 from ..ToolKeys import ToolKey
 from ..adapter.StringAdapter import StringAdapter
 from ..mrk.MetadataFields import MetadataFields
@@ -10,38 +12,46 @@ from ..mrk.MetadataFields import MetadataFields
 
 class JSONUtil:
     """Responsavel por leitura e normalizacao dos JSONs de metadata."""
+
+    # Registros do dump JSON Lines normalizados por vez (`iter_records`)
+    STREAM_BATCH_SIZE = 2048
+
     @staticmethod
     def _get_logger(tool_key: str = ToolKey.UNTRACEABLE) -> LogUtils:
         return LogUtils(tool=tool_key, class_name="JSONUtil")
 
     @staticmethod
-    def _normalize_record(
-        record: Dict[str, Any],
-        *,
-        group_path: str = "",
-        file_key: str = "",
-    ) -> Dict[str, Any]:
-        """Normaliza um registro bruto para o formato canonico baseado em MetadataFields."""
-        if not isinstance(record, dict):
-            return {}
-
-        normalized = MetadataFields.normalize_record_to_keys(record)
-
+    def _normalize_records(
+        entries: List[Tuple[Dict[str, Any], str, str]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Normaliza em lote entradas (registro, group_path, file_key); a conversao
+        de chaves e feita por formato de registro (`normalize_records_to_keys`).
+        """
+        valid = [record for record, _, _ in entries if isinstance(record, dict)]
+        canonical = iter(MetadataFields.normalize_records_to_keys(valid))
         catalog = MetadataFields.all_fields()
-        known_keys = StringAdapter.filter_known_keys(normalized.keys(), catalog)
-        out = {key: normalized.get(key) for key in known_keys}
 
-        # Preserva campos extras nao catalogados (pipeline custom pode gerar campos novos).
-        for key, value in normalized.items():
-            if key not in out:
-                out[key] = value
+        images = []
+        for record, group_path, file_key in entries:
+            if not isinstance(record, dict):
+                images.append({})
+                continue
+            normalized = next(canonical)
+            known_keys = StringAdapter.filter_known_keys(normalized.keys(), catalog)
+            out = {key: normalized.get(key) for key in known_keys}
 
-        if out.get("File") in (None, "") and file_key:
-            out["File"] = file_key
-        if out.get("Path") in (None, "") and file_key:
-            out["Path"] = str(Path(group_path) / file_key) if group_path else file_key
+            # Preserva campos extras nao catalogados (pipeline custom pode gerar campos novos).
+            for key, value in normalized.items():
+                if key not in out:
+                    out[key] = value
 
-        return out
+            if out.get("File") in (None, "") and file_key:
+                out["File"] = file_key
+            if out.get("Path") in (None, "") and file_key:
+                out["Path"] = str(Path(group_path) / file_key) if group_path else file_key
+            images.append(out)
+        return images
 
     @staticmethod
     def load_json_file(json_path: str, tool_key: str = ToolKey.UNTRACEABLE) -> Any:
@@ -55,17 +65,59 @@ class JSONUtil:
         logger.info(f"JSON carregado: {json_path}")
         return data
 
+    @staticmethod
+    def iter_records(
+        json_path: str,
+        tool_key: str = ToolKey.UNTRACEABLE,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Registros normalizados do dump JSON Lines (`PhotoMetadataDump`), lidos
+        e normalizados em lotes de `STREAM_BATCH_SIZE`.
+        """
+        logger = JSONUtil._get_logger(tool_key)
+        if not Path(json_path).exists():
+            raise FileNotFoundError(f"JSON nao encontrado: {json_path}")
+        entries = PhotoMetadataDump.records(json_path)
+        total = 0
+        while True:
+            batch = list(islice(entries, JSONUtil.STREAM_BATCH_SIZE))
+            if not batch:
+                break
+            total += len(batch)
+            yield from JSONUtil._normalize_records(batch)
+        logger.info(f"iter_records: lidas {total} imagens do dump {json_path}")
+
+    @staticmethod
+    def iter_load_records(
+        json_path: str,
+        tool_key: str = ToolKey.UNTRACEABLE,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Como `load_records`, mas gera os registros: o dump JSON Lines e lido
+        em fluxo (so um lote em memoria); json2/legado sao carregados inteiros.
+        """
+        if PhotoMetadataDump.is_dump(json_path):
+            return JSONUtil.iter_records(json_path, tool_key=tool_key)
+        return iter(JSONUtil.load_records(json_path, tool_key=tool_key))
+
     @staticmethod
     def load_records(
         json_path: str = "metadata_completa_custom.json",
         tool_key: str = ToolKey.UNTRACEABLE,
     ) -> List[Dict[str, Any]]:
-        """Carrega registros de metadata suportando formato json2 e formato legado."""
+        """
+        Carrega registros de metadata: dump JSON Lines (`PhotoMetadataDump`),
+        formato json2 e formato legado. Para nao manter a lista inteira em
+        memoria use `iter_load_records`.
+        """
         logger = JSONUtil._get_logger(tool_key)
+        if PhotoMetadataDump.is_dump(json_path):
+            return list(JSONUtil.iter_records(json_path, tool_key=tool_key))
+
         data = JSONUtil.load_json_file(json_path, tool_key=tool_key)
 
         if isinstance(data, dict) and isinstance(data.get("groups"), dict):
-            images: List[Dict[str, Any]] = []
+            entries = []
             total_raw = 0
             for group_path, group_payload in data["groups"].items():
                 raw_records = (group_payload or {}).get("raw_records", {})
@@ -73,23 +125,21 @@ class JSONUtil:
                     continue
                 total_raw += len(raw_records)
                 for file_key, raw_record in raw_records.items():
-                    images.append(
-                        JSONUtil._normalize_record(
-                            raw_record,
-                            group_path=group_path,
-                            file_key=file_key,
-                        )
-                    )
+                    entries.append((raw_record, group_path, file_key))
+            images = JSONUtil._normalize_records(entries)
             logger.info(
                 f"load_records: carregadas {len(images)} imagens de json2 (raw_records={total_raw})"
             )
             return images
 
         if isinstance(data, dict):
-            images: List[Dict[str, Any]] = []
-            for file_key, record in data.items():
-                if isinstance(record, dict):
-                    images.append(JSONUtil._normalize_record(record, file_key=file_key))
+            images = JSONUtil._normalize_records(
+                [
+                    (record, "", file_key)
+                    for file_key, record in data.items()
+                    if isinstance(record, dict)
+                ]
+            )
             logger.info(
                 f"load_records: carregadas {len(images)} imagens de {len(data)} chaves"
             )
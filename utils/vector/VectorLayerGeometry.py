@@ -23,6 +23,8 @@ from qgis.PyQt.QtCore import QVariant
 
 
 from ...core.config.LogUtils import LogUtils
+from ...core.engine_tasks.CancellationToken import CancellationToken
+from ...core.model.MrkPointColumns import MrkPointColumns
 from ..ToolKeys import ToolKey
 from ..mrk.MetadataFields import MetadataFields
 import processing
@@ -139,6 +141,190 @@ class VectorLayerGeometry:
         except Exception:
             return None
 
+    @staticmethod
+    def _coerce_point_attr_value(value, qvariant_type):
+        if value is None:
+            return None
+        # Serializa containers para evitar erro de escrita em provider OGR.
+        if isinstance(value, (list, tuple, dict)):
+            try:
+                value = json.dumps(value, ensure_ascii=False)
+            except Exception:
+                value = str(value)
+
+        if qvariant_type == QVariant.String:
+            try:
+                return str(value)
+            except Exception:
+                return ""
+        if qvariant_type in (QVariant.Double,):
+            try:
+                if value == "":
+                    return None
+                return float(value)
+            except Exception:
+                return None
+        if qvariant_type in (QVariant.Int, QVariant.LongLong):
+            try:
+                if value == "":
+                    return None
+                return int(float(value))
+            except Exception:
+                return None
+        if qvariant_type == QVariant.Bool:
+            if isinstance(value, str):
+                lowered = value.strip().lower()
+                if lowered in ("1", "true", "sim", "yes"):
+                    return True
+                if lowered in ("0", "false", "nao", "não", "no"):
+                    return False
+            try:
+                return bool(value)
+            except Exception:
+                return None
+        return value
+
+    @staticmethod
+    def _normalize_point_specs(field_specs: Optional[list]) -> list:
+        """`field_specs` como [(input_key, QVariant.Type, output_name), ...]."""
+        normalized_specs = []
+        for spec in field_specs or []:
+            if not isinstance(spec, (tuple, list)):
+                continue
+            if len(spec) == 2:
+                input_name, qvariant_type = spec
+                output_name = input_name
+            elif len(spec) >= 3:
+                input_name, qvariant_type, output_name = spec[:3]
+            else:
+                continue
+            normalized_specs.append((input_name, qvariant_type, output_name))
+        return normalized_specs
+
+    @staticmethod
+    def _iter_point_rows(points, normalized_specs, x_key, y_key, extra_fields=None):
+        """
+        (x, y, atributos) de cada ponto (dicts ou `MrkPointColumns`), com os
+        valores já convertidos para o tipo do campo; None quando a coordenada
+        é inválida. Não usa objetos do QGIS.
+        """
+        extra_names = list((extra_fields or {}).keys())
+        keys = [x_key, y_key] + [spec[0] for spec in normalized_specs] + extra_names
+        if isinstance(points, MrkPointColumns):
+            # Colunar: lê direto das colunas, sem montar um dict por ponto
+            rows = points.iter_tuples(keys)
+        else:
+            rows = (tuple(p.get(key) for key in keys) for p in points)
+        attr_start = 2
+        extra_start = attr_start + len(normalized_specs)
+
+        for row in rows:
+            x_val = row[0]
+            y_val = row[1]
+            if x_val is None or y_val is None:
+                yield None
+                continue
+            try:
+                x_num = float(x_val)
+                y_num = float(y_val)
+            except Exception:
+                yield None
+                continue
+            attrs = []
+            for offset, (_, qvariant_type, _) in enumerate(normalized_specs):
+                value = row[attr_start + offset]
+                value = VectorLayerGeometry._coerce_point_attr_value(value, qvariant_type)
+                attrs.append(value)
+            attrs.extend(row[extra_start:])
+            yield (x_num, y_num, attrs)
+
+    @staticmethod
+    def _add_point_rows(vl, rows) -> int:
+        """Grava as linhas de `_iter_point_rows` na camada; retorna quantas eram None."""
+        vl.startEditing()
+        skipped_invalid_geometry = 0
+        for row in rows:
+            if row is None:
+                skipped_invalid_geometry += 1
+                continue
+            x_num, y_num, attrs = row
+            f = QgsFeature(vl.fields())
+            f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x_num, y_num)))
+            f.setAttributes(attrs)
+            vl.addFeature(f)
+
+        vl.commitChanges()
+        return skipped_invalid_geometry
+
+    @staticmethod
+    def _add_point_features(
+        vl, points, normalized_specs, x_key, y_key, extra_fields=None
+    ) -> int:
+        """
+        Adiciona pontos (dicts ou `MrkPointColumns`) na camada; retorna
+        quantos foram pulados.
+        """
+        return VectorLayerGeometry._add_point_rows(
+            vl,
+            VectorLayerGeometry._iter_point_rows(
+                points, normalized_specs, x_key, y_key, extra_fields
+            ),
+        )
+
+    @staticmethod
+    def build_point_rows(
+        points,
+        field_specs: list,
+        geometry_keys: tuple = ("lon", "lat"),
+        extra_fields: Optional[dict] = None,
+    ) -> tuple:
+        """
+        Feições de `create_point_layer_from_dicts` como dados simples:
+        ([(x, y, atributos)], pulados). Pode rodar numa QgsTask (ex.: lotes
+        de stream); a camada é montada com `create_point_layer_from_rows` na
+        thread principal.
+        """
+        x_key, y_key = geometry_keys
+        rows = []
+        skipped = 0
+        for row in VectorLayerGeometry._iter_point_rows(
+            points,
+            VectorLayerGeometry._normalize_point_specs(field_specs),
+            x_key,
+            y_key,
+            extra_fields,
+        ):
+            if row is None:
+                skipped += 1
+            else:
+                rows.append(row)
+        return rows, skipped
+
+    @staticmethod
+    def create_point_layer_from_rows(
+        rows: list,
+        name: str = "MRK_Pontos",
+        field_specs: Optional[list] = None,
+        extra_fields: Optional[dict] = None,
+    ) -> Optional[QgsVectorLayer]:
+        """Camada de pontos em memória a partir de `build_point_rows`."""
+        fields = QgsFields()
+        for _, qvariant_type, output_name in VectorLayerGeometry._normalize_point_specs(
+            field_specs
+        ):
+            fields.append(QgsField(output_name, qvariant_type))
+        for field_name, qtype in (extra_fields or {}).items():
+            fields.append(QgsField(field_name, qtype))
+
+        vl = QgsVectorLayer("Point?crs=EPSG:4326", name, "memory")
+        vl.dataProvider().addAttributes(fields)
+        vl.updateFields()
+        VectorLayerGeometry._add_point_rows(vl, rows or [])
+        vl.updateExtents()
+        if vl.featureCount() == 0:
+            return None
+        return vl
+
     @staticmethod
     def create_point_layer_from_dicts(
         points: list,
@@ -151,6 +337,13 @@ class VectorLayerGeometry:
         """
         Cria uma camada de pontos em memória a partir de registros genéricos.
 
+        points:
+            - lista de dicts, `MrkPointColumns` ou qualquer iterável de dicts
+              (ex.: `MrkParser.iter_folder`). Com `field_specs` informado,
+              um iterador é consumido à medida que as feições são gravadas,
+              sem montar a lista; sem `field_specs` ele é materializado para
+              inferir os tipos.
+
         field_specs:
             - [("input_key", QVariant.Type), ...] ou
             - [("input_key", QVariant.Type, "output_field_name"), ...]
@@ -159,10 +352,19 @@ class VectorLayerGeometry:
             - tupla (x_key, y_key) usada para montar a geometria ponto.
         """
         logger = VectorLayerGeometry._get_logger(tool_key)
+        is_sequence = isinstance(points, (list, tuple, MrkPointColumns))
+        if not is_sequence and points is not None and not field_specs:
+            points = list(points)
+            is_sequence = True
         logger.debug(
-            f"create_point_layer_from_dicts(points={len(points) if points else 0}, name={name}, field_specs_count={len(field_specs) if field_specs else 0}, extra_fields={list(extra_fields.keys()) if extra_fields else None})"
+            "create_point_layer_from_dicts",
+            code="POINT_LAYER_FROM_DICTS",
+            points=len(points) if is_sequence else "stream",
+            name=name,
+            field_specs_count=len(field_specs) if field_specs else 0,
+            extra_fields=list(extra_fields.keys()) if extra_fields else None,
         )
-        if not points:
+        if points is None or (is_sequence and not points):
             return None
 
         if len(geometry_keys) != 2:
@@ -188,17 +390,7 @@ class VectorLayerGeometry:
         # Se nao informado, infere a partir das chaves do primeiro registro.
         normalized_specs = []
         if field_specs:
-            for spec in field_specs:
-                if not isinstance(spec, (tuple, list)):
-                    continue
-                if len(spec) == 2:
-                    input_name, qvariant_type = spec
-                    output_name = input_name
-                elif len(spec) >= 3:
-                    input_name, qvariant_type, output_name = spec[:3]
-                else:
-                    continue
-                normalized_specs.append((input_name, qvariant_type, output_name))
+            normalized_specs = VectorLayerGeometry._normalize_point_specs(field_specs)
         else:
             first = points[0] if points else {}
             for key in first.keys():
@@ -219,76 +411,9 @@ class VectorLayerGeometry:
         vl.dataProvider().addAttributes(fields)
         vl.updateFields()
 
-        def _coerce_attr_value(value, qvariant_type):
-            if value is None:
-                return None
-            # Serializa containers para evitar erro de escrita em provider OGR.
-            if isinstance(value, (list, tuple, dict)):
-                try:
-                    value = json.dumps(value, ensure_ascii=False)
-                except Exception:
-                    value = str(value)
-
-            if qvariant_type == QVariant.String:
-                try:
-                    return str(value)
-                except Exception:
-                    return ""
-            if qvariant_type in (QVariant.Double,):
-                try:
-                    if value == "":
-                        return None
-                    return float(value)
-                except Exception:
-                    return None
-            if qvariant_type in (QVariant.Int, QVariant.LongLong):
-                try:
-                    if value == "":
-                        return None
-                    return int(float(value))
-                except Exception:
-                    return None
-            if qvariant_type == QVariant.Bool:
-                if isinstance(value, str):
-                    lowered = value.strip().lower()
-                    if lowered in ("1", "true", "sim", "yes"):
-                        return True
-                    if lowered in ("0", "false", "nao", "não", "no"):
-                        return False
-                try:
-                    return bool(value)
-                except Exception:
-                    return None
-            return value
-
-        vl.startEditing()
-        skipped_invalid_geometry = 0
-        for p in points:
-            x_val = p.get(x_key)
-            y_val = p.get(y_key)
-            if x_val is None or y_val is None:
-                skipped_invalid_geometry += 1
-                continue
-            try:
-                x_num = float(x_val)
-                y_num = float(y_val)
-            except Exception:
-                skipped_invalid_geometry += 1
-                continue
-            f = QgsFeature(vl.fields())
-            f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x_num, y_num)))
-            attrs = []
-            for input_name, qvariant_type, _ in normalized_specs:
-                value = p.get(input_name)
-                value = _coerce_attr_value(value, qvariant_type)
-                attrs.append(value)
-            if extra_fields:
-                for field_name in extra_fields.keys():
-                    attrs.append(p.get(field_name))
-            f.setAttributes(attrs)
-            vl.addFeature(f)
-
-        vl.commitChanges()
+        skipped_invalid_geometry = VectorLayerGeometry._add_point_features(
+            vl, points, normalized_specs, x_key, y_key, extra_fields
+        )
         vl.updateExtents()
         if skipped_invalid_geometry:
             logger.warning(
@@ -310,9 +435,35 @@ class VectorLayerGeometry:
         tool_key: str = ToolKey.UNTRACEABLE,
     ) -> Optional[QgsVectorLayer]:
         """Cria linha(s) em memoria a partir de pontos."""
+        records = VectorLayerGeometry.build_line_records(
+            points,
+            group_by_fields=group_by_fields,
+            attribute_fields=attribute_fields,
+            tool_key=tool_key,
+        )
+        if records is None:
+            return None
+        field_names, lines = records
+        return VectorLayerGeometry.create_line_layer_from_records(
+            field_names, lines, name=name
+        )
+
+    @staticmethod
+    def build_line_records(
+        points: list,
+        group_by_fields: list = None,
+        attribute_fields: list = None,
+        tool_key: str = ToolKey.UNTRACEABLE,
+    ) -> Optional[tuple]:
+        """
+        Vertices e atributos das linhas de `create_line_layer_from_points`,
+        sem objetos do QGIS: (nomes dos campos, [(vertices (x, y), atributos)]).
+        Pode rodar numa QgsTask; a camada e montada com
+        `create_line_layer_from_records` na thread principal.
+        """
         logger = VectorLayerGeometry._get_logger(tool_key)
         logger.debug(
-            f"create_line_layer_from_points(points={len(points) if points else 0}, name={name}, group_by_fields={group_by_fields}, attribute_fields={attribute_fields})"
+            f"build_line_records(points={len(points) if points else 0}, group_by_fields={group_by_fields}, attribute_fields={attribute_fields})"
         )
         if not points:
             return None
@@ -332,38 +483,40 @@ class VectorLayerGeometry:
             except Exception:
                 return None
 
+        x_candidates = [
+            "Lon",
+            "lon",
+            "Longitude",
+            "GPSLong",
+            "GpsLongitude",
+            MetadataFields.resolve_output_name("Lon"),
+            MetadataFields.resolve_output_name("GpsLongitude"),
+        ]
+        y_candidates = [
+            "Lat",
+            "lat",
+            "Latitude",
+            "GpsLat",
+            "GpsLatitude",
+            MetadataFields.resolve_output_name("Lat"),
+            MetadataFields.resolve_output_name("GpsLatitude"),
+        ]
+
         def _extract_xy(record):
-            x_candidates = [
-                "Lon",
-                "lon",
-                "Longitude",
-                "GPSLong",
-                "GpsLongitude",
-                MetadataFields.resolve_output_name("Lon"),
-                MetadataFields.resolve_output_name("GpsLongitude"),
-            ]
-            y_candidates = [
-                "Lat",
-                "lat",
-                "Latitude",
-                "GpsLat",
-                "GpsLatitude",
-                MetadataFields.resolve_output_name("Lat"),
-                MetadataFields.resolve_output_name("GpsLatitude"),
-            ]
             x_val = _to_float(_first_non_empty(record, x_candidates))
             y_val = _to_float(_first_non_empty(record, y_candidates))
             if x_val is None or y_val is None:
                 return None
             return (x_val, y_val)
 
+        photo_candidates = [
+            "Foto",
+            "foto",
+            "PhotoNum",
+            MetadataFields.resolve_output_name("Foto"),
+        ]
+
         def _photo_sort_key(record):
-            photo_candidates = [
-                "Foto",
-                "foto",
-                "PhotoNum",
-                MetadataFields.resolve_output_name("Foto"),
-            ]
             raw = _first_non_empty(record, photo_candidates)
             try:
                 return int(raw)
@@ -377,7 +530,6 @@ class VectorLayerGeometry:
                 key = tuple(str(point.get(field, "") or "").strip() for field in group_by_fields)
                 groups.setdefault(key, []).append(point)
 
-        fields = QgsFields()
         resolved_attr_pairs = []
         if attribute_fields:
             seen_output_names = set()
@@ -387,12 +539,8 @@ class VectorLayerGeometry:
                     continue
                 seen_output_names.add(output_name)
                 resolved_attr_pairs.append((input_name, output_name))
-                fields.append(QgsField(output_name, QVariant.String))
-
-        line = QgsVectorLayer("LineString?crs=EPSG:4326", name, "memory")
-        line.dataProvider().addAttributes(fields)
-        line.updateFields()
 
+        lines = []
         for _, group in groups.items():
             try:
                 group = sorted(group, key=_photo_sort_key)
@@ -403,16 +551,13 @@ class VectorLayerGeometry:
             vertices = []
             for point in group:
                 xy = _extract_xy(point)
-                if not xy:
-                    continue
-                vertices.append(QgsPointXY(xy[0], xy[1]))
+                if xy:
+                    vertices.append(xy)
 
             if len(vertices) < 2:
                 continue
 
-            feature = QgsFeature(line.fields())
-            feature.setGeometry(QgsGeometry.fromPolylineXY(vertices))
-
+            attributes = {}
             if attribute_fields:
                 source = group[0]
                 for input_name, output_name in resolved_attr_pairs:
@@ -420,8 +565,31 @@ class VectorLayerGeometry:
                     if value is None and output_name != input_name:
                         value = source.get(output_name)
                     if value is not None:
-                        feature.setAttribute(output_name, value)
+                        attributes[output_name] = value
+            lines.append((vertices, attributes))
+
+        return [output_name for _, output_name in resolved_attr_pairs], lines
+
+    @staticmethod
+    def create_line_layer_from_records(
+        field_names: list, lines: list, name: str = "Trilha"
+    ) -> Optional[QgsVectorLayer]:
+        """Camada de linhas em memoria a partir de `build_line_records`."""
+        fields = QgsFields()
+        for field_name in field_names or []:
+            fields.append(QgsField(field_name, QVariant.String))
+
+        line = QgsVectorLayer("LineString?crs=EPSG:4326", name, "memory")
+        line.dataProvider().addAttributes(fields)
+        line.updateFields()
 
+        for vertices, attributes in lines or []:
+            feature = QgsFeature(line.fields())
+            feature.setGeometry(
+                QgsGeometry.fromPolylineXY([QgsPointXY(x, y) for x, y in vertices])
+            )
+            for field_name, value in attributes.items():
+                feature.setAttribute(field_name, value)
             line.dataProvider().addFeature(feature)
 
         line.updateExtents()
@@ -553,12 +721,20 @@ class VectorLayerGeometry:
 
     @staticmethod
     def explode_lines_to_path_safe(
-        *, layer: QgsVectorLayer, output_path: str, external_tool_key=ToolKey.UNTRACEABLE
+        *,
+        layer: QgsVectorLayer,
+        output_path: str,
+        external_tool_key=ToolKey.UNTRACEABLE,
+        cancel_token=None,
     ) -> str:
         """
         Explode linhas (LineString / MultiLineString) manualmente.
         Thread-safe. Compatível com QgsTask.
+
+        Com `cancel_token` cancelado o writer é fechado e `OperationCancelled`
+        é levantada (o arquivo parcial fica em `output_path`).
         """
+        cancel_token = CancellationToken.ensure(cancel_token)
         logger = VectorLayerGeometry._get_logger(external_tool_key)
         logger.info(f"explode_lines_to_path_safe start -> output: {output_path}")
         if not layer or not layer.isValid():
@@ -595,28 +771,33 @@ class VectorLayerGeometry:
         feat_out = QgsFeature(layer.fields())
 
         processed = 0
-        for feat in layer.getFeatures():
-            geom = feat.geometry()
-            if not geom or geom.isEmpty():
-                continue
-
-            if geom.isMultipart():
-                parts = geom.asMultiPolyline()
-            else:
-                parts = [geom.asPolyline()]
-
-            for part in parts:
-                if len(part) < 2:
+        total = layer.featureCount()
+        try:
+            for index, feat in enumerate(layer.getFeatures()):
+                if index % cancel_token.check_every == 0:
+                    cancel_token.report(index, total)
+                geom = feat.geometry()
+                if not geom or geom.isEmpty():
                     continue
 
-                for i in range(len(part) - 1):
-                    line = QgsGeometry.fromPolylineXY([part[i], part[i + 1]])
-                    feat_out.setAttributes(feat.attributes())
-                    feat_out.setGeometry(line)
-                    writer.addFeature(feat_out)
-                    processed += 1
-
-        del writer
+                if geom.isMultipart():
+                    parts = geom.asMultiPolyline()
+                else:
+                    parts = [geom.asPolyline()]
+
+                for part in parts:
+                    if len(part) < 2:
+                        continue
+
+                    for i in range(len(part) - 1):
+                        cancel_token.tick()
+                        line = QgsGeometry.fromPolylineXY([part[i], part[i + 1]])
+                        feat_out.setAttributes(feat.attributes())
+                        feat_out.setGeometry(line)
+                        writer.addFeature(feat_out)
+                        processed += 1
+        finally:
+            del writer
         logger.info(
             f"explode_lines_to_path_safe completed, processed features (approx): {processed}"
         )